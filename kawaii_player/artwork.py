@@ -0,0 +1,255 @@
+"""
+Copyright (C) 2017 kanishka-linux kanishka.linux@gmail.com
+
+This file is part of kawaii-player.
+
+kawaii-player is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kawaii-player is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kawaii-player.  If not, see <http://www.gnu.org/licenses/>.
+
+Artwork of audio files. Embedded pictures (ID3 APIC, FLAC pictures,
+MP4 covr, Ogg/Opus METADATA_BLOCK_PICTURE, ASF WM/Picture) or cover
+image of the folder are extracted once and stored in thumbnails/artwork
+by hash of image data, so that all tracks of an album share single
+file. Result of every file, including absence of artwork, is kept in
+artwork/index.db along with mtime of the file, so that files without
+artwork aren't read again until they are modified.
+"""
+
+import os
+import base64
+import shutil
+import sqlite3
+import hashlib
+import logging
+from threading import Lock
+
+try:
+    import mutagen
+    from mutagen.flac import Picture
+except ImportError:
+    mutagen = None
+
+AUDIO_EXTENSIONS = (
+    '.mp3', '.flac', '.m4a', '.m4b', '.aac', '.oga', '.opus', '.wma'
+    )
+ARTWORK_EXTENSIONS = AUDIO_EXTENSIONS + ('.ogg', )
+FOLDER_ART = (
+    'cover.jpg', 'folder.jpg', 'front.jpg', 'album.jpg',
+    'cover.png', 'folder.png', 'front.png'
+    )
+
+
+class AudioArtwork():
+
+    def __init__(self, home, logger=None):
+        if logger is None:
+            logger = logging.getLogger(__name__)
+        self.logger = logger
+        self.art_dir = os.path.join(home, 'thumbnails', 'artwork')
+        self.index_db = os.path.join(self.art_dir, 'index.db')
+        self.lock = Lock()
+        self.entries = None
+        self.dirty = {}
+        self.folder_art = {}
+
+    def is_audio(self, path):
+        """Files whose thumbnail is their artwork only"""
+        return path.lower().endswith(AUDIO_EXTENSIONS)
+
+    def has_artwork_tags(self, path):
+        return path.lower().endswith(ARTWORK_EXTENSIONS)
+
+    def connect(self):
+        if not os.path.exists(self.art_dir):
+            os.makedirs(self.art_dir)
+        conn = sqlite3.connect(self.index_db)
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS Artwork(Path text primary key, '
+            'Mtime real, Hash text)'
+            )
+        return conn
+
+    def load(self):
+        """Called with lock held"""
+        if self.entries is not None:
+            return
+        self.entries = {}
+        conn = self.connect()
+        for path, mtime, art_hash in conn.execute('SELECT Path, Mtime, Hash FROM Artwork'):
+            self.entries.update({path: (mtime, art_hash)})
+        conn.close()
+
+    def art_path(self, art_hash):
+        return os.path.join(self.art_dir, art_hash + '.jpg')
+
+    def embedded_artwork(self, path):
+        """Data of first embedded picture or None"""
+        if mutagen is None:
+            return None
+        tag_file = mutagen.File(path)
+        if tag_file is None:
+            return None
+        pictures = getattr(tag_file, 'pictures', None)
+        if pictures:
+            return pictures[0].data
+        tags = tag_file.tags
+        if not tags:
+            return None
+        if hasattr(tags, 'getall'):
+            apic = tags.getall('APIC')
+            if apic:
+                front = [i for i in apic if i.type == 3]
+                return (front or apic)[0].data
+        keys = list(tags.keys())
+        if 'covr' in keys and tags['covr']:
+            return bytes(tags['covr'][0])
+        for key in keys:
+            if key.lower() == 'metadata_block_picture':
+                for value in tags[key]:
+                    try:
+                        return Picture(base64.b64decode(value)).data
+                    except Exception as err:
+                        self.logger.error('{0}::{1}'.format(err, path))
+            elif key == 'WM/Picture' and tags[key]:
+                return self.asf_picture(tags[key][0].value)
+        return None
+
+    def asf_picture(self, value):
+        """WM/Picture: type(1), size(4), mime and description (utf-16, nul ended), data"""
+        pos = 5
+        for i in range(2):
+            while value[pos:pos+2] != b'\x00\x00':
+                pos += 2
+            pos += 2
+        return value[pos:]
+
+    def folder_artwork(self, path):
+        """Hash of cover image of folder of path, None if there isn't any"""
+        folder = os.path.dirname(path)
+        if folder in self.folder_art:
+            return self.folder_art[folder]
+        art_hash = None
+        try:
+            names = {i.lower(): i for i in os.listdir(folder)}
+        except OSError:
+            names = {}
+        for name in FOLDER_ART:
+            if name in names:
+                with open(os.path.join(folder, names[name]), 'rb') as f:
+                    data = f.read()
+                if data:
+                    art_hash = self.store(data)
+                    break
+        self.folder_art.update({folder: art_hash})
+        return art_hash
+
+    def store(self, data):
+        art_hash = hashlib.sha1(data).hexdigest()
+        art_file = self.art_path(art_hash)
+        if not os.path.exists(art_file):
+            if not os.path.exists(self.art_dir):
+                os.makedirs(self.art_dir)
+            tmp_file = art_file + '.tmp'
+            with open(tmp_file, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_file, art_file)
+        return art_hash
+
+    def lookup(self, path):
+        """
+        (known, artwork path) from index only. known is False if path
+        wasn't scanned since its last modification.
+        """
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return (False, None)
+        with self.lock:
+            self.load()
+            entry = self.dirty.get(path) or self.entries.get(path)
+        if entry is None or entry[0] != mtime:
+            return (False, None)
+        if entry[1] is None:
+            return (True, None)
+        art_file = self.art_path(entry[1])
+        if os.path.isfile(art_file):
+            return (True, art_file)
+        return (False, None)
+
+    def artwork(self, path):
+        """Path of artwork of audio file path, extracted if required"""
+        known, art_file = self.lookup(path)
+        if known:
+            return art_file
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return None
+        art_hash = None
+        try:
+            data = self.embedded_artwork(path)
+            if data:
+                art_hash = self.store(data)
+        except Exception as err:
+            self.logger.error('{0}::{1}'.format(err, path))
+        if art_hash is None:
+            try:
+                art_hash = self.folder_artwork(path)
+            except Exception as err:
+                self.logger.error('{0}::{1}'.format(err, path))
+        with self.lock:
+            self.dirty.update({path: (mtime, art_hash)})
+            if len(self.dirty) >= 50:
+                self.flush_locked()
+        if art_hash:
+            return self.art_path(art_hash)
+        return None
+
+    def export(self, art_file, picn):
+        """
+        Copies art_file to thumbnail picn. It is a copy rather than a
+        link, since picn is resized in place later and art_file is
+        shared by all tracks of album.
+        """
+        tmp_file = '{0}.tmp'.format(picn)
+        shutil.copy(art_file, tmp_file)
+        os.replace(tmp_file, picn)
+
+    def scan(self, paths):
+        """Extracts artwork of all audio files in paths, returns number of new artworks"""
+        new_art = set()
+        for path in paths:
+            if self.has_artwork_tags(path) and not self.lookup(path)[0]:
+                art_file = self.artwork(path)
+                if art_file:
+                    new_art.add(art_file)
+        self.flush()
+        return len(new_art)
+
+    def flush(self):
+        with self.lock:
+            self.flush_locked()
+
+    def flush_locked(self):
+        if not self.dirty:
+            return
+        self.load()
+        conn = self.connect()
+        conn.executemany(
+            'INSERT OR REPLACE INTO Artwork VALUES(?, ?, ?)',
+            [(i, j[0], j[1]) for i, j in self.dirty.items()]
+            )
+        conn.commit()
+        conn.close()
+        self.entries.update(self.dirty)
+        self.dirty.clear()
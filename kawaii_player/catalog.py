@@ -0,0 +1,586 @@
+"""
+Copyright (C) 2017 kanishka-linux kanishka.linux@gmail.com
+
+This file is part of kawaii-player.
+
+kawaii-player is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kawaii-player is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kawaii-player.  If not, see <http://www.gnu.org/licenses/>.
+
+Unified media catalog.
+
+Video.db, Music.db, pickled playing history (VideoDB/historydata) and
+per series History/<site>/[<siteName>/]<name>/Ep.txt files are imported
+into single sqlite database (catalog.db) with normalized tables.
+kawaii-player repeats the import in background at every start; only
+stores modified since last import are read again and entries removed
+from them are removed from catalog. Video History view is answered
+from catalog once it has been imported.
+
+Usage: python catalog.py [home_directory]
+"""
+
+import os
+import sys
+import time
+import pickle
+import sqlite3
+import logging
+import datetime
+from db_maintenance import DatabaseMaintenance
+
+# Every entry of SCHEMA_MIGRATIONS upgrades schema by one version and
+# PRAGMA user_version keeps track of applied version. Never modify
+# existing entries, append new ones.
+SCHEMA_MIGRATIONS = [
+    [
+        '''CREATE TABLE directory(
+            id integer primary key, path text unique, title text,
+            category integer)''',
+        '''CREATE TABLE series(
+            id integer primary key, site text, site_name text, name text,
+            unique(site, site_name, name))''',
+        '''CREATE TABLE media_item(
+            id integer primary key, path text unique, kind text,
+            directory_id integer references directory(id) on delete set null,
+            series_id integer references series(id) on delete cascade,
+            title text, file_name text, episode_name text,
+            episode_number integer, artist text, album text,
+            category integer, watched integer default 0,
+            favourite integer default 0, play_count integer default 0,
+            added real, modified real, last_played real)''',
+        '''CREATE TABLE play_event(
+            id integer primary key,
+            media_id integer references media_item(id) on delete cascade,
+            played_at real, position real)''',
+        '''CREATE TABLE playback_state(
+            media_id integer primary key references media_item(id) on delete cascade,
+            seek_time real, sub_id text, audio_id text, remember_quit integer,
+            volume text, aspect text, updated real)''',
+        '''CREATE TABLE artwork(
+            id integer primary key, owner_type text, owner_id integer,
+            kind text, path text, unique(owner_type, owner_id, kind))''',
+        'CREATE INDEX media_item_directory ON media_item(directory_id)',
+        'CREATE INDEX media_item_series ON media_item(series_id)',
+        'CREATE INDEX media_item_kind_title ON media_item(kind, title)',
+        'CREATE INDEX media_item_artist ON media_item(artist)',
+        'CREATE INDEX media_item_album ON media_item(album)',
+        'CREATE INDEX media_item_play_count ON media_item(play_count)',
+        'CREATE INDEX media_item_last_played ON media_item(last_played)',
+        'CREATE INDEX media_item_added ON media_item(added)',
+        'CREATE INDEX play_event_media ON play_event(media_id, played_at)',
+        'CREATE INDEX play_event_played_at ON play_event(played_at)',
+        'CREATE INDEX playback_state_updated ON playback_state(updated)',
+    ],
+    [
+        'CREATE TABLE import_state(source text primary key, mtime real)',
+        'CREATE INDEX media_item_watched ON media_item(kind, watched, directory_id)',
+    ],
+]
+
+# (title, directory) of video directories with watched entries, most
+# recently played first; same rows as History view of Video.db
+VIDEO_HISTORY_QUERY = (
+    'SELECT directory.title, directory.path FROM media_item '
+    'JOIN directory ON directory.id = media_item.directory_id '
+    "Where media_item.kind='video' and media_item.watched=1 "
+    'group by directory.id '
+    'order by max(ifnull(media_item.last_played, 0)) desc, directory.title'
+    )
+
+SCHEMA_VERSION = len(SCHEMA_MIGRATIONS)
+
+
+class MediaCatalog():
+
+    def __init__(self, home=None, logger=None, catalog_db=None):
+        self.home = home
+        if logger is None:
+            logger = logging.getLogger(__name__)
+        self.logger = logger
+        if catalog_db is None:
+            catalog_db = os.path.join(home, 'catalog.db')
+        self.catalog_db = catalog_db
+
+    def exists(self):
+        return os.path.isfile(self.catalog_db)
+
+    def connect(self):
+        conn = sqlite3.connect(self.catalog_db)
+        conn.execute('PRAGMA foreign_keys = ON')
+        self.migrate(conn)
+        return conn
+
+    def schema_version(self, conn):
+        return conn.execute('PRAGMA user_version').fetchone()[0]
+
+    def migrate(self, conn):
+        version = self.schema_version(conn)
+        if version > SCHEMA_VERSION:
+            raise sqlite3.DatabaseError(
+                'catalog schema version {0} is newer than supported {1}'.format(
+                    version, SCHEMA_VERSION)
+                )
+        if 0 < version < SCHEMA_VERSION:
+            DatabaseMaintenance(self.logger).snapshot(self.catalog_db)
+        for new_version in range(version+1, SCHEMA_VERSION+1):
+            self.logger.info('migrating catalog schema to version {0}'.format(new_version))
+            with conn:
+                for qr in SCHEMA_MIGRATIONS[new_version-1]:
+                    conn.execute(qr)
+                conn.execute('PRAGMA user_version = {0}'.format(new_version))
+
+    def source_mtime(self, path):
+        """mtime of store, sqlite databases include their -wal file"""
+        mtimes = []
+        for i in [path, path + '-wal']:
+            try:
+                mtimes.append(os.stat(i).st_mtime)
+            except OSError:
+                pass
+        if mtimes:
+            return max(mtimes)
+        return None
+
+    def is_modified(self, cur, source, mtime):
+        cur.execute('SELECT mtime FROM import_state Where source=?', (source, ))
+        row = cur.fetchone()
+        return row is None or row[0] != mtime
+
+    def set_imported(self, cur, source, mtime):
+        qr = 'INSERT OR REPLACE INTO import_state VALUES(?, ?)'
+        cur.execute(qr, (source, mtime))
+
+    def is_imported(self, source):
+        """True if source has been imported into existing catalog"""
+        if not self.exists():
+            return False
+        conn = self.connect()
+        try:
+            row = conn.execute(
+                'SELECT mtime FROM import_state Where source=?', (source, )
+                ).fetchone()
+        finally:
+            conn.close()
+        return row is not None
+
+    def delete_missing(self, cur, paths, where, params=()):
+        """Deletes media items matching where, whose path isn't in paths"""
+        cur.execute('CREATE TEMP TABLE IF NOT EXISTS seen_path(path text primary key)')
+        cur.execute('DELETE FROM seen_path')
+        cur.executemany('INSERT OR IGNORE INTO seen_path VALUES(?)', [(i, ) for i in paths])
+        qr = ('DELETE FROM media_item Where {0} and '
+              'path not in (SELECT path FROM seen_path)').format(where)
+        cur.execute(qr, params)
+        if cur.rowcount > 0:
+            self.logger.info('{0} entries removed from catalog'.format(cur.rowcount))
+        return cur.rowcount
+
+    def delete_orphans(self, cur):
+        """Removes directories and artwork left without media items"""
+        cur.execute('DELETE FROM directory Where id not in '
+                    '(SELECT directory_id FROM media_item Where directory_id is not null)')
+        cur.execute("DELETE FROM artwork Where owner_type='directory' and "
+                    'owner_id not in (SELECT id FROM directory)')
+        cur.execute("DELETE FROM artwork Where owner_type='series' and "
+                    'owner_id not in (SELECT id FROM series)')
+
+    def get_directory_id(self, cur, path, title=None, category=None):
+        cur.execute('SELECT id FROM directory Where path=?', (path, ))
+        row = cur.fetchone()
+        if row:
+            if title is not None:
+                qr = 'Update directory Set title=?, category=? Where id=?'
+                cur.execute(qr, (title, category, row[0]))
+            return row[0]
+        qr = 'INSERT INTO directory(path, title, category) VALUES(?, ?, ?)'
+        cur.execute(qr, (path, title, category))
+        return cur.lastrowid
+
+    def get_series_id(self, cur, site, site_name, name):
+        qr = 'SELECT id FROM series Where site=? and site_name=? and name=?'
+        cur.execute(qr, (site, site_name, name))
+        row = cur.fetchone()
+        if row:
+            return row[0]
+        qr = 'INSERT INTO series(site, site_name, name) VALUES(?, ?, ?)'
+        cur.execute(qr, (site, site_name, name))
+        return cur.lastrowid
+
+    def upsert_media_item(self, cur, path, **fields):
+        cur.execute('SELECT id FROM media_item Where path=?', (path, ))
+        row = cur.fetchone()
+        if row:
+            media_id = row[0]
+            if fields:
+                columns = ', '.join('{0}=?'.format(i) for i in fields)
+                qr = 'Update media_item Set {0} Where id=?'.format(columns)
+                cur.execute(qr, list(fields.values()) + [media_id])
+        else:
+            columns = ['path'] + list(fields)
+            qr = 'INSERT INTO media_item({0}) VALUES({1})'.format(
+                ', '.join(columns), ', '.join('?' for i in columns))
+            cur.execute(qr, [path] + list(fields.values()))
+            media_id = cur.lastrowid
+        return media_id
+
+    def set_artwork(self, cur, owner_type, owner_id, directory):
+        for kind in ['poster', 'fanart', 'thumbnail']:
+            path = os.path.join(directory, kind+'.jpg')
+            if os.path.isfile(path):
+                qr = 'INSERT OR REPLACE INTO artwork(owner_type, owner_id, kind, path) VALUES(?, ?, ?, ?)'
+                cur.execute(qr, (owner_type, owner_id, kind, path))
+
+    def timestamp(self, value):
+        if value is None or value == '':
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            pass
+        try:
+            return datetime.datetime.fromisoformat(str(value)).timestamp()
+        except ValueError as err:
+            self.logger.error('{0}::{1}'.format(err, value))
+            return None
+
+    def import_video_db(self, conn, video_db):
+        if not os.path.isfile(video_db):
+            return 0
+        src = sqlite3.connect(video_db)
+        rows = src.execute(
+            'SELECT Title, Directory, FileName, EP_NAME, Path, EPN, Category FROM Video'
+            ).fetchall()
+        src.close()
+        cur = conn.cursor()
+        dir_ids = {}
+        for title, directory, file_name, ep_name, path, epn, category in rows:
+            if directory not in dir_ids:
+                dir_id = self.get_directory_id(cur, directory, title, category)
+                dir_ids.update({directory:dir_id})
+                self.set_artwork(cur, 'directory', dir_id, os.path.join(self.home, 'Local', title))
+            watched = 0
+            if file_name.startswith('#'):
+                file_name = file_name.replace('#', '', 1)
+                watched = 1
+            if ep_name.startswith('#'):
+                ep_name = ep_name.replace('#', '', 1)
+            self.upsert_media_item(
+                cur, path, kind='video', directory_id=dir_ids[directory],
+                title=title, file_name=file_name, episode_name=ep_name,
+                episode_number=epn, category=category, watched=watched
+                )
+        # entries added by playing history or record_play have no directory
+        self.delete_missing(
+            cur, [i[4] for i in rows], "kind='video' and directory_id is not null"
+            )
+        self.logger.info('imported {0} video entries'.format(len(rows)))
+        return len(rows)
+
+    def import_music_db(self, conn, music_db):
+        if not os.path.isfile(music_db):
+            return 0
+        src = sqlite3.connect(music_db)
+        qr = ('SELECT Title, Artist, Album, Directory, Path, Favourite, '
+              'Playcount, Modified, LastPlayed FROM Music')
+        rows = src.execute(qr).fetchall()
+        src.close()
+        cur = conn.cursor()
+        dir_ids = {}
+        for title, artist, album, directory, path, fav, count, modified, last_played in rows:
+            if directory not in dir_ids:
+                dir_ids.update({directory:self.get_directory_id(cur, directory)})
+            last_played = self.timestamp(last_played)
+            count = count or 0
+            self.upsert_media_item(
+                cur, path, kind='music', directory_id=dir_ids[directory],
+                title=title, file_name=os.path.basename(path), artist=artist,
+                album=album, favourite=int(fav == 'yes'), play_count=count,
+                modified=self.timestamp(modified), last_played=(last_played if count else None)
+                )
+        self.delete_missing(cur, [i[4] for i in rows], "kind='music'")
+        artist_dir = os.path.join(self.home, 'Music', 'Artist')
+        if os.path.isdir(artist_dir):
+            cur.execute("SELECT distinct artist FROM media_item Where kind='music'")
+            for artist, in cur.fetchall():
+                if artist and os.path.isdir(os.path.join(artist_dir, artist)):
+                    series_id = self.get_series_id(cur, 'Music', 'Artist', artist)
+                    self.set_artwork(cur, 'series', series_id, os.path.join(artist_dir, artist))
+        self.logger.info('imported {0} music entries'.format(len(rows)))
+        return len(rows)
+
+    def import_playing_history(self, conn, history_file):
+        if not os.path.isfile(history_file):
+            return 0
+        with open(history_file, 'rb') as pls_file_read:
+            try:
+                history_dict = pickle.load(pls_file_read)
+            except Exception as err:
+                self.logger.error('{0}::{1}'.format(err, history_file))
+                return 0
+        cur = conn.cursor()
+        count = 0
+        for key, value in history_dict.items():
+            if key.startswith('#') or not isinstance(value, list) or len(value) != 7:
+                continue
+            seek_time, acc_time, sub_id, audio_id, rem_quit, vol, asp = value
+            cur.execute('SELECT id FROM media_item Where path=?', (key, ))
+            row = cur.fetchone()
+            if row:
+                media_id = row[0]
+            else:
+                if os.path.exists(key):
+                    kind = 'video'
+                else:
+                    kind = 'stream'
+                media_id = self.upsert_media_item(
+                    cur, key, kind=kind, title=os.path.basename(key)
+                    )
+            cur.execute('SELECT updated FROM playback_state Where media_id=?', (media_id, ))
+            row = cur.fetchone()
+            last_update = row[0] if row and row[0] is not None else 0
+            qr = 'INSERT OR REPLACE INTO playback_state VALUES(?, ?, ?, ?, ?, ?, ?, ?)'
+            cur.execute(
+                qr, (media_id, seek_time, str(sub_id), str(audio_id),
+                     rem_quit, str(vol), str(asp), acc_time)
+                )
+            # acc_time is time at which playback stopped; play started
+            # after previous entry was saved is already recorded by
+            # record_play, or by previous import if acc_time is unchanged
+            qr = ('SELECT id FROM play_event Where media_id=? and '
+                  'played_at > ? and played_at <= ?')
+            if acc_time != last_update and not cur.execute(
+                    qr, (media_id, last_update, acc_time)).fetchone():
+                cur.execute(
+                    'INSERT INTO play_event(media_id, played_at, position) VALUES(?, ?, ?)',
+                    (media_id, acc_time, seek_time)
+                    )
+            qr = ('Update media_item Set last_played=max(ifnull(last_played, 0), ?), '
+                  'play_count=max(play_count, 1) Where id=?')
+            cur.execute(qr, (acc_time, media_id))
+            count += 1
+        self.logger.info('imported {0} history entries'.format(count))
+        return count
+
+    def import_series_history(self, conn, history_dir):
+        if not os.path.isdir(history_dir):
+            return 0
+        cur = conn.cursor()
+        count = 0
+        seen = []
+        seen_files = set()
+        for r, d, f in os.walk(history_dir):
+            if 'Ep.txt' not in f:
+                continue
+            parts = os.path.relpath(r, history_dir).split(os.sep)
+            if len(parts) < 2:
+                continue
+            site = parts[0]
+            name = parts[-1]
+            site_name = os.sep.join(parts[1:-1])
+            series_id = self.get_series_id(cur, site, site_name, name)
+            seen.append(series_id)
+            ep_file = os.path.join(r, 'Ep.txt')
+            seen_files.add(ep_file)
+            mtime = self.source_mtime(ep_file)
+            if not self.is_modified(cur, ep_file, mtime):
+                continue
+            self.set_artwork(cur, 'series', series_id, r)
+            try:
+                lines = open(ep_file, 'r', encoding='utf-8').readlines()
+            except Exception as err:
+                self.logger.error('{0}::{1}'.format(err, r))
+                continue
+            paths = []
+            epn = 0
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                line_list = line.split('\t')
+                ep_name = line_list[0]
+                if len(line_list) > 1:
+                    path = line_list[1]
+                else:
+                    path = ep_name
+                watched = 0
+                if ep_name.startswith('#'):
+                    ep_name = ep_name.replace('#', '', 1)
+                    watched = 1
+                path = path.replace('"', '')
+                if not path:
+                    continue
+                self.upsert_media_item(
+                    cur, path, kind='episode', series_id=series_id, title=name,
+                    episode_name=ep_name, episode_number=epn, watched=watched
+                    )
+                paths.append(path)
+                epn += 1
+                count += 1
+            self.delete_missing(cur, paths, "kind='episode' and series_id=?", (series_id, ))
+            self.set_imported(cur, ep_file, mtime)
+        # series whose Ep.txt is gone; artist series belong to Music.db
+        cur.execute('CREATE TEMP TABLE IF NOT EXISTS seen_series(id integer primary key)')
+        cur.execute('DELETE FROM seen_series')
+        cur.executemany('INSERT OR IGNORE INTO seen_series VALUES(?)', [(i, ) for i in seen])
+        cur.execute("DELETE FROM series Where not (site='Music' and site_name='Artist') "
+                    'and id not in (SELECT id FROM seen_series)')
+        prefix = os.path.join(history_dir, '')
+        cur.execute('SELECT source FROM import_state Where source like ?', (prefix + '%', ))
+        gone = [i for i, in cur.fetchall() if i.startswith(prefix) and i not in seen_files]
+        cur.executemany('DELETE FROM import_state Where source=?', [(i, ) for i in gone])
+        self.logger.info('imported {0} series episodes'.format(count))
+        return count
+
+    def import_legacy_stores(self, force=False):
+        """
+        Imports stores modified since last import, all of them if force
+        is True. Returns number of imported entries of every store.
+        Import is idempotent and can be repeated to refresh catalog.
+        """
+        stores = [
+            ('video', os.path.join(self.home, 'VideoDB', 'Video.db'), self.import_video_db),
+            ('music', os.path.join(self.home, 'Music', 'Music.db'), self.import_music_db),
+            ('history', os.path.join(self.home, 'VideoDB', 'historydata'),
+             self.import_playing_history),
+            ]
+        conn = self.connect()
+        result = {}
+        try:
+            with conn:
+                cur = conn.cursor()
+                if force:
+                    cur.execute('DELETE FROM import_state')
+                for key, path, import_store in stores:
+                    mtime = self.source_mtime(path)
+                    result[key] = 0
+                    if mtime is not None and self.is_modified(cur, path, mtime):
+                        result[key] = import_store(conn, path)
+                        self.set_imported(cur, path, mtime)
+                    if key == 'music':
+                        # episodes are imported before playing history,
+                        # which refers to them
+                        result['series'] = self.import_series_history(
+                            conn, os.path.join(self.home, 'History'))
+                self.delete_orphans(cur)
+        finally:
+            conn.close()
+        return result
+
+    def set_watched(self, path, watched, title=None, directory=None, category=None):
+        """
+        Mirrors watched mark of Video.db entry. Entry missing from catalog
+        is added if its directory is given.
+        """
+        conn = self.connect()
+        try:
+            with conn:
+                cur = conn.cursor()
+                cur.execute('SELECT id FROM media_item Where path=?', (path, ))
+                row = cur.fetchone()
+                if row:
+                    cur.execute(
+                        'Update media_item Set watched=? Where id=?', (int(watched), row[0])
+                        )
+                elif directory is not None:
+                    dir_id = self.get_directory_id(cur, directory, title, category)
+                    self.upsert_media_item(
+                        cur, path, kind='video', directory_id=dir_id, title=title,
+                        file_name=os.path.basename(path), category=category,
+                        watched=int(watched)
+                        )
+        finally:
+            conn.close()
+
+    def record_play(self, path, position=None, kind='video'):
+        conn = self.connect()
+        try:
+            with conn:
+                cur = conn.cursor()
+                played_at = time.time()
+                cur.execute('SELECT id FROM media_item Where path=?', (path, ))
+                row = cur.fetchone()
+                if row:
+                    media_id = row[0]
+                else:
+                    media_id = self.upsert_media_item(
+                        cur, path, kind=kind, title=os.path.basename(path)
+                        )
+                cur.execute(
+                    'INSERT INTO play_event(media_id, played_at, position) VALUES(?, ?, ?)',
+                    (media_id, played_at, position)
+                    )
+                qr = ('Update media_item Set last_played=?, '
+                      'play_count=play_count+1 Where id=?')
+                cur.execute(qr, (played_at, media_id))
+        finally:
+            conn.close()
+
+    def video_history(self, limit=-1):
+        conn = self.connect()
+        rows = conn.execute(VIDEO_HISTORY_QUERY + ' limit ?', (limit, )).fetchall()
+        conn.close()
+        return rows
+
+    def continue_watching(self, limit=50):
+        """Partially watched items, most recently played first"""
+        qr = ('SELECT media_item.title, media_item.path, playback_state.seek_time '
+              'FROM playback_state JOIN media_item ON media_item.id = playback_state.media_id '
+              'Where playback_state.seek_time > 0 '
+              'order by playback_state.updated desc limit ?')
+        conn = self.connect()
+        rows = conn.execute(qr, (limit, )).fetchall()
+        conn.close()
+        return rows
+
+    def most_played(self, kind=None, limit=50):
+        qr = 'SELECT title, path, play_count FROM media_item Where play_count > 0 '
+        params = []
+        if kind:
+            qr += 'and kind=? '
+            params.append(kind)
+        qr += 'order by play_count desc limit ?'
+        params.append(limit)
+        conn = self.connect()
+        rows = conn.execute(qr, params).fetchall()
+        conn.close()
+        return rows
+
+    def recently_played(self, kind=None, limit=50):
+        qr = 'SELECT title, path, last_played FROM media_item Where last_played > 0 '
+        params = []
+        if kind:
+            qr += 'and kind=? '
+            params.append(kind)
+        qr += 'order by last_played desc limit ?'
+        params.append(limit)
+        conn = self.connect()
+        rows = conn.execute(qr, params).fetchall()
+        conn.close()
+        return rows
+
+
+def main():
+    if len(sys.argv) > 1:
+        home = sys.argv[1]
+    else:
+        home = os.path.join(os.path.expanduser('~'), '.config', 'kawaii-player')
+    logging.basicConfig(level=logging.INFO)
+    catalog = MediaCatalog(home)
+    result = catalog.import_legacy_stores()
+    for key, value in result.items():
+        print('{0}: {1}'.format(key, value))
+    print('catalog: {0}'.format(catalog.catalog_db))
+
+
+if __name__ == '__main__':
+    main()
@@ -19,10 +19,13 @@ along with kawaii-player.  If not, see <http://www.gnu.org/licenses/>.
 
 
 import os
+import time
 import sqlite3
 import datetime
 from PyQt5 import QtWidgets
 from player_functions import open_files, send_notification
+from catalog import MediaCatalog, VIDEO_HISTORY_QUERY
+from db_maintenance import DatabaseMaintenance
 
 try:
     try:
@@ -38,15 +41,138 @@ except Exception as err:
 
 print(SONG_TAGS, '--tagging-module--')
 
+# user_version of Video.db once VideoTime has been filled for whole library
+VIDEO_TIME_VERSION = 1
+
+def paged_query(qr):
+    return 'SELECT * FROM ({0}) limit ? offset ?'.format(qr)
+
+
+class PagedCursor():
+
+    """
+    Wraps sqlite cursor and restricts every select query to
+    a single page using limit/offset. Last query and its
+    parameters are kept for PagedResult.
+    """
+
+    def __init__(self, cur, limit, offset):
+        self.cur = cur
+        self.limit = limit
+        self.offset = offset
+        self.query = None
+        self.params = ()
+
+    def execute(self, qr, params=()):
+        self.query = qr
+        self.params = tuple(params)
+        return self.cur.execute(paged_query(qr), self.params + (self.limit, self.offset))
+
+    def __getattr__(self, name):
+        return getattr(self.cur, name)
+
+
+class PagedResult():
+
+    """
+    Returns rows of a query page by page, so that large categories
+    are not loaded into memory at once. Every page is separate
+    limit/offset query on short lived connection; no cursor is kept
+    open between pages, which would block writers of the database.
+    """
+
+    def __init__(self, db_path, qr, params, page_size, rows=None):
+        self.db_path = db_path
+        self.query = qr
+        self.params = tuple(params)
+        self.page_size = page_size
+        self.offset = 0
+        self.rows = rows
+        self.finished = qr is None
+
+    def fetch_page(self):
+        if self.finished:
+            return []
+        if self.rows is not None:
+            rows = self.rows
+            self.rows = None
+        else:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                rows = conn.execute(
+                    paged_query(self.query),
+                    self.params + (self.page_size, self.offset)
+                    ).fetchall()
+            finally:
+                conn.close()
+        self.offset += len(rows)
+        if len(rows) < self.page_size:
+            self.close()
+        return rows
+
+    def close(self):
+        self.finished = True
+        self.rows = None
+
+
 class MediaDatabase():
 
     def __init__(self, home=None, logger=None):
         self.home = home
         self.logger = logger
         self.ui = None
+        self.maintenance = DatabaseMaintenance(logger)
+        if home:
+            self.catalog = MediaCatalog(home, logger)
+        else:
+            self.catalog = None
         
     def set_ui(self, ui):
         self.ui = ui
+
+    def record_catalog_play(self, path, kind):
+        """Play events are mirrored in catalog.db once it has been created"""
+        if self.catalog and self.catalog.exists():
+            try:
+                self.catalog.record_play(path, kind=kind)
+            except Exception as err:
+                self.logger.error('{0}::{1}'.format(err, '--catalog--'))
+
+    def record_catalog_watched(self, path, watched, row=None):
+        """row: (Title, Directory, Category) of Video.db entry"""
+        if self.catalog and self.catalog.exists():
+            title, directory, category = row or (None, None, None)
+            try:
+                self.catalog.set_watched(path, watched, title, directory, category)
+            except Exception as err:
+                self.logger.error('{0}::{1}'.format(err, '--catalog--'))
+
+    def catalog_ready(self, video_db):
+        """True once video_db, Video.db of home, has been imported into catalog"""
+        if not self.catalog:
+            return False
+        source = os.path.join(self.catalog.home, 'VideoDB', 'Video.db')
+        if os.path.abspath(video_db) != os.path.abspath(source):
+            return False
+        try:
+            return self.catalog.is_imported(source)
+        except Exception as err:
+            self.logger.error('{0}::{1}'.format(err, '--catalog--'))
+            return False
+
+    def get_catalog_rows(self, qr, params=(), page_size=None, offset=None):
+        """Rows of catalog query, paged same way as get_video_db"""
+        catalog_db = self.catalog.catalog_db
+        conn = sqlite3.connect(catalog_db)
+        cur = conn.cursor()
+        if page_size:
+            cur = PagedCursor(cur, page_size, offset or 0)
+        cur.execute(qr, params)
+        rows = cur.fetchall()
+        conn.close()
+        if page_size and offset is None:
+            rows = PagedResult(catalog_db, qr, params, page_size, rows)
+        return rows
         
     def import_video_dir(self):
         m = []
@@ -86,9 +212,18 @@ class MediaDatabase():
                             j = j+1
         return vid
     
-    def get_video_db(self, music_db, queryType, queryVal):
+    def get_video_db(self, music_db, queryType, queryVal, page_size=None, offset=None):
+        """
+        page_size and offset: returns single page of rows.
+        only page_size: returns PagedResult, rows are fetched with fetch_page().
+        History is read from catalog.db once Video.db has been imported.
+        """
+        if queryType.lower() == 'history' and self.catalog_ready(music_db):
+            return self.get_catalog_rows(VIDEO_HISTORY_QUERY, (), page_size, offset)
         conn = sqlite3.connect(music_db)
         cur = conn.cursor()    
+        if page_size:
+            cur = PagedCursor(cur, page_size, offset or 0)
         q = queryType
         qVal = str(queryVal)
         print(music_db)
@@ -105,7 +240,13 @@ class MediaDatabase():
             cur.execute(qr, (qVal, ))
         elif q.lower() == "history":
             print(q)
-            qr = 'SELECT distinct Title, Directory FROM Video Where FileName like ? order by Title'
+            if self.has_video_time(conn.cursor()):
+                qr = ('SELECT Video.Title, Video.Directory FROM Video LEFT JOIN VideoTime '
+                      'ON Video.Directory = VideoTime.Directory Where Video.FileName like ? '
+                      'group by Video.Title, Video.Directory '
+                      'order by max(VideoTime.LastPlayed) desc, Video.Title')
+            else:
+                qr = 'SELECT distinct Title, Directory FROM Video Where FileName like ? order by Title'
             qv = '#'+'%'
             self.logger.info('qv={0};qr={1}'.format(qv, qr))
             cur.execute(qr, (qv, ))
@@ -115,7 +256,14 @@ class MediaDatabase():
             self.logger.info('qr={0};qVal={1}'.format(qr, qVal))
             cur.execute(qr, (qVal, qVal, ))
         elif q.lower() == 'recent':
-            cur.execute('SELECT distinct Title, Directory FROM Video order by Title')
+            if self.has_video_time(conn.cursor()):
+                qr = ('SELECT Video.Title, Video.Directory FROM Video LEFT JOIN VideoTime '
+                      'ON Video.Directory = VideoTime.Directory '
+                      'group by Video.Title, Video.Directory '
+                      'order by max(VideoTime.Added) desc, Video.Title')
+            else:
+                qr = 'SELECT distinct Title, Directory FROM Video order by Title'
+            cur.execute(qr)
         else:
             cat_type = self.ui.category_dict.get(q.lower())
             if not cat_type:
@@ -130,48 +278,86 @@ class MediaDatabase():
                     rows = [('none','none')]
         if not error_occured:
             rows = cur.fetchall()
-            if q.lower() in ['history', 'recent']:
-                rows_access = []
-                rows_not_access = []
-                new_arr = []
-                for i in rows:
-                    if os.path.exists(i[1]):
-                        m = os.listdir(i[1])
-                        for ii in m:
-                            if '.' in ii:
-                                _, ext = ii.rsplit('.', 1)
-                                file_path = os.path.join(i[1], ii)
-                                if ext in self.ui.video_type_arr:
-                                    if q.lower() == 'history':
-                                        access_time = self.ui.history_dict_obj.get(file_path)
-                                        if access_time:
-                                            tp = [file_path, access_time[1]]
-                                        else:
-                                            tp = [file_path, os.path.getatime(file_path)]
-                                    else:
-                                        tp = [file_path, os.path.getctime(file_path)]
-                                    new_arr.append(tp)
-                        if new_arr:
-                            new_arr = sorted(new_arr, key=lambda x: x[1], reverse=True)
-                            ntp = [i, new_arr[0][1]]
-                            self.logger.debug(ntp)
-                            #self.logger.debug(new_arr)
-                        else:
-                            ntp = [i, 0]
-                            self.logger.error(ntp)
-                        rows_access.append(ntp)
-                    else:
-                        rows_not_access.append(i)
-                    new_arr[:] = []
-                if rows_access:
-                    rows_access = sorted(rows_access, key=lambda x: x[1], reverse=True)
-                    rows_access = [i[0] for i in rows_access]
-                rows[:] = []
-                rows = rows_access + rows_not_access
+            if page_size and offset is None:
+                rows = PagedResult(music_db, cur.query, cur.params, page_size, rows)
         conn.commit()
         conn.close()
         return rows
 
+    def create_video_time_table(self, cur):
+        """
+        VideoTime keeps per directory timestamps used by the
+        'Recent' (Added) and 'History' (LastPlayed) views, so that
+        these views can be answered without touching the filesystem.
+        """
+        cur.execute('CREATE TABLE IF NOT EXISTS VideoTime(Directory text primary key, Added real, LastPlayed real)')
+        cur.execute('CREATE INDEX IF NOT EXISTS VideoTime_Added ON VideoTime(Added)')
+        cur.execute('CREATE INDEX IF NOT EXISTS VideoTime_LastPlayed ON VideoTime(LastPlayed)')
+        cur.execute('CREATE INDEX IF NOT EXISTS Video_Directory ON Video(Directory)')
+
+    def has_video_time(self, cur):
+        """VideoTime exists; it is created only by the database scanners"""
+        qr = "SELECT name FROM sqlite_master Where type='table' and name='VideoTime'"
+        cur.execute(qr)
+        return bool(cur.fetchall())
+
+    def update_video_time(self, cur, directory, added=None, last_played=None):
+        cur.execute('INSERT OR IGNORE INTO VideoTime VALUES(?, ?, ?)', (directory, 0, 0))
+        if added:
+            qr = 'Update VideoTime Set Added=max(Added, ?) Where Directory=?'
+            cur.execute(qr, (added, directory))
+        if last_played:
+            qr = 'Update VideoTime Set LastPlayed=max(LastPlayed, ?) Where Directory=?'
+            cur.execute(qr, (last_played, directory))
+
+    def refresh_video_time(self, video_db, paths=None):
+        """
+        Stat files and fill VideoTime. Only called from the database
+        scanners; if paths is None every entry of Video table is refreshed.
+        """
+        conn = sqlite3.connect(video_db)
+        cur = conn.cursor()
+        self.create_video_time_table(cur)
+        if paths is None:
+            cur.execute('SELECT Path, Directory, FileName FROM Video')
+            rows = cur.fetchall()
+        else:
+            rows = []
+            for path in paths:
+                cur.execute('SELECT Path, Directory, FileName FROM Video Where Path=?', (path, ))
+                rows += cur.fetchall()
+        history_dict = {}
+        if self.ui and hasattr(self.ui, 'history_dict_obj'):
+            history_dict = self.ui.history_dict_obj
+        for path, directory, file_name in rows:
+            try:
+                added = os.path.getctime(path)
+            except Exception as err:
+                self.logger.error('{0}::{1}'.format(err, path))
+                continue
+            last_played = None
+            access_time = history_dict.get(path)
+            if access_time:
+                last_played = access_time[1]
+            elif file_name.startswith('#'):
+                last_played = os.path.getatime(path)
+            self.update_video_time(cur, directory, added, last_played)
+        if paths is None:
+            cur.execute('PRAGMA user_version = {0}'.format(VIDEO_TIME_VERSION))
+        self.logger.debug('refreshed video time for {0} entries'.format(len(rows)))
+        conn.commit()
+        conn.close()
+
+    def video_time_filled(self, video_db):
+        """
+        True once VideoTime has been filled for every entry of Video
+        table; an empty VideoTime table doesn't count.
+        """
+        conn = sqlite3.connect(video_db)
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        conn.close()
+        return version >= VIDEO_TIME_VERSION
+
     def create_update_video_db(self, video_db, video_file, video_file_bak,
                                update_progress_show=None):
         if (update_progress_show is None or update_progress_show) and self.ui:
@@ -276,6 +462,7 @@ class MediaDatabase():
                         self.logger.error('Escaping: {0} <---> {1}'.format(e, w))
         conn.commit()
         conn.close()
+        self.refresh_video_time(video_db)
         if (update_progress_show is None or update_progress_show) and self.ui:
             self.ui.text.setText('Update Complete!')
             print('--191---update-complete--')
@@ -292,6 +479,7 @@ class MediaDatabase():
         if version <= (2, 0, 0, 0) and version > (0, 0, 0, 0):
             msg = 'Video Database Updating. Please Wait!'
             send_notification(msg)
+            self.maintenance.snapshot(os.path.join(self.home, 'VideoDB', 'Video.db'))
             conn = sqlite3.connect(os.path.join(self.home, 'VideoDB', 'Video.db'))
             cur = conn.cursor()
             try:
@@ -325,7 +513,7 @@ class MediaDatabase():
             conn.commit()
             conn.close()
             
-    def update_video_count(self, qType, qVal, rownum=None):
+    def update_video_count(self, qType, qVal, rownum=None, played=True):
         qVal = qVal.replace('"', '')
         qVal = str(qVal)
         conn = sqlite3.connect(os.path.join(self.home, 'VideoDB', 'Video.db'))
@@ -335,7 +523,8 @@ class MediaDatabase():
             #qVal = '"'+qVal+'"'
             #cur.execute("Update Music Set LastPlayed=? Where Path=?", (datetime.datetime.now(), qVal))
             self.logger.info("----------"+qVal)
-            cur.execute('Select FileName, EP_NAME from Video Where Path=?', (qVal, ))
+            qr = 'Select FileName, EP_NAME, Title, Directory, Category from Video Where Path=?'
+            cur.execute(qr, (qVal, ))
             r = cur.fetchall()
             self.logger.info(r)
             for i in r:
@@ -349,6 +538,11 @@ class MediaDatabase():
             #cur.execute("Update Music Set Playcount=? Where Path=?", (incr, qVal))
             qr = 'Update Video Set FileName=?, EP_NAME=? Where Path=?'
             cur.execute(qr, (fname, epName, qVal))
+            if self.has_video_time(cur):
+                self.update_video_time(cur, os.path.dirname(qVal), last_played=time.time())
+            if played:
+                self.record_catalog_play(qVal, 'video')
+            self.record_catalog_watched(qVal, True, r[0][2:] if r else None)
         elif qType == "unmark":    
             self.logger.info("----------"+qVal)
             cur.execute('Select FileName, EP_NAME from Video Where Path=?', (qVal, ))
@@ -365,6 +559,7 @@ class MediaDatabase():
                 epName = epName.replace('#', '', 1)
             qr = 'Update Video Set FileName=?, EP_NAME=? Where Path=?'
             cur.execute(qr, (fname, epName, qVal))
+            self.record_catalog_watched(qVal, False)
 
         self.logger.info("Number of rows updated: %d" % cur.rowcount)
         conn.commit()
@@ -374,13 +569,15 @@ class MediaDatabase():
             self.adjust_video_dict_mark(epName, qVal, rownum)
         
     def update_on_start_video_db(self, video_db, video_file, video_file_bak,
-                                 video_opt, update_progress_show=None):
+                                 video_opt, update_progress_show=None, retry=True):
         if (update_progress_show is None or update_progress_show) and self.ui:
             self.ui.text.setText('Wait..Updating Video Database')
             QtWidgets.QApplication.processEvents()
         m_files = self.import_video(video_file, video_file_bak)
+        inserted = []
         try:
             self.logger.debug('--fetching--')
+            time_table_filled = self.video_time_filled(video_db)
             conn = sqlite3.connect(video_db)
             cur = conn.cursor()
             cur.execute('SELECT Path FROM Video')
@@ -390,6 +587,17 @@ class MediaDatabase():
             self.logger.debug('--fetch complete--')
         except Exception as e:
             self.logger.error('{0}::{1}'.format(e, '--database-corrupted--21010--'))
+            if retry and self.maintenance.is_busy(e):
+                time.sleep(1)
+                return self.update_on_start_video_db(
+                    video_db, video_file, video_file_bak, video_opt,
+                    update_progress_show=update_progress_show, retry=False
+                    )
+            if retry and self.maintenance.recover(video_db, e):
+                return self.update_on_start_video_db(
+                    video_db, video_file, video_file_bak, video_opt,
+                    update_progress_show=update_progress_show, retry=False
+                    )
             return 0
         m_files_old = []
         for i in rows:
@@ -448,6 +656,7 @@ class MediaDatabase():
                 if video_opt == "UpdateAll":
                     if os.path.exists(i) and not rows:
                         cur.execute('INSERT INTO Video VALUES(?, ?, ?, ?, ?, ?, ?)', w)
+                        inserted.append(i)
                         self.logger.info("Not Inserted, Hence Inserting File = "+i)
                         self.logger.info(w)
                         epn_cnt += 1
@@ -462,6 +671,7 @@ class MediaDatabase():
                     if os.path.exists(i) and not rows:
                         self.logger.info(i)
                         cur.execute('INSERT INTO Video VALUES(?, ?, ?, ?, ?, ?, ?)', w)
+                        inserted.append(i)
                         self.logger.info("Not Inserted, Hence Inserting File = "+i)
                         self.logger.info(w)
                         epn_cnt += 1
@@ -469,11 +679,79 @@ class MediaDatabase():
 
         conn.commit()
         conn.close()
+        if not time_table_filled:
+            self.refresh_video_time(video_db)
+        elif inserted:
+            self.refresh_video_time(video_db, inserted)
         if (update_progress_show is None or update_progress_show) and self.ui:
             QtWidgets.QApplication.processEvents()
             self.ui.text.setText('Updating Complete')
             QtWidgets.QApplication.processEvents()
 
+    def update_video_directory(self, video_db, directory):
+        """
+        Incremental update of Video table for a single directory,
+        used by library watcher instead of full rescan.
+        Returns number of changed entries.
+        """
+        if not os.path.exists(video_db):
+            return 0
+        m_files = []
+        if os.path.isdir(directory):
+            try:
+                for k in os.listdir(directory):
+                    file_ext = k.rsplit('.', 1)[-1]
+                    path = os.path.join(directory, k)
+                    if file_ext.lower() in self.ui.video_type_arr and os.path.isfile(path):
+                        m_files.append(path)
+            except (PermissionError, OSError) as err:
+                self.logger.error('Error accessing directory {}: {}'.format(directory, err))
+                return 0
+        conn = sqlite3.connect(video_db)
+        cur = conn.cursor()
+        cur.execute('SELECT Path FROM Video Where Directory=?', (directory,))
+        m_files_old = [i[0] for i in cur.fetchall()]
+        new_files = sorted(set(m_files) - set(m_files_old))
+        removed_files = set(m_files_old) - set(m_files)
+        for i in removed_files:
+            cur.execute('Delete FROM Video Where Path=?', (i,))
+            self.logger.info('Deleting File From Database : '+i)
+        epn_cnt = len(m_files_old) - len(removed_files)
+        metadata_file = os.path.join(directory, "metadata.txt")
+        ti = None
+        if os.path.exists(metadata_file):
+            content = open(metadata_file, "r").read()
+            content_lines = content.split("\n")
+            metadata = [(i.split(":")[0].lower(), i.split(":", 1)[-1].strip()) for i in content_lines if ":" in i]
+            ti = dict(metadata).get("title")
+        if not ti:
+            ti = os.path.basename(directory)
+        di = directory.lower()
+        if 'movie' in di:
+            category = self.ui.category_dict['movies']
+        elif 'anime' in di:
+            category = self.ui.category_dict['anime']
+        elif 'cartoon' in di:
+            category = self.ui.category_dict['cartoons']
+        elif 'tv shows' in di or 'tv-shows' in di:
+            category = self.ui.category_dict['tv shows']
+        else:
+            category = self.ui.category_dict['others']
+        for i in new_files:
+            na = os.path.basename(i)
+            w = [ti, directory, na, na, i, epn_cnt, category]
+            try:
+                cur.execute('INSERT INTO Video VALUES(?, ?, ?, ?, ?, ?, ?)', w)
+                self.logger.info("Not Inserted, Hence Inserting File = "+i)
+                epn_cnt += 1
+            except Exception as err:
+                self.logger.error('Escaping: {0} <---> {1}'.format(err, w))
+        conn.commit()
+        conn.close()
+        if new_files:
+            self.refresh_video_time(video_db, new_files)
+        return len(new_files) + len(removed_files)
+
     def import_video(self, video_file, video_file_bak):
         m = []
         o = []
@@ -517,9 +795,30 @@ class MediaDatabase():
                             continue
         return list(set(m_files))  # Remove any duplicates
 
-    def get_music_db(self, music_db, queryType, queryVal):
+    def get_library_paths(self, db_path, table):
+        """Paths of all files of Video or Music table of db_path"""
+        if table not in ['Video', 'Music'] or not os.path.isfile(db_path):
+            return []
+        conn = sqlite3.connect(db_path)
+        cur = conn.cursor()
+        try:
+            cur.execute('SELECT Path FROM {0} order by Directory'.format(table))
+            paths = [i[0] for i in cur.fetchall() if i[0]]
+        except Exception as err:
+            self.logger.error(err)
+            paths = []
+        conn.close()
+        return paths
+    
+    def get_music_db(self, music_db, queryType, queryVal, page_size=None, offset=None):
+        """
+        page_size and offset: returns single page of rows.
+        only page_size: returns PagedResult, rows are fetched with fetch_page().
+        """
         conn = sqlite3.connect(music_db)
         cur = conn.cursor()
+        if page_size:
+            cur = PagedCursor(cur, page_size, offset or 0)
         q = queryType
         qVal = str(queryVal)
         #if '"' in qVal:
@@ -607,6 +906,8 @@ class MediaDatabase():
         #print(rows)
         conn.commit()
         conn.close()
+        if page_size and offset is None:
+            rows = PagedResult(music_db, cur.query, cur.params, page_size, rows)
         return rows
 
     def update_music_count(self, qType, qVal):
@@ -642,6 +943,7 @@ class MediaDatabase():
                 q1 = datetime.datetime.now()
                 #qVal = '"'+qVal+'"'
                 cur.execute(qr, (q1, incr))
+            self.record_catalog_play(qVal, 'music')
         elif qType == "fav":
             tmp = str(self.ui.list3.currentItem().text())
             if tmp == "Artist":
@@ -763,10 +1065,15 @@ class MediaDatabase():
         m.append(0)
         m.append(os.path.getmtime(path))
         m.append(datetime.datetime.now())
+        if self.ui is not None:
+            try:
+                self.ui.audio_artwork.artwork(path)
+            except Exception as err:
+                self.logger.error('{0}::{1}'.format(err, path))
         return m
 
     def update_on_start_music_db(self, music_db, music_file, music_file_bak,
-                                 update_progress_show=None):
+                                 update_progress_show=None, retry=True):
         m_files = self.import_music(music_file, music_file_bak)
         try:
             conn = sqlite3.connect(music_db)
@@ -777,6 +1084,17 @@ class MediaDatabase():
             conn.close()
         except Exception as e:
             print(e, '--database-corrupted--21369---')
+            if retry and self.maintenance.is_busy(e):
+                time.sleep(1)
+                return self.update_on_start_music_db(
+                    music_db, music_file, music_file_bak,
+                    update_progress_show=update_progress_show, retry=False
+                    )
+            if retry and self.maintenance.recover(music_db, e):
+                return self.update_on_start_music_db(
+                    music_db, music_file, music_file_bak,
+                    update_progress_show=update_progress_show, retry=False
+                    )
             return 0
         m_files_old = []
         for i in rows:
@@ -824,6 +1142,51 @@ class MediaDatabase():
         conn.commit()
         conn.close()
 
+    def update_music_directory(self, music_db, directory):
+        """
+        Incremental update of Music table for a single directory,
+        used by library watcher instead of full rescan.
+        Returns number of changed entries.
+        """
+        if not os.path.exists(music_db):
+            return 0
+        m_files = {}
+        if os.path.isdir(directory):
+            try:
+                for k in os.listdir(directory):
+                    file_ext = k.rsplit('.', 1)[-1]
+                    path = os.path.join(directory, k)
+                    if file_ext.lower() in self.ui.music_type_arr and os.path.isfile(path):
+                        m_files.update({path:(str(os.path.getmtime(path))).split('.')[0]})
+            except (PermissionError, OSError) as err:
+                self.logger.error('Error accessing directory {}: {}'.format(directory, err))
+                return 0
+        conn = sqlite3.connect(music_db)
+        cur = conn.cursor()
+        cur.execute('SELECT Path, Modified FROM Music Where Directory=?', (directory, ))
+        m_files_old = dict([(i[0], (str(i[1])).split('.')[0]) for i in cur.fetchall()])
+        changed = 0
+        for i in m_files_old:
+            if i not in m_files:
+                cur.execute('Delete FROM Music Where Path=?', (i, ))
+                self.logger.info('Deleting File From Database : '+i)
+                changed += 1
+        for i, mtime in m_files.items():
+            if m_files_old.get(i) == mtime:
+                continue
+            if i in m_files_old:
+                cur.execute('Delete FROM Music Where Path=?', (i, ))
+                self.logger.info('File Modified : '+i)
+            try:
+                w = self.get_tag_lib(i)
+                cur.execute('INSERT INTO Music VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', w)
+                changed += 1
+            except Exception as err:
+                self.logger.error('{0}::{1}'.format(err, i))
+        conn.commit()
+        conn.close()
+        return changed
+
     def import_music(self, music_file, music_file_bak):
         m = []
         o = []
@@ -0,0 +1,183 @@
+"""
+Copyright (C) 2017 kanishka-linux kanishka.linux@gmail.com
+
+This file is part of kawaii-player.
+
+kawaii-player is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kawaii-player is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kawaii-player.  If not, see <http://www.gnu.org/licenses/>.
+
+Maintenance of sqlite databases: integrity check, ANALYZE,
+PRAGMA optimize, incremental vacuum, snapshots with sqlite backup
+API and restore of last good snapshot in case of corruption.
+"""
+
+import os
+import time
+import shutil
+import sqlite3
+import logging
+
+
+class DatabaseMaintenance():
+
+    def __init__(self, logger=None, interval=86400):
+        if logger is None:
+            logger = logging.getLogger(__name__)
+        self.logger = logger
+        self.interval = interval
+
+    def snapshot_path(self, db_path):
+        return db_path + '.snapshot'
+
+    def is_busy(self, err):
+        """err is caused by locked or busy database, not by corruption"""
+        msg = str(err).lower()
+        return isinstance(err, sqlite3.OperationalError) and ('locked' in msg or 'busy' in msg)
+
+    def is_healthy(self, db_path, quick=False):
+        """Raises sqlite3.OperationalError if database is locked or busy"""
+        if not os.path.isfile(db_path):
+            return False
+        if quick:
+            qr = 'PRAGMA quick_check'
+        else:
+            qr = 'PRAGMA integrity_check'
+        try:
+            conn = sqlite3.connect(db_path)
+            try:
+                rows = conn.execute(qr).fetchall()
+            finally:
+                conn.close()
+        except sqlite3.DatabaseError as err:
+            if self.is_busy(err):
+                raise
+            self.logger.error('{0}::{1}'.format(err, db_path))
+            return False
+        healthy = (rows == [('ok', )])
+        if not healthy:
+            self.logger.error('integrity check failed {0}: {1}'.format(db_path, rows[:10]))
+        return healthy
+
+    def snapshot(self, db_path):
+        """Copies db_path into snapshot file using sqlite backup API"""
+        if not os.path.isfile(db_path):
+            return False
+        snapshot = self.snapshot_path(db_path)
+        tmp_snapshot = snapshot + '.tmp'
+        try:
+            src = sqlite3.connect(db_path)
+            dest = sqlite3.connect(tmp_snapshot)
+            try:
+                with dest:
+                    src.backup(dest)
+            finally:
+                dest.close()
+                src.close()
+            os.replace(tmp_snapshot, snapshot)
+        except sqlite3.DatabaseError as err:
+            self.logger.error('{0}::{1}'.format(err, db_path))
+            if os.path.exists(tmp_snapshot):
+                os.remove(tmp_snapshot)
+            return False
+        self.logger.info('snapshot created: {0}'.format(snapshot))
+        return True
+
+    def recover(self, db_path, err):
+        """
+        Called when reading db_path failed with err. Database is restored
+        only for sqlite3.DatabaseError which isn't caused by locked or
+        busy database. Returns True if db_path was restored.
+        """
+        if not isinstance(err, sqlite3.DatabaseError) or self.is_busy(err):
+            return False
+        try:
+            return self.restore(db_path)
+        except sqlite3.OperationalError as err:
+            self.logger.error('{0}::{1}'.format(err, db_path))
+            return False
+
+    def restore(self, db_path):
+        """
+        Replaces corrupted db_path with last good snapshot. Corrupted
+        file is kept as db_path.corrupted for manual inspection. db_path
+        which passes integrity check, along with its -wal and -journal,
+        is never touched.
+        """
+        if os.path.isfile(db_path) and self.is_healthy(db_path):
+            self.logger.info('{0} passes integrity check, not restored'.format(db_path))
+            return False
+        snapshot = self.snapshot_path(db_path)
+        if not self.is_healthy(snapshot, quick=True):
+            self.logger.error('no usable snapshot for {0}'.format(db_path))
+            return False
+        if os.path.exists(db_path):
+            shutil.move(db_path, db_path + '.corrupted')
+        for ext in ['-wal', '-shm', '-journal']:
+            if os.path.exists(db_path + ext):
+                os.remove(db_path + ext)
+        src = sqlite3.connect(snapshot)
+        dest = sqlite3.connect(db_path)
+        try:
+            with dest:
+                src.backup(dest)
+        finally:
+            dest.close()
+            src.close()
+        self.logger.info('restored {0} from {1}'.format(db_path, snapshot))
+        return True
+
+    def is_due(self, db_path):
+        snapshot = self.snapshot_path(db_path)
+        if not os.path.isfile(snapshot):
+            return True
+        return (time.time() - os.path.getmtime(snapshot)) > self.interval
+
+    def optimize(self, db_path):
+        conn = sqlite3.connect(db_path)
+        try:
+            auto_vacuum = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+            free_pages = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            if auto_vacuum != 2:
+                # incremental vacuum requires auto_vacuum=INCREMENTAL which
+                # takes effect only after full VACUUM, so it is done once.
+                conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                conn.execute('VACUUM')
+            elif free_pages:
+                conn.execute('PRAGMA incremental_vacuum')
+            conn.execute('ANALYZE')
+            conn.execute('PRAGMA optimize')
+            conn.commit()
+            self.logger.info('optimized {0}: free pages={1}'.format(db_path, free_pages))
+        finally:
+            conn.close()
+
+    def maintain(self, db_path, force=False):
+        """
+        Runs integrity check and optimizations and takes new snapshot.
+        Returns 'skip', 'busy', 'ok' or 'failed'. Corrupted database is
+        left alone and its last good snapshot is kept; it is restored by
+        recover() when opening database fails.
+        """
+        if not os.path.isfile(db_path) or not (force or self.is_due(db_path)):
+            return 'skip'
+        try:
+            if not self.is_healthy(db_path):
+                return 'failed'
+            self.optimize(db_path)
+        except sqlite3.DatabaseError as err:
+            self.logger.error('{0}::{1}'.format(err, db_path))
+            if self.is_busy(err):
+                return 'busy'
+            return 'failed'
+        self.snapshot(db_path)
+        return 'ok'
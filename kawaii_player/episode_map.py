@@ -0,0 +1,152 @@
+"""
+Copyright (C) 2017 kanishka-linux kanishka.linux@gmail.com
+
+This file is part of kawaii-player.
+
+kawaii-player is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kawaii-player is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kawaii-player.  If not, see <http://www.gnu.org/licenses/>.
+
+Mapping of local episode names to TVDB episodes. TVDB episodes are
+indexed by season and episode number and by absolute number, every
+local name is parsed once and looked up in index. Mapping found for
+series is kept in episode_map.db, so that names mapped earlier (both
+original and renamed ones) aren't parsed again.
+"""
+
+import os
+import sqlite3
+import logging
+from threading import Lock
+from title_match import parse_episode
+
+
+def season_episode(tvdb_key):
+    """(season, episode) of TVDB key like 1x05, None for other keys"""
+    if tvdb_key.startswith('-'):
+        tvdb_key = tvdb_key[1:].rsplit('-', 1)[0]
+    season, sep, episode = tvdb_key.partition('x')
+    if sep and season.isdigit() and episode.isdigit():
+        return (int(season), int(episode))
+    return None
+
+
+class EpisodeMap():
+
+    def __init__(self, home, logger=None):
+        if logger is None:
+            logger = logging.getLogger(__name__)
+        self.logger = logger
+        self.map_db = os.path.join(home, 'episode_map.db')
+        self.lock = Lock()
+        self.series = {}
+
+    def connect(self):
+        conn = sqlite3.connect(self.map_db)
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS EpisodeMap(Series text, Name text, '
+            'TvdbKey text, primary key(Series, Name))'
+            )
+        return conn
+
+    def load(self, series):
+        """Called with lock held"""
+        mapping = self.series.get(series)
+        if mapping is None:
+            conn = self.connect()
+            mapping = dict(conn.execute(
+                'SELECT Name, TvdbKey FROM EpisodeMap Where Series=?', (series, )
+                ))
+            conn.close()
+            self.series.update({series:mapping})
+        return mapping
+
+    def save(self, series, names):
+        """Store {name: tvdb_key} of series"""
+        if not names:
+            return
+        with self.lock:
+            mapping = self.load(series)
+            mapping.update(names)
+            conn = self.connect()
+            conn.executemany(
+                'INSERT OR REPLACE INTO EpisodeMap VALUES(?, ?, ?)',
+                [(series, name, key) for name, key in names.items()]
+                )
+            conn.commit()
+            conn.close()
+
+    def forget(self, series):
+        with self.lock:
+            self.series.pop(series, None)
+            conn = self.connect()
+            conn.execute('DELETE FROM EpisodeMap Where Series=?', (series, ))
+            conn.commit()
+            conn.close()
+
+    def build_index(self, tvdb_dict):
+        """
+        ({sXeY: tvdb_key}, {absolute number: tvdb_key}) of TVDB episodes,
+        absolute number counts regular episodes after specials (0xN)
+        """
+        by_key = {}
+        by_number = {}
+        specials = 0
+        for key, value in tvdb_dict.items():
+            if key.startswith('0x'):
+                specials += 1
+        for key, value in tvdb_dict.items():
+            if not value or key.startswith('0x'):
+                continue
+            ssn_ep = season_episode(key)
+            if ssn_ep and not key.startswith('-'):
+                by_key.update({'s{}e{}'.format(*ssn_ep):key})
+            by_number.update({value[0] - specials + 1:key})
+        return by_key, by_number
+
+    def match(self, lower_case, index, by_key, by_number):
+        ep_patn = parse_episode(lower_case, index)[0]
+        if not ep_patn:
+            return None
+        if ep_patn.startswith('s'):
+            season, episode = ep_patn[1:].split('e')
+        else:
+            season, episode = '1', ep_patn[1:]
+        key = by_key.get('s{}e{}'.format(int(season), int(episode)))
+        if key is None:
+            key = by_number.get(int(episode))
+        return key
+
+    def map_names(self, series, tvdb_dict, names):
+        """
+        [(tvdb_key, known)] for every name of names, tvdb_key is None if
+        not found and known is True when name was mapped earlier
+        """
+        with self.lock:
+            mapping = self.load(series).copy()
+        index = None
+        result = []
+        new_names = {}
+        for i, name in enumerate(names):
+            lower_case = name.lower()
+            key = mapping.get(lower_case)
+            if key is not None and key in tvdb_dict:
+                result.append((key, True))
+                continue
+            if index is None:
+                index = self.build_index(tvdb_dict)
+            key = self.match(lower_case, i, *index)
+            if key is not None:
+                new_names.update({lower_case:key})
+            result.append((key, False))
+        self.save(series, new_names)
+        return result
@@ -20,7 +20,9 @@ along with kawaii-player.  If not, see <http://www.gnu.org/licenses/>.
 import os
 import urllib.parse
 import subprocess
+import threading
 from io import BytesIO
+from http_cache import parse_raw_headers
 try:
     import pycurl
 except Exception as err:
@@ -28,6 +30,80 @@ except Exception as err:
 
 
 USER_AGENT = 'Mozilla/5.0 (X11; Ubuntu; Linux i686; rv:60.0) Gecko/20100101 Firefox/60.0'
+HTTP_CACHE = None
+CURL_LOCAL = threading.local()
+CURL_SHARE = None
+CURL_SHARE_LOCK = threading.Lock()
+
+
+def set_http_cache(cache):
+    """HttpCache used by ccurl for plain GET requests and -o downloads"""
+    global HTTP_CACHE
+    HTTP_CACHE = cache
+
+
+def curl_share():
+    """
+    CurlShare of DNS cache and TLS sessions used by all handles, so that
+    new connection to known host skips DNS lookup and full TLS handshake.
+    """
+    global CURL_SHARE
+    with CURL_SHARE_LOCK:
+        if CURL_SHARE is None:
+            CURL_SHARE = pycurl.CurlShare()
+            CURL_SHARE.setopt(pycurl.SH_SHARE, pycurl.LOCK_DATA_DNS)
+            CURL_SHARE.setopt(pycurl.SH_SHARE, pycurl.LOCK_DATA_SSL_SESSION)
+    return CURL_SHARE
+
+
+def http2_supported():
+    return bool(pycurl.version_info()[4] & getattr(pycurl, 'VERSION_HTTP2', 0))
+
+
+def setup_curl_handle(c):
+    c.setopt(c.SHARE, curl_share())
+    c.setopt(c.NOSIGNAL, 1)
+    if http2_supported():
+        c.setopt(c.HTTP_VERSION, pycurl.CURL_HTTP_VERSION_2TLS)
+        c.setopt(c.PIPEWAIT, 1)
+
+
+def reset_curl_handle(c):
+    """Clears options of handle for reuse, pycurl refuses to share twice"""
+    c.unsetopt(c.SHARE)
+    c.reset()
+
+
+def get_curl_handle(pooled=True):
+    """
+    Reusable handle of calling thread, which keeps its connections alive
+    between calls. Handles which use cookies aren't pooled, since cookies
+    of the handle survive reset.
+    """
+    if pooled:
+        c = getattr(CURL_LOCAL, 'handle', None)
+        if c is None:
+            c = pycurl.Curl()
+            CURL_LOCAL.handle = c
+        else:
+            reset_curl_handle(c)
+    else:
+        c = pycurl.Curl()
+    setup_curl_handle(c)
+    return c
+
+
+def release_curl_handle(c, pooled=True):
+    if not pooled:
+        c.close()
+
+
+def cached_response(entry, out_file):
+    """Result of ccurl for cache entry"""
+    if out_file:
+        HTTP_CACHE.copy_to(entry, out_file)
+        return None
+    return getContentUnicode(HTTP_CACHE.read(entry))
 
 
 def wget_string(url, dest, get_lib, rfr=None):
@@ -435,7 +511,6 @@ def ccurl(url, external_cookie=None, user_auth=None, verify_peer=None,
     if 'youtube.com' in url:
         hdr = 'Mozilla/5.0 (Linux; Android 4.4.4; SM-G928X Build/LMY47X) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/47.0.2526.83 Mobile Safari/537.36'
     print(url)
-    c = pycurl.Curl()
     if not external_cookie:
         cookie_file = ''
     else:
@@ -449,10 +524,6 @@ def ccurl(url, external_cookie=None, user_auth=None, verify_peer=None,
         nUrl = url
         postfield = ''
         legacy = True
-    if hdr_data and isinstance(hdr_data, dict) and len(hdr_data) > 0:
-        c.setopt(c.HTTPHEADER, [k+': '+v for k,v in hdr_data.items()])
-    else:
-        c.setopt(c.USERAGENT, hdr)
     if '#' in url and legacy:
         curl_opt = nUrl.split('#')[1]
         url = nUrl.split('#')[0]
@@ -509,6 +580,30 @@ def ccurl(url, external_cookie=None, user_auth=None, verify_peer=None,
             return ''
                 
     url = str(url)
+    pooled = not cookie_file
+    c = get_curl_handle(pooled)
+    if hdr_data and isinstance(hdr_data, dict) and len(hdr_data) > 0:
+        c.setopt(c.HTTPHEADER, [k+': '+v for k,v in hdr_data.items()])
+    else:
+        c.setopt(c.USERAGENT, hdr)
+    cache_entry = None
+    req_hdrs = hdr_data if isinstance(hdr_data, dict) else None
+    use_cache = (HTTP_CACHE is not None and curl_opt in ['', '-L', '-o']
+                 and not cookie_file and user_auth is None
+                 and HTTP_CACHE.is_cacheable_url(url))
+    if use_cache:
+        cache_entry = HTTP_CACHE.lookup(url, req_hdrs)
+        if cache_entry and cache_entry['fresh']:
+            release_curl_handle(c, pooled)
+            return cached_response(cache_entry, picn_op if curl_opt == '-o' else None)
+        hdr_list = []
+        if hdr_data and isinstance(hdr_data, dict):
+            hdr_list = [k+': '+v for k,v in hdr_data.items()]
+        hdr_list += [k+': '+v for k,v in HTTP_CACHE.conditional_headers(cache_entry).items()]
+        if hdr_list:
+            c.setopt(c.HTTPHEADER, hdr_list)
+        header_storage = BytesIO()
+        c.setopt(c.HEADERFUNCTION, header_storage.write)
     try:
         c.setopt(c.URL, url)
     except UnicodeEncodeError as e:
@@ -532,6 +627,7 @@ def ccurl(url, external_cookie=None, user_auth=None, verify_peer=None,
             c.setopt(c.WRITEDATA, f)
         except Exception as err:
             print(err, 'not able to write file')
+            release_curl_handle(c, pooled)
             return 0
         try:
             ver_peer = url.split('/')
@@ -542,10 +638,16 @@ def ccurl(url, external_cookie=None, user_auth=None, verify_peer=None,
                     c.setopt(c.SSL_VERIFYPEER, False)
                     c.setopt(c.SSL_VERIFYHOST, False)
             c.perform()
-            c.close()
         except Exception as err:
             print('failure in obtaining image try again', err)
+        release_curl_handle(c, pooled)
         f.close()
+        if use_cache:
+            status, headers = parse_raw_headers(header_storage.getvalue())
+            if status == 304 and HTTP_CACHE.revalidate(url, headers, req_hdrs):
+                return cached_response(cache_entry, picn_op)
+            elif status == 200:
+                HTTP_CACHE.store(url, headers, src_file=picn_op, request_headers=req_hdrs)
     else:
         if curl_opt == '-I':
             c.setopt(c.FOLLOWLOCATION, True)
@@ -623,15 +725,134 @@ def ccurl(url, external_cookie=None, user_auth=None, verify_peer=None,
                         '&pl_id=' in ver_peer_get and verify_peer is not False):
                     c.setopt(c.SSL_VERIFYPEER, False)
             c.perform()
-            c.close()
             content = storage.getvalue()
+            if use_cache:
+                status, headers = parse_raw_headers(header_storage.getvalue())
+                if status == 304 and HTTP_CACHE.revalidate(url, headers, req_hdrs):
+                    content = HTTP_CACHE.read(cache_entry)
+                elif status == 200:
+                    HTTP_CACHE.store(url, headers, body=content, request_headers=req_hdrs)
             content = getContentUnicode(content)
         except Exception as err:
             print(err, 'curl failure try again', '--523--')
             content = ''
+        release_curl_handle(c, pooled)
         return content
 
 
+def ccurl_multi(jobs, max_connections=6, verify_peer=None, hdr_data=None):
+    """
+    Downloads jobs, list of (url, out_file), in parallel on calling thread
+    with CurlMulti. Requests to same host are multiplexed over one HTTP/2
+    connection where possible. Returns list of jobs which were downloaded
+    or served from http cache.
+    """
+    done = []
+    queue = []
+    req_hdrs = hdr_data if isinstance(hdr_data, dict) else None
+    for url, out_file in jobs:
+        entry = None
+        use_cache = HTTP_CACHE is not None and HTTP_CACHE.is_cacheable_url(url)
+        if use_cache:
+            entry = HTTP_CACHE.lookup(url, req_hdrs)
+            if entry and entry['fresh']:
+                cached_response(entry, out_file)
+                done.append((url, out_file))
+                continue
+        queue.append((url, out_file, use_cache, entry))
+    if not queue:
+        return done
+    m = pycurl.CurlMulti()
+    if http2_supported():
+        m.setopt(pycurl.M_PIPELINING, pycurl.PIPE_MULTIPLEX)
+    m.setopt(pycurl.M_MAX_HOST_CONNECTIONS, max_connections)
+    free = [pycurl.Curl() for i in range(min(max_connections, len(queue)))]
+    active = {}
+    
+    def start(c, url, out_file, use_cache, entry):
+        reset_curl_handle(c)
+        setup_curl_handle(c)
+        hdr_list = []
+        if hdr_data and isinstance(hdr_data, dict):
+            hdr_list = [k+': '+v for k,v in hdr_data.items()]
+        else:
+            c.setopt(c.USERAGENT, USER_AGENT)
+        header_storage = None
+        if use_cache:
+            hdr_list += [k+': '+v for k,v in HTTP_CACHE.conditional_headers(entry).items()]
+            header_storage = BytesIO()
+            c.setopt(c.HEADERFUNCTION, header_storage.write)
+        if hdr_list:
+            c.setopt(c.HTTPHEADER, hdr_list)
+        if os.name == 'nt':
+            ca_cert = get_ca_certificate()
+            if ca_cert:
+                c.setopt(c.CAINFO, ca_cert)
+        if verify_peer is False:
+            c.setopt(c.SSL_VERIFYPEER, False)
+        c.setopt(c.URL, url)
+        c.setopt(c.FOLLOWLOCATION, True)
+        f = open(out_file, 'wb')
+        c.setopt(c.WRITEDATA, f)
+        m.add_handle(c)
+        active.update({c: (url, out_file, use_cache, entry, f, header_storage)})
+    
+    def finish(c, error):
+        url, out_file, use_cache, entry, f, header_storage = active.pop(c)
+        m.remove_handle(c)
+        f.close()
+        free.append(c)
+        if error:
+            print(error, url, '--multi-download-failed--')
+            if os.path.isfile(out_file):
+                os.remove(out_file)
+            return
+        status = c.getinfo(pycurl.RESPONSE_CODE)
+        if use_cache:
+            headers = parse_raw_headers(header_storage.getvalue())[1]
+            if status == 304 and HTTP_CACHE.revalidate(url, headers, req_hdrs):
+                cached_response(entry, out_file)
+                status = 200
+            elif status == 200:
+                HTTP_CACHE.store(url, headers, src_file=out_file, request_headers=req_hdrs)
+        if status == 200:
+            done.append((url, out_file))
+        elif os.path.isfile(out_file):
+            os.remove(out_file)
+    
+    try:
+        while queue or active:
+            while queue and free:
+                job = queue.pop(0)
+                c = free.pop()
+                try:
+                    start(c, *job)
+                except Exception as err:
+                    print(err, job[0], '--multi-download-failed--')
+                    free.append(c)
+            while True:
+                ret, num_handles = m.perform()
+                if ret != pycurl.E_CALL_MULTI_PERFORM:
+                    break
+            while True:
+                num_q, ok_list, err_list = m.info_read()
+                for c in ok_list:
+                    finish(c, None)
+                for c, errno, errmsg in err_list:
+                    finish(c, errmsg or str(errno))
+                if num_q == 0:
+                    break
+            if active:
+                m.select(1.0)
+    finally:
+        for c in list(active):
+            finish(c, 'aborted')
+        for c in free:
+            c.close()
+        m.close()
+    return done
+
+
 def get_ca_certificate():
     ca_cert = ''
     if os.name == 'nt':
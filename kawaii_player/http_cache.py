@@ -0,0 +1,348 @@
+"""
+Copyright (C) 2017 kanishka-linux kanishka.linux@gmail.com
+
+This file is part of kawaii-player.
+
+kawaii-player is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kawaii-player is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kawaii-player.  If not, see <http://www.gnu.org/licenses/>.
+
+On-disk cache of GET responses shared by ccurl and vinanti. Freshness
+follows Cache-Control max-age/no-cache/no-store and Expires, stale
+entries with ETag or Last-Modified are revalidated with conditional
+request. Hosts which don't send caching headers can be given TTL in
+host_ttl, which also applies to subdomains. Bodies are kept as files
+in cache_dir and least recently used ones are removed once total size
+exceeds max_bytes.
+
+Entries are keyed by url together with values of request headers in
+KEY_HEADERS, so that responses for other language or credentials
+aren't shared. Responses with Vary: * aren't stored, other Vary
+headers aren't taken into account.
+"""
+
+import os
+import re
+import time
+import json
+import shutil
+import sqlite3
+import hashlib
+import logging
+import ipaddress
+from threading import Lock, get_ident
+from email.message import Message
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+HOST_TTL = {
+    'thetvdb.com': 24*3600,
+    'themoviedb.org': 24*3600,
+    'last.fm': 24*3600,
+    'duckduckgo.com': 6*3600,
+    }
+
+KEY_HEADERS = ('accept-language', 'authorization', 'cookie')
+
+
+def parse_raw_headers(raw):
+    """
+    (status, [(name, value)]) of last response in raw header data
+    written by curl, which contains headers of every redirect
+    """
+    if isinstance(raw, bytes):
+        raw = raw.decode('iso-8859-1')
+    status = None
+    headers = []
+    for line in raw.splitlines():
+        line = line.strip()
+        if line.startswith('HTTP/'):
+            status = None
+            headers = []
+            parts = line.split()
+            if len(parts) > 1 and parts[1].isdigit():
+                status = int(parts[1])
+        elif ':' in line:
+            name, value = line.split(':', 1)
+            headers.append((name.strip(), value.strip()))
+    return (status, headers)
+
+
+def http_date(value):
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except Exception:
+        return None
+
+
+class HttpCache():
+
+    def __init__(self, cache_dir, logger=None, max_bytes=100*1024*1024,
+                 host_ttl=None):
+        if logger is None:
+            logger = logging.getLogger(__name__)
+        self.logger = logger
+        self.cache_dir = cache_dir
+        self.index_db = os.path.join(cache_dir, 'index.db')
+        self.max_bytes = max_bytes
+        self.host_ttl = HOST_TTL.copy()
+        if host_ttl:
+            self.host_ttl.update(host_ttl)
+        self.lock = Lock()
+        self.used = None
+
+    def connect(self):
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        conn = sqlite3.connect(self.index_db)
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS Response(Url text primary key, '
+            'Headers text, Expires real, Size integer, Accessed real)'
+            )
+        return conn
+
+    def cache_key(self, url, request_headers=None):
+        """
+        url followed by values of KEY_HEADERS in request_headers, dict or
+        list of (name, value). Key is url itself if none of them is sent.
+        """
+        if not request_headers:
+            return url
+        if isinstance(request_headers, dict):
+            request_headers = request_headers.items()
+        values = sorted(
+            '{0}: {1}'.format(i.lower(), j) for i, j in request_headers
+            if i.lower() in KEY_HEADERS
+            )
+        if not values:
+            return url
+        return '\n'.join([url] + values)
+
+    def body_path(self, key):
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    def set_host_ttl(self, host, ttl):
+        self.host_ttl.update({host.lower(): ttl})
+
+    def ttl_of_host(self, url):
+        host = (urlparse(url).hostname or '').lower()
+        while host:
+            if host in self.host_ttl:
+                return self.host_ttl[host]
+            if '.' not in host:
+                break
+            host = host.split('.', 1)[1]
+        return None
+
+    def is_cacheable_url(self, url):
+        """Only remote http(s) urls, responses of local media servers change any time"""
+        if not self.max_bytes or not url.startswith(('http://', 'https://')):
+            return False
+        host = urlparse(url).hostname or ''
+        if host == 'localhost':
+            return False
+        try:
+            ip = ipaddress.ip_address(host)
+            return not (ip.is_private or ip.is_loopback or ip.is_link_local)
+        except ValueError:
+            return True
+
+    def header(self, headers, name):
+        name = name.lower()
+        for key, value in headers:
+            if key.lower() == name:
+                return value
+        return None
+
+    def expiry(self, url, headers):
+        """Expiry time of response, None if it shouldn't be stored"""
+        now = time.time()
+        cache_control = (self.header(headers, 'Cache-Control') or '').lower()
+        if 'no-store' in cache_control:
+            return None
+        validator = self.header(headers, 'ETag') or self.header(headers, 'Last-Modified')
+        if 'no-cache' in cache_control:
+            if validator:
+                return now
+            return None
+        max_age = re.search(r'max-age\s*=\s*"?(\d+)', cache_control)
+        if max_age:
+            return now + int(max_age.group(1))
+        expires = self.header(headers, 'Expires')
+        if expires:
+            expires_time = http_date(expires)
+            if expires_time is None:
+                return now if validator else None
+            return expires_time
+        ttl = self.ttl_of_host(url)
+        if ttl is not None:
+            return now + ttl
+        last_modified = self.header(headers, 'Last-Modified')
+        if last_modified:
+            modified_time = http_date(last_modified)
+            if modified_time is not None and modified_time < now:
+                return now + min((now - modified_time)/10, 24*3600)
+        if validator:
+            return now
+        return None
+
+    def lookup(self, url, request_headers=None):
+        """
+        Entry dict of url with keys headers, fresh and path, or None.
+        Entry which isn't fresh can be used after revalidation.
+        """
+        key = self.cache_key(url, request_headers)
+        with self.lock:
+            conn = self.connect()
+            row = conn.execute(
+                'SELECT Headers, Expires FROM Response Where Url=?', (key, )
+                ).fetchone()
+            if row is not None:
+                conn.execute(
+                    'Update Response Set Accessed=? Where Url=?', (time.time(), key)
+                    )
+                conn.commit()
+            conn.close()
+        if row is None:
+            return None
+        path = self.body_path(key)
+        if not os.path.isfile(path):
+            return None
+        headers = [tuple(i) for i in json.loads(row[0])]
+        return {'headers': headers, 'fresh': row[1] > time.time(), 'path': path}
+
+    def conditional_headers(self, entry):
+        hdrs = {}
+        if entry:
+            etag = self.header(entry['headers'], 'ETag')
+            last_modified = self.header(entry['headers'], 'Last-Modified')
+            if etag:
+                hdrs.update({'If-None-Match': etag})
+            if last_modified:
+                hdrs.update({'If-Modified-Since': last_modified})
+        return hdrs
+
+    def read(self, entry):
+        with open(entry['path'], 'rb') as f:
+            return f.read()
+
+    def copy_to(self, entry, out_file):
+        shutil.copy(entry['path'], out_file)
+
+    def message(self, headers):
+        """headers as email.message.Message, which urllib uses for info()"""
+        msg = Message()
+        for name, value in headers:
+            msg[name] = value
+        return msg
+
+    def store(self, url, headers, body=None, src_file=None, request_headers=None):
+        """Stores 200 response of url, body is either bytes or src_file"""
+        if not self.is_cacheable_url(url):
+            return False
+        if (self.header(headers, 'Vary') or '').strip() == '*':
+            return False
+        expires = self.expiry(url, headers)
+        if expires is None:
+            return False
+        if body is not None:
+            size = len(body)
+        elif src_file and os.path.isfile(src_file):
+            size = os.stat(src_file).st_size
+        else:
+            return False
+        if size > self.max_bytes/8:
+            return False
+        headers = [
+            (i, j) for i, j in headers
+            if i.lower() not in ['set-cookie', 'transfer-encoding', 'connection']
+            ]
+        key = self.cache_key(url, request_headers)
+        path = self.body_path(key)
+        tmp_file = '{0}.{1}.tmp'.format(path, get_ident())
+        try:
+            if not os.path.exists(self.cache_dir):
+                os.makedirs(self.cache_dir)
+            if body is not None:
+                with open(tmp_file, 'wb') as f:
+                    f.write(body)
+            else:
+                shutil.copy(src_file, tmp_file)
+            os.replace(tmp_file, path)
+        except OSError as err:
+            self.logger.error('{0}::{1}'.format(err, url))
+            return False
+        with self.lock:
+            conn = self.connect()
+            old = conn.execute('SELECT Size FROM Response Where Url=?', (key, )).fetchone()
+            conn.execute(
+                'INSERT OR REPLACE INTO Response VALUES(?, ?, ?, ?, ?)',
+                (key, json.dumps(headers), expires, size, time.time())
+                )
+            conn.commit()
+            if self.used is None:
+                self.used = conn.execute(
+                    'SELECT COALESCE(SUM(Size), 0) FROM Response'
+                    ).fetchone()[0]
+            else:
+                self.used += size - (old[0] if old else 0)
+            if self.used > self.max_bytes:
+                self.evict(conn)
+            conn.close()
+        return True
+
+    def revalidate(self, url, headers, request_headers=None):
+        """Updates entry of url after 304 response, returns entry"""
+        entry = self.lookup(url, request_headers)
+        if entry is None:
+            return None
+        new_headers = dict((i.lower(), (i, j)) for i, j in entry['headers'])
+        for name, value in headers:
+            if name.lower() not in ['content-length', 'set-cookie', 'transfer-encoding']:
+                new_headers.update({name.lower(): (name, value)})
+        merged = list(new_headers.values())
+        expires = self.expiry(url, merged)
+        if expires is None:
+            expires = time.time()
+        with self.lock:
+            conn = self.connect()
+            conn.execute(
+                'Update Response Set Headers=?, Expires=? Where Url=?',
+                (json.dumps(merged), expires, self.cache_key(url, request_headers))
+                )
+            conn.commit()
+            conn.close()
+        entry.update({'headers': merged, 'fresh': True})
+        return entry
+
+    def evict(self, conn):
+        """Called with lock held, removes least recently used entries"""
+        limit = self.max_bytes * 0.9
+        removed = []
+        for key, size in conn.execute('SELECT Url, Size FROM Response order by Accessed'):
+            if self.used <= limit:
+                break
+            removed.append(key)
+            self.used -= size
+        for key in removed:
+            path = self.body_path(key)
+            if os.path.exists(path):
+                os.remove(path)
+        conn.executemany('DELETE FROM Response Where Url=?', [(i, ) for i in removed])
+        conn.commit()
+        self.logger.info('http cache: {0} entries evicted'.format(len(removed)))
+
+    def clear(self):
+        with self.lock:
+            if os.path.exists(self.cache_dir):
+                shutil.rmtree(self.cache_dir)
+            self.used = None
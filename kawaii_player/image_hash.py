@@ -0,0 +1,370 @@
+"""
+Copyright (C) 2017 kanishka-linux kanishka.linux@gmail.com
+
+This file is part of kawaii-player.
+
+kawaii-player is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kawaii-player is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kawaii-player.  If not, see <http://www.gnu.org/licenses/>.
+
+Perceptual hash (dHash) index of poster, fanart and episode images kept
+in metadata directories. Images of same shape whose hashes differ in at
+most threshold bits are treated as same picture. Index also remembers
+hash, resolution and content digest of every downloaded url, so that url
+whose picture is already available locally at equal or higher
+resolution isn't downloaded again. Lower resolution copies of a picture
+are replaced by copies of higher resolution one; files are always
+copied, never linked, so that writing one file doesn't change others.
+"""
+
+import os
+import shutil
+import hashlib
+import sqlite3
+import logging
+from threading import Lock, get_ident
+from PIL import Image
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+SKIP_PREFIXES = ('128px.', '256px.', '480px.', 'label.')
+EXCLUDE_DIRS = ('artwork', 'thumbnail_server')
+
+
+def dhash(img, hash_size=8):
+    """Difference hash of PIL image as integer of hash_size*hash_size bits"""
+    img = img.convert('L').resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = list(img.getdata())
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def file_digest(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024*1024), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def hamming(first, second):
+    return bin(first ^ second).count('1')
+
+
+def is_distinct(hash_val, min_bits=4):
+    """
+    False for hash of nearly uniform picture, e.g. dark or blank frame,
+    which would match every other such picture.
+    """
+    bits = bin(hash_val).count('1')
+    return min_bits <= bits <= 64 - min_bits
+
+
+def same_shape(first, second, tolerance=0.02):
+    """first and second are (width, height) of images"""
+    return abs(first[0] * second[1] - second[0] * first[1]) <= tolerance * first[0] * second[1]
+
+
+def copy_file(src, dest):
+    """Copies src over dest through temporary file, dest is never partially written"""
+    tmp_file = '{0}.{1}.tmp'.format(dest, get_ident())
+    shutil.copy(src, tmp_file)
+    os.replace(tmp_file, dest)
+
+
+class ImageHashIndex():
+
+    def __init__(self, home, logger=None, threshold=6):
+        if logger is None:
+            logger = logging.getLogger(__name__)
+        self.logger = logger
+        self.home = home
+        self.index_db = os.path.join(home, 'thumbnails', 'image_hash.db')
+        self.threshold = threshold
+        self.lock = Lock()
+        self.images = None
+        self.urls = None
+
+    def connect(self):
+        db_dir = os.path.dirname(self.index_db)
+        if not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        conn = sqlite3.connect(self.index_db)
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS Image(Path text primary key, '
+            'Hash text, Width integer, Height integer, Mtime real)'
+            )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS Url(Url text primary key, '
+            'Hash text, Width integer, Height integer)'
+            )
+        for table in ['Image', 'Url']:
+            columns = [i[1] for i in conn.execute('PRAGMA table_info({0})'.format(table))]
+            if 'Digest' not in columns:
+                conn.execute('ALTER TABLE {0} ADD COLUMN Digest text'.format(table))
+        return conn
+
+    def load(self):
+        """Called with lock held"""
+        if self.images is not None:
+            return
+        self.images = {}
+        self.urls = {}
+        conn = self.connect()
+        qr = 'SELECT Path, Hash, Width, Height, Mtime, Digest FROM Image'
+        for path, hash_val, width, height, mtime, digest in conn.execute(qr):
+            self.images.update({path: (int(hash_val, 16), width, height, mtime, digest)})
+        qr = 'SELECT Url, Hash, Width, Height, Digest FROM Url'
+        for url, hash_val, width, height, digest in conn.execute(qr):
+            self.urls.update({url: (int(hash_val, 16), width, height, digest)})
+        conn.close()
+
+    def image_info(self, path):
+        """(hash, width, height) of image file path"""
+        img = Image.open(path)
+        width, height = img.size
+        if img.format == 'JPEG':
+            img.draft('RGB', (64, 64))
+        return (dhash(img), width, height)
+
+    def add(self, path, url=None):
+        """Indexes image path; with url, it is recorded as content of url too"""
+        try:
+            hash_val, width, height = self.image_info(path)
+            mtime = os.stat(path).st_mtime
+            digest = file_digest(path)
+        except Exception as err:
+            self.logger.error('{0}::{1}'.format(err, path))
+            return None
+        hash_txt = '{0:016x}'.format(hash_val)
+        with self.lock:
+            self.load()
+            conn = self.connect()
+            self.images.update({path: (hash_val, width, height, mtime, digest)})
+            conn.execute(
+                'INSERT OR REPLACE INTO Image VALUES(?, ?, ?, ?, ?, ?)',
+                (path, hash_txt, width, height, mtime, digest)
+                )
+            if url is not None:
+                self.urls.update({url: (hash_val, width, height, digest)})
+                conn.execute(
+                    'INSERT OR REPLACE INTO Url VALUES(?, ?, ?, ?, ?)',
+                    (url, hash_txt, width, height, digest)
+                    )
+            conn.commit()
+            conn.close()
+        return (hash_val, width, height)
+
+    def find_copy(self, digest):
+        """Existing local file with content digest, None if there is none"""
+        with self.lock:
+            self.load()
+            candidates = [
+                (path, i[3]) for path, i in self.images.items() if i[4] == digest
+                ]
+        for path, mtime in sorted(candidates):
+            try:
+                if os.stat(path).st_mtime == mtime:
+                    return path
+            except OSError:
+                pass
+        return None
+
+    def find(self, info, min_pixels=0, exclude=None):
+        """
+        Existing local image of same picture as info, (hash, width,
+        height), with highest resolution of at least min_pixels. Files
+        modified after they were indexed aren't used.
+        """
+        if not is_distinct(info[0]):
+            return None
+        if exclude is not None:
+            exclude = os.path.abspath(exclude)
+        with self.lock:
+            self.load()
+            candidates = [
+                (i[1] * i[2], path, i[3]) for path, i in self.images.items()
+                if i[1] * i[2] >= min_pixels and same_shape(i[1:3], info[1:3])
+                and hamming(i[0], info[0]) <= self.threshold
+                and os.path.abspath(path) != exclude
+                ]
+        for pixels, path, mtime in sorted(candidates, reverse=True):
+            try:
+                if os.stat(path).st_mtime == mtime:
+                    return path
+            except OSError:
+                pass
+        return None
+
+    def lookup_url(self, url, out_file):
+        """
+        Copies local file having same content as last download of url,
+        or same picture at equal or higher resolution, into out_file.
+        Returns True if download isn't needed.
+        """
+        with self.lock:
+            self.load()
+            info = self.urls.get(url)
+        if info is None:
+            return False
+        local = None
+        if info[3]:
+            local = self.find_copy(info[3])
+        if local is None:
+            local = self.find(info, info[1] * info[2])
+        if local is None:
+            return False
+        if os.path.abspath(local) != os.path.abspath(out_file):
+            copy_file(local, out_file)
+        self.logger.info('image of {0} available locally: {1}'.format(url, local))
+        return True
+
+    def record_url(self, url, out_file):
+        """
+        Remembers picture of downloaded url. If same picture is available
+        locally at higher resolution, out_file is replaced by its copy.
+        """
+        if not os.path.isfile(out_file) or not os.stat(out_file).st_size:
+            return
+        info = self.add(out_file, url=url)
+        if info is None:
+            return
+        local = self.find(info, info[1] * info[2] + 1, exclude=out_file)
+        if local is not None:
+            copy_file(local, out_file)
+            self.add(out_file)
+
+    def fetch(self, url, out_file, download):
+        """download(url, out_file) is called only if picture isn't available locally"""
+        if self.lookup_url(url, out_file):
+            return False
+        download(url, out_file)
+        self.record_url(url, out_file)
+        return True
+
+    def choose(self, urls, prefix=''):
+        """
+        Drops urls which are known to be lower resolution copies of another
+        url in urls. Order of remaining urls is preserved. Only urls which
+        were downloaded before can be compared, others are always kept.
+        """
+        with self.lock:
+            self.load()
+            known = [(self.urls.get(prefix + i), i) for i in urls]
+        result = []
+        for info, url in known:
+            if info is not None and any(
+                    other is not None and other_url != url
+                    and is_distinct(info[0]) and same_shape(other[1:3], info[1:3])
+                    and hamming(other[0], info[0]) <= self.threshold
+                    and (other[1] * other[2], other_url) > (info[1] * info[2], url)
+                    for other, other_url in known):
+                continue
+            result.append(url)
+        return result
+
+    def metadata_dirs(self):
+        """
+        Directories of posters, fanart and episode images. Top level of
+        thumbnails, frames of local videos (thumbnail_server) and artwork
+        of audio files, which is already stored by content, aren't included.
+        """
+        dirs = [
+            os.path.join(self.home, 'History'), os.path.join(self.home, 'Local'),
+            os.path.join(self.home, 'Music', 'Artist')
+            ]
+        thumbnail_dir = os.path.join(self.home, 'thumbnails')
+        if os.path.isdir(thumbnail_dir):
+            for name in sorted(os.listdir(thumbnail_dir)):
+                if name not in EXCLUDE_DIRS:
+                    dirs.append(os.path.join(thumbnail_dir, name))
+        return [i for i in dirs if os.path.isdir(i)]
+
+    def is_indexed_file(self, path):
+        name = os.path.basename(path)
+        return (name.lower().endswith(IMAGE_EXTENSIONS)
+                and not name.startswith(SKIP_PREFIXES))
+
+    def scan(self, dirs):
+        """Indexes new and modified images of dirs, returns number of indexed images"""
+        with self.lock:
+            self.load()
+            known = {i: j[3] for i, j in self.images.items() if j[4]}
+        count = 0
+        found = set()
+        for directory in dirs:
+            for root, subdirs, files in os.walk(directory):
+                for name in files:
+                    path = os.path.join(root, name)
+                    if not self.is_indexed_file(path):
+                        continue
+                    found.add(path)
+                    try:
+                        mtime = os.stat(path).st_mtime
+                    except OSError:
+                        continue
+                    if known.get(path) != mtime and self.add(path):
+                        count += 1
+        removed = [
+            i for i in known
+            if i not in found and any(i.startswith(d) for d in dirs)
+            ]
+        if removed:
+            with self.lock:
+                conn = self.connect()
+                conn.executemany('DELETE FROM Image Where Path=?', [(i, ) for i in removed])
+                conn.commit()
+                conn.close()
+                for i in removed:
+                    self.images.pop(i, None)
+        return count
+
+    def dedupe(self, dirs):
+        """
+        Replaces lower resolution copies of same picture in dirs by copy
+        of highest resolution one. Returns number of replaced files.
+        """
+        self.scan(dirs)
+        with self.lock:
+            images = [
+                (path, info) for path, info in self.images.items()
+                if is_distinct(info[0]) and any(path.startswith(d) for d in dirs)
+                ]
+        images.sort(key=lambda x: (-x[1][1] * x[1][2], x[0]))
+        masters = []
+        replaced = 0
+        for path, info in images:
+            for master, master_info in masters:
+                if (same_shape(master_info[1:3], info[1:3])
+                        and hamming(master_info[0], info[0]) <= self.threshold):
+                    break
+            else:
+                masters.append((path, info))
+                continue
+            if (master_info[1] * master_info[2] <= info[1] * info[2]
+                    or master_info[4] == info[4]):
+                continue
+            try:
+                if (os.stat(master).st_mtime != master_info[3]
+                        or os.stat(path).st_mtime != info[3]):
+                    continue
+                copy_file(master, path)
+            except OSError as err:
+                self.logger.error('{0}::{1}'.format(err, path))
+                continue
+            self.add(path)
+            replaced += 1
+        self.logger.info('image dedupe: {0} files replaced'.format(replaced))
+        return replaced
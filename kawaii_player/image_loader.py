@@ -0,0 +1,210 @@
+"""
+Copyright (C) 2017 kanishka-linux kanishka.linux@gmail.com
+
+This file is part of kawaii-player.
+
+kawaii-player is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kawaii-player is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kawaii-player.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+from collections import OrderedDict, deque
+from threading import Lock
+from PyQt5 import QtCore, QtGui
+from PyQt5.QtCore import pyqtSignal
+
+
+class ImageCache():
+
+    """LRU of decoded and scaled QImages limited by memory used"""
+
+    def __init__(self, max_bytes=64*1024*1024):
+        self.max_bytes = max_bytes
+        self.used = 0
+        self.images = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key):
+        with self.lock:
+            img = self.images.get(key)
+            if img is not None:
+                self.images.move_to_end(key)
+            return img
+
+    def put(self, key, img):
+        size = img.byteCount()
+        with self.lock:
+            old = self.images.pop(key, None)
+            if old is not None:
+                self.used -= old.byteCount()
+            self.images.update({key: img})
+            self.used += size
+            while self.used > self.max_bytes and len(self.images) > 1:
+                k, v = self.images.popitem(last=False)
+                self.used -= v.byteCount()
+
+    def clear(self):
+        with self.lock:
+            self.images.clear()
+            self.used = 0
+
+
+class ImageLoaderThread(QtCore.QThread):
+
+    def __init__(self, loader):
+        QtCore.QThread.__init__(self)
+        self.loader = loader
+
+    def __del__(self):
+        self.wait()
+
+    def run(self):
+        while True:
+            job = self.loader.take_job()
+            if job is None:
+                break
+            target, index, path, width, height, pixel, prepare, generation = job
+            path, img = self.loader.load(path, width, height, pixel, prepare)
+            if img is not None:
+                self.loader.finish_job(target, index, generation, path, img)
+
+
+class ImageLoader(QtCore.QObject):
+
+    """
+    Prepares QImages of thumbnails in worker threads. Images are decoded,
+    scaled to widget size and kept in ImageCache, GUI thread only
+    converts received image into QPixmap or QIcon.
+
+    Requests are identified by target ('grid', 'playlist', 'palette',
+    'label_new', 'label', 'float_window', 'fanart') and index of
+    widget. cancel(target) drops pending requests of target and
+    results of running ones, when widgets are recreated or newer image
+    is requested.
+    """
+
+    image_ready = pyqtSignal(str, int, str, QtGui.QImage)
+
+    def __init__(self, ui_widget, logr, default_image=None, workers=2,
+                 max_bytes=64*1024*1024):
+        QtCore.QObject.__init__(self)
+        self.ui = ui_widget
+        self.logger = logr
+        self.default_image = default_image
+        self.max_workers = workers
+        self.cache = ImageCache(max_bytes)
+        self.lock = Lock()
+        self.jobs = deque()
+        self.active = 0
+        self.threads = []
+        self.generation = {}
+
+    def cache_key(self, path, width, height):
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return None
+        return (path, mtime, width, height)
+
+    def fit_image(self, img, width, height):
+        """Scales img into width x height keeping aspect ratio, with black border"""
+        img = img.scaled(
+            width, height, QtCore.Qt.KeepAspectRatio,
+            QtCore.Qt.SmoothTransformation
+            )
+        if img.width() == width and img.height() == height:
+            return img
+        bg = QtGui.QImage(width, height, QtGui.QImage.Format_RGB32)
+        bg.fill(QtCore.Qt.black)
+        painter = QtGui.QPainter(bg)
+        painter.drawImage(int((width - img.width())/2), int((height - img.height())/2), img)
+        painter.end()
+        return bg
+
+    def cached(self, path, width=None, height=None):
+        """QImage of path if it is already prepared, else None"""
+        key = self.cache_key(path, width, height)
+        if key is None:
+            return None
+        return self.cache.get(key)
+
+    def load(self, path, width=None, height=None, pixel=None, prepare=None):
+        """
+        Returns (path, QImage) of path, fitted into width x height if
+        given. If pixel is given, pixel variant of path is created/used
+        first as done by create_new_image_pixel and returned as path.
+        If prepare is given, it is called first and path it returns is
+        loaded.
+        """
+        try:
+            if prepare:
+                path = prepare()
+            if pixel:
+                path = self.ui.create_new_image_pixel(path, pixel)
+            if (not path or not os.path.isfile(path)) and width and height:
+                path = self.default_image
+            if not path:
+                return (path, None)
+            key = self.cache_key(path, width, height)
+            if key is None:
+                return (path, None)
+            img = self.cache.get(key)
+            if img is None:
+                img = QtGui.QImage(path)
+                if img.isNull():
+                    return (path, None)
+                if width and height:
+                    img = self.fit_image(img, width, height)
+                self.cache.put(key, img)
+            return (path, img)
+        except Exception as err:
+            self.logger.error('{0}::{1}'.format(err, path))
+            return (path, None)
+
+    def request(self, target, index, path, width=None, height=None, pixel=None,
+                prepare=None):
+        """Thread safe. Result is delivered through image_ready signal"""
+        if not pixel and not prepare:
+            img = self.cached(path, width, height)
+            if img is not None:
+                self.image_ready.emit(target, index, path, img)
+                return
+        with self.lock:
+            generation = self.generation.get(target, 0)
+            self.jobs.append((target, index, path, width, height, pixel, prepare, generation))
+            self.threads = [i for i in self.threads if not i.isFinished()]
+            if self.active < self.max_workers:
+                self.active += 1
+                thread = ImageLoaderThread(self)
+                self.threads.append(thread)
+                thread.start()
+
+    def take_job(self):
+        with self.lock:
+            if self.jobs:
+                return self.jobs.popleft()
+            self.active -= 1
+            return None
+
+    def finish_job(self, target, index, generation, path, img):
+        with self.lock:
+            current = (generation == self.generation.get(target, 0))
+        if current:
+            self.image_ready.emit(target, index, path, img)
+
+    def cancel(self, target):
+        with self.lock:
+            self.generation[target] = self.generation.get(target, 0) + 1
+            jobs = [i for i in self.jobs if i[0] != target]
+            self.jobs.clear()
+            self.jobs.extend(jobs)
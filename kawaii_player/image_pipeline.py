@@ -0,0 +1,237 @@
+"""
+Copyright (C) 2017 kanishka-linux kanishka.linux@gmail.com
+
+This file is part of kawaii-player.
+
+kawaii-player is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kawaii-player is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kawaii-player.  If not, see <http://www.gnu.org/licenses/>.
+
+Rendering of fanart and poster images for image_fit_option. Geometry
+is computed from plain sizes, so that rendering can run in any thread.
+Decoded sources and resized images are kept in small LRU caches and
+last max_results rendered files are remembered along with the source
+they were made from, so that same fit of unchanged source isn't
+rendered again.
+"""
+
+import os
+import hashlib
+import logging
+from collections import OrderedDict
+from threading import Lock, get_ident
+from PIL import Image
+
+BORDER_COLOR = (56, 60, 74)
+
+
+def fit_layout(fit_size, src_size, size, screen, letterbox=False):
+    """
+    Returns (resize, canvas, fill, offsets) of fit_size as described in
+    image_fit_option, for source of src_size. size is (width, height)
+    of target widget where it is used. canvas is None if resized image
+    itself is the result.
+    """
+    src_w, src_h = src_size
+    screen_w, screen_h = screen
+    if fit_size in (1, 2) or fit_size > 100:
+        basewidth = size[0]
+        if fit_size == 1:
+            hsize = screen_h
+        else:
+            hsize = int(src_h * (basewidth / float(src_w)))
+        if letterbox:
+            height = size[1]
+            if hsize < height:
+                offset = int((height - hsize)/2)
+            else:
+                offset = 0
+            return ((basewidth, hsize), (basewidth, height), None, [(0, offset)])
+        return ((basewidth, hsize), (basewidth, hsize), None, [(0, 0)])
+    elif fit_size in (3, 5, 7, 8, 11):
+        if fit_size == 11:
+            baseheight = size[1]
+        else:
+            baseheight = screen_h
+        wsize = int(src_w * (baseheight / float(src_h)))
+        resize = (wsize, baseheight)
+        if fit_size == 5:
+            return (resize, screen, BORDER_COLOR, [(int((screen_w - wsize)/2), 0)])
+        elif fit_size == 8:
+            return (resize, screen, BORDER_COLOR, [(0, 0)])
+        elif fit_size == 7:
+            return (resize, (wsize + 20, baseheight), None, [(0, 0)])
+        return (resize, resize, None, [(0, 0)])
+    elif fit_size in (9, 10):
+        basewidth, baseheight = size
+        hsize = int(src_h * (basewidth / float(src_w)))
+        if hsize < screen_h:
+            return ((basewidth, hsize), screen, BORDER_COLOR, [(20, 20)])
+        nbw = int(float(baseheight/hsize) * float(basewidth))
+        if fit_size == 9:
+            second = (40 + nbw, 20)
+        else:
+            second = (20 + nbw, 20)
+        return ((nbw, baseheight), screen, BORDER_COLOR, [(20, 20), second])
+    elif fit_size in (4, 6):
+        basewidth, baseheight = size
+        hsize = int(src_h * (basewidth / float(src_w)))
+        if hsize > baseheight:
+            nbw = int(float(baseheight/hsize) * float(basewidth))
+            resize = (nbw, baseheight)
+            offset = (int((basewidth - nbw)/2), 0)
+        else:
+            resize = (basewidth, hsize)
+            offset = (0, int((baseheight - hsize)/2))
+        return (resize, size, None, [offset])
+    return None
+
+
+class ImagePipeline():
+
+    def __init__(self, tmp_dir, default_image, logger=None, max_sources=4,
+                 max_resized=16, max_tmp=32, max_results=256):
+        if logger is None:
+            logger = logging.getLogger(__name__)
+        self.logger = logger
+        self.tmp_dir = tmp_dir
+        self.default_image = default_image
+        self.max_sources = max_sources
+        self.max_resized = max_resized
+        self.max_tmp = max_tmp
+        self.max_results = max_results
+        self.lock = Lock()
+        self.sources = OrderedDict()
+        self.resized = OrderedDict()
+        self.results = OrderedDict()
+        self.tmp_results = OrderedDict()
+
+    def source_key(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if not stat.st_size:
+            return None
+        return (path, stat.st_mtime, stat.st_size)
+
+    def lru_get(self, cache, key):
+        """Called with lock held"""
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+    def lru_put(self, cache, key, value, limit):
+        """Called with lock held, returns evicted keys"""
+        cache.update({key: value})
+        cache.move_to_end(key)
+        evicted = []
+        while len(cache) > limit:
+            evicted.append(cache.popitem(last=False)[0])
+        return evicted
+
+    def open_source(self, path):
+        """(key, decoded PIL image) of path or of default image if path can't be read"""
+        for src in (path, self.default_image):
+            key = self.source_key(src)
+            if key is None:
+                continue
+            with self.lock:
+                img = self.lru_get(self.sources, key)
+            if img is not None:
+                return (key, img)
+            try:
+                img = Image.open(src)
+                img.load()
+            except Exception as err:
+                self.logger.error('{0}::Error in opening image {1}'.format(err, src))
+                continue
+            with self.lock:
+                self.lru_put(self.sources, key, img, self.max_sources)
+            return (key, img)
+        return (None, None)
+
+    def resize(self, key, img, size):
+        with self.lock:
+            resized = self.lru_get(self.resized, (key, size))
+        if resized is None:
+            resized = img.resize(size, Image.LANCZOS)
+            with self.lock:
+                self.lru_put(self.resized, (key, size), resized, self.max_resized)
+        return resized
+
+    def tmp_path(self, result_key):
+        name = hashlib.sha1(str(result_key).encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.tmp_dir, 'fit-{0}.jpg'.format(name))
+
+    def is_current(self, result_key, out):
+        with self.lock:
+            mtime = self.lru_get(self.results, (result_key, out))
+        if mtime is None:
+            return False
+        try:
+            return os.stat(out).st_mtime == mtime
+        except OSError:
+            return False
+
+    def save(self, img, out):
+        if img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        tmp_file = '{0}.{1}.tmp'.format(out, get_ident())
+        img.save(tmp_file, 'JPEG', quality=100)
+        os.replace(tmp_file, out)
+
+    def render(self, src, out, fit_size, size, screen, color='RGB',
+               letterbox=False, resized_only=False):
+        """
+        Renders src fitted as fit_size into out and returns out. If out is
+        None, result is written to temporary file named after the fit.
+        Thread safe, returns None on failure.
+        """
+        key, img = self.open_source(src)
+        if img is None:
+            return None
+        result_key = (key, fit_size, size, screen, color, letterbox, resized_only)
+        use_tmp = not out
+        if use_tmp:
+            out = self.tmp_path(result_key)
+        if self.is_current(result_key, out):
+            return out
+        layout = fit_layout(fit_size, img.size, size, screen, letterbox)
+        if layout is None:
+            return None
+        resize, canvas, fill, offsets = layout
+        result = self.resize(key, img, resize)
+        if not resized_only:
+            if fill is None:
+                bg = Image.new(color, canvas)
+            else:
+                bg = Image.new(color, canvas, fill)
+            for offset in offsets:
+                bg.paste(result, offset)
+            result = bg
+        self.save(result, out)
+        evicted = []
+        with self.lock:
+            self.lru_put(
+                self.results, (result_key, out), os.stat(out).st_mtime, self.max_results
+                )
+            if use_tmp:
+                evicted = self.lru_put(self.tmp_results, out, True, self.max_tmp)
+                for path in evicted:
+                    for i in [i for i in self.results if i[1] == path]:
+                        del self.results[i]
+        for path in evicted:
+            if os.path.exists(path):
+                os.remove(path)
+        return out
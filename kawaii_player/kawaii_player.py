@@ -87,6 +87,7 @@ from player_functions import wget_string, open_files, get_config_options
 from player_functions import get_tmp_dir, naturallysorted, set_logger
 from player_functions import get_home_dir, change_opt_file, create_ssl_cert
 from player_functions import set_user_password, get_lan_ip, random_string
+from get_functions import set_http_cache
 from yt import YTDL
 from ds import CustomList
 from meta_engine import MetaEngine
@@ -158,11 +159,6 @@ logger = log_instance.get_logger()
 
 print(TMPDIR, OSNAME)
 
-try:
-    import mutagen
-except Exception as e:
-    print(e,'--143--')
-
 try:
     import dbus
     import dbus.service
@@ -187,6 +183,17 @@ except Exception as e:
 from settings_widget import LoginAuth, LoginPCToPC, OptionsSettings
 from media_server import ThreadServerLocal
 from database import MediaDatabase
+from library_watcher import LibraryWatcher
+from thumbnail_scheduler import ThumbnailScheduler
+from thumbnail_cache import ThumbnailCache
+from sprite_sheet import SpriteSheet
+from image_loader import ImageLoader
+from image_pipeline import ImagePipeline
+from artwork import AudioArtwork
+from image_hash import ImageHashIndex
+from http_cache import HttpCache
+from metadata_batch import MetadataBatch
+from metadata_pack import MetadataPack
 from player import PlayerWidget
 from mpv_opengl import MpvOpenglWidget, QProcessExtra
     
@@ -198,8 +205,10 @@ from widgets.titlelist import TitleListWidget
 from widgets.traywidget import SystemAppIndicator, FloatWindowWidget
 from widgets.optionwidgets import *
 from widgets.scrollwidgets import *
-from thread_modules import FindPosterThread, ThreadingThumbnail, GetSubThread
+from thread_modules import FindPosterThread, GetSubThread
 from thread_modules import ThreadingExample, DownloadThread, UpdateMusicThread
+from thread_modules import DatabaseMaintenanceThread, CatalogImportThread
+from thread_modules import ThumbnailPrewarmThread, MetadataBatchThread, MetadataPackThread
 from thread_modules import GetIpThread, YTdlThread, PlayerWaitThread
 from thread_modules import DiscoverServer, BroadcastServer, SetThumbnailGrid
 from thread_modules import GetServerEpisodeInfo, PlayerGetEpn, SetThumbnail, observe_prop, Observe
@@ -364,6 +373,7 @@ class Ui_MainWindow(object):
         self.list1.setMouseTracking(True)
         #self.list1.setMinimumSize(QtCore.QSize(450, 16777215))
         self.verticalLayout_40.insertWidget(0, self.list1, 0)
+        self.list1.verticalScrollBar().valueChanged.connect(self.fetch_list1_page)
         
         self.btnEpnList = QtWidgets.QComboBox(MainWindow)
         self.btnEpnList.setObjectName(_fromUtf8("btnEpnList"))
@@ -1422,7 +1432,8 @@ class Ui_MainWindow(object):
         self.mplayer_timer.setSingleShot(True)
         self.version_number = (5, 0, 0, 1)
         self.threadPool = []
-        self.threadPoolthumb = []
+        self.thumbnail_scheduler = None
+        self.label_epn_list = []
         self.thumbnail_cnt = 0
         self.player_setLoop_var = False
         self.playerPlaylist_setLoop_var = 0
@@ -1470,6 +1481,7 @@ class Ui_MainWindow(object):
         if not os.path.isdir(self.video_db_location):
             os.makedirs(self.video_db_location)
         self.current_background = os.path.join(home, 'default.jpg')
+        self.video_image_fanart = self.current_background
         self.default_background = os.path.join(home, 'default.jpg')
         self.yt_sub_folder = os.path.join(home, 'External-Subtitle')
         
@@ -1505,6 +1517,17 @@ class Ui_MainWindow(object):
         self.quit_now = False
         self.system_bgcolor = ''
         self.thumbnail_engine = 'mpv'
+        self.thumbnail_workers = 'auto'
+        self.library_watcher = 'no'
+        self.library_watcher_obj = None
+        self.db_maintenance = True
+        self.db_maintenance_thread = None
+        self.db_maintenance_timer = None
+        self.catalog_import_thread = None
+        self.thumbnail_prewarm = True
+        self.thumbnail_prewarm_thread = None
+        self.metadata_batch_thread = None
+        self.metadata_pack_thread = None
         self.torrent_show_piece_map = False
         self.torrent_status_command = 'default'
         self.mpv_start = False
@@ -1648,6 +1671,9 @@ class Ui_MainWindow(object):
         self.epn_arr_list = []
         self.icon_size_arr = []
         self.original_path_name = []
+        self.list1_pager = None
+        self.list1_pager_opt = None
+        self.db_page_size = 500
         self.download_video = 0
         self.total_seek = 0
         self.new_tray_widget = None
@@ -1727,6 +1753,19 @@ class Ui_MainWindow(object):
                 screen_width, screen_height
                 )
         self.list_poster.hide()
+        self.thumbnail_cache = ThumbnailCache(home, logger)
+        self.audio_artwork = AudioArtwork(home, logger)
+        self.image_hash = ImageHashIndex(home, logger)
+        self.http_cache = HttpCache(os.path.join(home, 'http_cache'), logger)
+        set_http_cache(self.http_cache)
+        self.sprite_sheet = SpriteSheet(home, TMPDIR, logger)
+        self.thumbnail_scheduler = ThumbnailScheduler(self, logger, TMPDIR)
+        self.thumbnail_scheduler.thumbnail_ready.connect(self.thumbnail_generated)
+        self.image_loader = ImageLoader(self, logger, os.path.join(home, 'default.jpg'))
+        self.image_loader.image_ready.connect(self.image_prepared)
+        self.image_pipeline = ImagePipeline(TMPDIR, os.path.join(home, 'default.jpg'), logger)
+        self.list2.verticalScrollBar().valueChanged.connect(self.visible_thumbnail_rows)
+        self.list_poster.verticalScrollBar().valueChanged.connect(self.visible_thumbnail_rows)
         #self.settings_close_btn = QPushButtonExtra(MainWindow)
         #self.settings_close_btn.hide()
         self.settings_box = OptionsSettings(MainWindow, self, TMPDIR)
@@ -1749,8 +1788,14 @@ class Ui_MainWindow(object):
             verify = True
         else:
             verify = False
-        self.vnt = Vinanti(block=False, hdrs={'User-Agent':self.user_agent}, verify=verify)
-        self.tvdb = TVDB(lang='en', wait=0.2, hdrs={'User-Agent':self.user_agent})
+        self.vnt = Vinanti(
+            block=False, hdrs={'User-Agent':self.user_agent}, verify=verify,
+            cache=self.http_cache
+            )
+        self.tvdb = TVDB(
+            lang='en', wait=0.2, hdrs={'User-Agent':self.user_agent},
+            cache=self.http_cache
+            )
         self.yt = YTDL(self)
         self.frame_extra_toolbar = ExtraToolBar(MainWindow, self)
         self.verticalLayout_50.insertWidget(5, self.frame_extra_toolbar, 0)
@@ -2102,10 +2147,8 @@ class Ui_MainWindow(object):
                 fanart = self.default_background
             if os.path.isfile(fanart):
                 if not self.keep_background_constant or first_time:
-                    palette	= QtGui.QPalette()
-                    palette.setBrush(QtGui.QPalette.Background, 
-                                     QtGui.QBrush(QtGui.QPixmap(fanart)))
-                    MainWindow.setPalette(palette)
+                    self.image_loader.cancel('palette')
+                    self.image_loader.request('palette', 0, fanart)
                     self.current_background = fanart
         elif theme in ['system', 'transparent', 'mix', 'dark']:
             if theme == 'dark' and (first_time or rgb_tuple):
@@ -2122,11 +2165,14 @@ class Ui_MainWindow(object):
                     fanart_name, ext = fanart.rsplit('.', 1)
                     if not fanart_name.endswith('default'):
                         fanart_new = fanart_name + '-new.' + ext
-                        picn = self.image_fit_option(
+                        params = self.image_fit_params(
                                 fanart, fanart_new, fit_size=11, widget=ui.label_new
                                 )
-                        if os.path.exists(fanart_new):
-                            self.label_new.setPixmap(QtGui.QPixmap(fanart_new, "1"))
+                        self.image_loader.cancel('label_new')
+                        self.image_loader.request(
+                            'label_new', 0, fanart_new,
+                            prepare=partial(self.image_pipeline.render, **params)
+                            )
                     else:
                         self.label_new.clear()
             else:
@@ -2756,10 +2802,16 @@ class Ui_MainWindow(object):
                 "\npicn={0}, fanart={1}, image_fit_option={2}\n".format(
                 picn, fanart, self.image_fit_option_val))
             if var == 8:
-                self.image_fit_option(picn, fanart, fit_size=6, widget=self.label_new)
-            else:
-                self.image_fit_option(picn, fanart, fit_size=self.image_fit_option_val)
-            self.set_mainwindow_palette(fanart, theme=self.player_theme)
+                params = self.image_fit_params(picn, fanart, fit_size=6, widget=self.label_new)
+            else:
+                params = self.image_fit_params(picn, fanart, fit_size=self.image_fit_option_val)
+            jobs = []
+            if params:
+                jobs.append(partial(self.image_pipeline.render, **params))
+            self.image_loader.cancel('fanart')
+            self.image_loader.request(
+                'fanart', 0, fanart, prepare=partial(self.prepare_images, jobs, fanart)
+                )
         
     def webResize(self):
         global screen_width
@@ -2909,19 +2961,10 @@ class Ui_MainWindow(object):
                     wd = str(self.width_allowed)
                 else:
                     wd = str(self.label_new.maximumWidth())
-            if path.endswith('.mp3') or path.endswith('.flac'):
-                try:
-                    f = mutagen.File(path)
-                    artwork = f.tags['APIC:'].data
-                    with open(picn, 'wb') as img:
-                        img.write(artwork) 
-                except Exception as e:
-                    try:
-                        f = open(picn, 'w').close()
-                        print(e, '--9048--')
-                    except Exception as e:
-                        print(e, '--9065--')
-                        
+            if self.audio_artwork.is_audio(path):
+                art_file = self.audio_artwork.artwork(path)
+                if art_file:
+                    self.audio_artwork.export(art_file, picn)
             else:
                 subprocess.call(["ffmpegthumbnailer", "-i", path, "-o", picn, 
                             "-t", str(inter), '-q', '10', '-s', wd])
@@ -2937,24 +2980,18 @@ class Ui_MainWindow(object):
                     self.image_fit_option(picn, new_picn, fit_size=6, widget=self.label)
                 
     def generate_thumbnail_method(self, picn, interval, path,
-                                  width_allowed=None, from_client=None):
+                                  width_allowed=None, from_client=None,
+                                  tmp_dir=None):
         path = path.replace('"', '')
         inter = str(interval)
-        
-        new_tmp = '"'+TMPDIR+'"'
-        
-        if path.endswith('.mp3') or path.endswith('.flac'):
-            try:
-                f = mutagen.File(path)
-                artwork = f.tags['APIC:'].data
-                with open(picn, 'wb') as img:
-                    img.write(artwork) 
-            except Exception as e:
-                try:
-                    f = open(picn, 'w').close()
-                    print(e, '--9048--')
-                except Exception as e:
-                    print(e, '--9065--')
+        if tmp_dir is None:
+            tmp_dir = TMPDIR
+        new_tmp = '"'+tmp_dir+'"'
+        
+        if self.audio_artwork.is_audio(path):
+            art_file = self.audio_artwork.artwork(path)
+            if art_file:
+                self.audio_artwork.export(art_file, picn)
             logger.info("{0}:{1}".format(path, picn))
             if os.path.exists(picn) and os.stat(picn).st_size and not from_client:
                 self.image_fit_option(picn, picn, fit_size=6, widget=self.label)
@@ -3003,7 +3040,7 @@ class Ui_MainWindow(object):
                         if counter > 20:
                             proc.terminate()
                             break
-                picn_path = os.path.join(TMPDIR, '00000001.jpg')
+                picn_path = os.path.join(tmp_dir, '00000001.jpg')
                 if os.path.exists(picn_path):
                     shutil.copy(picn_path, picn)
                     os.remove(picn_path)
@@ -3011,53 +3048,37 @@ class Ui_MainWindow(object):
                         self.create_new_image_pixel(picn, 128)
                         self.create_new_image_pixel(picn, 480)
     
+    def create_default_image_pixel(self, pixel):
+        """pixel variant of default background, scaled only once"""
+        art_url_name = str(pixel)+'px.'+os.path.basename(self.default_background)
+        path_thumb, new_title = os.path.split(self.default_background)
+        abs_path_thumb = os.path.join(path_thumb, art_url_name)
+        if not os.path.exists(abs_path_thumb) and os.path.exists(self.default_background):
+            basewidth = pixel
+            img = Image.open(str(self.default_background))
+            wpercent = (basewidth / float(img.size[0]))
+            hsize = int((float(img.size[1]) * float(wpercent)))
+            img = img.resize((basewidth, hsize), PIL.Image.LANCZOS)
+            try:
+                img.save(str(abs_path_thumb))
+            except Exception as err:
+                print(err)
+                self.handle_png_to_jpg(abs_path_thumb, img)
+        return abs_path_thumb
+    
     def create_new_image_pixel(self, art_url, pixel):
         art_url_name = str(pixel)+'px.'+os.path.basename(art_url)
         path_thumb, new_title = os.path.split(art_url)
         abs_path_thumb = os.path.join(path_thumb, art_url_name)
         try:
             if not os.path.exists(abs_path_thumb) and os.path.exists(art_url):
-                basewidth = pixel
-                img = Image.open(str(art_url))
-                wpercent = (basewidth / float(img.size[0]))
-                hsize = int((float(img.size[1]) * float(wpercent)))
-                img = img.resize((basewidth, hsize), PIL.Image.LANCZOS)
-                try:
-                    img.save(str(abs_path_thumb))
-                except Exception as err:
-                    print(err)
-                    self.handle_png_to_jpg(abs_path_thumb, img)
+                self.thumbnail_cache.create_variants(art_url, pixel)
+            elif os.path.exists(abs_path_thumb):
+                self.thumbnail_cache.touch(art_url)
             elif not os.path.exists(art_url):
-                art_url_name = str(pixel)+'px.'+os.path.basename(self.default_background)
-                path_thumb, new_title = os.path.split(self.default_background)
-                abs_path_thumb = os.path.join(path_thumb, art_url_name)
-
-                if not os.path.exists(abs_path_thumb) and os.path.exists(self.default_background):
-                    basewidth = pixel
-                    img = Image.open(str(self.default_background))
-                    wpercent = (basewidth / float(img.size[0]))
-                    hsize = int((float(img.size[1]) * float(wpercent)))
-                    img = img.resize((basewidth, hsize), PIL.Image.LANCZOS)
-                    try:
-                        img.save(str(abs_path_thumb))
-                    except Exception as err:
-                        print(err)
-                        self.handle_png_to_jpg(abs_path_thumb, img)
+                abs_path_thumb = self.create_default_image_pixel(pixel)
         except:
-            art_url_name = str(pixel)+'px.'+os.path.basename(self.default_background)
-            path_thumb, new_title = os.path.split(self.default_background)
-            abs_path_thumb = os.path.join(path_thumb, art_url_name)
-            if not os.path.exists(abs_path_thumb) and os.path.exists(self.default_background):
-                basewidth = pixel
-                img = Image.open(str(self.default_background))
-                wpercent = (basewidth / float(img.size[0]))
-                hsize = int((float(img.size[1]) * float(wpercent)))
-                img = img.resize((basewidth, hsize), PIL.Image.LANCZOS)
-                try:
-                    img.save(str(abs_path_thumb))
-                except Exception as err:
-                    print(err)
-                    self.handle_png_to_jpg(abs_path_thumb, img)
+            abs_path_thumb = self.create_default_image_pixel(pixel)
         if abs_path_thumb and abs_path_thumb.endswith('.default.jpg'):
             return ''
         else:
@@ -3496,21 +3517,10 @@ class Ui_MainWindow(object):
     def mark_epn_thumbnail_label_new(self, txt, index):
         if txt.startswith('#'):
             txt = txt.replace('#', self.check_symbol, 1)
-        p1 = "self.label_epn_{0}".format(index)
-        label_number = eval(p1)
+        label_number = self.label_epn_list[index]
         label_number.setTextColor(self.thumbnail_text_color_dict[self.thumbnail_text_color_focus])
-        try:
-            p1 = "self.label_epn_{0}.setText('{1}')".format(index, txt)
-            exec(p1)
-        except Exception as e:
-            logger.debug('{0}::first try'.format(e))
-            try:
-                p1 = 'self.label_epn_{0}.setText("{1}")'.format(index, txt)
-                exec(p1)
-            except Exception as e:
-                logger.debug('{0}::Second try'.format(e))
-        p1="self.label_epn_{0}.setAlignment(QtCore.Qt.AlignCenter)".format(index)
-        exec(p1)
+        label_number.setText(txt)
+        label_number.setAlignment(QtCore.Qt.AlignCenter)
     
     def mark_epn_thumbnail_label(self, num, old_num=None):
         if self.idw and self.idw != self.get_winid() and self.idw != str(int(self.label.winId())):
@@ -3530,8 +3540,7 @@ class Ui_MainWindow(object):
         if r < 0:
             r = 0
         try:
-            p1="self.label_epn_"+str(r)+".y()"
-            yy=eval(p1)
+            yy = self.label_epn_list[r].y()
         except Exception as err:
             print(err)
             yy = 0
@@ -3548,8 +3557,7 @@ class Ui_MainWindow(object):
         self.tab_6.show()
         QtWidgets.QApplication.processEvents()
         try:
-            p1="self.label_epn_"+str(r)+".setFocus()"
-            exec(p1)
+            self.label_epn_list[r].setFocus()
         except Exception as err:
             print(err)
         if not context:
@@ -3573,12 +3581,10 @@ class Ui_MainWindow(object):
             c = self.current_thumbnail_position[1]
             print(r, c, '--thumbnail--7323--')
             thumbnail_index = self.thumbnail_label_number[0]
-            p6 = "self.gridLayout2.addWidget(self.label_epn_"+str(thumbnail_index)+", "+str(r)+", "+str(c)+", 1, 1, QtCore.Qt.AlignCenter)"
-            exec(p6)
-            p2 = "self.label_epn_"+str(thumbnail_index)+".setMaximumSize(QtCore.QSize("+width+", "+height+"))"
-            p3 = "self.label_epn_"+str(thumbnail_index)+".setMinimumSize(QtCore.QSize("+width+", "+height+"))"
-            exec(p2)
-            exec(p3)
+            label_epn = self.label_epn_list[thumbnail_index]
+            self.gridLayout2.addWidget(label_epn, r, c, 1, 1, QtCore.Qt.AlignCenter)
+            label_epn.setMaximumSize(QtCore.QSize(int(width), int(height)))
+            label_epn.setMinimumSize(QtCore.QSize(int(width), int(height)))
 
             self.gridLayout.setSpacing(5)
             self.superGridLayout.setContentsMargins(5, 5, 5, 5)
@@ -3924,8 +3930,7 @@ class Ui_MainWindow(object):
                     elif self.idw == str(int(self.label.winId())):
                         pass
                     else:
-                        p1 = "self.label_epn_{0}.winId()".format(str(self.thumbnail_label_number[0]))
-                        id_w = eval(p1)
+                        id_w = self.label_epn_list[self.thumbnail_label_number[0]].winId()
                         self.idw = str(int(id_w))
                         finalUrl = self.epn_return(self.cur_row)
                         self.play_file_now(finalUrl, win_id=self.idw)
@@ -4322,6 +4327,63 @@ class Ui_MainWindow(object):
         if item and not self.lock_process:
             if site in ["PlayLists", "Music"] or bookmark:
                 self.options('local') 
+    
+    def start_db_maintenance_on_idle(self):
+        """
+        Starts database maintenance once per session, when nothing is
+        playing and no thread is reading or writing the databases.
+        """
+        thread = self.db_maintenance_thread
+        if thread is None or thread.isRunning():
+            return
+        if thread.isFinished():
+            self.db_maintenance_timer.stop()
+            return
+        if self.mpvplayer_val.processId() > 0:
+            return
+        db_threads = [
+            getattr(self, 'update_thread', None), self.metadata_batch_thread,
+            self.metadata_pack_thread, self.catalog_import_thread
+            ]
+        if self.library_watcher_obj is not None:
+            db_threads.append(self.library_watcher_obj.update_thread)
+        for db_thread in db_threads:
+            if isinstance(db_thread, QtCore.QThread) and db_thread.isRunning():
+                return
+        thread.start(QtCore.QThread.LowestPriority)
+
+    def refresh_library_lists(self, directories):
+        """
+        Reloads title list of Video/Music section after library watcher
+        updated databases. Episode list is reloaded only when selected
+        title is one of changed directories and nothing is playing.
+        """
+        global site
+        item = self.list3.currentItem()
+        if self.lock_process or not item or site not in ['Video', 'Music']:
+            return
+        list_opt = item.text()
+        if site == 'Video' and list_opt.lower() in ['update', 'updateall']:
+            return
+        if site == 'Music' and list_opt not in [
+                'Artist', 'Album', 'Title', 'Directory',
+                'Fav-Artist', 'Fav-Album', 'Fav-Directory']:
+            return
+        cur_row = self.list1.currentRow()
+        cur_path = None
+        if 0 <= cur_row < len(self.original_path_name):
+            cur_path = self.original_path_name[cur_row]
+        self.list1.blockSignals(True)
+        try:
+            self.options('local')
+            if cur_path in self.original_path_name:
+                self.list1.setCurrentRow(self.original_path_name.index(cur_path))
+        finally:
+            self.list1.blockSignals(False)
+        if (site == 'Video' and cur_path and '\t' in cur_path
+                and cur_path.split('\t')[1] in directories
+                and self.mpvplayer_val.processId() == 0):
+            self.listfound()
         
     def prev_thumbnails(self):
         global thumbnail_indicator, total_till, browse_cnt
@@ -4331,9 +4393,7 @@ class Ui_MainWindow(object):
         if self.view_mode == 'thumbnail_light':
             self.list_poster.show_list(mode='prev')
             try:
-                for i in range(0, total_till_epn):
-                    t = "self.label_epn_{0}.deleteLater()".format(i)
-                    exec(t)
+                self.delete_label_epn_widgets()
                 total_till_epn=0
             
             except Exception as err:
@@ -4356,9 +4416,7 @@ class Ui_MainWindow(object):
                 logger.error(attr_err)
                 return 0
             try:
-                for i in range(0, total_till_epn):
-                    t = "self.label_epn_"+str(i)+".deleteLater()"
-                    exec(t)
+                self.delete_label_epn_widgets()
                 total_till_epn=0
             except Exception as err:
                 logger.error(err)
@@ -4799,8 +4857,7 @@ class Ui_MainWindow(object):
                 jj = 2*iconv_r
             kk = 0
             while(i<length):
-                p2 = "self.label_epn_{0}".format(i)
-                label_epn = eval(p2)
+                label_epn = self.label_epn_list[i]
                 label_hide = False
                 if range_show:
                     if i not in range_show:
@@ -4818,8 +4875,7 @@ class Ui_MainWindow(object):
                     j = j + 2*iconv_r
                     k = 0
                 
-                p2 = "self.label_epn_{0}".format(ii)
-                label_epn_txt = eval(p2)
+                label_epn_txt = self.label_epn_list[ii]
                 if not label_hide:
                     label_epn_txt.setMinimumWidth(width)
                     label_epn_txt.setMaximumWidth(width)
@@ -4900,8 +4956,7 @@ class Ui_MainWindow(object):
             label_txt = self.labelFrame2.text()
             self.labelFrame2.setText('Wait...')
             while(i<length):
-                p2 = "self.label_epn_{0}".format(i)
-                label_epn = eval(p2)
+                label_epn = self.label_epn_list[i]
                 label_hide = False
                 if range_show:
                     if i not in range_show:
@@ -4951,14 +5006,7 @@ class Ui_MainWindow(object):
                         if picn.startswith(self.check_symbol):
                             picn = picn[1:]
                     
-                    picn_old = picn
-                    if site == 'Video':
-                        picn = self.image_fit_option(picn_old, picn_old, fit_size=2, widget=label_epn)
-                    else:
-                        picn = self.image_fit_option(picn_old, '', fit_size=6, widget_size=(int(width), int(height)))
-                    img = QtGui.QPixmap(picn, "1")
-                    q1="self.label_epn_"+str(counter)+".setPixmap(img)"
-                    exec (q1)
+                    self.image_loader.request('grid', counter, picn, width, height)
                 
                 i=i+1
                 k = k+1
@@ -4966,8 +5014,7 @@ class Ui_MainWindow(object):
                     j = j + 2*iconv_r
                     k = 0
                 
-                p2 = "self.label_epn_{0}".format(ii)
-                label_epn_txt = eval(p2)
+                label_epn_txt = self.label_epn_list[ii]
                 if not label_hide:
                     label_epn_txt.setMinimumWidth(width)
                     label_epn_txt.setMaximumWidth(width)
@@ -4989,6 +5036,76 @@ class Ui_MainWindow(object):
             self.scrollArea1.show()
             self.scrollArea1.setFocus()
             
+    def thumbnail_server_picn(self, path):
+        thumb_name = hashlib.sha256(bytes(path, 'utf-8')).hexdigest()
+        return os.path.join(home, 'thumbnails', 'thumbnail_server', thumb_name+'.jpg')
+    
+    def thumbnail_prewarm_entries(self):
+        """(thumbnail, path) of entries of title saved in #LAST@TITLE"""
+        entries = []
+        last_title = self.history_dict_obj.get('#LAST@TITLE')
+        if not last_title or not self.list1.currentItem():
+            return entries
+        title = last_title[2]
+        if self.list1.currentItem().text() != title:
+            return entries
+        for row, row_string in enumerate(self.epn_arr_list):
+            try:
+                picn, path = self.get_thumbnail_image_path(
+                    row, row_string, only_name=True, send_path=True, title_list=title
+                    )
+                entries.append((picn, path))
+            except Exception as err:
+                logger.error(err)
+        return entries
+    
+    def start_thumbnail_prewarm(self, library=None, delay=30000):
+        if library:
+            entries = None
+        else:
+            entries = self.thumbnail_prewarm_entries()
+            if not entries:
+                return
+        self.thumbnail_prewarm_thread = ThumbnailPrewarmThread(self, entries, logger)
+        QtCore.QTimer.singleShot(
+            delay,
+            partial(self.thumbnail_prewarm_thread.start, QtCore.QThread.LowestPriority)
+            )
+    
+    def start_metadata_batch(self, entries=None, overwrite=False, retry_failed=False):
+        if self.metadata_batch_thread and self.metadata_batch_thread.isRunning():
+            self.gui_signals.display_string('Metadata: batch already running')
+            return
+        if self.image_fit_option_val in range(1, 11) and self.image_fit_option_val != 6:
+            img_opt = self.image_fit_option_val
+        else:
+            img_opt = 1
+        batch = MetadataBatch(
+            self, home, TMPDIR, logger, img_opt=img_opt,
+            progress=self.gui_signals.display_string
+            )
+        self.metadata_batch_thread = MetadataBatchThread(
+            self, batch, entries, overwrite, retry_failed
+            )
+        self.metadata_batch_thread.start()
+    
+    def start_metadata_pack(self, mode):
+        if self.metadata_pack_thread and self.metadata_pack_thread.isRunning():
+            self.gui_signals.display_string('Metadata pack: already running')
+            return
+        if mode == 'export':
+            fname = QtWidgets.QFileDialog.getSaveFileName(
+                MainWindow, 'Export Metadata Pack',
+                os.path.join(self.last_dir, 'kawaii-metadata-pack.db'))
+        else:
+            fname = QtWidgets.QFileDialog.getOpenFileName(
+                MainWindow, 'Import Metadata Pack', self.last_dir)
+        if fname and fname[0]:
+            self.metadata_pack_thread = MetadataPackThread(
+                self, MetadataPack(home, logger), mode, fname[0], logger
+                )
+            self.metadata_pack_thread.start()
+    
     def get_thumbnail_image_path(self, row_cnt, row_string, only_name=None,
                                  title_list=None, start_async=None, send_path=None,
                                  fullsize=None, filename=None):
@@ -5018,12 +5135,22 @@ class Ui_MainWindow(object):
                 path = self.if_path_is_rel(path, thumbnail=True)
                 
             path = path.replace('"', '')
-            thumb_name_bytes = bytes(path, 'utf-8')
-            h = hashlib.sha256(thumb_name_bytes)
-            thumb_name = h.hexdigest()
-            picn = os.path.join(thumbnail_dir, thumb_name+'.jpg')
+            picn = self.thumbnail_server_picn(path)
             pic = ''
-            if site == "Music":
+            if site == "Music" and self.audio_artwork.has_artwork_tags(path):
+                known, art_file = self.audio_artwork.lookup(path)
+                if art_file:
+                    picn = art_file
+                elif known and self.audio_artwork.is_audio(path):
+                    picn = self.default_background
+                    if '	' in title and len(title.split('	')) > 2:
+                        art_n = title.split('	')[2]
+                        if OSNAME != 'posix':
+                            art_n = self.replace_special_characters(art_n)
+                        pic = os.path.join(home, 'Music', 'Artist', art_n, 'poster.jpg')
+                        if os.path.exists(pic) and os.stat(pic).st_size:
+                            picn = pic
+            if site == "Music" and picn.startswith(thumbnail_dir):
                 if os.path.exists(picn):
                     if os.stat(picn).st_size == 0:
                         art_n =title.split('	')[2]
@@ -5071,6 +5198,8 @@ class Ui_MainWindow(object):
             return picn
         if fullsize and filename:
             picn = filename
+        elif path and os.path.exists(picn) and self.thumbnail_cache.is_stale(picn, path):
+            self.thumbnail_cache.remove(picn)
         if ((picn and not os.path.exists(picn) and 'http' not in path) 
                 or (picn and not os.path.exists(picn) and 'http' in path and 'youtube.com' in path)
                 or (picn and 'http' in path and site.lower() == 'myserver' and not os.path.exists(picn))
@@ -5086,13 +5215,7 @@ class Ui_MainWindow(object):
                 size = screen_width
             else:
                 size = None
-            self.threadPoolthumb.append(ThreadingThumbnail(self, logger, path, picn, inter, size))
-            self.threadPoolthumb[len(self.threadPoolthumb)-1].finished.connect(
-                partial(self.thumbnail_generated, row_cnt, picn))
-            length = len(self.threadPoolthumb)
-            if length == 1:
-                if not self.threadPoolthumb[0].isRunning():
-                    self.threadPoolthumb[0].start()
+            self.thumbnail_scheduler.submit(row_cnt, picn, path, inter, size)
         return picn
     
     def thumbnailEpn(self):
@@ -5165,11 +5288,8 @@ class Ui_MainWindow(object):
                     create_widget = False
                 else:
                     create_widget = True
-                p1 = "self.label_epn_{0} = ThumbnailWidget(self.scrollAreaWidgetContents1)".format(i)
-                exec (p1)
-                p1 = "l_{0} = weakref.ref(self.label_epn_{0})".format(i)
-                exec (p1)
-                label_epn = eval('self.label_epn_{0}'.format(i))
+                label_epn = ThumbnailWidget(self.scrollAreaWidgetContents1)
+                self.set_label_epn(i, label_epn)
                 label_epn.setup_globals(MainWindow, ui, home, TMPDIR, logger, screen_width, screen_height)
                 label_epn.setMaximumSize(QtCore.QSize(width, height))
                 label_epn.setMinimumSize(QtCore.QSize(width, height))
@@ -5246,12 +5366,7 @@ class Ui_MainWindow(object):
                         
                 picn_old = picn
                 if not start_already:
-                    if site == 'Video':
-                        picn = ui.image_fit_option(picn_old, picn_old, fit_size=2, widget=label_epn)
-                    else:
-                        picn = ui.image_fit_option(picn_old, '', fit_size=6, widget_size=(int(width), int(height)))
-                    img = QtGui.QPixmap(picn, "1")
-                    label_epn.setPixmap(img)
+                    self.image_loader.request('grid', counter, picn, width, height)
                 
                 i=i+1
                 k = k+1
@@ -5259,11 +5374,8 @@ class Ui_MainWindow(object):
                     j = j + 2*iconv_r
                     k = 0
                     
-                p1 = "self.label_epn_{} = QtWidgets.QLabel(self.scrollAreaWidgetContents1)".format(ii)
-                exec(p1)
-                p7 = "l_"+str(ii)+" = weakref.ref(self.label_epn_"+str(ii)+")"
-                exec(p7)
-                label_epn_txt = eval('self.label_epn_{0}'.format(ii))
+                label_epn_txt = QtWidgets.QLabel(self.scrollAreaWidgetContents1)
+                self.set_label_epn(ii, label_epn_txt)
                 label_epn_txt.setMinimumWidth(width)
                 label_epn_txt.setObjectName(_fromUtf8('label_epn_{}'.format(ii)))
                 self.gridLayout2.addWidget(label_epn_txt, jj, kk, 1, 1, QtCore.Qt.AlignCenter)
@@ -5384,8 +5496,7 @@ class Ui_MainWindow(object):
                 if self.mpvplayer_val.processId() > 0:
                     self.mpvNextEpnList(play_row=num, mode= 'play_now')
                 else:
-                    exec_str = 'self.label_epn_{0}.change_video_mode({1}, {2})'.format(num, self.video_mode_index, num)
-                    exec(exec_str)
+                    self.label_epn_list[num].change_video_mode(self.video_mode_index, num)
                 thumb_mode = True
             else:
                 if self.mpvplayer_val.processId() > 0:
@@ -5420,8 +5531,7 @@ class Ui_MainWindow(object):
                     print(e)
         if MainWindow.isFullScreen() and site.lower() != 'music' and self.list2.isHidden():
             if thumb_mode:
-                exec_str = 'self.label_epn_{0}.player_thumbnail_fs(mode="{1}")'.format(num, 'fs')
-                exec(exec_str)
+                self.label_epn_list[num].player_thumbnail_fs(mode='fs')
             else:
                 if self.player_val == "libmpv":
                     self.tab_5.mpv.set_property('fullscreen', 'yes')
@@ -5601,9 +5711,7 @@ class Ui_MainWindow(object):
                     t = "self.label_"+str(i)+".deleteLater()"
                     exec(t)
             if total_till_epn > 0:
-                for i in range(total_till_epn):
-                    t = "self.label_epn_"+str(i)+".deleteLater()"
-                    exec(t)
+                self.delete_label_epn_widgets()
             self.list_poster.clear()
             self.list_poster.title_clicked = False
             total_till = 0
@@ -5744,12 +5852,8 @@ class Ui_MainWindow(object):
                 exec (t)
                 i = i+1
             total_till = 0
-        i = 0
         if total_till_epn > 0:
-            while(i<total_till_epn):
-                t = "self.label_epn_"+str(i)+".deleteLater()"
-                exec (t)
-                i = i+1
+            self.delete_label_epn_widgets()
             total_till_epn = 0
             
         if self.tab_6.isHidden():
@@ -5805,15 +5909,12 @@ class Ui_MainWindow(object):
                 self.labelFrame2.setText(txt)
                 self.list1.setCurrentRow(row)
             elif mode == 'epn':
-                p1 = "self.label_epn_"+str(row)+".y()"
-                yy = eval(p1)
+                yy = self.label_epn_list[row].y()
                 self.scrollArea1.verticalScrollBar().setValue(yy -10)
                 if focus:
-                    p1 = "self.label_epn_"+str(row)+".setFocus()"
-                    exec(p1)
+                    self.label_epn_list[row].setFocus()
                 new_cnt = row+self.list2.count()
-                p1 = "self.label_epn_{0}".format(new_cnt)
-                label_number = eval(p1)
+                label_number = self.label_epn_list[new_cnt]
                 #label_number.setTextColor(self.thumbnail_text_color_dict[self.thumbnail_text_color_focus])
                 self.setLabelTextStyle(label_number, self.thumbnail_text_color_focus)
                 txt = label_number.text()
@@ -6025,25 +6126,29 @@ class Ui_MainWindow(object):
         return path
     
     def metadata_copy(self, dir_path, picn, thumbnail=None, mode=None,
-                      img_opt=None, site=None):
+                      img_opt=None, site=None, display=True):
         if not os.path.exists(dir_path):
             os.makedirs(dir_path)
         if mode == 'img' and os.path.isfile(picn) and thumbnail:
             self.image_fit_option(picn, thumbnail, fit_size=450)
             shutil.copy(picn, os.path.join(dir_path, 'poster.jpg'))
+            self.image_hash.add(os.path.join(dir_path, 'poster.jpg'))
             if os.path.exists(thumbnail):
                 self.image_fit_option(picn, thumbnail, fit_size=6, widget=self.label)
                 shutil.copy(thumbnail, os.path.join(dir_path, 'thumbnail.jpg'))
-            self.videoImage(
-                picn, os.path.join(dir_path, 'thumbnail.jpg'),
-                os.path.join(dir_path, 'fanart.jpg'), '')
+            if display:
+                self.videoImage(
+                    picn, os.path.join(dir_path, 'thumbnail.jpg'),
+                    os.path.join(dir_path, 'fanart.jpg'), '')
         elif mode == 'fanart' and os.path.isfile(picn) and img_opt:
             self.image_fit_option(picn, picn, fit_size=img_opt)
             shutil.copy(picn, os.path.join(dir_path, 'original-fanart.jpg'))
+            self.image_hash.add(os.path.join(dir_path, 'original-fanart.jpg'))
             shutil.copy(picn, os.path.join(dir_path, 'fanart.jpg'))
-            self.videoImage(
-                picn, os.path.join(dir_path, 'thumbnail.jpg'),
-                os.path.join(dir_path, 'fanart.jpg'), '')
+            if display:
+                self.videoImage(
+                    picn, os.path.join(dir_path, 'thumbnail.jpg'),
+                    os.path.join(dir_path, 'fanart.jpg'), '')
         elif mode == 'summary' and os.path.isfile(picn):
             if site == 'Music':
                 file_path = os.path.join(dir_path, 'bio.txt')
@@ -6187,6 +6292,12 @@ class Ui_MainWindow(object):
         if os.path.exists(thumb):
             Image.open(thumb).show()
     
+    def image_downloaded(self, out_file, callback, *args):
+        """vinanti callback, args are task number, url and result"""
+        if len(args) > 1:
+            self.image_hash.record_url(args[1], out_file)
+        callback()
+    
     def metadata_fetched(self, *args):
         nm, fan, po, sm, eps = args[0], args[1], args[2], args[3], args[4]
         vd, st, epr, obj, val = args[5], args[6], args[7], args[8], args[9]
@@ -6201,15 +6312,27 @@ class Ui_MainWindow(object):
             if obj.summary and sm:
                 self.copySummary(new_name=nm, copy_sum=txt)
         elif val == 'poster':
-            arr = random.sample(obj.poster, len(obj.poster))
+            arr = self.image_hash.choose(random.sample(obj.poster, len(obj.poster)))
             if arr and po:
                 logger.debug(arr[0])
-                self.vnt.get(arr[0], out=thumb, onfinished=partial(self.copyImg, nm))
+                if self.image_hash.lookup_url(arr[0], thumb):
+                    self.copyImg(nm)
+                else:
+                    self.vnt.get(
+                        arr[0], out=thumb,
+                        onfinished=partial(self.image_downloaded, thumb, partial(self.copyImg, nm))
+                        )
         elif val == 'fanart':
-            arr = random.sample(obj.fanart, len(obj.fanart))
+            arr = self.image_hash.choose(random.sample(obj.fanart, len(obj.fanart)))
             if arr and fan:
                 logger.debug(arr[0])
-                self.vnt.get(arr[0], out=fanart, onfinished=partial(self.copyFanart, nm))
+                if self.image_hash.lookup_url(arr[0], fanart):
+                    self.copyFanart(nm)
+                else:
+                    self.vnt.get(
+                        arr[0], out=fanart,
+                        onfinished=partial(self.image_downloaded, fanart, partial(self.copyFanart, nm))
+                        )
         elif val == 'episode-info' and eps and vd and epr:
             self.metaengine.map_episodes(
                 tvdb_dict=obj.episode_summary.copy(), epn_arr=epr.copy(), name=nm,
@@ -6462,7 +6585,7 @@ class Ui_MainWindow(object):
                 elif mark_val == 'mark' and not i.startswith(self.check_symbol):
                     url1 = self.epn_arr_list[row].split('	')[1]
                     item.setText(self.check_symbol+i)
-                    self.media_data.update_video_count('mark', url1, rownum=row)
+                    self.media_data.update_video_count('mark', url1, rownum=row, played=False)
                 elif mark_val == 'unmark' and i.startswith(self.check_symbol):
                     url1 = self.epn_arr_list[row].split('	')[1]
                     i = i[1:]
@@ -6726,6 +6849,8 @@ class Ui_MainWindow(object):
             print(update_pl_thumb, 'update_playlist_thumb')
             row = self.list2.currentRow()
             self.list2.clear()
+            self.thumbnail_scheduler.cancel_pending()
+            self.image_loader.cancel('playlist')
             if self.view_mode == "thumbnail_light":
                 self.list_poster.clear()
             for i in new_epn_arr:
@@ -6739,11 +6864,25 @@ class Ui_MainWindow(object):
                 if self.view_mode == "thumbnail_light":
                     self.list_poster.addItem(i)
             self.list2.setCurrentRow(row)
+            self.visible_thumbnail_rows()
             if self.list1.currentItem():
                 title_list = self.list1.currentItem().text()
             else:
                 title_list = 'NONE'
-            new_thread = SetThumbnail(self, logger, new_epn_arr, update_pl_thumb, title_list)
+            icon_list = []
+            if ((self.list1.currentItem() or self.show_search_thumbnail)
+                    and self.list_with_thumbnail and update_pl_thumb):
+                for k, i in enumerate(new_epn_arr):
+                    try:
+                        icon_list.append(self.get_thumbnail_image_path(k, i, title_list=title_list))
+                    except Exception as e:
+                        print(e)
+                        icon_list.append(None)
+            if self.view_mode == "thumbnail_light":
+                size = 256
+            else:
+                size = 128
+            new_thread = SetThumbnail(self, logger, icon_list, size)
             self.set_thumbnail_thread_list.append(new_thread)
             self.set_thumbnail_thread_list[len(self.set_thumbnail_thread_list) - 1].finished.connect(
                 partial(self.thumbnail_thread_finished, len(self.set_thumbnail_thread_list) - 1))
@@ -6763,12 +6902,7 @@ class Ui_MainWindow(object):
             if list_thumb and update_pl:
                 try:
                     icon_name = self.get_thumbnail_image_path(k, epnArr[k])
-                    icon_new_pixel = self.create_new_image_pixel(icon_name, 128)
-                    if os.path.exists(icon_new_pixel):
-                        try:
-                            self.list2.item(k).setIcon(QtGui.QIcon(icon_new_pixel))
-                        except:
-                            pass
+                    self.image_loader.request('playlist', k, icon_name, pixel=128)
                 except Exception as e:
                     print(e)
         txt_str = str(self.list1.count())+'/'+str(self.list2.count())
@@ -6934,22 +7068,75 @@ class Ui_MainWindow(object):
                     size = 256
                 else:
                     size = 128
-                icon_new_pixel = self.create_new_image_pixel(picn, size)
-                if icon_new_pixel is not None and os.path.exists(icon_new_pixel):
-                    try:
-                        if row < self.list2.count():
-                            self.list2.item(row).setIcon(QtGui.QIcon(icon_new_pixel))
-                            if ui.view_mode == "thumbnail_light" and ui.list_poster.title_clicked:
-                                ui.list_poster.item(row).setIcon(QtGui.QIcon(icon_new_pixel))
-                    except Exception as err:
-                        logger.error(err)
+                self.image_loader.request('playlist', row, picn, pixel=size)
         except Exception as err:
             logger.error(err)
         logger.info("Thumbnail Process Ended")
-        self.threadPoolthumb = self.threadPoolthumb[1:]
-        length = len(self.threadPoolthumb)
-        if length > 0 and not self.threadPoolthumb[0].isRunning():
-            self.threadPoolthumb[0].start()
+
+    def image_prepared(self, target, index, path, image):
+        """Receives images prepared by image_loader in worker threads"""
+        try:
+            if target == 'playlist':
+                if index < self.list2.count():
+                    icon = QtGui.QIcon(QtGui.QPixmap.fromImage(image))
+                    self.list2.item(index).setIcon(icon)
+                    if (self.view_mode == "thumbnail_light" and self.list_poster.title_clicked
+                            and index < self.list_poster.count()):
+                        self.list_poster.item(index).setIcon(icon)
+            elif target == 'grid':
+                if index < len(self.label_epn_list) and self.label_epn_list[index] is not None:
+                    self.label_epn_list[index].setPixmap(QtGui.QPixmap.fromImage(image))
+            elif target == 'palette':
+                palette	= QtGui.QPalette()
+                palette.setBrush(QtGui.QPalette.Background,
+                                 QtGui.QBrush(QtGui.QPixmap.fromImage(image)))
+                MainWindow.setPalette(palette)
+            elif target == 'label_new':
+                self.label_new.setPixmap(QtGui.QPixmap.fromImage(image))
+            elif target == 'fanart':
+                self.set_mainwindow_palette(path, theme=self.player_theme)
+            elif target == 'label':
+                self.video_image_prepared(path, image)
+            elif target == 'float_window':
+                self.float_window.setPixmap(QtGui.QPixmap.fromImage(image))
+        except Exception as err:
+            logger.error(err)
+
+    def prepare_images(self, jobs, path):
+        """prepare function of image_loader: runs jobs in order and returns path"""
+        for job in jobs:
+            job()
+        return path
+
+    def set_label_epn(self, index, widget):
+        if index >= len(self.label_epn_list):
+            self.label_epn_list.extend([None]*(index + 1 - len(self.label_epn_list)))
+        self.label_epn_list[index] = widget
+
+    def delete_label_epn_widgets(self):
+        self.image_loader.cancel('grid')
+        for widget in self.label_epn_list:
+            if widget is not None:
+                widget.deleteLater()
+        self.label_epn_list[:] = []
+
+    def visible_thumbnail_rows(self, value=None):
+        rows = set()
+        widgets = [self.list2]
+        if self.view_mode == "thumbnail_light" and self.list_poster.title_clicked:
+            widgets.append(self.list_poster)
+        for widget in widgets:
+            if widget.isHidden() or not widget.count():
+                continue
+            rect = widget.viewport().rect()
+            first = widget.indexAt(rect.topLeft()).row()
+            last = widget.indexAt(rect.bottomRight()).row()
+            if first < 0:
+                first = 0
+            if last < 0:
+                last = min(first + 50, widget.count() - 1)
+            rows.update(range(first, last + 1))
+        self.thumbnail_scheduler.set_visible_rows(rows)
     
     def preview(self):
         txt = str(self.chk.text())
@@ -7070,15 +7257,11 @@ class Ui_MainWindow(object):
             else:
                 while(i < length):
                     if item_index[i] == 1:
-                        t = "self.label_epn_"+str(i)+".show()"
-                        exec(t)
-                        t = "self.label_epn_"+str(i+length1)+".show()"
-                        exec(t)
+                        self.label_epn_list[i].show()
+                        self.label_epn_list[i+length1].show()
                     else:
-                        t = "self.label_epn_"+str(i)+".hide()"
-                        exec(t)
-                        t = "self.label_epn_"+str(i+length1)+".hide()"
-                        exec(t)
+                        self.label_epn_list[i].hide()
+                        self.label_epn_list[i+length1].hide()
                     i = i+1
             
     def filter_label_list(self):
@@ -8495,6 +8678,75 @@ class Ui_MainWindow(object):
         im.putalpha(alpha)
         return im
 
+    def image_fit_params(self, picn, fanart, fit_size=None, widget=None,
+                         widget_size=None, color=None):
+        """
+        Arguments of image_pipeline.render for image_fit_option. Sizes of
+        widgets are read here, so it should be called from GUI thread.
+        Returns None if nothing is to be rendered.
+        """
+        global screen_height, screen_width
+        if not fit_size:
+            return None
+        if not color:
+            color = 'RGB'
+        params = {
+            'src': picn, 'out': fanart, 'fit_size': fit_size, 'size': None,
+            'screen': (screen_width, screen_height), 'color': color
+            }
+        if (fit_size == 1 or fit_size == 2) or fit_size > 100:
+            alt_asp = False
+            if fit_size == 1 or fit_size == 2:
+                if widget:
+                    basewidth = widget.width()
+                    alt_asp = True
+                else:
+                    basewidth = screen_width
+            else:
+                basewidth = fit_size
+            params['size'] = (basewidth, None)
+            if widget == self.float_window or alt_asp:
+                if os.path.isfile(fanart):
+                    params['src'] = fanart
+                params.update(
+                    {'size': (basewidth, widget.height()), 'letterbox': True, 'out': None}
+                    )
+        elif fit_size == 11:
+            params['size'] = (widget.maximumWidth(), widget.maximumHeight())
+        elif fit_size == 9 or fit_size == 10:
+            baseheight = screen_height - (self.frame1.height()+self.label.height()+100)
+            if fit_size == 9:
+                basewidth = screen_width - self.width_allowed - 40
+            else:
+                basewidth = screen_width - 2*self.width_allowed - 40
+            params['size'] = (basewidth, baseheight)
+        elif fit_size == 6 or fit_size == 4:
+            if widget and fit_size == 6:
+                if widget in [self.label, self.label_new]:
+                    basewidth = widget.maximumWidth()
+                    baseheight = widget.maximumHeight()
+                    params['resized_only'] = True
+                elif widget == self.float_window:
+                    basewidth = widget.width()
+                    baseheight = widget.height()
+                    params['out'] = None
+                else:
+                    return None
+            elif fit_size == 4:
+                basewidth = screen_width - self.width_allowed
+                baseheight = screen_height
+            elif widget_size:
+                basewidth, baseheight = widget_size
+                params.update({'resized_only': True, 'out': None})
+            else:
+                basewidth = self.float_window.width()
+                baseheight = self.float_window.height()
+                params['out'] = None
+            params['size'] = (basewidth, baseheight)
+        elif fit_size not in (3, 5, 7, 8):
+            return None
+        return params
+
     def image_fit_option(self, picn, fanart, fit_size=None, widget=None,
                          widget_size=None, color=None):
         """
@@ -8508,281 +8760,20 @@ class Ui_MainWindow(object):
         fit_size = 7. Fit to Screen Height (Left Side) with black border gap 
         between two posters
         fit_size = 8. Fit to Screen Height (Left Side) with black border
+        
+        Rendering is done by image_pipeline, which skips fits already
+        rendered from unchanged source. Fits written to temporary file are
+        returned.
         """
-        #print(color,'--color--')
-        #logger.info('{0}:{1}:{2}:{3}:{4}:{5}'.format(picn,fanart,fit_size,widget,widget_size,color))
-        global screen_height, screen_width
-        if not color:
-            color = 'RGB'
-        color_val = (56,60,74)
         try:
-            if fit_size:
-                if (fit_size == 1 or fit_size == 2) or fit_size > 100:
-                    alt_asp = False
-                    if fit_size == 1 or fit_size == 2:
-                        if widget:
-                            basewidth = widget.width()
-                            alt_asp = True
-                        else:
-                            basewidth = screen_width
-                    else:
-                        basewidth = fit_size
-                    try:
-                        if widget == self.float_window or alt_asp:
-                            if os.path.isfile(fanart):
-                                img = Image.open(str(fanart))
-                            else:
-                                img = Image.open(str(picn))
-                        else:
-                            img = Image.open(str(picn))
-                    except Exception as e:
-                        print(e, 'Error in opening image, videoImage, ---13238')
-                        picn = os.path.join(home, 'default.jpg')
-                        img = Image.open(str(picn))
-                    if fit_size == 1:
-                        hsize = screen_height
-                    else:
-                        wpercent = (basewidth / float(img.size[0]))
-                        hsize = int((float(img.size[1]) * float(wpercent)))
-                    
-                    if widget == self.float_window or alt_asp:
-                        img = img.resize((basewidth, hsize), PIL.Image.LANCZOS)
-                        bg = Image.new(color, (basewidth, widget.height()))
-                        if hsize < widget.height():
-                            offset = int((widget.height() - hsize)/2)
-                            bg.paste(img, (0, offset))
-                            #bg.paste(img, (0, 0))
-                            #bg.paste(img, (0, hsize))
-                        else:
-                            bg.paste(img, (0, 0))
-                        tmp_img = (os.path.join(TMPDIR, 'tmp.jpg'))
-                        try:
-                            bg.save(str(tmp_img), 'JPEG', quality=100)
-                        except Exception as err:
-                            print(err)
-                            self.handle_png_to_jpg(tmp_img, bg)
-                        return tmp_img
-                    else:
-                        img = img.resize((basewidth, hsize), PIL.Image.LANCZOS)
-                        bg = Image.new(color, (basewidth, hsize))
-                        bg.paste(img, (0, 0))
-                        try:
-                            bg.save(str(fanart), 'JPEG', quality=100)
-                        except Exception as err:
-                            print(err)
-                            self.handle_png_to_jpg(fanart, bg)
-                elif fit_size == 3:
-                    baseheight = screen_height
-                    try:
-                        img = Image.open(str(picn))
-                    except Exception as e:
-                        print(e, 'Error in opening image, videoImage, ---13253')
-                        picn = os.path.join(home, 'default.jpg')
-                        img = Image.open(str(picn))
-                    wpercent = (baseheight / float(img.size[1]))
-                    wsize = int((float(img.size[0]) * float(wpercent)))
-                    img = img.resize((wsize, baseheight), PIL.Image.LANCZOS)
-                    #img.save(str(fanart), 'JPEG', quality=100)
-                    bg = Image.new(color, (wsize, screen_height))
-                    bg.paste(img, (0, 0))
-                    try:
-                        bg.save(str(fanart), 'JPEG', quality=100)
-                    except Exception as err:
-                        print(err)
-                        self.handle_png_to_jpg(fanart, bg)
-                elif fit_size == 7:
-                    baseheight = screen_height
-                    try:
-                        img = Image.open(str(picn))
-                    except Exception as e:
-                        print(e, 'Error in opening image, videoImage, ---13268')
-                        picn = os.path.join(home, 'default.jpg')
-                        img = Image.open(str(picn))
-                    wpercent = (baseheight / float(img.size[1]))
-                    wsize = int((float(img.size[0]) * float(wpercent)))
-                    img = img.resize((wsize, baseheight), PIL.Image.LANCZOS)
-                    bg = Image.new(color, (wsize+20, baseheight))
-                    offset = (0, 0)
-                    bg.paste(img, offset)
-                    try:
-                        bg.save(str(fanart), 'JPEG', quality=100)
-                    except Exception as err:
-                        print(err)
-                        self.handle_png_to_jpg(fanart, bg)
-                elif fit_size == 5 or fit_size == 8:
-                    baseheight = screen_height
-                    try:
-                        img = Image.open(str(picn))
-                    except Exception as e:
-                        print(e, 'Error in opening image, videoImage, ---13284')
-                        picn = os.path.join(home, 'default.jpg')
-                        img = Image.open(str(picn))
-                    wpercent = (baseheight / float(img.size[1]))
-                    wsize = int((float(img.size[0]) * float(wpercent)))
-                    sz = (wsize, baseheight)
-                    img = img.resize((wsize, baseheight), PIL.Image.LANCZOS)
-                    bg = Image.new(color, (screen_width, screen_height), color_val)
-                    if fit_size == 5:
-                        offset = (int((screen_width-wsize)/2), int((screen_height-baseheight)/2))
-                    else:
-                        offset = (int((0)), int((screen_height-baseheight)/2))
-                    bg.paste(img, offset)
-                    try:
-                        bg.save(str(fanart), 'JPEG', quality=100)
-                    except Exception as err:
-                        print(err)
-                        self.handle_png_to_jpg(fanart, bg)
-                elif fit_size == 11:
-                    width = widget.maximumWidth()
-                    baseheight = height = widget.maximumHeight()
-                    logger.debug('{} -----> {} {}'.format(fit_size, width, baseheight))
-                    try:
-                        img = Image.open(str(picn))
-                    except Exception as e:
-                        print(e, 'Error in opening image, videoImage, ---13284')
-                        picn = os.path.join(home, 'default.jpg')
-                        img = Image.open(str(picn))
-                    wpercent = (baseheight / float(img.size[1]))
-                    wsize = int((float(img.size[0]) * float(wpercent)))
-                    sz = (wsize, baseheight)
-                    
-                    img = img.resize(sz, PIL.Image.LANCZOS)
-                    bg = Image.new(color, sz, "black")
-                    #offset = (int((width-wsize)/2), int((height-baseheight)/2))
-                    bg.paste(img)
-                    try:
-                        bg.save(str(fanart), 'JPEG', quality=100)
-                    except Exception as err:
-                        print(err)
-                        self.handle_png_to_jpg(fanart, bg)
-                elif fit_size == 9 or fit_size == 10:
-                    baseheight = screen_height - (self.frame1.height()+self.label.height()+100)
-                    #baseheight = screen_height - self.label.x()
-                    if fit_size == 9:
-                        basewidth = screen_width - self.width_allowed - 40
-                    else:
-                        basewidth = screen_width - 2*self.width_allowed - 40
-                    try:
-                        img = Image.open(str(picn))
-                    except Exception as e:
-                        print(e, 'Error in opening image, videoImage, ---13284')
-                        picn = os.path.join(home, 'default.jpg')
-                        img = Image.open(str(picn))
-                    #img = self.round_corner(img, 30)
-                    wpercent = (basewidth / float(img.size[0]))
-                    hsize = int((float(img.size[1]) * float(wpercent)))
-                    bg = Image.new(color, (screen_width, screen_height), color_val)
-                    #bg = Image.open(os.path.join(home, 'default.jpg'))
-                    if hsize < screen_height:
-                        sz = (basewidth, hsize)
-                        img = img.resize((basewidth, hsize), PIL.Image.LANCZOS)
-                        offset = (20,20)
-                        #new_offset = (20+basewidth, 20)
-                        bg.paste(img, offset)
-                        #bg.paste(img, new_offset)
-                        try:
-                            bg.save(str(fanart), 'JPEG', quality=100)
-                        except Exception as err:
-                            print(err)
-                            self.handle_png_to_jpg(fanart, bg)
-                    else:
-                        wp = float(baseheight/hsize)
-                        nbw = int(float(wp)*float(basewidth))
-                        img = img.resize((nbw, baseheight), PIL.Image.LANCZOS)
-                        offset = (20, 20)
-                        if fit_size == 9:
-                            new_offset = (40+nbw, 20)
-                        else:
-                            new_offset = (20+nbw, 20)
-                        bg.paste(img, offset)
-                        bg.paste(img, new_offset)
-                        try:
-                            bg.save(str(fanart), 'JPEG', quality=100)
-                        except Exception as err:
-                            print(err)
-                            self.handle_png_to_jpg(fanart, bg)
-                elif fit_size == 6 or fit_size == 4:
-                    if widget and fit_size == 6:
-                        if widget in [self.label, self.label_new]:
-                            basewidth = widget.maximumWidth()
-                            baseheight = widget.maximumHeight()
-                        else:
-                            basewidth = widget.width()
-                            baseheight = widget.height()
-                    elif fit_size == 4:
-                        basewidth = screen_width - self.width_allowed
-                        baseheight = screen_height
-                    else:
-                        if widget_size:
-                            basewidth = widget_size[0]
-                            baseheight = widget_size[1]
-                        else:
-                            basewidth = self.float_window.width()
-                            baseheight = self.float_window.height()
-                    if fit_size == 6:
-                        bg = Image.new(color, (basewidth, baseheight))
-                    else:
-                        bg = Image.new(color, (basewidth, baseheight))
-                    try:
-                        if os.path.exists(picn) and os.stat(picn).st_size:
-                            img = Image.open(str(picn))
-                        else:
-                            picn = os.path.join(home, 'default.jpg')
-                            img = Image.open(str(picn))
-                    except Exception as e:
-                        logger.error('{0}::Error in opening image, videoImage ---13321'.format(e))
-                        picn = os.path.join(home, 'default.jpg')
-                        img = Image.open(str(picn))
-                    wpercent = (basewidth / float(img.size[0]))
-                    hsize = int((float(img.size[1]) * float(wpercent)))
-                    sz = (basewidth, hsize)
-                    if hsize > baseheight:
-                        wp = float(baseheight/hsize)
-                        nbw = int(float(wp)*float(basewidth))
-                        img = img.resize((nbw, baseheight), PIL.Image.LANCZOS)
-                        offset = (int((basewidth-nbw)/2), 0)
-                    else:
-                        img = img.resize((basewidth, hsize), PIL.Image.LANCZOS)
-                        offset = (0, int((baseheight-hsize)/2))
-                    bg.paste(img, offset)
-                    
-                    if widget and fit_size == 6:
-                        if widget in [self.label, self.label_new]:
-                            try:
-                                img.save(str(fanart), 'JPEG', quality=100)
-                            except Exception as err:
-                                logger.error(err)
-                                self.handle_png_to_jpg(fanart, img)
-                        elif widget == self.float_window:
-                            tmp_img = (os.path.join(TMPDIR, 'tmp.jpg'))
-                            try:
-                                bg.save(str(tmp_img), 'JPEG', quality=100)
-                            except Exception as err:
-                                print(err)
-                                self.handle_png_to_jpg(tmp_img, bg)
-                            return tmp_img
-                    elif widget_size:
-                        tmp_img = (os.path.join(TMPDIR, 'tmp.jpg'))
-                        try:
-                            img.save(str(tmp_img), 'JPEG', quality=100)
-                        except Exception as err:
-                            print(err)
-                            self.handle_png_to_jpg(tmp_img, img)
-                        return tmp_img
-                    elif fit_size == 4:
-                        try:
-                            bg.save(str(fanart), 'JPEG', quality=100)
-                        except Exception as err:
-                            print(err)
-                            self.handle_png_to_jpg(fanart, bg)
-                    else:
-                        tmp_img = (os.path.join(TMPDIR, 'tmp.jpg'))
-                        try:
-                            bg.save(str(tmp_img), 'JPEG', quality=100)
-                        except Exception as err:
-                            print(err)
-                            self.handle_png_to_jpg(tmp_img, bg)
-                        return tmp_img
+            params = self.image_fit_params(
+                picn, fanart, fit_size=fit_size, widget=widget,
+                widget_size=widget_size, color=color
+                )
+            if params:
+                result = self.image_pipeline.render(**params)
+                if params['out'] is None:
+                    return result
         except Exception as e:
             print(e, ':Error in resizing and changing aspect ratio --13353--')
     
@@ -8821,6 +8812,21 @@ class Ui_MainWindow(object):
         #img.save(str(tmp_img), 'JPEG', quality=100)
         return tmp_img
     
+    def video_image_prepared(self, picn, image):
+        """Shows images rendered for videoImage by image_loader"""
+        fanart = self.video_image_fanart
+        if self.player_theme != "default" and "thumbnail_server" in picn:
+            logger.debug("Escaping thumbnail label for theme = {}".format(self.player_theme))
+        else:
+            self.label.setPixmap(QtGui.QPixmap.fromImage(image))
+        if not self.float_window.isHidden():
+            params = self.image_fit_params(picn, fanart, fit_size=2, widget=self.float_window)
+            if params:
+                self.image_loader.request(
+                    'float_window', 0, picn,
+                    prepare=partial(self.image_pipeline.render, **params)
+                    )
+
     def apply_text_change(self):
         self.text.setText(self.text_change_content)
     
@@ -8842,10 +8848,13 @@ class Ui_MainWindow(object):
             original_fanart = os.path.join(image_dir, 'original-fanart.jpg')
             logger.info('videoimage picn file is {0}'.format(picn))
             if os.path.isfile(str(picn)):
+                jobs = []
                 if not os.path.isfile(fanart):
                     if not os.path.exists(original_fanart):
-                        shutil.copy(picn, original_fanart)
-                    self.image_fit_option(picn, fanart, fit_size=img_opt)
+                        jobs.append(partial(shutil.copy, picn, original_fanart))
+                    params = self.image_fit_params(picn, fanart, fit_size=img_opt)
+                    if params:
+                        jobs.append(partial(self.image_pipeline.render, **params))
                 get_thumbnail = False
                 if os.path.isfile(thumbnail):
                     if not os.stat(thumbnail).st_size:
@@ -8853,33 +8862,36 @@ class Ui_MainWindow(object):
                 elif not os.path.isfile(thumbnail):
                     get_thumbnail = True
                 if get_thumbnail:
-                    self.image_fit_option(picn, thumbnail, fit_size=6, widget=self.label)
+                    params = self.image_fit_params(picn, thumbnail, fit_size=6, widget=self.label)
+                    if params:
+                        jobs.append(partial(self.image_pipeline.render, **params))
                 poster = picn
                 picn = thumbnail
+                self.video_image_fanart = fanart
                 if (picn == thumbnail == fanart):
                     pass
                 else:
-                    self.gui_signals.fanart_changed(fanart, self.player_theme)
+                    jobs.append(partial(self.gui_signals.fanart_changed, fanart, self.player_theme))
                 try:
                     poster_dir, _ = os.path.split(poster)
                     poster_picn = os.path.join(poster_dir, 'thumbnail.jpg')
                     if 'poster.jpg' in poster:
                         if not os.path.exists(poster_picn):
-                            self.image_fit_option(poster, poster_picn, fit_size=6, widget=self.label)
+                            params = self.image_fit_params(
+                                poster, poster_picn, fit_size=6, widget=self.label
+                                )
+                            if params:
+                                jobs.append(partial(self.image_pipeline.render, **params))
                         picn = poster_picn
                 except Exception as e:
                     print(e, '--10147--')
                     
                 logger.info(picn)
-                if self.player_theme != "default" and "thumbnail_server" in picn:
-                    logger.debug("Escaping thumbnail label for theme = {}".format(self.player_theme))
-                else:
-                    self.label.setPixmap(QtGui.QPixmap(picn, "1"))
-                if not self.float_window.isHidden():
-                    picn = self.image_fit_option(
-                        picn, fanart, fit_size=2, widget=self.float_window
-                        )
-                    self.float_window.setPixmap(QtGui.QPixmap(picn, "1"))
+                self.image_loader.cancel('label')
+                self.image_loader.cancel('float_window')
+                self.image_loader.request(
+                    'label', 0, picn, prepare=partial(self.prepare_images, jobs, picn)
+                    )
             else:
                 if os.path.exists(self.default_background):
                     dir_n, p = os.path.split(self.default_background)
@@ -9060,8 +9072,7 @@ class Ui_MainWindow(object):
                     self.idw = str(win_id)
                 elif thumbnail_indicator and self.video_mode_index not in [1, 2]:
                     try:
-                        p1 = 'self.label_epn_{0}.winId()'.format(str(self.thumbnail_label_number[0]))
-                        self.idw = str(int(eval(p1)))
+                        self.idw = str(int(self.label_epn_list[self.thumbnail_label_number[0]].winId()))
                     except Exception as e:
                         print(e)
                         self.idw = self.get_winid()
@@ -9158,8 +9169,7 @@ class Ui_MainWindow(object):
                     self.idw = str(win_id)
                 elif thumbnail_indicator and self.video_mode_index not in [1, 2]:
                     try:
-                        p1 = 'self.label_epn_{0}.winId()'.format(str(self.thumbnail_label_number[0]))
-                        self.idw = str(int(eval(p1)))
+                        self.idw = str(int(self.label_epn_list[self.thumbnail_label_number[0]].winId()))
                     except Exception as e:
                         print(e)
                         self.idw = self.get_winid()
@@ -10384,6 +10394,7 @@ class Ui_MainWindow(object):
                     finalUrl = self.yt.get_yt_url(finalUrl, self.quality_val,
                                                   self.ytdl_path, logger,
                                                   mode=yt_mode)
+                    self.yt_prefetch_next(row)
         if site not in ["PlayLists", "None", "Music", "Video"]:
             if site != "Local":
                 try:
@@ -10436,7 +10447,24 @@ class Ui_MainWindow(object):
                 finalUrl = self.yt.get_yt_url(finalUrl, self.quality_val,
                                               self.ytdl_path, logger,
                                               mode=yt_mode)
+                self.yt_prefetch_next(row)
         return finalUrl
+    
+    def yt_prefetch_next(self, row, count=2):
+        """Resolves youtube urls of next queue or playlist entries in background"""
+        urls = []
+        for item in self.queue_url_list + self.epn_arr_list[row+1:]:
+            if len(urls) >= count:
+                break
+            if '\t' in item:
+                url = item.split('\t')[1]
+            else:
+                url = item.replace('#', '', 1)
+            url = url.replace('"', '')
+            if 'youtube.com' in url or url.startswith('ytdl:'):
+                urls.append(url)
+        if urls:
+            self.yt.prefetch(urls, self.quality_val, self.ytdl_path)
         
     def watchDirectly(self, finalUrl, title, quit_val):
         global site
@@ -11298,10 +11326,9 @@ class Ui_MainWindow(object):
                     if self.playlist_continue and self.quit_really == "no" and not self.epn_wait_thread.isRunning():
                         if self.tab_5.isHidden() and thumbnail_indicator:
                             length_1 = self.list2.count()
-                            q3="self.label_epn_"+str(length_1+self.thumbnail_label_number[0])+".setText(self.epn_name_in_list)"
-                            exec(q3)
-                            q3="self.label_epn_"+str(length_1+self.thumbnail_label_number[0])+".setAlignment(QtCore.Qt.AlignCenter)"
-                            exec(q3)
+                            label_epn_txt = self.label_epn_list[length_1+self.thumbnail_label_number[0]]
+                            label_epn_txt.setText(self.epn_name_in_list)
+                            label_epn_txt.setAlignment(QtCore.Qt.AlignCenter)
                         if site in ["Video", "Music", "PlayLists", "None", "MyServer"]:
                             if queue_item is None or isinstance(queue_item, tuple):
                                 move_ahead = True
@@ -11600,10 +11627,9 @@ class Ui_MainWindow(object):
                                 self.getNextInList(eofcode='end')
                         if self.tab_5.isHidden() and thumbnail_indicator:
                             length_1 = self.list2.count()
-                            q3="self.label_epn_"+str(length_1+self.thumbnail_label_number[0])+".setText((self.epn_name_in_list))"
-                            exec (q3)
-                            q3="self.label_epn_"+str(length_1+self.thumbnail_label_number[0])+".setAlignment(QtCore.Qt.AlignCenter)"
-                            exec(q3)
+                            label_epn_txt = self.label_epn_list[length_1+self.thumbnail_label_number[0]]
+                            label_epn_txt.setText(self.epn_name_in_list)
+                            label_epn_txt.setAlignment(QtCore.Qt.AlignCenter)
                             QtWidgets.QApplication.processEvents()
                     elif self.quit_really == "yes":
                         self.player_stop.clicked_emit() 
@@ -11615,10 +11641,9 @@ class Ui_MainWindow(object):
         global site
         if self.tab_5.isHidden() and thumbnail_indicator and self.video_mode_index not in [6, 7] and self.player_val.lower() in ["mpv", "mplayer"]:
             length_1 = self.list2.count()
-            q3="self.label_epn_"+str(length_1+self.thumbnail_label_number[0])+".setText((self.epn_name_in_list))"
-            exec(q3)
-            q3="self.label_epn_"+str(length_1+self.thumbnail_label_number[0])+".setAlignment(QtCore.Qt.AlignCenter)"
-            exec(q3)
+            label_epn_txt = self.label_epn_list[length_1+self.thumbnail_label_number[0]]
+            label_epn_txt.setText(self.epn_name_in_list)
+            label_epn_txt.setAlignment(QtCore.Qt.AlignCenter)
             QtWidgets.QApplication.processEvents()
         logger.debug("Process Started")
         logger.debug(self.mpvplayer_val.processId())
@@ -11789,38 +11814,22 @@ class Ui_MainWindow(object):
                     newTitle = self.check_symbol+self.epn_name_in_list
                     
                 sumry = "<html><h1>"+self.epn_name_in_list+"</h1></html>"
-                q4="self.label_epn_"+str(title_num)+".setToolTip((sumry))"
-                exec (q4)
-                q3="self.label_epn_"+str(title_num)+".setText((newTitle))"
-                exec (q3)
-                q3="self.label_epn_"+str(title_num)+".setAlignment(QtCore.Qt.AlignCenter)"
-                exec(q3)
+                label_epn_txt = self.label_epn_list[title_num]
+                label_epn_txt.setToolTip(sumry)
+                label_epn_txt.setText(newTitle)
+                label_epn_txt.setAlignment(QtCore.Qt.AlignCenter)
                 QtWidgets.QApplication.processEvents()
                 
-                p1 = "self.label_epn_"+str(row)+".y()"
-                ht=eval(p1)
+                ht = self.label_epn_list[row].y()
                 
                 self.scrollArea1.verticalScrollBar().setValue(ht)
                 self.labelFrame2.setText(newTitle)
                 
                 new_cnt = self.cur_row + self.list2.count()
-                p1 = "self.label_epn_{0}".format(new_cnt)
-                label_number = eval(p1)
+                label_number = self.label_epn_list[new_cnt]
                 label_number.setTextColor(self.thumbnail_text_color_dict[self.thumbnail_text_color_focus])
-                p1 = "self.label_epn_{0}.text()".format(new_cnt)
-                txt = eval(p1)
-                try:
-                    p1 = "self.label_epn_{0}.text('{1}')".format(new_cnt, txt)
-                    exec(p1)
-                except Exception as e:
-                    print(e, '--line--4597--')
-                    try:
-                        p1 = 'self.label_epn_{0}.text("{1}")'.format(new_cnt, txt)
-                        exec(p1)
-                    except Exception as e:
-                        print(e)
-                p1="self.label_epn_{0}.setAlignment(QtCore.Qt.AlignCenter)".format(new_cnt)
-                exec(p1)
+                txt = label_number.text()
+                label_number.setAlignment(QtCore.Qt.AlignCenter)
                 QtWidgets.QApplication.processEvents()
             except Exception as e:
                 logger.error(e)
@@ -11835,57 +11844,30 @@ class Ui_MainWindow(object):
                     else:
                         newTitle = self.check_symbol+self.epn_name_in_list
                     sumry = "<html><h1>"+self.epn_name_in_list+"</h1></html>"
-                    q4="self.label_epn_"+str(title_num)+".setToolTip((sumry))"
-                    exec (q4)
-                    q3="self.label_epn_"+str(title_num)+".setText((newTitle))"
-                    exec (q3)
-                    q3="self.label_epn_"+str(title_num)+".setAlignment(QtCore.Qt.AlignCenter)"
-                    exec(q3)
+                    label_epn_txt = self.label_epn_list[title_num]
+                    label_epn_txt.setToolTip(sumry)
+                    label_epn_txt.setText(newTitle)
+                    label_epn_txt.setAlignment(QtCore.Qt.AlignCenter)
                     QtWidgets.QApplication.processEvents()
                     
                     if self.video_mode_index == 2:
-                        p1 = "self.label_epn_"+str(row)+".y()"
-                        ht=eval(p1)
+                        ht = self.label_epn_list[row].y()
                         self.scrollArea1.verticalScrollBar().setValue(ht)
                     self.labelFrame2.setText(newTitle)
                     
                     new_cnt = self.cur_row + self.list2.count()
-                    p1 = "self.label_epn_{0}".format(new_cnt)
-                    label_number = eval(p1)
+                    label_number = self.label_epn_list[new_cnt]
                     label_number.setTextColor(self.thumbnail_text_color_dict[self.thumbnail_text_color_focus])
-                    p1 = "self.label_epn_{0}.text()".format(new_cnt)
-                    txt = eval(p1)
-                    try:
-                        p1 = "self.label_epn_{0}.text('{1}')".format(new_cnt, txt)
-                        exec(p1)
-                    except Exception as e:
-                        print(e, '--line--4597--')
-                        try:
-                            p1 = 'self.label_epn_{0}.text("{1}")'.format(new_cnt, txt)
-                            exec(p1)
-                        except Exception as e:
-                            print(e)
-                    p1="self.label_epn_{0}.setAlignment(QtCore.Qt.AlignCenter)".format(new_cnt)
-                    exec(p1)
+                    txt = label_number.text()
+                    label_number.setAlignment(QtCore.Qt.AlignCenter)
                     
                     init_cnt = self.thumbnail_label_number[0] + self.list2.count()
                     if self.quit_really == 'yes':
                         txt = self.thumbnail_label_number[1]
-                    p1 = "self.label_epn_{0}".format(init_cnt)
-                    label_number = eval(p1)
+                    label_number = self.label_epn_list[init_cnt]
                     label_number.setTextColor(self.thumbnail_text_color_dict[self.thumbnail_text_color_focus])
-                    try:
-                        p1 = "self.label_epn_{0}.setText('{1}')".format(init_cnt, txt)
-                        exec(p1)
-                    except Exception as e:
-                        print(e, '--line--4597--')
-                        try:
-                            p1 = 'self.label_epn_{0}.setText("{1}")'.format(init_cnt, txt)
-                            exec(p1)
-                        except Exception as e:
-                            print(e)
-                    p1="self.label_epn_{0}.setAlignment(QtCore.Qt.AlignCenter)".format(init_cnt)
-                    exec(p1)
+                    label_number.setText(txt)
+                    label_number.setAlignment(QtCore.Qt.AlignCenter)
                 except Exception as e:
                     logger.error(e)
     
@@ -12890,6 +12872,40 @@ class Ui_MainWindow(object):
             self.list_poster.show_list(mode='prev')
             self.dockWidget_3.show()
             
+    def list1_paged_options(self):
+        return [
+            "Artist", "Album", "Title", "Directory",
+            "Fav-Artist", "Fav-Album", "Fav-Directory"
+            ]
+
+    def fetch_list1_page(self, value=None):
+        """
+        Appends next page of music category to list1 when list1 (or
+        list_poster) is scrolled near the end. Only Music categories are
+        paged so far; Video categories and list2 still load every row.
+        """
+        global site
+        if self.list1_pager is None or self.list1_pager.finished:
+            return 0
+        if value is not None:
+            if value < self.list1.verticalScrollBar().maximum() - 10:
+                return 0
+        if (site != "Music" or not self.list3.currentItem()
+                or self.list3.currentItem().text() != self.list1_pager_opt):
+            self.list1_pager.close()
+            self.list1_pager = None
+            return 0
+        start = self.list1.count()
+        for i in self.list1_pager.fetch_page():
+            title = i[0]
+            self.original_path_name.append(title)
+            if self.list1_pager_opt in ["Directory", "Fav-Directory"]:
+                title = os.path.basename(title)
+            self.list1.addItem(title)
+        if not self.list_poster.isHidden():
+            self.list_poster.add_items(start)
+        return self.list1.count() - start
+
     def options(self, val=None):
         global opt, pgn, genre_num, site, name
         global pre_opt, mirrorNo, home, siteName, finalUrlFound
@@ -12939,6 +12955,9 @@ class Ui_MainWindow(object):
             print(music_opt)
             
             artist =[]
+            if self.list1_pager:
+                self.list1_pager.close()
+                self.list1_pager = None
             if music_opt == "Playlist":
                 pls = os.path.join(home, 'Playlists')
                 if os.path.exists(pls):
@@ -12946,6 +12965,13 @@ class Ui_MainWindow(object):
                     m.sort()
                     for i in m:
                         artist.append(i)
+            elif music_opt in self.list1_paged_options():
+                self.list1_pager = self.media_data.get_music_db(
+                    music_db, music_opt, "", page_size=self.db_page_size
+                    )
+                self.list1_pager_opt = music_opt
+                for i in self.list1_pager.fetch_page():
+                    artist.append(i[0])
             else:
                 m = self.media_data.get_music_db(music_db, music_opt, "")
                 for i in m:
@@ -13167,11 +13193,7 @@ class Ui_MainWindow(object):
                             self.scrollArea.show()
                             if thumbnail_indicator:
                                 thumbnail_indicator.pop()
-                            i = 0
-                            while(i<total_till_epn):
-                                t = "self.label_epn_"+str(i)+".deleteLater()"
-                                exec (t)
-                                i = i+1
+                            self.delete_label_epn_widgets()
                             total_till_epn=0
                             self.next_page('deleted')
                             #self.thumbnail_label_update_epn()
@@ -14778,6 +14800,60 @@ def main():
                             ui.thumbnail_engine = k
                     except Exception as e:
                         print(e)
+                elif i.startswith('THUMBNAIL_CACHE_SIZE='):
+                    try:
+                        k = int(j)
+                        if k >= 0:
+                            ui.thumbnail_cache.set_quota(k)
+                    except Exception as e:
+                        print(e)
+                elif i.startswith('THUMBNAIL_WORKERS='):
+                    try:
+                        k = j.lower()
+                        if k.isdigit() and int(k) > 0:
+                            ui.thumbnail_workers = int(k)
+                            ui.thumbnail_scheduler.set_workers(int(k))
+                    except Exception as e:
+                        print(e)
+                elif i.startswith('DB_MAINTENANCE='):
+                    try:
+                        k = j.lower()
+                        if k in ['no', 'false', '0']:
+                            ui.db_maintenance = False
+                    except Exception as e:
+                        print(e)
+                elif i.startswith('HTTP_CACHE_SIZE='):
+                    try:
+                        k = j.lower()
+                        if k.isdigit():
+                            ui.http_cache.max_bytes = int(k)*1024*1024
+                    except Exception as e:
+                        print(e)
+                elif i.startswith('HTTP_CACHE_TTL='):
+                    try:
+                        for host_ttl in j.split(','):
+                            if ':' in host_ttl:
+                                host, ttl = host_ttl.rsplit(':', 1)
+                                if ttl.strip().isdigit():
+                                    ui.http_cache.set_host_ttl(host.strip(), int(ttl))
+                    except Exception as e:
+                        print(e)
+                elif i.startswith('THUMBNAIL_PREWARM='):
+                    try:
+                        k = j.lower()
+                        if k in ['no', 'false', '0']:
+                            ui.thumbnail_prewarm = False
+                    except Exception as e:
+                        print(e)
+                elif i.startswith('LIBRARY_WATCHER='):
+                    try:
+                        k = j.lower()
+                        if k in ['yes', 'true', '1', 'auto']:
+                            ui.library_watcher = 'auto'
+                        elif k == 'poll':
+                            ui.library_watcher = 'poll'
+                    except Exception as e:
+                        print(e)
                 elif i.startswith('LIVE_PREVIEW_QUALITY='):
                     try:
                         k = j.lower()
@@ -15115,6 +15191,12 @@ def main():
             else:
                 f.write("\nGET_LIBRARY=pycurl")
                 f.write("\nTHUMBNAIL_ENGINE=mpv")
+            f.write("\n#THUMBNAIL_WORKERS=auto,1,2,3...")
+            f.write("\nTHUMBNAIL_WORKERS=auto")
+            f.write("\n#THUMBNAIL_CACHE_SIZE in MB, 0 = unlimited")
+            f.write("\nTHUMBNAIL_CACHE_SIZE=500")
+            f.write("\n#LIBRARY_WATCHER=no,auto,poll")
+            f.write("\nLIBRARY_WATCHER=no")
             f.write("\n#IMAGE_FIT_OPTION=0-9")
             f.write("\nIMAGE_FIT_OPTION=3")
             f.write("\nAUTH=NONE")
@@ -15466,6 +15548,26 @@ def main():
     if ui.player_theme == "system":
         ui.cover_label.hide()
     MainWindow.show()
+    if ui.library_watcher != 'no':
+        ui.library_watcher_obj = LibraryWatcher(ui, home, logger, mode=ui.library_watcher)
+        ui.library_watcher_obj.library_changed.connect(ui.refresh_library_lists)
+        ui.library_watcher_obj.start()
+    ui.catalog_import_thread = CatalogImportThread(ui, logger)
+    QtCore.QTimer.singleShot(
+        30000,
+        partial(ui.catalog_import_thread.start, QtCore.QThread.LowestPriority)
+        )
+    if ui.db_maintenance:
+        db_list = [
+            os.path.join(home, 'VideoDB', 'Video.db'),
+            os.path.join(home, 'Music', 'Music.db'),
+            ui.media_data.catalog.catalog_db
+            ]
+        ui.db_maintenance_thread = DatabaseMaintenanceThread(ui, db_list, logger)
+        ui.db_maintenance_timer = QtCore.QTimer()
+        ui.db_maintenance_timer.setInterval(120000)
+        ui.db_maintenance_timer.timeout.connect(ui.start_db_maintenance_on_idle)
+        ui.db_maintenance_timer.start()
     
     if len(sys.argv) >= 2:
         logger.info(sys.argv)
@@ -15510,6 +15612,10 @@ def main():
             ui.IconViewEpn(start=True, mode=1)
         else:
             ui.experiment_list({"mode":"start", "epi": episode_index, "title_index": name_index})
+    if '--prewarm-thumbnails' in sys.argv:
+        ui.start_thumbnail_prewarm(library=True, delay=5000)
+    elif ui.thumbnail_prewarm:
+        ui.start_thumbnail_prewarm()
     logger.debug('FullScreen={}'.format(ui.force_fs))
     if ui.force_fs:
         MainWindow.showFullScreen()
@@ -15544,6 +15650,17 @@ def main():
     Application Quits"""
     logger.debug(('Return code = {}'.format(ret), "Saving settings before quit"))
     save_all_settings_before_quit()
+    if ui.thumbnail_prewarm_thread is not None:
+        ui.thumbnail_prewarm_thread.stop()
+        ui.thumbnail_prewarm_thread.wait()
+    if ui.metadata_batch_thread is not None:
+        ui.metadata_batch_thread.stop()
+    ui.yt.resolver.close()
+    if ui.library_watcher_obj is not None:
+        ui.library_watcher_obj.stop()
+    ui.thumbnail_cache.flush()
+    ui.audio_artwork.flush()
+    ui.thumbnail_scheduler.close()
     del app
     #sys.exit(ret)
     if os.path.exists(ui.mpv_socket):
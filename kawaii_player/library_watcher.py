@@ -0,0 +1,279 @@
+"""
+Copyright (C) 2017 kanishka-linux kanishka.linux@gmail.com
+
+This file is part of kawaii-player.
+
+kawaii-player is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kawaii-player is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kawaii-player.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+from PyQt5 import QtCore
+from PyQt5.QtCore import pyqtSlot, pyqtSignal
+from player_functions import open_files
+
+
+class LibraryScanThread(QtCore.QThread):
+
+    """
+    Walks directories listed in local.txt off the GUI thread and
+    returns list of directories to be watched.
+    """
+
+    directories_found = pyqtSignal(list)
+
+    def __init__(self, home, logr, directories=None):
+        QtCore.QThread.__init__(self)
+        self.home = home
+        self.logger = logr
+        self.directories = directories
+
+    def __del__(self):
+        self.wait()
+
+    def run(self):
+        if self.directories is None:
+            local_file = os.path.join(self.home, 'local.txt')
+            roots = []
+            if os.path.isfile(local_file):
+                for lines_d in open_files(local_file, True):
+                    lines_d = lines_d.strip()
+                    if lines_d and not lines_d.startswith('#'):
+                        roots.append(os.path.normpath(lines_d))
+        else:
+            roots = self.directories
+        dir_list = []
+        for dirn in roots:
+            if os.path.isdir(dirn):
+                dir_list.append(dirn)
+                try:
+                    for r, d, f in os.walk(dirn, followlinks=False):
+                        if self.isInterruptionRequested():
+                            return
+                        d[:] = [x for x in d if not x.startswith('.')]
+                        for z in d:
+                            dir_list.append(os.path.join(r, z))
+                except (PermissionError, OSError) as err:
+                    self.logger.error('Error walking directory {}: {}'.format(dirn, err))
+        self.directories_found.emit(dir_list)
+
+
+class LibraryUpdateThread(QtCore.QThread):
+
+    """
+    Applies incremental changes of modified directories to Video.db
+    and Music.db.
+    """
+
+    library_updated = pyqtSignal(list, int, int)
+
+    def __init__(self, ui_widget, home, logr, directories):
+        QtCore.QThread.__init__(self)
+        self.ui = ui_widget
+        self.home = home
+        self.logger = logr
+        self.directories = directories
+
+    def __del__(self):
+        self.wait()
+
+    def run(self):
+        video_db = os.path.join(self.home, 'VideoDB', 'Video.db')
+        music_db = os.path.join(self.home, 'Music', 'Music.db')
+        video_changed = 0
+        music_changed = 0
+        for directory in self.directories:
+            if self.isInterruptionRequested():
+                break
+            try:
+                video_changed += self.ui.media_data.update_video_directory(video_db, directory)
+                music_changed += self.ui.media_data.update_music_directory(music_db, directory)
+            except Exception as err:
+                self.logger.error('{0}::{1}'.format(err, directory))
+        self.library_updated.emit(self.directories, video_changed, music_changed)
+
+
+class LibraryWatcher(QtCore.QObject):
+
+    """
+    Keeps Video and Music database in sync with directories of local.txt.
+
+    QFileSystemWatcher (inotify on linux) is used for notifications.
+    Directories which can't be watched (watch limit reached, network mounts)
+    are polled by comparing their mtime. Events are collected and applied
+    after debounce interval, so that copying many files results in a
+    single database update per directory.
+
+    mode: 'auto' = QFileSystemWatcher with polling fallback,
+          'poll' = polling only
+    """
+
+    library_changed = pyqtSignal(list)
+
+    def __init__(self, ui_widget, home, logr, mode='auto',
+                 debounce=3000, poll_interval=60000):
+        QtCore.QObject.__init__(self)
+        self.ui = ui_widget
+        self.home = home
+        self.logger = logr
+        self.mode = mode
+        self.watcher = None
+        self.scan_thread = None
+        self.update_thread = None
+        self.pending = set()
+        self.scan_queue = []
+        self.known_dirs = set()
+        self.initial_scan_done = False
+        self.poll_dirs = {}
+        self.debounce_timer = QtCore.QTimer()
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(debounce)
+        self.debounce_timer.timeout.connect(self.apply_changes)
+        self.poll_timer = QtCore.QTimer()
+        self.poll_timer.setInterval(poll_interval)
+        self.poll_timer.timeout.connect(self.poll_directories)
+
+    def start(self, directories=None):
+        if self.mode == 'auto' and self.watcher is None:
+            self.watcher = QtCore.QFileSystemWatcher()
+            self.watcher.directoryChanged.connect(self.directory_changed)
+        if self.scan_thread is not None and self.scan_thread.isRunning():
+            # running thread isn't replaced, directories are scanned after it
+            if directories is not None:
+                self.scan_queue.extend(i for i in directories if i not in self.scan_queue)
+            return
+        self.scan_thread = LibraryScanThread(self.home, self.logger, directories)
+        self.scan_thread.directories_found.connect(self.add_directories)
+        self.scan_thread.finished.connect(self.scan_finished)
+        self.scan_thread.start()
+
+    @pyqtSlot()
+    def scan_finished(self):
+        if self.scan_queue and self.initial_scan_done:
+            directories = self.scan_queue[:]
+            self.scan_queue[:] = []
+            self.start(directories=directories)
+
+    def stop(self):
+        self.debounce_timer.stop()
+        self.poll_timer.stop()
+        if self.watcher is not None:
+            watched = self.watcher.directories()
+            if watched:
+                self.watcher.removePaths(watched)
+        self.poll_dirs.clear()
+        self.pending.clear()
+        self.scan_queue[:] = []
+        self.known_dirs.clear()
+        self.initial_scan_done = False
+        for thread in (self.scan_thread, self.update_thread):
+            if thread is not None and thread.isRunning():
+                thread.requestInterruption()
+                thread.wait()
+
+    def restart(self):
+        self.stop()
+        self.start()
+
+    @pyqtSlot(list)
+    def add_directories(self, dir_list):
+        dir_list = [i for i in dir_list if i not in self.known_dirs]
+        self.known_dirs.update(dir_list)
+        if self.initial_scan_done and dir_list:
+            # directories created after initial scan need to be indexed
+            self.pending.update(dir_list)
+            self.debounce_timer.start()
+        self.initial_scan_done = True
+        failed = dir_list
+        if self.watcher is not None and dir_list:
+            failed = self.watcher.addPaths(dir_list)
+        for dirn in failed:
+            try:
+                self.poll_dirs.update({dirn: os.stat(dirn).st_mtime})
+            except OSError as err:
+                self.logger.error('{0}::{1}'.format(err, dirn))
+        if self.poll_dirs and not self.poll_timer.isActive():
+            self.poll_timer.start()
+        if self.watcher is not None:
+            watch_count = len(self.watcher.directories())
+        else:
+            watch_count = 0
+        self.logger.info(
+            'library watcher: {0} directories watched, {1} polled'.format(
+                watch_count, len(self.poll_dirs))
+            )
+
+    def poll_directories(self):
+        for dirn, mtime in list(self.poll_dirs.items()):
+            try:
+                new_mtime = os.stat(dirn).st_mtime
+            except OSError:
+                new_mtime = None
+            if new_mtime != mtime:
+                if new_mtime is None:
+                    del self.poll_dirs[dirn]
+                else:
+                    self.poll_dirs[dirn] = new_mtime
+                self.directory_changed(dirn)
+
+    @pyqtSlot(str)
+    def directory_changed(self, path):
+        self.logger.debug('library watcher: {0} changed'.format(path))
+        self.pending.add(path)
+        self.debounce_timer.start()
+
+    def apply_changes(self):
+        if self.update_thread is not None and self.update_thread.isRunning():
+            self.debounce_timer.start()
+            return
+        directories = sorted(self.pending)
+        self.pending.clear()
+        if not directories:
+            return
+        new_dirs = []
+        for dirn in directories:
+            if os.path.isdir(dirn):
+                try:
+                    for k in os.listdir(dirn):
+                        path = os.path.join(dirn, k)
+                        if (not k.startswith('.') and path not in self.known_dirs
+                                and os.path.isdir(path)):
+                            new_dirs.append(path)
+                except OSError as err:
+                    self.logger.error('{0}::{1}'.format(err, dirn))
+            else:
+                self.known_dirs.discard(dirn)
+                if dirn in self.poll_dirs:
+                    del self.poll_dirs[dirn]
+        if new_dirs:
+            self.start(directories=new_dirs)
+        self.update_thread = LibraryUpdateThread(self.ui, self.home, self.logger, directories)
+        self.update_thread.library_updated.connect(self.library_updated)
+        self.update_thread.start()
+
+    @pyqtSlot(list, int, int)
+    def library_updated(self, directories, video_changed, music_changed):
+        self.logger.info(
+            'library watcher: video={0}, music={1} entries updated'.format(
+                video_changed, music_changed)
+            )
+        if video_changed:
+            self.ui.media_server_cache_video.clear()
+            for dirn in directories:
+                if dirn in self.ui.video_dict:
+                    del self.ui.video_dict[dirn]
+        if music_changed:
+            self.ui.media_server_cache_music.clear()
+        if video_changed or music_changed:
+            self.ui.media_server_cache_playlist.clear()
+            self.library_changed.emit(directories)
@@ -36,6 +36,8 @@ import subprocess
 import urllib.parse
 import urllib.request
 import sqlite3
+from threading import Event, Thread
+from concurrent.futures import Future
 from urllib.parse import urlparse
 from collections import OrderedDict
 from http.server import BaseHTTPRequestHandler, HTTPServer
@@ -45,6 +47,7 @@ from PyQt5 import QtCore
 from PyQt5.QtCore import pyqtSlot, pyqtSignal
 from player_functions import send_notification, write_files, open_files
 from player_functions import get_lan_ip, ccurl, naturallysorted, change_opt_file
+from yt_resolver import expand_playlist_command
 from settings_widget import LoginAuth
 from serverlib import ServerLib
 try:
@@ -1970,6 +1973,8 @@ class HTTPServer_RequestHandler(BaseHTTPRequestHandler):
             pls_cache = False
             pls_txt = ''
             url_format = 'htm'
+            page = None
+            limit = None
             for i in new_arr:
                 logger.info(i)
                 if i.startswith('site='):
@@ -1984,6 +1989,7 @@ class HTTPServer_RequestHandler(BaseHTTPRequestHandler):
                         srch = srch.replace('&exact', '')
                     if '&shuffle' in srch:
                         srch = srch.replace('&shuffle', '')
+                    srch = re.sub('&(page|limit)=[0-9]*', '', srch)
                     if (srch.endswith('.pls') or srch.endswith('.m3u') 
                             or srch.endswith('.htm') or srch.endswith('.html')):
                         if srch.endswith('.m3u'):
@@ -1996,6 +2002,15 @@ class HTTPServer_RequestHandler(BaseHTTPRequestHandler):
                     srch_exact = True
                 elif i.startswith('shuffle'):
                     shuffle_list = True
+                elif i.startswith('page=') or i.startswith('limit='):
+                    page_val = re.search('[0-9]+', i)
+                    if page_val:
+                        if i.startswith('page='):
+                            page = int(page_val.group())
+                        else:
+                            limit = int(page_val.group())
+            if limit and page is None:
+                page = 0
             if not st_o:
                 st_o = 'NONE'
             if st:
@@ -2029,7 +2044,7 @@ class HTTPServer_RequestHandler(BaseHTTPRequestHandler):
                         ui.navigate_playlist_history.add_item(path)
             elif st and st_o and not pls_cache:
                 original_path_name = getdb.options_from_bookmark(
-                    st, st_o, srch, search_exact=srch_exact)
+                    st, st_o, srch, search_exact=srch_exact, page=page, limit=limit)
                 pls_txt = ''
                 if original_path_name:
                     pls_txt = self.create_option_playlist(
@@ -2381,11 +2396,17 @@ class HTTPServer_RequestHandler(BaseHTTPRequestHandler):
                         if nm.startswith('"'):
                             nm = nm.replace('"', '')
                     elif (('youtube.com' in nm or nm.startswith('ytdl:')) and not self.path.endswith('.subtitle') 
-                            and not self.path.endswith('.getsub') and not self.path.endswith('.image')):
+                            and not self.path.endswith('.getsub') and not self.path.endswith('.image')
+                            and not self.path.endswith('.thumbnails.vtt')
+                            and not re.search(r'\.sprite_\d+\.jpg$', self.path)):
                         nm = ui.yt.get_yt_url(
                                 nm, ui.client_quality_val, ui.ytdl_path, logger,
                                 mode=ui.client_yt_mode, reqfrom='client'
                                 )
+                        ui.yt.prefetch(
+                            ui.yt.resolver.next_entries(old_nm.replace('"', '')),
+                            ui.client_quality_val, ui.ytdl_path, reqfrom='client'
+                            )
                         nm = nm.strip()
                         if '::' in nm:
                             nm_arr = nm.split('::')
@@ -2409,6 +2430,11 @@ class HTTPServer_RequestHandler(BaseHTTPRequestHandler):
                     self.process_subtitle_url(nm, status='getsub')
                 elif self.path.endswith('.image'):
                     self.process_image_url(nm)
+                elif self.path.endswith('.thumbnails.vtt'):
+                    self.process_sprite_url(nm)
+                elif re.search(r'\.sprite_\d+\.jpg$', self.path):
+                    sheet_num = re.search(r'\.sprite_(\d+)\.jpg$', self.path).group(1)
+                    self.process_sprite_url(nm, sheet_num=int(sheet_num))
                 elif self.path.endswith('.download'):
                     if 'youtube.com' in old_nm:
                         captions = self.check_yt_captions(old_nm)
@@ -3254,6 +3280,43 @@ class HTTPServer_RequestHandler(BaseHTTPRequestHandler):
         except Exception as e:
             print(e)
         
+    def process_sprite_url(self, path, sheet_num=None):
+        """
+        Serves seek preview sprite sheets: media.thumbnails.vtt returns
+        WebVTT thumbnail track which refers to media.sprite_N.jpg images.
+        Missing sprite sheets are generated in background.
+        """
+        global ui
+        content = None
+        if sheet_num is None:
+            prefix = urllib.parse.unquote(self.path.rsplit('/', 1)[-1])
+            prefix = prefix.rsplit('.thumbnails.vtt', 1)[0] + '.'
+            prefix = urllib.parse.quote(prefix)
+            vtt = ui.sprite_sheet.vtt_content(path, prefix)
+            if vtt:
+                content = bytes(vtt, 'utf-8')
+                content_type = 'text/vtt'
+        else:
+            sprite = ui.sprite_sheet.sprite_file(path, sheet_num)
+            if sprite:
+                content = open(sprite, 'rb').read()
+                content_type = 'image/jpeg'
+        if content is None:
+            ui.sprite_sheet.request(path)
+            self.send_response(404)
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-type', content_type)
+        self.send_header('Content-Length', len(content))
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        try:
+            self.wfile.write(content)
+        except Exception as e:
+            print(e)
+
     def check_local_subtitle(self, path, external=None):
         result = None
         ext = ['.srt', '.ass', '.en.srt', '.en.ass', '.en.vtt']
@@ -3446,6 +3509,11 @@ class HTTPServer_RequestHandler(BaseHTTPRequestHandler):
             else:
                 yt_playlist = False
             if url.startswith('http') and 'youtube.com' in url:
+                if yt_playlist:
+                    pls_path = os.path.join(home, 'Playlists', pls)
+                    op_success = self.expand_yt_playlist(url, pls_path)
+                    if mode != 'offline':
+                        return op_success
                 try:
                     req = urllib.request.Request(
                         url, data=None, headers={'User-Agent': 'Mozilla/5.0'}
@@ -3475,26 +3543,6 @@ class HTTPServer_RequestHandler(BaseHTTPRequestHandler):
                     if os.path.exists(pls_path):
                         write_files(pls_path, new_line, line_by_line=True)
                         op_success = True
-                elif pls_path and yt_playlist:
-                    ut_c = soup.findAll('li', {'class':"yt-uix-scroller-scroll-unit vve-check currently-playing"})
-                    ut = soup.findAll('li', {'class':"yt-uix-scroller-scroll-unit vve-check"})
-                    if ut_c:
-                        ut = ut_c + ut
-                    arr = []
-                    for i in ut:
-                        try:
-                            j = 'https://www.youtube.com/watch?v='+i['data-video-id']
-                            k = i['data-video-title']
-                            l = k+'	'+j+'	'+'NONE'
-                            arr.append(l)
-                        except Exception as e:
-                            print(e, '--2004--')
-                    if arr:
-                        if os.path.exists(pls_path):
-                            lines = open_files(pls_path, lines_read=True)
-                            lines = lines + arr
-                            write_files(pls_path, lines, line_by_line=True)
-                            op_success = True
                 if mode == 'offline':
                     nm = ui.yt.get_yt_url(
                             url, ui.client_quality_val, ui.ytdl_path,
@@ -3541,6 +3589,63 @@ class HTTPServer_RequestHandler(BaseHTTPRequestHandler):
                     op_success = True
         return op_success
 
+    def expand_yt_playlist(self, url, pls_path, wait=60):
+        """
+        Appends entries of youtube playlist to pls_path in batches, as
+        they are extracted by yt-dlp worker, or by yt-dlp command if
+        ytdl_path is configured. Returns after first batch, remaining
+        entries are added in background.
+        """
+        global logger
+        first_batch = Event()
+        added = []
+        if not os.path.exists(pls_path):
+            open(pls_path, 'wb').close()
+
+        def add_entries(entries):
+            arr = []
+            for i in entries:
+                if i.get('url'):
+                    title = ' '.join(str(i.get('title')).split())
+                    arr.append(title + '\t' + i['url'] + '\t' + 'NONE')
+            if arr:
+                lines = open_files(pls_path, lines_read=True)
+                write_files(pls_path, lines + arr, line_by_line=True)
+                ui.media_server_cache_playlist.clear()
+                added.extend(arr)
+                logger.info('{0}: {1} entries added'.format(pls_path, len(added)))
+            first_batch.set()
+
+        if ui.ytdl_path == 'default' and not ui.yt.resolver.disabled:
+            future = ui.yt.resolver.expand_playlist(url, callback=add_entries)
+        else:
+            future = Future()
+            thread = Thread(
+                target=self.expand_yt_playlist_command,
+                args=(url, add_entries, future), daemon=True
+                )
+            thread.start()
+        future.add_done_callback(lambda x: first_batch.set())
+        first_batch.wait(wait)
+        if future.done() and future.exception():
+            logger.error('{0}: {1}'.format(url, future.exception()))
+        return bool(added) or not future.done()
+
+    def expand_yt_playlist_command(self, url, callback, future):
+        if ui.ytdl_path and ui.ytdl_path != 'default' and os.path.exists(ui.ytdl_path):
+            youtube_dl = ui.ytdl_path
+        elif os.name == 'nt':
+            youtube_dl = 'yt-dlp.exe'
+        else:
+            youtube_dl = 'yt-dlp'
+        try:
+            count = expand_playlist_command(
+                [youtube_dl, '--flat-playlist', '-j', url], callback
+                )
+            future.set_result(count)
+        except Exception as err:
+            future.set_exception(err)
+
     def final_message(self, txt, cookie=None, auth_failed=None):
         if cookie:
             self.send_response(303)
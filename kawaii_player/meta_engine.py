@@ -10,6 +10,13 @@ from PyQt5 import QtCore, QtGui
 from PyQt5.QtCore import pyqtSlot, pyqtSignal
 from player_functions import ccurl, write_files, open_files
 from thread_modules import DownloadThread
+from title_match import parse_episode, BRACKET_RE
+from episode_map import EpisodeMap
+
+NAME_SEPARATOR_RE = re.compile('-|_| |\.')
+NAME_TAGS_RE = re.compile('\+sub|\+dub|subbed|dubbed|online|720p|1080p|480p|.mkv|.mp4')
+NAME_RIPS_RE = re.compile('\+season[^"]*|\+special[^"]*|xvid|bdrip|brrip|ac3|hdtv|dvdrip')
+NAME_YEAR_RE = re.compile("[1-2][0-9]{3}|[0-9]{2}[\']?s")
 
 
 
@@ -26,17 +33,18 @@ class MetaEngine:
         self.image_dict_list = {}
         self.dest_dir = ''
         self.site = ''
+        self.episode_map = EpisodeMap(hm, logr)
         
     def name_adjust(self, name):
-        nam = re.sub('-|_| |\.', '+', name)
+        nam = NAME_SEPARATOR_RE.sub('+', name)
         nam = nam.lower()
-        nam = re.sub('\[[^\]]*\]|\([^\)]*\)', '', nam)
-        nam = re.sub('\+sub|\+dub|subbed|dubbed|online|720p|1080p|480p|.mkv|.mp4', '', nam)
-        nam = re.sub('\+season[^"]*|\+special[^"]*|xvid|bdrip|brrip|ac3|hdtv|dvdrip', '', nam)
+        nam = BRACKET_RE.sub('', nam)
+        nam = NAME_TAGS_RE.sub('', nam)
+        nam = NAME_RIPS_RE.sub('', nam)
         nam = nam.strip()
-        dt = re.search("[1-2][0-9]{3}|[0-9]{2}[\']?s", name)
+        dt = NAME_YEAR_RE.search(name)
         if dt:
-            nam = re.sub(dt.group(), '', nam)
+            nam = nam.replace(dt.group(), '')
             nam = nam.strip()
             nam = '{}+({})'.format(nam, dt.group())
         return nam
@@ -232,27 +240,15 @@ class MetaEngine:
     
     def map_episodes(self, tvdb_dict=None, epn_arr=None, name=None,
                        site=None, row=None, video_dir=None):
-        epn_arr_list = epn_arr.copy()
-        ep_dict = tvdb_dict.copy()
-        sr_dict = {}
-        ep_list = []
-        sp = 0
-        for key, value in ep_dict.items():
-            if value and not key.startswith('0x'):
-                ep_list.append(value)
-            elif key.startswith('0x'):
-                sp += 1
-        for i, j in enumerate(ep_list):
-            key = j[0] - sp + 1
-            sr_dict.update({key:j})
+        epn_arr_list = epn_arr
         if site.lower() == 'video':
             dest_dir = os.path.join(home, 'thumbnails', 'thumbnail_server')
         else:
             dest_dir = os.path.join(home, "thumbnails", name)
         if not os.path.exists(dest_dir):
             os.makedirs(dest_dir)
-        new_arr = []
-        for i, val in enumerate(epn_arr_list):
+        entries = []
+        for val in epn_arr_list:
             if '\t' in val:
                 name_val, extra = val.split('\t', 1)
             else:
@@ -262,33 +258,20 @@ class MetaEngine:
             if name_val.startswith('#'):
                 name_val = name_val.replace('#', '', 1)
                 watched = True
-            lower_case = name_val.lower()
-            key_found = False
-            ep_val = None
-            ep_patn = self.find_episode_key_val(lower_case, index=i)
-            print(ep_patn, lower_case)
-            if ep_patn:
-                e = -1
-                if ep_patn.startswith('s') or ep_patn.startswith('e'):
-                    if ep_patn.startswith('s'):
-                        ep_patn = ep_patn[1:]
-                    s, e = ep_patn.split('e')
-                    if s:
-                        s = int(s)
-                    else:
-                        s = 1
-                    e = int(e)
-                    ep_patn = str(s) + 'x' + str(e)
-                print(ep_patn, 'final...')
-                ep_val = ep_dict.get(ep_patn)
-                if not ep_val and e != -1:
-                    ep_val = sr_dict.get(e)
-                if ep_val:
-                    key_found = True
-            if key_found:
+            entries.append((name_val, extra, watched))
+        series = '{}:{}'.format(site, video_dir or name)
+        mapped = self.episode_map.map_names(series, tvdb_dict, [i[0] for i in entries])
+        new_arr = []
+        renamed = {}
+        for i, val in enumerate(epn_arr_list):
+            name_val, extra, watched = entries[i]
+            ep_key, known = mapped[i]
+            if ep_key is not None:
+                ep_val = tvdb_dict[ep_key]
                 if ep_val[3] is None:
                     ep_val[3] = "None"
                 new_name = ep_val[1]+ ' ' + ep_val[3].replace('/', ' - ')
+                renamed.update({new_name.lower():ep_key})
                 summary = 'Air Date: {}\n\n{}: {}\n\n{}'.format(ep_val[-3], ep_val[1], ep_val[3], ep_val[-1])
                 img_url = ep_val[-2]
                 if extra:
@@ -311,16 +294,24 @@ class MetaEngine:
                 else:
                     dest_txt = os.path.join(dest_dir, new_name+'.txt')
                     dest_picn = os.path.join(dest_dir, new_name+'.jpg')
+                if known and os.path.isfile(dest_txt) and os.path.isfile(dest_picn):
+                    # mapped earlier, summary and thumbnail are in place
+                    new_arr.append(new_val)
+                    continue
                 write_files(dest_txt, summary, line_by_line=False)
                 self.remove_extra_thumbnails(dest_picn)
                 if img_url and img_url.startswith('http'):
-                    ui.vnt.get(
-                            img_url, wait=0.1, out=dest_picn,
-                            onfinished=partial(self.finished_thumbnails, i, new_name, summary, dest_picn)
-                        )
+                    if ui.image_hash.lookup_url(img_url, dest_picn):
+                        self.finished_thumbnails(i, new_name, summary, dest_picn)
+                    else:
+                        ui.vnt.get(
+                                img_url, wait=0.1, out=dest_picn,
+                                onfinished=partial(self.finished_thumbnails, i, new_name, summary, dest_picn)
+                            )
             else:
                 new_val = val
             new_arr.append(new_val)
+        self.episode_map.save(series, renamed)
         if new_arr:
             epn_arr_list = self.epn_list = new_arr.copy()
             
@@ -360,6 +351,8 @@ class MetaEngine:
             logger.debug('<<<<<<<{0}>>>>>>>>'.format(file_path))
     
     def finished_thumbnails(self, *args):
+        if len(args) > 5:
+            ui.image_hash.record_url(args[5], args[3])
         ui.gui_signals.ep_changed(args[0], args[1], args[2], args[3])
         
     def remove_extra_thumbnails(self, dest):
@@ -379,68 +372,8 @@ class MetaEngine:
             os.remove(small_label)
                 
     def find_episode_key_val(self, lower_case, index=None, season=None):
-        lower_case = re.sub('\[[^\]]*\]|\([^\)]*\)', '', lower_case)
-        name_srch = re.search(r's[0-9]+ep?[0-9]+|[0-9]+x[0-9]+ ', lower_case)
-        name_srch_val = None
-        ep_name = ''
-        
-        if not name_srch:
-            name_srch = re.search('e(p)?(isode)?[0-9]+', lower_case)
-            if not name_srch:
-                name_srch = re.search('-[^"]*[0-9][0-9]+', lower_case)
-                if not name_srch:
-                    name_srch = re.search('[0-9][0-9]+', lower_case)
-                    if not name_srch:
-                        if isinstance(index, int):
-                            oped = re.search('op[0-9]*|ed[0-9]*', lower_case)
-                            if not oped:
-                                name_srch_val = 'ep'+str(index+1)
-                    else:
-                        oped = re.search('op[0-9]*|ed[0-9]*', lower_case)
-                        if not oped:
-                            name_srch_val = 'ep' + name_srch.group()
-                else:
-                    ssn_final = ''
-                    ssn_val = re.search('s[0-9]+[^"]*\-', lower_case)
-                    if ssn_val:
-                        ssn_str_srch = re.search('s[0-9]+', ssn_val.group())
-                        if ssn_str_srch:
-                            ssn_final = ssn_str_srch.group()
-                    if ssn_final:
-                        name_srch_val = ssn_final + 'ep'+re.sub('-[^0-9]*', '', name_srch.group())
-                    else:
-                        oped = re.search('op[0-9]*|ed[0-9]*', lower_case)
-                        if not oped:
-                            name_srch_val = 'ep' + re.sub('-[^0-9]*', '', name_srch.group())
-                            print(name_srch_val, lower_case)
-            else:
-                name_srch_val = name_srch.group()
-        else:
-            name_srch_val = name_srch.group()
-        sn = -1
-        en = -1
-        if name_srch_val:
-            epval = name_srch_val.lower()
-            s = re.search('s[0-9]+|[0-9]+x', epval)
-            e = re.search('e[0-9]+|ep[0-9]+|x[0-9]+ ', epval)
-            if not e:
-                e = re.search('episode[^"]*[0-9]+|ep[^"]+[0-9]+', epval)
-            
-            if s:
-                ss = re.search('[0-9][0-9]*', s.group())
-                if ss:
-                    sn = int(ss.group())
-            if e:
-                ee = re.search('[0-9][0-9]*', e.group())
-                if ee:
-                    en = int(ee.group())
-            if sn >= 0 and en >=0:
-                ep_name = 's'+str(sn)+'e'+str(en)
-            elif sn < 0 and en >=0:
-                ep_name = 'e'+str(en)
-            else:
-                ep_name = ''
-            logger.debug('{0}::{1}'.format(ep_name, sn))
+        ep_name, sn = parse_episode(lower_case, index)
+        logger.debug('{0}::{1}'.format(ep_name, sn))
         if season:
             return (ep_name, sn)
         else:
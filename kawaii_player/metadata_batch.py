@@ -0,0 +1,492 @@
+"""
+Copyright (C) 2017 kanishka-linux kanishka.linux@gmail.com
+
+This file is part of kawaii-player.
+
+kawaii-player is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kawaii-player is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kawaii-player.  If not, see <http://www.gnu.org/licenses/>.
+
+Batch metadata fetching of whole Video and Music library. Titles of
+video library are looked up with tvdb_async.TVDB and artists of music
+library on last.fm, images are downloaded with vinanti. Number of
+titles (or downloads) in progress and interval between their start is
+limited per host. Failed or timed out titles are retried with
+exponential backoff. State of every title is kept in metadata_batch.db,
+so that interrupted run continues from where it was left.
+"""
+
+import os
+import time
+import random
+import sqlite3
+import logging
+import urllib.parse
+from threading import RLock
+from functools import partial
+from bs4 import BeautifulSoup
+
+# host: (titles or downloads in progress, seconds between their start)
+HOST_LIMITS = {
+    'thetvdb.com': (2, 1.0),
+    'last.fm': (2, 1.0),
+    }
+DEFAULT_LIMIT = (4, 0.2)
+
+PARTS = {
+    'Video': ('info', 'poster', 'fanart'),
+    'Music': ('info', 'poster'),
+    }
+SEARCH_HOST = {'Video': 'thetvdb.com', 'Music': 'last.fm'}
+
+
+class HostLimiter():
+
+    def __init__(self, limits=None, default=DEFAULT_LIMIT):
+        self.limits = HOST_LIMITS.copy()
+        if limits:
+            self.limits.update(limits)
+        self.default = default
+        self.active = {}
+        self.started = {}
+        self.blocked = {}
+
+    def limit_of_host(self, host):
+        """Limit of host or of its parent domain"""
+        name = host
+        while name:
+            if name in self.limits:
+                return self.limits[name]
+            if '.' not in name:
+                break
+            name = name.split('.', 1)[1]
+        return self.default
+
+    def available(self, host, now):
+        concurrent, interval = self.limit_of_host(host)
+        return (self.active.get(host, 0) < concurrent
+                and now - self.started.get(host, 0) >= interval
+                and now >= self.blocked.get(host, 0))
+
+    def acquire(self, host, now):
+        self.active.update({host: self.active.get(host, 0) + 1})
+        self.started.update({host: now})
+
+    def release(self, host):
+        if self.active.get(host, 0) > 0:
+            self.active.update({host: self.active[host] - 1})
+
+    def block(self, host, seconds):
+        """Politeness pause after host refused requests"""
+        self.blocked.update({host: time.time() + seconds})
+
+
+class BatchJob():
+
+    def __init__(self, site, title, directory, parts, attempts):
+        self.site = site
+        self.title = title
+        self.directory = directory
+        self.parts = set(parts)
+        self.attempts = attempts
+        self.started = None
+        self.error = None
+        self.host = SEARCH_HOST[site]
+
+    def key(self):
+        return (self.site, self.title)
+
+    def remaining(self):
+        return [i for i in PARTS[self.site] if i not in self.parts]
+
+
+class MetadataBatch():
+
+    """
+    ui supplies tvdb, vnt, image_hash, metadata_copy and name_adjust.
+    progress, if given, is called with status text after every title.
+    """
+
+    def __init__(self, ui, home, tmp_dir, logger=None, host_limits=None,
+                 retries=3, backoff=30, timeout=180, img_opt=1,
+                 progress=None):
+        if logger is None:
+            logger = logging.getLogger(__name__)
+        self.logger = logger
+        self.ui = ui
+        self.home = home
+        self.tmp_dir = tmp_dir
+        self.state_db = os.path.join(home, 'metadata_batch.db')
+        self.limiter = HostLimiter(host_limits)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.img_opt = img_opt
+        self.progress = progress
+        self.lock = RLock()
+        self.pending = []
+        self.active = {}
+        self.downloads = []
+        self.total = 0
+        self.done = 0
+        self.stopped = False
+
+    def connect(self):
+        conn = sqlite3.connect(self.state_db)
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS Batch(Site text, Title text, '
+            'Directory text, Parts text, Status text, Attempts integer, '
+            'NextTry real, Error text, primary key(Site, Title))'
+            )
+        return conn
+
+    def metadata_dir(self, site, title):
+        title = title.replace('/', '-')
+        if site == 'Music':
+            return os.path.join(self.home, 'Music', 'Artist', title)
+        return os.path.join(self.home, 'Local', title)
+
+    def has_metadata(self, site, title):
+        dir_path = self.metadata_dir(site, title)
+        if site == 'Music':
+            files = ['poster.jpg', 'bio.txt']
+        else:
+            files = ['poster.jpg', 'fanart.jpg', 'summary.txt']
+        return all(os.path.isfile(os.path.join(dir_path, i)) for i in files)
+
+    def library_entries(self):
+        """(site, title, directory) of all titles of Video and Music databases"""
+        entries = []
+        video_db = os.path.join(self.home, 'VideoDB', 'Video.db')
+        music_db = os.path.join(self.home, 'Music', 'Music.db')
+        if os.path.isfile(video_db):
+            for title, directory in self.ui.media_data.get_video_db(video_db, 'Directory', ''):
+                entries.append(('Video', title, directory))
+        if os.path.isfile(music_db):
+            for row in self.ui.media_data.get_music_db(music_db, 'Artist', ''):
+                if row[0]:
+                    entries.append(('Music', row[0], ''))
+        return entries
+
+    def add_entries(self, entries, overwrite=False, retry_failed=False):
+        """
+        Adds titles to checkpoint. Titles already done are fetched again
+        only with overwrite, failed ones only with retry_failed.
+        """
+        conn = self.connect()
+        rows = {
+            (i[0], i[1]): i[2] for i in conn.execute('SELECT Site, Title, Status FROM Batch')
+            }
+        for site, title, directory in entries:
+            status = rows.get((site, title))
+            if status is None:
+                if not overwrite and self.has_metadata(site, title):
+                    status = 'done'
+                else:
+                    status = 'pending'
+                conn.execute(
+                    'INSERT INTO Batch VALUES(?, ?, ?, ?, ?, ?, ?, ?)',
+                    (site, title, directory, '', status, 0, 0, '')
+                    )
+            elif (overwrite and status == 'done') or (retry_failed and status == 'failed'):
+                conn.execute(
+                    'Update Batch Set Parts=?, Status=?, Attempts=?, NextTry=? '
+                    'Where Site=? and Title=?', ('', 'pending', 0, 0, site, title)
+                    )
+        conn.commit()
+        conn.close()
+
+    def load(self):
+        conn = self.connect()
+        counts = dict(conn.execute('SELECT Status, count(*) FROM Batch group by Status').fetchall())
+        rows = conn.execute(
+            'SELECT Site, Title, Directory, Parts, Attempts, NextTry FROM Batch '
+            'Where Status=? order by NextTry, Site, Title', ('pending', )
+            ).fetchall()
+        conn.close()
+        self.pending = [
+            [next_try, BatchJob(site, title, directory, [i for i in parts.split(',') if i], attempts)]
+            for site, title, directory, parts, attempts, next_try in rows
+            ]
+        self.total = sum(counts.values())
+        self.done = self.total - len(self.pending)
+
+    def save(self, job, status, next_try=0):
+        conn = self.connect()
+        conn.execute(
+            'Update Batch Set Parts=?, Status=?, Attempts=?, NextTry=?, Error=? '
+            'Where Site=? and Title=?',
+            (','.join(sorted(job.parts)), status, job.attempts, next_try,
+             job.error or '', job.site, job.title)
+            )
+        conn.commit()
+        conn.close()
+
+    def stop(self):
+        self.stopped = True
+
+    def run(self):
+        """Blocks until every pending title is done, failed or stop is called"""
+        self.load()
+        self.logger.info('metadata batch: {0} of {1} titles pending'.format(len(self.pending), self.total))
+        while not self.stopped:
+            now = time.time()
+            with self.lock:
+                self.check_timeouts(now)
+                self.dispatch(now)
+                if not self.pending and not self.active and not self.downloads:
+                    break
+            time.sleep(0.5)
+        self.report('Metadata: {0}/{1} titles done'.format(self.done, self.total))
+
+    def report(self, text):
+        self.logger.info(text)
+        if self.progress:
+            self.progress(text)
+
+    def dispatch(self, now):
+        """Called with lock held"""
+        for item in self.downloads.copy():
+            host, start = item
+            if self.limiter.available(host, now):
+                self.downloads.remove(item)
+                self.limiter.acquire(host, now)
+                start()
+        for item in self.pending.copy():
+            next_try, job = item
+            if next_try <= now and self.limiter.available(job.host, now):
+                self.pending.remove(item)
+                self.limiter.acquire(job.host, now)
+                job.started = now
+                job.error = None
+                self.active.update({job.key(): job})
+                try:
+                    self.start_job(job)
+                except Exception as err:
+                    self.job_failed(job, str(err))
+
+    def start_job(self, job):
+        srch = self.ui.name_adjust(job.title)
+        if job.site == 'Music':
+            url = 'https://www.last.fm/search?q=' + urllib.parse.quote_plus(srch)
+            self.ui.vnt.get(url, onfinished=partial(self.lastfm_search, job.key()))
+        else:
+            self.ui.tvdb.search(
+                srch, backend='no', episode_summary=False,
+                onfinished=partial(self.tvdb_fetched, job.key())
+                )
+
+    def check_timeouts(self, now):
+        """Called with lock held"""
+        for job in list(self.active.values()):
+            if now - job.started > self.timeout:
+                self.job_failed(job, 'timeout')
+
+    def active_job(self, key):
+        with self.lock:
+            return self.active.get(key)
+
+    def part_done(self, key, part):
+        with self.lock:
+            job = self.active.get(key)
+            if job is None:
+                return
+            job.parts.add(part)
+            if not job.remaining():
+                self.finish(job, 'done')
+
+    def finish(self, job, status, next_try=0):
+        """Called with lock held"""
+        self.active.pop(job.key(), None)
+        self.limiter.release(job.host)
+        self.save(job, status, next_try)
+        if status == 'pending':
+            self.pending.append([next_try, job])
+        else:
+            self.done += 1
+            self.report('Metadata: {0}/{1} {2} ({3})'.format(self.done, self.total, job.title, status))
+
+    def job_failed(self, job, error):
+        with self.lock:
+            if self.active.get(job.key()) is not job:
+                return
+            job.attempts += 1
+            job.error = error
+            self.logger.error('metadata batch: {0}::{1}::attempt {2}'.format(error, job.title, job.attempts))
+            if job.attempts >= self.retries:
+                self.finish(job, 'failed')
+            else:
+                delay = self.backoff * 2 ** (job.attempts - 1)
+                self.finish(job, 'pending', time.time() + delay + random.uniform(0, delay/4))
+
+    def result_error(self, url, result):
+        """Error text of vinanti result, None if request succeeded"""
+        if result is None:
+            return 'no response'
+        if result.error:
+            if '429' in result.error or '503' in result.error:
+                self.limiter.block(urllib.parse.urlparse(url).hostname or '', 2 * self.backoff)
+            return result.error
+        return None
+
+    def tvdb_fetched(self, key, obj, val):
+        job = self.active_job(key)
+        if job is None:
+            return
+        if val == 'not-found':
+            job.error = 'not found'
+            with self.lock:
+                if self.active.get(key) is job:
+                    self.finish(job, 'notfound')
+        elif val == 'info' and 'info' not in job.parts:
+            aired = obj.info.get('first aired')
+            genres = obj.info.get('genres')
+            txt = '{} ({}) \n\nGenres: {} \n\n{}'.format(obj.title, aired, genres, obj.summary)
+            self.write_summary(job, txt)
+        elif val in ['poster', 'fanart'] and val not in job.parts:
+            urls = self.ui.image_hash.choose(getattr(obj, val))
+            self.queue_image(job, val, urls)
+
+    def lastfm_search(self, key, *args):
+        job = self.active_job(key)
+        if job is None:
+            return
+        url, result = args[-2], args[-1]
+        error = self.result_error(url, result)
+        if error:
+            self.job_failed(job, error)
+            return
+        artist_url = None
+        soup = BeautifulSoup(result.html, 'lxml')
+        for row in soup.findAll('div', {'class':'row clearfix'}):
+            for link in row.findAll('a'):
+                href = link.get('href')
+                if href and '?q=' not in href:
+                    artist_url = href
+                    break
+            if artist_url:
+                break
+        if not artist_url:
+            job.error = 'not found'
+            with self.lock:
+                if self.active.get(key) is job:
+                    self.finish(job, 'notfound')
+            return
+        if not artist_url.startswith('http'):
+            artist_url = 'https://www.last.fm' + artist_url
+        if 'info' not in job.parts:
+            self.ui.vnt.get(artist_url + '/+wiki', onfinished=partial(self.lastfm_wiki, key))
+        if 'poster' not in job.parts:
+            self.ui.vnt.get(artist_url + '/+images', onfinished=partial(self.lastfm_images, key))
+
+    def lastfm_wiki(self, key, *args):
+        job = self.active_job(key)
+        if job is None:
+            return
+        url, result = args[-2], args[-1]
+        error = self.result_error(url, result)
+        if error:
+            self.job_failed(job, error)
+            return
+        soup = BeautifulSoup(result.html, 'lxml')
+        link = soup.find('div', {'class':'wiki-content'})
+        self.write_summary(job, link.text if link else '')
+
+    def lastfm_images(self, key, *args):
+        job = self.active_job(key)
+        if job is None:
+            return
+        url, result = args[-2], args[-1]
+        error = self.result_error(url, result)
+        if error:
+            self.job_failed(job, error)
+            return
+        soup = BeautifulSoup(result.html, 'lxml')
+        img = []
+        for image_list in soup.findAll('ul', {'class':'image-list'}):
+            for k in image_list.findAll('img'):
+                src = k.get('src')
+                if src:
+                    img.append(src.rsplit('/', 2)[0] + '/770x0/' + src.split('/')[-1])
+        img = self.ui.image_hash.choose(sorted(set(img), key=img.index))
+        self.queue_image(job, 'poster', img)
+
+    def tmp_file(self, job, part):
+        name = job.title.replace('/', '-')
+        if part == 'fanart':
+            return os.path.join(self.tmp_dir, name + '-fanart.jpg')
+        elif part == 'info':
+            return os.path.join(self.tmp_dir, name + '-batch-summary.txt')
+        return os.path.join(self.tmp_dir, name + '.jpg')
+
+    def write_summary(self, job, txt):
+        if txt:
+            sumry = self.tmp_file(job, 'info')
+            with open(sumry, 'w') as f:
+                f.write(txt)
+            self.ui.metadata_copy(
+                self.metadata_dir(job.site, job.title), sumry, mode='summary',
+                site=job.site
+                )
+            os.remove(sumry)
+        self.part_done(job.key(), 'info')
+
+    def queue_image(self, job, part, urls):
+        if not urls:
+            self.part_done(job.key(), part)
+            return
+        url = urls[0]
+        out_file = self.tmp_file(job, part)
+        if self.ui.image_hash.lookup_url(url, out_file):
+            self.image_fetched(job.key(), part, out_file)
+            return
+        host = urllib.parse.urlparse(url).hostname or ''
+        start = partial(
+            self.ui.vnt.get, url, out=out_file,
+            onfinished=partial(self.image_downloaded, job.key(), part, host, out_file)
+            )
+        with self.lock:
+            self.downloads.append((host, start))
+
+    def image_downloaded(self, key, part, host, out_file, *args):
+        url, result = args[-2], args[-1]
+        with self.lock:
+            self.limiter.release(host)
+        job = self.active_job(key)
+        if job is None:
+            return
+        error = self.result_error(url, result)
+        if error is None and not (os.path.isfile(out_file) and os.stat(out_file).st_size):
+            error = 'empty image'
+        if error:
+            self.job_failed(job, error)
+            return
+        self.ui.image_hash.record_url(url, out_file)
+        self.image_fetched(key, part, out_file)
+
+    def image_fetched(self, key, part, picn):
+        job = self.active_job(key)
+        if job is None:
+            return
+        dir_path = self.metadata_dir(job.site, job.title)
+        try:
+            if part == 'poster':
+                thumbnail = os.path.join(self.tmp_dir, job.title.replace('/', '-') + '-thumbnail.jpg')
+                self.ui.metadata_copy(dir_path, picn, thumbnail, mode='img', display=False)
+                if job.site == 'Music':
+                    self.ui.metadata_copy(dir_path, picn, mode='fanart', img_opt=self.img_opt, display=False)
+            else:
+                self.ui.metadata_copy(dir_path, picn, mode='fanart', img_opt=self.img_opt, display=False)
+        except Exception as err:
+            self.job_failed(job, str(err))
+            return
+        self.part_done(key, part)
@@ -0,0 +1,380 @@
+"""
+Copyright (C) 2017 kanishka-linux kanishka.linux@gmail.com
+
+This file is part of kawaii-player.
+
+kawaii-player is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kawaii-player is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kawaii-player.  If not, see <http://www.gnu.org/licenses/>.
+
+Offline metadata pack.
+
+Metadata of whole library (files of Local/<title> and
+Music/Artist/<artist>, episode thumbnails and summaries of
+thumbnails/thumbnail_server, episode names of Video.db and
+episode_map.db) is exported into single sqlite file, file contents are
+stored once per sha1. Import maps titles by name, directory name or
+fuzzy title match and episodes by path hash, file fingerprint (size
+and sha1 of first and last 64 KiB) or file name, so that library
+with different paths on new machine gets metadata without scraping.
+
+Usage: python metadata_pack.py export|import pack_file [home_directory]
+"""
+
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import hashlib
+import logging
+from title_match import TitleIndex, normalize_title
+from episode_map import EpisodeMap
+
+PACK_VERSION = 1
+FINGERPRINT_CHUNK = 64*1024
+SKIP_PREFIXES = ('128px.', '256px.', '480px.', 'label.')
+
+PACK_SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS Pack(Key text primary key, Value text)',
+    'CREATE TABLE IF NOT EXISTS Blob(Hash text primary key, Data blob)',
+    '''CREATE TABLE IF NOT EXISTS TitleFile(Site text, Title text, Directory text,
+        Name text, Hash text, primary key(Site, Title, Name))''',
+    '''CREATE TABLE IF NOT EXISTS Episode(Title text, Directory text, Path text primary key,
+        PathHash text, FileName text, Size integer, Fingerprint text, EpName text,
+        Thumbnail text, Summary text)''',
+    'CREATE TABLE IF NOT EXISTS EpisodeMap(Directory text, Name text, TvdbKey text)',
+    ]
+
+
+def path_hash(path):
+    """Name of thumbnail_server files of path"""
+    return hashlib.sha256(bytes(path.replace('"', ''), 'utf-8')).hexdigest()
+
+
+def file_fingerprint(path, size=None):
+    if size is None:
+        size = os.stat(path).st_size
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        h.update(f.read(FINGERPRINT_CHUNK))
+        if size > 2*FINGERPRINT_CHUNK:
+            f.seek(size - FINGERPRINT_CHUNK)
+            h.update(f.read(FINGERPRINT_CHUNK))
+    return '{0}:{1}'.format(size, h.hexdigest())
+
+
+class MetadataPack():
+
+    def __init__(self, home, logger=None):
+        self.home = home
+        if logger is None:
+            logger = logging.getLogger(__name__)
+        self.logger = logger
+        self.video_db = os.path.join(home, 'VideoDB', 'Video.db')
+        self.music_db = os.path.join(home, 'Music', 'Music.db')
+        self.map_db = EpisodeMap(home).map_db
+        self.thumbnail_dir = os.path.join(home, 'thumbnails', 'thumbnail_server')
+
+    def connect_pack(self, pack_file):
+        conn = sqlite3.connect(pack_file)
+        for qr in PACK_SCHEMA:
+            conn.execute(qr)
+        return conn
+
+    def title_dir(self, site, title):
+        title = title.replace('/', '-')
+        if site == 'Music':
+            return os.path.join(self.home, 'Music', 'Artist', title)
+        return os.path.join(self.home, 'Local', title)
+
+    def library_titles(self):
+        """{(site, title): directory} of Video and Music databases"""
+        titles = {}
+        if os.path.isfile(self.video_db):
+            conn = sqlite3.connect(self.video_db)
+            for title, directory in conn.execute('SELECT distinct Title, Directory FROM Video'):
+                titles.update({('Video', title):directory})
+            conn.close()
+        if os.path.isfile(self.music_db):
+            conn = sqlite3.connect(self.music_db)
+            for row in conn.execute('SELECT distinct Artist FROM Music'):
+                if row[0]:
+                    titles.update({('Music', row[0]):''})
+            conn.close()
+        return titles
+
+    def video_rows(self):
+        if not os.path.isfile(self.video_db):
+            return []
+        conn = sqlite3.connect(self.video_db)
+        rows = conn.execute('SELECT Title, Directory, FileName, EP_NAME, Path FROM Video').fetchall()
+        conn.close()
+        return rows
+
+    def put_blob(self, conn, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        hash_val = hashlib.sha1(data).hexdigest()
+        conn.execute('INSERT OR IGNORE INTO Blob VALUES(?, ?)', (hash_val, sqlite3.Binary(data)))
+        return hash_val
+
+    def write_blob(self, conn, hash_val, path, overwrite=False):
+        if os.path.isfile(path) and not overwrite:
+            return False
+        row = conn.execute('SELECT Data FROM Blob Where Hash=?', (hash_val, )).fetchone()
+        if row is None:
+            return False
+        dir_name = os.path.dirname(path)
+        if not os.path.exists(dir_name):
+            os.makedirs(dir_name)
+        tmp_path = path + '.part'
+        with open(tmp_path, 'wb') as f:
+            f.write(row[0])
+        shutil.move(tmp_path, path)
+        return True
+
+    def export_pack(self, pack_file):
+        """Writes metadata of library into pack_file, returns counts"""
+        if os.path.isfile(pack_file):
+            os.remove(pack_file)
+        conn = self.connect_pack(pack_file)
+        result = {'titles': 0, 'files': 0, 'episodes': 0}
+        for (site, title), directory in sorted(self.library_titles().items()):
+            dir_path = self.title_dir(site, title)
+            if not os.path.isdir(dir_path):
+                continue
+            names = [
+                i for i in os.listdir(dir_path)
+                if not i.startswith(SKIP_PREFIXES) and os.path.isfile(os.path.join(dir_path, i))
+                ]
+            for name in names:
+                hash_val = self.put_blob(conn, os.path.join(dir_path, name))
+                conn.execute(
+                    'INSERT OR REPLACE INTO TitleFile VALUES(?, ?, ?, ?, ?)',
+                    (site, title, directory, name, hash_val)
+                    )
+                result['files'] += 1
+            if names:
+                result['titles'] += 1
+        for title, directory, file_name, ep_name, path in self.video_rows():
+            thumb_hash = path_hash(path)
+            blobs = []
+            for ext in ['.jpg', '.txt']:
+                thumb = os.path.join(self.thumbnail_dir, thumb_hash+ext)
+                if os.path.isfile(thumb):
+                    blobs.append(self.put_blob(conn, thumb))
+                else:
+                    blobs.append(None)
+            if ep_name == file_name and not any(blobs):
+                continue
+            size = fingerprint = None
+            local_path = path.replace('"', '')
+            if os.path.isfile(local_path):
+                try:
+                    size = os.stat(local_path).st_size
+                    fingerprint = file_fingerprint(local_path, size)
+                except OSError as err:
+                    self.logger.error('{0}::{1}'.format(err, local_path))
+            conn.execute(
+                'INSERT OR REPLACE INTO Episode VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (title, directory, path, thumb_hash, file_name, size, fingerprint,
+                 ep_name, blobs[0], blobs[1])
+                )
+            result['episodes'] += 1
+        if os.path.isfile(self.map_db):
+            src = sqlite3.connect(self.map_db)
+            for series, name, key in src.execute('SELECT Series, Name, TvdbKey FROM EpisodeMap'):
+                if series.startswith('Video:'):
+                    conn.execute('INSERT INTO EpisodeMap VALUES(?, ?, ?)', (series[6:], name, key))
+            src.close()
+        conn.execute('INSERT OR REPLACE INTO Pack VALUES(?, ?)', ('version', str(PACK_VERSION)))
+        conn.execute('INSERT OR REPLACE INTO Pack VALUES(?, ?)', ('created', str(time.time())))
+        conn.commit()
+        result['blobs'] = conn.execute('SELECT count(*) FROM Blob').fetchone()[0]
+        conn.close()
+        return result
+
+    def map_titles(self, pack_titles, local_titles):
+        """
+        {(site, pack title): (site, local title)}, matched by title, then
+        by name of directory, then by closest normalized title
+        """
+        mapping = {}
+        by_dir = {}
+        index = {}
+        for (site, title), directory in local_titles.items():
+            if directory:
+                by_dir.update({(site, os.path.basename(directory.rstrip('/'))):title})
+            if site not in index:
+                index.update({site:TitleIndex()})
+            index[site].add(title, title)
+        for (site, title), directory in pack_titles.items():
+            if (site, title) in local_titles:
+                mapping.update({(site, title):(site, title)})
+                continue
+            if directory:
+                local = by_dir.get((site, os.path.basename(directory.rstrip('/'))))
+                if local:
+                    mapping.update({(site, title):(site, local)})
+                    continue
+            if site in index:
+                best = index[site].best(title)
+                if best and best[2] <= max(1, len(normalize_title(title))//5):
+                    mapping.update({(site, title):(site, best[1])})
+        return mapping
+
+    def map_episodes(self, conn, title_map):
+        """{pack path: local path} of episodes of pack"""
+        local_rows = self.video_rows()
+        local_paths = set(i[4] for i in local_rows)
+        by_name = {}
+        by_size = {}
+        for title, directory, file_name, ep_name, path in local_rows:
+            by_name.setdefault((title, file_name), path)
+        sizes = set(i[0] for i in conn.execute('SELECT Size FROM Episode Where Size is not null'))
+        if sizes:
+            for row in local_rows:
+                local_path = row[4].replace('"', '')
+                try:
+                    size = os.stat(local_path).st_size
+                except OSError:
+                    continue
+                if size in sizes:
+                    by_size.setdefault(size, []).append(row[4])
+        fingerprints = {}
+        mapping = {}
+        qr = 'SELECT Title, Path, FileName, Size, Fingerprint FROM Episode'
+        for title, path, file_name, size, fingerprint in conn.execute(qr).fetchall():
+            if path in local_paths:
+                mapping.update({path:path})
+                continue
+            local = None
+            if fingerprint and size in by_size:
+                for candidate in by_size[size]:
+                    if candidate not in fingerprints:
+                        try:
+                            fingerprints[candidate] = file_fingerprint(candidate.replace('"', ''), size)
+                        except OSError:
+                            fingerprints[candidate] = None
+                    if fingerprints[candidate] == fingerprint:
+                        local = candidate
+                        break
+            if local is None:
+                local_title = title_map.get(('Video', title))
+                if local_title:
+                    local = by_name.get((local_title[1], file_name))
+            if local:
+                mapping.update({path:local})
+        return mapping
+
+    def import_pack(self, pack_file, overwrite=False):
+        """
+        Writes metadata of pack_file into library, existing files are
+        replaced only with overwrite. Returns counts.
+        """
+        conn = sqlite3.connect(pack_file)
+        version = conn.execute('SELECT Value FROM Pack Where Key=?', ('version', )).fetchone()
+        if version is None or int(version[0]) > PACK_VERSION:
+            conn.close()
+            raise sqlite3.DatabaseError(
+                'metadata pack version {0} is not supported'.format(version and version[0])
+                )
+        result = {'titles': 0, 'files': 0, 'episodes': 0, 'unmatched': 0}
+        pack_titles = {}
+        for site, title, directory in conn.execute('SELECT distinct Site, Title, Directory FROM TitleFile'):
+            pack_titles.update({(site, title):directory})
+        for title, directory in conn.execute('SELECT distinct Title, Directory FROM Episode'):
+            pack_titles.setdefault(('Video', title), directory)
+        title_map = self.map_titles(pack_titles, self.library_titles())
+        result['unmatched'] = len(pack_titles) - len(title_map)
+
+        qr = 'SELECT Site, Title, Name, Hash FROM TitleFile'
+        done = set()
+        for site, title, name, hash_val in conn.execute(qr).fetchall():
+            local = title_map.get((site, title))
+            if local is None:
+                continue
+            path = os.path.join(self.title_dir(*local), name)
+            if self.write_blob(conn, hash_val, path, overwrite):
+                result['files'] += 1
+                done.add(local)
+        result['titles'] = len(done)
+
+        episode_map = self.map_episodes(conn, title_map)
+        video_conn = None
+        if os.path.isfile(self.video_db):
+            video_conn = sqlite3.connect(self.video_db)
+        qr = 'SELECT Path, FileName, EpName, Thumbnail, Summary FROM Episode'
+        for path, file_name, ep_name, thumb, summary in conn.execute(qr).fetchall():
+            local = episode_map.get(path)
+            if local is None:
+                continue
+            local_hash = path_hash(local)
+            for hash_val, ext in [(thumb, '.jpg'), (summary, '.txt')]:
+                if hash_val:
+                    self.write_blob(
+                        conn, hash_val, os.path.join(self.thumbnail_dir, local_hash+ext), overwrite
+                        )
+            if video_conn and ep_name and ep_name != file_name:
+                if overwrite:
+                    video_conn.execute('Update Video Set EP_NAME=? Where Path=?', (ep_name, local))
+                else:
+                    video_conn.execute(
+                        'Update Video Set EP_NAME=? Where Path=? and EP_NAME=FileName',
+                        (ep_name, local)
+                        )
+            result['episodes'] += 1
+        if video_conn:
+            video_conn.commit()
+            video_conn.close()
+
+        dir_map = {}
+        local_titles = self.library_titles()
+        for (site, title), directory in pack_titles.items():
+            local = title_map.get((site, title))
+            if site == 'Video' and directory and local:
+                dir_map.update({directory:local_titles.get(local)})
+        rows = [
+            ('Video:{0}'.format(dir_map[directory]), name, key)
+            for directory, name, key in conn.execute('SELECT Directory, Name, TvdbKey FROM EpisodeMap')
+            if dir_map.get(directory)
+            ]
+        if rows:
+            map_conn = EpisodeMap(self.home, self.logger).connect()
+            map_conn.executemany('INSERT OR IGNORE INTO EpisodeMap VALUES(?, ?, ?)', rows)
+            map_conn.commit()
+            map_conn.close()
+        conn.close()
+        return result
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] not in ['export', 'import']:
+        print(__doc__.strip().split('\n')[-1])
+        sys.exit(1)
+    if len(sys.argv) > 3:
+        home = sys.argv[3]
+    else:
+        home = os.path.join(os.path.expanduser('~'), '.config', 'kawaii-player')
+    logging.basicConfig(level=logging.INFO)
+    pack = MetadataPack(home)
+    if sys.argv[1] == 'export':
+        result = pack.export_pack(sys.argv[2])
+    else:
+        result = pack.import_pack(sys.argv[2])
+    for key, value in result.items():
+        print('{0}: {1}'.format(key, value))
+
+
+if __name__ == '__main__':
+    main()
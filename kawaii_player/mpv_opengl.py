@@ -1593,7 +1593,7 @@ class MpvOpenglWidget(QOpenGLWidget):
                     if iconv_r_indicator:
                         iconv_r = iconv_r_indicator[0]
                     self.ui.set_parameters_value(iconv=iconv_r)
-                    widget = eval("self.ui.label_epn_"+str(cur_label_num))
+                    widget = self.ui.label_epn_list[cur_label_num]
                     col = (cur_label_num%iconv_r)
                     row = 2*int(cur_label_num/iconv_r)
                     new_pos = (row, col)
@@ -1653,7 +1653,7 @@ class MpvOpenglWidget(QOpenGLWidget):
             else:
                 if not self.ui.float_window.isHidden():
                     if not self.ui.float_window.isFullScreen():
-                        widget = eval("self.ui.label_epn_"+str(cur_label_num))
+                        widget = self.ui.label_epn_list[cur_label_num]
                         index = self.ui.gridLayout2.indexOf(widget)
                         print(index, '--index--')
                         self.ui.current_thumbnail_position = self.ui.gridLayout2.getItemPosition(index)
@@ -440,6 +440,19 @@ else:
     from get_functions import ccurl
     print('--using default pycurl--')
 
+
+if get_lib.lower() in ['curl', 'wget']:
+    def ccurl_multi(jobs, *args, **kargs):
+        """Downloads jobs, list of (url, out_file), one by one with ccurl"""
+        done = []
+        for url, out_file in jobs:
+            ccurl(url+'#'+'-o'+'#'+out_file)
+            if os.path.isfile(out_file) and os.stat(out_file).st_size:
+                done.append((url, out_file))
+        return done
+else:
+    from get_functions import ccurl_multi
+
         
         
         
@@ -79,7 +79,16 @@ class ServerLib:
             return 0
     
     def options_from_bookmark(self, site, site_option,
-                              search_term, search_exact=None):
+                              search_term, search_exact=None,
+                              page=None, limit=None):
+        """
+        page and limit restrict music and video category listings
+        to single page of database rows
+        """
+        if limit:
+            offset = (page or 0) * limit
+        else:
+            offset = None
         original_path_name = []
         bookmark = False
         music_opt = ''
@@ -335,7 +344,9 @@ class ServerLib:
                     send_list_direct = True
                 else:
                 """
-                m = ui.media_data.get_music_db(music_db, music_opt, "")
+                m = ui.media_data.get_music_db(
+                    music_db, music_opt, "", page_size=limit, offset=offset
+                    )
                 for i in m:
                     artist.append(i[0])
             if send_list_direct:
@@ -376,11 +387,17 @@ class ServerLib:
             m = []
             if not bookmark:
                 if video_opt.lower() == "available":
-                    m = ui.media_data.get_video_db(video_db, "Directory", "")
+                    m = ui.media_data.get_video_db(
+                        video_db, "Directory", "", page_size=limit, offset=offset
+                        )
                 elif video_opt.lower() == "history":
-                    m = ui.media_data.get_video_db(video_db, "History", "")
+                    m = ui.media_data.get_video_db(
+                        video_db, "History", "", page_size=limit, offset=offset
+                        )
                 else:
-                    m = ui.media_data.get_video_db(video_db, video_opt, "")
+                    m = ui.media_data.get_video_db(
+                        video_db, video_opt, "", page_size=limit, offset=offset
+                        )
             else:
                 book_file = os.path.join(home, 'Bookmark', status+'.txt')
                 if os.path.exists(book_file):
@@ -1988,6 +1988,8 @@ class OptionsSettings(QtWidgets.QTabWidget):
             logger.info(fname)
             self.list_library.addItem(fname)
             write_files(self.library_file_name, fname, line_by_line=True)
+            if ui.library_watcher_obj:
+                ui.library_watcher_obj.restart()
     
     def remove_folder_from_library(self):
         index = self.list_library.currentRow()
@@ -1999,3 +2001,5 @@ class OptionsSettings(QtWidgets.QTabWidget):
             del item
             del lines[index]
             write_files(self.library_file_name, lines, line_by_line=True)
+            if ui.library_watcher_obj:
+                ui.library_watcher_obj.restart()
@@ -0,0 +1,242 @@
+"""
+Copyright (C) 2017 kanishka-linux kanishka.linux@gmail.com
+
+This file is part of kawaii-player.
+
+kawaii-player is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kawaii-player is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kawaii-player.  If not, see <http://www.gnu.org/licenses/>.
+
+Seek preview sprite sheets. Frames are taken every interval seconds
+in a single mpv run which decodes only keyframes, tiled into sheets
+of columns x rows frames and indexed by WebVTT thumbnail track
+(sprite_0.jpg#xywh=x,y,w,h), which is understood by most web players.
+"""
+
+import os
+import re
+import shutil
+import bisect
+import hashlib
+import logging
+import subprocess
+from threading import Lock
+from PyQt5 import QtCore
+from PyQt5.QtCore import pyqtSignal
+from PIL import Image
+
+SPRITE_VTT = 'thumbnails.vtt'
+
+
+def format_vtt_time(seconds):
+    hrs, rem = divmod(seconds, 3600)
+    mins, secs = divmod(rem, 60)
+    return '{0:02d}:{1:02d}:{2:06.3f}'.format(int(hrs), int(mins), secs)
+
+
+def parse_vtt_time(txt):
+    val = 0.0
+    for i in txt.strip().split(':'):
+        val = val * 60 + float(i)
+    return val
+
+
+def load_vtt(vtt_file):
+    """Returns list of (start, end, image_name, (x, y, w, h))"""
+    cues = []
+    with open(vtt_file, 'r') as f:
+        lines = [i.strip() for i in f.readlines()]
+    for i, line in enumerate(lines):
+        if '-->' in line and i + 1 < len(lines):
+            start, end = line.split('-->')
+            image, xywh = lines[i+1].split('#xywh=')
+            rect = tuple(int(k) for k in xywh.split(','))
+            cues.append((parse_vtt_time(start), parse_vtt_time(end), image, rect))
+    return cues
+
+
+class SpriteSheetThread(QtCore.QThread):
+
+    sprite_ready = pyqtSignal(str)
+
+    def __init__(self, sprite_sheet, tmp_dir):
+        QtCore.QThread.__init__(self)
+        self.sprite_sheet = sprite_sheet
+        self.tmp_dir = tmp_dir
+
+    def __del__(self):
+        self.wait()
+
+    def run(self):
+        while True:
+            path = self.sprite_sheet.next_request()
+            if path is None:
+                break
+            if self.sprite_sheet.create(path, self.tmp_dir):
+                self.sprite_ready.emit(path)
+
+
+class SpriteSheet():
+
+    def __init__(self, home, tmp_dir, logger=None, interval=10,
+                 tile_width=160, columns=10, rows=10, timeout=900):
+        if logger is None:
+            logger = logging.getLogger(__name__)
+        self.logger = logger
+        self.sprite_dir = os.path.join(home, 'sprites')
+        self.tmp_dir = tmp_dir
+        self.interval = interval
+        self.tile_width = tile_width
+        self.columns = columns
+        self.rows = rows
+        self.timeout = timeout
+        self.lock = Lock()
+        self.requests = []
+        self.failed = set()
+        self.cues = {}
+        self.thread = None
+
+    def sprite_dir_for(self, path):
+        path_bytes = bytes(path, 'utf-8')
+        h = hashlib.sha256(path_bytes)
+        return os.path.join(self.sprite_dir, h.hexdigest())
+
+    def vtt_path(self, path):
+        return os.path.join(self.sprite_dir_for(path), SPRITE_VTT)
+
+    def exists(self, path):
+        return os.path.isfile(self.vtt_path(path))
+
+    def request(self, path):
+        """Queues generation of sprite sheet of local file path"""
+        if not os.path.isfile(path):
+            return False
+        with self.lock:
+            if path in self.failed or path in self.requests or self.exists(path):
+                return False
+            self.requests.append(path)
+            if self.thread is None or self.thread.isFinished():
+                self.thread = SpriteSheetThread(self, self.tmp_dir)
+                self.thread.start(QtCore.QThread.LowPriority)
+        return True
+
+    def next_request(self):
+        with self.lock:
+            if self.requests:
+                return self.requests[0]
+            self.thread = None
+            return None
+
+    def extract_frames(self, path, frames_dir):
+        vf = 'lavfi=[fps=fps=1/{0}:round=down,scale={1}:-2]'.format(
+            self.interval, self.tile_width
+            )
+        cmd = [
+            "mpv", "--no-config", "--vo=image", "--vo-image-format=jpg",
+            "--vo-image-outdir="+frames_dir, "--no-audio", "--sid=no",
+            "--ytdl=no", "--really-quiet", "--untimed", "--hr-seek=no",
+            "--vd-lavc-skipframe=nokey", "--vd-lavc-skiploopfilter=all",
+            "--vf="+vf, path
+            ]
+        try:
+            subprocess.run(cmd, timeout=self.timeout)
+        except (OSError, subprocess.SubprocessError) as err:
+            self.logger.error('{0}::{1}'.format(err, path))
+        return sorted(i for i in os.listdir(frames_dir) if i.endswith('.jpg'))
+
+    def create(self, path, tmp_dir):
+        out_dir = self.sprite_dir_for(path)
+        frames_dir = os.path.join(tmp_dir, 'sprite_frames')
+        if os.path.exists(frames_dir):
+            shutil.rmtree(frames_dir)
+        os.makedirs(frames_dir)
+        try:
+            frames = self.extract_frames(path, frames_dir)
+            if frames:
+                self.tile_frames(frames_dir, frames, out_dir)
+        except Exception as err:
+            self.logger.error('{0}::{1}'.format(err, path))
+            frames = []
+        finally:
+            shutil.rmtree(frames_dir, ignore_errors=True)
+            with self.lock:
+                if path in self.requests:
+                    self.requests.remove(path)
+                if not frames:
+                    self.failed.add(path)
+        self.logger.info('sprite sheet: {0} frames: {1}'.format(len(frames), path))
+        return bool(frames)
+
+    def tile_frames(self, frames_dir, frames, out_dir):
+        if not os.path.exists(out_dir):
+            os.makedirs(out_dir)
+        first = Image.open(os.path.join(frames_dir, frames[0]))
+        width, height = first.size
+        per_sheet = self.columns * self.rows
+        vtt = ['WEBVTT', '']
+        for sheet_num, start in enumerate(range(0, len(frames), per_sheet)):
+            sheet_frames = frames[start:start+per_sheet]
+            rows = (len(sheet_frames) + self.columns - 1) // self.columns
+            columns = min(self.columns, len(sheet_frames))
+            sheet = Image.new('RGB', (columns * width, rows * height))
+            sheet_name = 'sprite_{0}.jpg'.format(sheet_num)
+            for i, frame in enumerate(sheet_frames):
+                x = (i % self.columns) * width
+                y = (i // self.columns) * height
+                img = Image.open(os.path.join(frames_dir, frame))
+                if img.size != (width, height):
+                    img = img.resize((width, height))
+                sheet.paste(img, (x, y))
+                begin = (start + i) * self.interval
+                vtt.append('{0} --> {1}'.format(
+                    format_vtt_time(begin), format_vtt_time(begin + self.interval)))
+                vtt.append('{0}#xywh={1},{2},{3},{4}'.format(sheet_name, x, y, width, height))
+                vtt.append('')
+            sheet.save(os.path.join(out_dir, sheet_name), 'JPEG', quality=80)
+        tmp_vtt = os.path.join(out_dir, SPRITE_VTT + '.tmp')
+        with open(tmp_vtt, 'w') as f:
+            f.write('\n'.join(vtt))
+        os.replace(tmp_vtt, os.path.join(out_dir, SPRITE_VTT))
+
+    def lookup(self, path, seconds):
+        """
+        Returns (sprite image, (x, y, w, h), cue index) for position
+        in seconds or None if sprite sheet of path isn't available.
+        """
+        if path not in self.cues:
+            vtt_file = self.vtt_path(path)
+            if not os.path.isfile(vtt_file):
+                return None
+            cues = load_vtt(vtt_file)
+            if not cues:
+                return None
+            self.cues.update({path: ([i[0] for i in cues], cues)})
+        starts, cues = self.cues[path]
+        index = bisect.bisect_right(starts, seconds) - 1
+        index = min(max(index, 0), len(cues) - 1)
+        image = os.path.join(self.sprite_dir_for(path), cues[index][2])
+        return (image, cues[index][3], index)
+
+    def vtt_content(self, path, prefix):
+        """VTT of path with sprite names prefixed for media server urls"""
+        vtt_file = self.vtt_path(path)
+        if not os.path.isfile(vtt_file):
+            return None
+        with open(vtt_file, 'r') as f:
+            content = f.read()
+        return re.sub(r'^(sprite_\d+\.jpg)', prefix + r'\1', content, flags=re.MULTILINE)
+
+    def sprite_file(self, path, sheet_num):
+        sprite = os.path.join(self.sprite_dir_for(path), 'sprite_{0}.jpg'.format(sheet_num))
+        if os.path.isfile(sprite):
+            return sprite
+        return None
@@ -32,6 +32,7 @@ from bs4 import BeautifulSoup
 from PyQt5 import QtCore, QtGui
 from PyQt5.QtCore import pyqtSlot, pyqtSignal
 from player_functions import ccurl, write_files, open_files, send_notification
+from player_functions import ccurl_multi
 from player import PlayerWidget
 from multiprocessing import Process
 
@@ -141,14 +142,30 @@ class FindPosterThread(QtCore.QThread):
             if not os.path.exists(new_picn):
                 ui.image_fit_option(picn, new_picn, fit_size=6, widget=ui.label)
     
-    def run_curl(self, url=None, get_text=None, img_list=None):
+    def fetch_image(self, url, out_file):
+        """Downloads url into out_file unless same picture is available locally"""
+        return ui.image_hash.fetch(
+            url, out_file, lambda img_url, dest: ccurl(img_url+'#'+'-o'+'#'+dest)
+            )
+    
+    def fetch_images(self, jobs):
+        """
+        Downloads jobs, list of (url, out_file), in parallel. Pictures
+        which are available locally aren't downloaded.
+        """
+        jobs = [i for i in jobs if not ui.image_hash.lookup_url(*i)]
+        if jobs:
+            for url, out_file in ccurl_multi(jobs):
+                ui.image_hash.record_url(url, out_file)
+    
+    def run_curl(self, url=None, get_text=None, img_list=None, fetched=False):
         dest = dest_txt = ep_url = dest_txt = ''
         if img_list and len(img_list) == 7:
             img_url, dt, ep_url, local_path, site, img_key, dest_txt = img_list
             
         if not get_text:
-            if url.startswith('http'):
-                ccurl(url)
+            if url.startswith('http') and not fetched:
+                self.fetch_image(url.split('#')[0], url.split('#')[2])
             try:
                 if url:
                     picn = url.split('#')[2]
@@ -179,6 +196,7 @@ class FindPosterThread(QtCore.QThread):
                 and site != 'NONE' and site != 'MyServer'):
             if not os.path.exists(dest_dir):
                 os.makedirs(dest_dir)
+            jobs = []
             for img_key, img_val in image_dict.items():
                 img_url, dt, ep_url, local_path, site_record = img_val
                 if site.lower() == 'video':
@@ -203,8 +221,12 @@ class FindPosterThread(QtCore.QThread):
                 img_val_copy = img_val.copy()
                 img_val_copy.append(img_key)
                 img_val_copy.append(dest_txt)
-                
-                self.run_curl(url=picn_url, get_text=False, img_list=img_val_copy)
+                jobs.append((picn_url, img_val_copy))
+            self.fetch_images([
+                (i.split('#')[0], i.split('#')[2]) for i, j in jobs if i.startswith('http')
+                ])
+            for picn_url, img_val_copy in jobs:
+                self.run_curl(url=picn_url, get_text=False, img_list=img_val_copy, fetched=True)
                 self.run_curl(url=picn_url, get_text=True, img_list=img_val_copy)
     
     def parse_tvdb(self, name, url):
@@ -292,6 +314,8 @@ class FindPosterThread(QtCore.QThread):
             
         post_arr = list(set(post_arr))
         post_arr = random.sample(post_arr, len(post_arr))
+        fan_arr = ui.image_hash.choose(fan_arr, prefix="http://thetvdb.com/")
+        post_arr = ui.image_hash.choose(post_arr, prefix="http://thetvdb.com/")
         return (post_arr, fan_arr)
     
     def parse_tmdb(self, name, final_link, thumb, fanart):
@@ -344,10 +368,12 @@ class FindPosterThread(QtCore.QThread):
             fanart_link = posters_link
         if posters_link:
             posters_link = random.sample(posters_link, len(posters_link))
-            ccurl(posters_link[0]+'#'+'-o'+'#'+thumb)
+            posters_link = ui.image_hash.choose(posters_link)
+            self.fetch_image(posters_link[0], thumb)
         if fanart_link:
             fanart_link = random.sample(fanart_link, len(fanart_link))
-            ccurl(fanart_link[0]+'#'+'-o'+'#'+fanart)
+            fanart_link = ui.image_hash.choose(fanart_link)
+            self.fetch_image(fanart_link[0], fanart)
     
     def init_search(self, nam, url, direct_url, thumb, fanart, src_site):
         final_link = ""
@@ -366,9 +392,9 @@ class FindPosterThread(QtCore.QThread):
             if direct_url and url:
                 if (".jpg" in url or ".png" in url or url.endswith('.webp')) and "http" in url:
                     if self.copy_poster:
-                        ccurl(url+'#'+'-o'+'#'+thumb)
+                        self.fetch_image(url, thumb)
                     elif self.copy_fanart:
-                        ccurl(url+'#'+'-o'+'#'+fanart)
+                        self.fetch_image(url, fanart)
                 elif 'tvdb' in url or 'themoviedb' in url:
                     final_link = url
                     logger.info(final_link)
@@ -453,13 +479,13 @@ class FindPosterThread(QtCore.QThread):
                         u2 = l.split('/')[-1]
                         u = u1 + '/770x0/'+u2
                         img.append(u)
-                img = list(set(img))
+                img = ui.image_hash.choose(sorted(set(img), key=img.index))
                 logger.info(len(img))
                 thumb = os.path.join(TMPDIR, name+'.jpg')
                 if img:
                     url = img[0]
                     try:
-                        ccurl(url, curl_opt='-o', out_file=thumb)
+                        self.fetch_image(url, thumb)
                     except Exception as err:
                         print(err, '--151--')
             elif (self.copy_poster or self.copy_fanart) and url and direct_url:
@@ -489,7 +515,7 @@ class FindPosterThread(QtCore.QThread):
                     final = ''
                 try:
                     if final.startswith('http'):
-                        ccurl(final, curl_opt='-o', out_file=thumb)
+                        self.fetch_image(final, thumb)
                 except Exception as e:
                     print(e)
         else:
@@ -561,10 +587,10 @@ class FindPosterThread(QtCore.QThread):
                 if post_val or fan_val:
                     if post_val:
                         url = "http://thetvdb.com/" + post_val
-                        ccurl(url+'#'+'-o'+'#'+thumb)
+                        self.fetch_image(url, thumb)
                     if fan_val:
                         url = "http://thetvdb.com/" + fan_val
-                        ccurl(url+'#'+'-o'+'#'+fanart)
+                        self.fetch_image(url, fanart)
                 else:
                     if not final_link:
                         n = re.sub('amp;', '', m[0])
@@ -577,14 +603,14 @@ class FindPosterThread(QtCore.QThread):
                     post_arr, fan_arr = self.parse_tvdb(name, url)
                     if post_arr:
                         url = "http://thetvdb.com/" + post_arr[0]
-                        ccurl(url+'#'+'-o'+'#'+thumb)
+                        self.fetch_image(url, thumb)
                         logger.info(post_arr)
                     if fan_arr:
                         #if ui.player_theme != 'default':
                         fan_arr = [i for i in fan_arr if 'vignette' not in i]
                         if fan_arr:
                             url = "http://thetvdb.com/" + fan_arr[0]
-                            ccurl(url+'#'+'-o'+'#'+fanart)
+                            self.fetch_image(url, fanart)
                         logger.debug(fan_arr)
                     fan_arr.sort()
                     post_arr.sort()
@@ -765,6 +791,212 @@ class UpdateMusicThread(QtCore.QThread):
                                                self.music_file_bak)
         self.music_db_update.emit('end')
 
+class DatabaseMaintenanceThread(QtCore.QThread):
+
+    """
+    Runs integrity check, ANALYZE, PRAGMA optimize and incremental vacuum
+    on Video, Music and catalog databases and takes snapshots of them.
+    Afterwards images of metadata directories are indexed by image_hash
+    and their lower resolution copies are replaced.
+    Should be started with QtCore.QThread.LowestPriority while idle.
+    """
+
+    def __init__(self, ui_widget, db_list, logr):
+        QtCore.QThread.__init__(self)
+        self.ui = ui_widget
+        self.db_list = db_list
+        self.logger = logr
+
+    def __del__(self):
+        self.wait()
+
+    def run(self):
+        for db_path in self.db_list:
+            if self.ui.quit_now:
+                break
+            status = self.ui.media_data.maintenance.maintain(db_path)
+            self.logger.info('database maintenance: {0} {1}'.format(db_path, status))
+        if not self.ui.quit_now:
+            self.ui.image_hash.dedupe(self.ui.image_hash.metadata_dirs())
+
+class CatalogImportThread(QtCore.QThread):
+
+    """
+    Imports Video.db, Music.db and playing history into catalog.db, so
+    that catalog follows database scans done in earlier sessions.
+    Import is idempotent. Should be started with
+    QtCore.QThread.LowestPriority.
+    """
+
+    def __init__(self, ui_widget, logr):
+        QtCore.QThread.__init__(self)
+        self.ui = ui_widget
+        self.logger = logr
+
+    def __del__(self):
+        self.wait()
+
+    def run(self):
+        if self.ui.quit_now or self.ui.media_data.catalog is None:
+            return
+        try:
+            result = self.ui.media_data.catalog.import_legacy_stores()
+            self.logger.info('catalog import: {0}'.format(result))
+        except Exception as err:
+            self.logger.error('{0}::{1}'.format(err, '--catalog-import--'))
+
+class ThumbnailPrewarmThread(QtCore.QThread):
+
+    """
+    Generates missing thumbnails of entries, list of (thumbnail, path),
+    and 128px/480px variants of existing ones. If entries is None, all
+    files of Video and Music databases are used. Jobs are given to
+    thumbnail_scheduler in small batches only while it is idle, so that
+    thumbnails of visible rows aren't delayed. Should be started with
+    QtCore.QThread.LowestPriority.
+    """
+
+    def __init__(self, ui_widget, entries, logr, batch=4, interval=1):
+        QtCore.QThread.__init__(self)
+        self.ui = ui_widget
+        self.entries = entries
+        self.logger = logr
+        self.batch = batch
+        self.interval = interval
+        self.pixels = [128, 480]
+        self.stopped = False
+
+    def __del__(self):
+        self.wait()
+
+    def stop(self):
+        self.stopped = True
+
+    def library_entries(self):
+        home = self.ui.home_folder
+        for db_path, table in [
+                (os.path.join(home, 'VideoDB', 'Video.db'), 'Video'),
+                (os.path.join(home, 'Music', 'Music.db'), 'Music')]:
+            for path in self.ui.media_data.get_library_paths(db_path, table):
+                if table == 'Music' and self.ui.audio_artwork.has_artwork_tags(path):
+                    art_file = self.ui.audio_artwork.artwork(path)
+                    if art_file:
+                        yield (art_file, path)
+                        continue
+                yield (self.ui.thumbnail_server_picn(path), path)
+
+    def wait_idle(self):
+        while self.ui.thumbnail_scheduler.pending_count() and not self.stopped:
+            time.sleep(self.interval)
+
+    def submit(self, jobs):
+        self.wait_idle()
+        if self.stopped:
+            return
+        for picn, path in jobs:
+            self.ui.thumbnail_scheduler.submit(None, picn, path, '10s')
+
+    def create_variants(self, picn):
+        picn_dir, picn_name = os.path.split(picn)
+        for pixel in self.pixels:
+            variant = os.path.join(picn_dir, '{0}px.{1}'.format(pixel, picn_name))
+            if not os.path.exists(variant):
+                self.ui.create_new_image_pixel(picn, pixel)
+
+    def run(self):
+        for pixel in self.pixels:
+            self.ui.create_default_image_pixel(pixel)
+        if self.entries is None:
+            entries = self.library_entries()
+        else:
+            entries = self.entries
+        count = 0
+        jobs = []
+        for picn, path in entries:
+            if self.stopped:
+                break
+            try:
+                if os.path.isfile(picn):
+                    if os.stat(picn).st_size:
+                        self.create_variants(picn)
+                elif path and not path.startswith('http') and os.path.isfile(path):
+                    jobs.append((picn, path))
+                    count += 1
+                    if len(jobs) >= self.batch:
+                        self.submit(jobs)
+                        jobs = []
+            except Exception as err:
+                self.logger.error('{0}::{1}'.format(err, picn))
+        if jobs and not self.stopped:
+            self.submit(jobs)
+        self.ui.audio_artwork.flush()
+        self.logger.info('thumbnail pre-warm: {0} thumbnails requested'.format(count))
+
+
+class MetadataBatchThread(QtCore.QThread):
+
+    """
+    Runs MetadataBatch over entries, list of (site, title, directory).
+    If entries is None, all titles of Video and Music databases are used.
+    """
+
+    def __init__(self, ui_widget, batch, entries=None, overwrite=False,
+                 retry_failed=False):
+        QtCore.QThread.__init__(self)
+        self.ui = ui_widget
+        self.batch = batch
+        self.entries = entries
+        self.overwrite = overwrite
+        self.retry_failed = retry_failed
+
+    def __del__(self):
+        self.wait()
+
+    def stop(self):
+        self.batch.stop()
+
+    def run(self):
+        if self.entries is None:
+            entries = self.batch.library_entries()
+        else:
+            entries = self.entries
+        self.batch.add_entries(entries, self.overwrite, self.retry_failed)
+        self.batch.run()
+
+class MetadataPackThread(QtCore.QThread):
+
+    """
+    Exports metadata of library into pack_file (mode 'export') or
+    imports it from pack_file (mode 'import') with MetadataPack.
+    """
+
+    def __init__(self, ui_widget, pack, mode, pack_file, logr):
+        QtCore.QThread.__init__(self)
+        self.ui = ui_widget
+        self.pack = pack
+        self.mode = mode
+        self.pack_file = pack_file
+        self.logger = logr
+
+    def __del__(self):
+        self.wait()
+
+    def run(self):
+        try:
+            if self.mode == 'export':
+                result = self.pack.export_pack(self.pack_file)
+            else:
+                result = self.pack.import_pack(self.pack_file)
+                episode_map = self.ui.metaengine.episode_map
+                with episode_map.lock:
+                    episode_map.series.clear()
+            msg = ', '.join('{0}: {1}'.format(key, value) for key, value in result.items())
+        except Exception as err:
+            self.logger.error(err)
+            msg = str(err)
+        self.logger.info('metadata pack {0}: {1}'.format(self.mode, msg))
+        self.ui.gui_signals.display_string('Metadata pack {0}: {1}'.format(self.mode, msg))
+
 @pyqtSlot(str)
 def update_music_db_onstart(val):
     global ui
@@ -829,7 +1061,10 @@ class DownloadThread(QtCore.QThread):
             
         if not self.get_text:
             if self.url.startswith('http'):
-                ccurl(self.url)
+                img_url, opt, dest = self.url.split('#', 2)
+                ui.image_hash.fetch(
+                    img_url, dest, lambda url, out: ccurl(url+'#'+'-o'+'#'+out)
+                    )
             try:
                 if self.url:
                     self.picn = self.url.split('#')[2]
@@ -1271,84 +1506,36 @@ def set_my_ip_function(my_ip):
             print('Cloud File Does not exists')
 
 
-class ThreadingThumbnail(QtCore.QThread):
-
-    def __init__(self, ui_widget, logr, path, picn, inter, size):
-        QtCore.QThread.__init__(self)
-        global ui, logger
-        ui = ui_widget
-        logger = logr
-        self.path = path
-        self.picn = picn
-        self.inter = inter
-        self.interval = 1
-        self.size = size
-
-    def __del__(self):
-        self.wait()                        
-
-    def run(self):
-        logger.info(self.path)
-        if not os.path.exists(self.picn) and self.path:
-            try:
-                if (self.path.startswith('http') and 
-                        (self.path.endswith('.jpg') or self.path.endswith('.png')
-                         or self.path.endswith('.image'))):
-                    ccurl(self.path+'#'+'-o'+'#'+self.picn)
-                    ui.image_fit_option(self.picn, self.picn, fit_size=6, widget=ui.label)
-                else:
-                    ui.generate_thumbnail_method(self.picn, self.inter, self.path, width_allowed=self.size)
-            except Exception as e:
-                logger.info("Thumbnail Generation Exception: {0}".format(e))
-                print(e,'--548--')
+class SetThumbnail(QtCore.QThread):
 
+    """
+    Requests playlist icons from image_loader. icon_list is computed
+    on GUI thread by get_thumbnail_image_path, no widget is accessed here.
+    """
 
-class SetThumbnail(QtCore.QThread):
-    setThumb = pyqtSignal(int, str, str)
-    def __init__(self, ui_widget, logr, epn_arr, update_pl, title_list):
+    def __init__(self, ui_widget, logr, icon_list, pixel):
         QtCore.QThread.__init__(self)
         global ui, logger
         ui = ui_widget
         logger = logr
-        self.epn_arr = epn_arr.copy()
-        self.update_pl = update_pl
-        self.title_list = title_list
-        self.setThumb.connect(apply_thumbnail_to_playlist)
+        self.image_loader = ui_widget.image_loader
+        self.icon_list = icon_list
+        self.pixel = pixel
         
     def __del__(self):
         self.wait()                        
 
     def run(self):
-        generate_thumbnail = False
-        if ui.list1.currentItem():
-            txt = ui.list1.currentItem().text()
-            if txt == self.title_list:
-                generate_thumbnail = True
-        if generate_thumbnail or ui.show_search_thumbnail:
-            for i, k in enumerate(self.epn_arr):
-                if ui.list_with_thumbnail and self.update_pl:
-                    self.setThumb.emit(i, k, self.title_list)
-
-@pyqtSlot(int, str, str)
-def apply_thumbnail_to_playlist(k, i, title):
-    try:
-        if k < ui.list2.count():
-            icon_name = ui.get_thumbnail_image_path(k, i, title_list=title)
-            if ui.view_mode == "thumbnail_light":
-                size = 256
-            else:
-                size = 128
-            icon_new_pixel = ui.create_new_image_pixel(icon_name, size)
-            if os.path.exists(icon_new_pixel):
-                ui.list2.item(k).setIcon(QtGui.QIcon(icon_new_pixel))
-                if ui.view_mode == "thumbnail_light" and ui.list_poster.title_clicked:
-                    ui.list_poster.item(k).setIcon(QtGui.QIcon(icon_new_pixel))
-    except Exception as e:
-        print(e)
+        for k, icon_name in enumerate(self.icon_list):
+            if icon_name:
+                try:
+                    self.image_loader.request('playlist', k, icon_name, pixel=self.pixel)
+                except Exception as e:
+                    print(e)
 
 
 class SetThumbnailGrid(QtCore.QThread):
-    setThumbGrid = pyqtSignal(int, str, str, int, tuple, int, str)
+
     def __init__(self, ui_widget, logr, browse_cnt, picn, val, fit_size,
                  widget_size, length, nameEpn, path=None):
         QtCore.QThread.__init__(self)
@@ -1362,8 +1549,8 @@ class SetThumbnailGrid(QtCore.QThread):
         self.widget_size = widget_size
         self.length = length
         self.nameEpn = nameEpn
-        self.setThumbGrid.connect(apply_to_thumbnail_grid)
         self.path = path
+        self.image_loader = ui_widget.image_loader
         
     def __del__(self):
         self.wait()                        
@@ -1381,21 +1568,8 @@ class SetThumbnailGrid(QtCore.QThread):
             time.sleep(0.5)
             counter += 1
         if os.path.exists(self.picn):
-            self.setThumbGrid.emit(self.browse_cnt, self.picn, self.val,
-                                   self.fit_size, self.widget_size, self.length,
-                                   self.nameEpn)
-
-@pyqtSlot(int, str, str, int, tuple, int, str)
-def apply_to_thumbnail_grid(browse_cnt, picn, val, fit_size, widget_size, length, nameEpn):
-    try:
-        picn_old = picn
-        picn = ui.image_fit_option(picn_old, '', fit_size=fit_size, widget_size=widget_size)
-        img = QtGui.QPixmap(picn, "1")
-        q1="ui.label_epn_"+str(browse_cnt)+".setPixmap(img)"
-        exec (q1)
-        #QtWidgets.QApplication.processEvents()
-    except Exception as err:
-        print(err, '--917--')
+            width, height = self.widget_size
+            self.image_loader.request('grid', self.browse_cnt, self.picn, width, height)
 
 class GetServerEpisodeInfo(QtCore.QThread):
 
@@ -0,0 +1,293 @@
+"""
+Copyright (C) 2017 kanishka-linux kanishka.linux@gmail.com
+
+This file is part of kawaii-player.
+
+kawaii-player is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kawaii-player is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kawaii-player.  If not, see <http://www.gnu.org/licenses/>.
+
+Index of generated thumbnails kept in thumbnails/thumbnail_index.db.
+Every thumbnail is stored along with its 128px, 256px and 480px variants
+which are created from single decode of the thumbnail. Index keeps total
+size, last access time and mtime of source file of every thumbnail, so
+that cache can be limited to given quota and thumbnails of modified
+files can be regenerated.
+"""
+
+import os
+import time
+import sqlite3
+import logging
+from threading import Lock
+from PIL import Image
+
+THUMBNAIL_SIZES = (128, 256, 480)
+VARIANT_PREFIXES = ['128px.', '256px.', '480px.', 'label.']
+
+
+class ThumbnailCache():
+
+    def __init__(self, home, logger=None, quota=500):
+        if logger is None:
+            logger = logging.getLogger(__name__)
+        self.logger = logger
+        self.thumbnail_dir = os.path.join(home, 'thumbnails')
+        self.artwork_dir = os.path.join(self.thumbnail_dir, 'artwork')
+        self.index_db = os.path.join(self.thumbnail_dir, 'thumbnail_index.db')
+        self.quota = quota * 1024 * 1024
+        self.lock = Lock()
+        self.entries = None
+        self.dirty = set()
+        self.total_size = 0
+
+    def set_quota(self, quota):
+        """quota in MB"""
+        self.quota = quota * 1024 * 1024
+
+    def connect(self):
+        if not os.path.exists(self.thumbnail_dir):
+            os.makedirs(self.thumbnail_dir)
+        conn = sqlite3.connect(self.index_db)
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS Thumbnail(Path text primary key, '
+            'Source text, SourceMtime real, Size integer, LastAccess real)'
+            )
+        conn.execute('CREATE INDEX IF NOT EXISTS thumbnail_access ON Thumbnail(LastAccess)')
+        return conn
+
+    def is_managed(self, picn):
+        name = os.path.basename(picn)
+        picn_dir = os.path.dirname(picn)
+        return (picn_dir.startswith(self.thumbnail_dir)
+                and not picn_dir.startswith(self.artwork_dir)
+                and name.lower().endswith(('.jpg', '.png'))
+                and not name.startswith(tuple(VARIANT_PREFIXES)))
+
+    def variant_path(self, picn, pixel):
+        path_thumb, new_title = os.path.split(picn)
+        return os.path.join(path_thumb, str(pixel)+'px.'+new_title)
+
+    def variants(self, picn):
+        path_thumb, new_title = os.path.split(picn)
+        return [picn] + [os.path.join(path_thumb, i+new_title) for i in VARIANT_PREFIXES]
+
+    def disk_size(self, picn):
+        size = 0
+        for path in self.variants(picn):
+            try:
+                size += os.stat(path).st_size
+            except OSError:
+                pass
+        return size
+
+    def load(self):
+        """Called with lock held. Indexes existing thumbnails on first run"""
+        if self.entries is not None:
+            return
+        new_index = not os.path.isfile(self.index_db)
+        conn = self.connect()
+        self.entries = {}
+        if new_index:
+            now = time.time()
+            rows = []
+            for r, d, f in os.walk(self.thumbnail_dir):
+                for k in f:
+                    picn = os.path.join(r, k)
+                    if self.is_managed(picn):
+                        try:
+                            atime = os.stat(picn).st_atime
+                        except OSError:
+                            atime = now
+                        rows.append((picn, None, None, self.disk_size(picn), atime))
+            conn.executemany('INSERT OR IGNORE INTO Thumbnail VALUES(?, ?, ?, ?, ?)', rows)
+            conn.commit()
+            self.logger.info('thumbnail index created: {0} entries'.format(len(rows)))
+        for row in conn.execute('SELECT Path, Source, SourceMtime, Size, LastAccess FROM Thumbnail'):
+            self.entries.update({row[0]: list(row[1:])})
+        conn.close()
+        self.total_size = sum(i[2] for i in self.entries.values())
+
+    def source_mtime(self, source):
+        if source and os.path.isfile(source):
+            try:
+                return os.stat(source).st_mtime
+            except OSError:
+                pass
+        return None
+
+    def create_variants(self, picn, pixel=None, source=None):
+        """
+        Creates all missing variants of picn from single decode and
+        registers picn in the index. Images outside thumbnail directory
+        (posters, fanart) get only requested variant and aren't indexed.
+        Returns path of requested variant.
+        """
+        managed = self.is_managed(picn)
+        if managed:
+            sizes = set(THUMBNAIL_SIZES)
+        else:
+            sizes = set()
+        if pixel:
+            sizes.add(pixel)
+        missing = [
+            i for i in sorted(sizes, reverse=True)
+            if not os.path.exists(self.variant_path(picn, i))
+            ]
+        if missing:
+            img = Image.open(picn)
+            if img.format == 'JPEG':
+                img.draft('RGB', (missing[0], missing[0]))
+            if img.mode not in ['RGB', 'L']:
+                img = img.convert('RGB')
+            for basewidth in missing:
+                wpercent = (basewidth / float(img.size[0]))
+                hsize = max(1, int((float(img.size[1]) * float(wpercent))))
+                img_variant = img.resize((basewidth, hsize), Image.LANCZOS)
+                variant = self.variant_path(picn, basewidth)
+                if variant.lower().endswith('.png'):
+                    img_variant.save(variant, 'PNG')
+                else:
+                    img_variant.save(variant, 'JPEG', quality=90)
+        if managed:
+            self.register(picn, source)
+        if pixel:
+            return self.variant_path(picn, pixel)
+        return None
+
+    def register(self, picn, source=None):
+        size = self.disk_size(picn)
+        now = time.time()
+        with self.lock:
+            self.load()
+            entry = self.entries.get(picn)
+            if entry is not None:
+                if source is None:
+                    source = entry[0]
+                self.total_size -= entry[2]
+            entry = [source, self.source_mtime(source), size, now]
+            self.entries.update({picn: entry})
+            self.dirty.discard(picn)
+            self.total_size += size
+            conn = self.connect()
+            conn.execute(
+                'INSERT OR REPLACE INTO Thumbnail VALUES(?, ?, ?, ?, ?)',
+                tuple([picn] + entry)
+                )
+            conn.commit()
+            conn.close()
+            over_quota = self.quota and self.total_size > self.quota
+        if over_quota:
+            self.evict()
+
+    def touch(self, picn):
+        with self.lock:
+            self.load()
+            entry = self.entries.get(picn)
+            if entry is not None:
+                entry[3] = time.time()
+                self.dirty.add(picn)
+                if len(self.dirty) >= 100:
+                    self.flush_locked()
+
+    def flush(self):
+        with self.lock:
+            if self.entries is not None:
+                self.flush_locked()
+
+    def flush_locked(self):
+        if not self.dirty:
+            return
+        conn = self.connect()
+        conn.executemany(
+            'INSERT OR REPLACE INTO Thumbnail VALUES(?, ?, ?, ?, ?)',
+            [tuple([i] + self.entries[i]) for i in self.dirty if i in self.entries]
+            )
+        conn.commit()
+        conn.close()
+        self.dirty.clear()
+
+    def is_stale(self, picn, source):
+        """
+        True if source file was modified after thumbnail was created.
+        Thumbnails without recorded mtime adopt current mtime of source;
+        like access times they are written to index in batches by flush.
+        """
+        mtime = self.source_mtime(source)
+        if mtime is None or not self.is_managed(picn):
+            return False
+        with self.lock:
+            self.load()
+            entry = self.entries.get(picn)
+            if entry is not None and entry[1] is not None:
+                return entry[1] != mtime
+        if not os.path.exists(picn):
+            return False
+        size = self.disk_size(picn)
+        with self.lock:
+            entry = self.entries.get(picn)
+            if entry is None:
+                entry = [source, mtime, size, time.time()]
+                self.entries.update({picn: entry})
+                self.total_size += size
+            else:
+                entry[0] = source
+                entry[1] = mtime
+            self.dirty.add(picn)
+            if len(self.dirty) >= 100:
+                self.flush_locked()
+        return False
+
+    def remove(self, picn):
+        for path in self.variants(picn):
+            if os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError as err:
+                    self.logger.error('{0}::{1}'.format(err, path))
+        with self.lock:
+            self.load()
+            entry = self.entries.pop(picn, None)
+            if entry is not None:
+                self.total_size -= entry[2]
+                self.dirty.discard(picn)
+                conn = self.connect()
+                conn.execute('DELETE FROM Thumbnail Where Path=?', (picn, ))
+                conn.commit()
+                conn.close()
+
+    def evict(self, limit=None):
+        """
+        Removes least recently used thumbnails until total size falls
+        below 90% of quota. Returns number of removed thumbnails.
+        """
+        if limit is None:
+            limit = int(self.quota * 0.9)
+        with self.lock:
+            self.load()
+            if self.total_size <= limit:
+                return 0
+            lru = sorted(self.entries.items(), key=lambda x: x[1][3])
+            total = self.total_size
+            remove_list = []
+            for picn, entry in lru:
+                if total <= limit:
+                    break
+                total -= entry[2]
+                remove_list.append(picn)
+        for picn in remove_list:
+            self.remove(picn)
+        self.logger.info(
+            'thumbnail cache: {0} thumbnails evicted, {1} bytes used'.format(
+                len(remove_list), self.total_size)
+            )
+        return len(remove_list)
@@ -0,0 +1,295 @@
+"""
+Copyright (C) 2017 kanishka-linux kanishka.linux@gmail.com
+
+This file is part of kawaii-player.
+
+kawaii-player is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kawaii-player is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kawaii-player.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+import shutil
+import heapq
+import itertools
+from threading import Lock, Event
+from PyQt5 import QtCore
+from PyQt5.QtCore import pyqtSignal
+from player_functions import ccurl
+from mpv_bak import MPV, MpvEventID
+
+
+class ThumbnailJob():
+
+    def __init__(self, picn, path, inter, size, priority, seq):
+        self.picn = picn
+        self.path = path
+        self.inter = inter
+        self.size = size
+        self.priority = priority
+        self.seq = seq
+        self.rows = set()
+
+
+class ThumbnailDecoder():
+
+    """
+    Long lived libmpv handle which extracts one frame per file. Seeking
+    is done to nearest keyframe (hr-seek=no) and loop filter is skipped,
+    so that cost of thumbnail is mostly demuxing and writing jpg instead
+    of starting new player process for every file.
+    """
+
+    def __init__(self, out_dir, logr, timeout=5):
+        self.out_dir = out_dir
+        self.logger = logr
+        self.timeout = timeout
+        self.done = Event()
+        self.mpv = MPV(
+            vo="image", ytdl="no", quiet=True, aid="no", sid="no", frames=1,
+            idle=True, hr_seek="no", vd_lavc_skiploopfilter="all",
+            vd_lavc_fast=True, vo_image_format="jpg", vo_image_jpeg_quality=90,
+            vo_image_outdir=out_dir
+            )
+        self.mpv.register_event_callback(self.mpv_event)
+
+    def mpv_event(self, event):
+        if event['event_id'] == MpvEventID.END_FILE:
+            self.done.set()
+
+    def extract(self, path, position, picn):
+        out_file = os.path.join(self.out_dir, '00000001.jpg')
+        if os.path.exists(out_file):
+            os.remove(out_file)
+        self.done.clear()
+        self.mpv.start = position
+        self.mpv.play(path)
+        if not self.done.wait(self.timeout):
+            self.logger.warning('thumbnail decoder timeout: {0}'.format(path))
+            self.mpv.command('stop')
+            self.done.wait(1)
+        if os.path.exists(out_file) and os.stat(out_file).st_size:
+            shutil.move(out_file, picn)
+            return True
+        return False
+
+    def close(self):
+        self.mpv.terminate()
+
+
+class ThumbnailWorker(QtCore.QThread):
+
+    def __init__(self, scheduler, worker_id):
+        QtCore.QThread.__init__(self)
+        self.scheduler = scheduler
+        self.worker_id = worker_id
+        self.tmp_dir = os.path.join(scheduler.tmp_dir, 'thumbnail_worker_{0}'.format(worker_id))
+
+    def __del__(self):
+        self.wait()
+
+    def run(self):
+        if not os.path.exists(self.tmp_dir):
+            os.makedirs(self.tmp_dir)
+        while True:
+            job = self.scheduler.take_job(self.worker_id)
+            if job is None:
+                break
+            decoder = self.scheduler.get_decoder(self.worker_id, self.tmp_dir)
+            self.scheduler.execute(job, self.tmp_dir, decoder)
+            self.scheduler.job_finished(job)
+
+
+class ThumbnailScheduler(QtCore.QObject):
+
+    """
+    Generates missing thumbnails with a bounded number of workers.
+
+    Jobs are keyed by thumbnail path, so requesting same thumbnail
+    for several rows results in a single job. Jobs of rows visible
+    in list2 or thumbnail grid are taken first and jobs of pre-warm,
+    which have no row, last. cancel_pending drops
+    queued jobs when playlist is replaced, running jobs are allowed
+    to finish but their rows are not reported anymore.
+
+    Every worker slot owns a ThumbnailDecoder which is kept alive
+    between batches, so only first thumbnail of a slot pays for
+    decoder startup. Workers exit as soon as queue is empty.
+    """
+
+    thumbnail_ready = pyqtSignal(int, str)
+
+    def __init__(self, ui_widget, logr, tmp_dir, workers=None):
+        QtCore.QObject.__init__(self)
+        self.ui = ui_widget
+        self.logger = logr
+        self.tmp_dir = tmp_dir
+        if not workers:
+            workers = os.cpu_count() or 2
+        self.max_workers = max(1, workers)
+        self.decoders = {}
+        self.decoder_timeout = 5
+        self.lock = Lock()
+        self.queue = []
+        self.pending = {}
+        self.running = {}
+        self.workers = []
+        self.worker_ids = set()
+        self.visible_rows = set()
+        self.generation = 0
+        self.counter = itertools.count()
+
+    def set_workers(self, workers):
+        with self.lock:
+            self.max_workers = max(1, workers)
+
+    def submit(self, row, picn, path, inter, size=None):
+        """row is None for jobs of pre-warm, which are taken last"""
+        with self.lock:
+            job = self.running.get(picn)
+            if job is None:
+                job = self.pending.get(picn)
+            if row is None:
+                priority = 2
+            elif row in self.visible_rows:
+                priority = 0
+            else:
+                priority = 1
+            if job is None:
+                job = ThumbnailJob(picn, path, inter, size, priority, next(self.counter))
+                self.pending.update({picn: job})
+                heapq.heappush(self.queue, (job.priority, job.seq, picn))
+            elif priority < job.priority and picn in self.pending:
+                job.priority = priority
+                heapq.heappush(self.queue, (job.priority, job.seq, picn))
+            if row is not None:
+                job.rows.add((row, self.generation))
+            self.start_workers()
+
+    def start_workers(self):
+        self.workers = [i for i in self.workers if not i.isFinished()]
+        while (len(self.worker_ids) < self.max_workers
+                and len(self.worker_ids) < len(self.pending)):
+            worker_id = 0
+            while worker_id in self.worker_ids:
+                worker_id += 1
+            self.worker_ids.add(worker_id)
+            worker = ThumbnailWorker(self, worker_id)
+            self.workers.append(worker)
+            worker.start()
+
+    def take_job(self, worker_id):
+        with self.lock:
+            while self.queue:
+                priority, seq, picn = heapq.heappop(self.queue)
+                job = self.pending.get(picn)
+                if job is not None and job.priority == priority and job.seq == seq:
+                    del self.pending[picn]
+                    self.running.update({picn: job})
+                    return job
+            self.worker_ids.discard(worker_id)
+            return None
+
+    def job_finished(self, job):
+        with self.lock:
+            if self.running.get(job.picn) is job:
+                del self.running[job.picn]
+            rows = sorted(row for row, gen in job.rows if gen == self.generation)
+        for row in rows:
+            self.thumbnail_ready.emit(row, job.picn)
+
+    def get_decoder(self, worker_id, tmp_dir):
+        """Decoder of worker slot, None if libmpv isn't usable"""
+        if worker_id not in self.decoders:
+            if self.ui.display_device == "rpitv":
+                timeout = 20
+            else:
+                timeout = self.decoder_timeout
+            try:
+                decoder = ThumbnailDecoder(tmp_dir, self.logger, timeout)
+            except Exception as err:
+                self.logger.error('thumbnail decoder not available: {0}'.format(err))
+                decoder = None
+            self.decoders.update({worker_id: decoder})
+        return self.decoders[worker_id]
+
+    def close(self):
+        with self.lock:
+            self.queue[:] = []
+            self.pending.clear()
+        for worker in self.workers:
+            worker.wait()
+        for decoder in self.decoders.values():
+            if decoder is not None:
+                decoder.close()
+        self.decoders.clear()
+
+    def execute(self, job, tmp_dir, decoder=None):
+        self.logger.info(job.path)
+        if os.path.exists(job.picn) or not job.path:
+            return
+        try:
+            inter = str(job.inter)
+            if inter.endswith('s'):
+                inter = inter[:-1]
+            if (job.path.startswith('http') and
+                    (job.path.endswith('.jpg') or job.path.endswith('.png')
+                     or job.path.endswith('.image'))):
+                ccurl(job.path+'#'+'-o'+'#'+job.picn)
+                self.ui.image_fit_option(job.picn, job.picn, fit_size=6, widget=self.ui.label)
+            elif self.ui.audio_artwork.has_artwork_tags(job.path) and self.audio_artwork(job):
+                pass
+            elif (decoder is not None and 'youtube.com' not in job.path
+                    and not self.ui.audio_artwork.is_audio(job.path)
+                    and decoder.extract(job.path, '{}%'.format(inter), job.picn)):
+                self.ui.thumbnail_cache.create_variants(job.picn, source=job.path)
+            else:
+                self.ui.generate_thumbnail_method(
+                    job.picn, job.inter, job.path, width_allowed=job.size,
+                    tmp_dir=tmp_dir
+                    )
+            if os.path.exists(job.picn):
+                self.ui.thumbnail_cache.register(job.picn, job.path)
+        except Exception as err:
+            self.logger.error("Thumbnail Generation Exception: {0}".format(err))
+
+    def audio_artwork(self, job):
+        """
+        True if job is done by artwork of audio file. Audio files without
+        artwork are done as well, since there is no frame to extract.
+        """
+        art_file = self.ui.audio_artwork.artwork(job.path)
+        if art_file:
+            self.ui.audio_artwork.export(art_file, job.picn)
+            return True
+        return self.ui.audio_artwork.is_audio(job.path)
+
+    def set_visible_rows(self, rows):
+        with self.lock:
+            self.visible_rows = set(rows)
+            for picn, job in self.pending.items():
+                if job.priority and any(
+                        row in self.visible_rows and gen == self.generation
+                        for row, gen in job.rows):
+                    job.priority = 0
+                    heapq.heappush(self.queue, (job.priority, job.seq, picn))
+
+    def cancel_pending(self):
+        with self.lock:
+            self.generation += 1
+            self.visible_rows.clear()
+            self.queue[:] = []
+            self.pending.clear()
+
+    def pending_count(self):
+        with self.lock:
+            return len(self.pending) + len(self.running)
@@ -0,0 +1,267 @@
+"""
+Copyright (C) 2017 kanishka-linux kanishka.linux@gmail.com
+
+This file is part of kawaii-player.
+
+kawaii-player is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kawaii-player is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kawaii-player.  If not, see <http://www.gnu.org/licenses/>.
+
+Matching of local titles and episode file names. Titles are compared
+after normalization, candidates are looked up in trigram index and
+ranked by edit distance. Edit distance is computed by rapidfuzz or
+python-Levenshtein when installed, otherwise by bit-parallel algorithm
+of Myers/Hyyro on python integers.
+"""
+
+import re
+import heapq
+from functools import lru_cache
+
+try:
+    from rapidfuzz.distance import Levenshtein as _c_levenshtein
+    c_distance = _c_levenshtein.distance
+except ImportError:
+    try:
+        import Levenshtein as _c_levenshtein
+        c_distance = _c_levenshtein.distance
+    except ImportError:
+        c_distance = None
+
+BRACKET_RE = re.compile(r'\[[^\]]*\]|\([^\)]*\)')
+EXT_RE = re.compile(r'\.(mkv|mp4|avi|webm|m4v|mov|wmv|flv|ogm|ts|mp3|flac|ogg|m4a)$')
+SEPARATOR_RE = re.compile(r'[-_.+\s]+')
+JUNK_RE = re.compile(r'\b(sub|dub|subbed|dubbed|online|480p|720p|1080p|2160p|x264|x265|h264|h265|hevc'
+                     r'|xvid|bdrip|brrip|bluray|webrip|web|dl|ac3|aac|hdtv|dvdrip|10bit)\b')
+SPACE_RE = re.compile(r'\s+')
+
+# patterns for episode number, in order of use. op/ed (opening and
+# ending) and season are matched only as separate words
+SXE_RE = re.compile(r's[0-9]+ep?[0-9]+|[0-9]+x[0-9]+ ')
+EPISODE_RE = re.compile(r'e(p)?(isode)?[0-9]+|(?<![a-z])ep(isode)?[ ._][0-9]+')
+DASH_NUMBER_RE = re.compile(r'-[^"]*[0-9][0-9]+')
+NUMBER_RE = re.compile(r'[0-9][0-9]+')
+OPED_RE = re.compile(r'(?<![a-z])(nc)?(op|ed)[0-9]*(?![a-z])')
+SEASON_DASH_RE = re.compile(r's[0-9]+[^"]*\-')
+SEASON_RE = re.compile(r's[0-9]+')
+SEASON_TOKEN_RE = re.compile(r'(?<![a-z])s[0-9]+')
+DASH_PREFIX_RE = re.compile(r'-[^0-9]*')
+SEASON_KEY_RE = re.compile(r's[0-9]+|[0-9]+x')
+EPISODE_KEY_RE = re.compile(r'e[0-9]+|ep[0-9]+|x[0-9]+ ')
+EPISODE_LONG_RE = re.compile(r'episode[^"]*[0-9]+|ep[^"]+[0-9]+')
+DIGITS_RE = re.compile(r'[0-9][0-9]*')
+# start of episode part of file name, title is text before it
+TITLE_END_RE = re.compile(r'(?<![a-z0-9])(s[0-9]+ep?[0-9]+|[0-9]+x[0-9]+|s[0-9]+(?![a-z0-9])'
+                          r'|e(p|pisode)?[ ._]?[0-9]+|(part|session)[ ._][0-9]+|(nc)?(op|ed)[0-9]*(?![a-z]))'
+                          r'|[ _]-[ _]|[ ._][0-9]+(?![0-9a-z])')
+
+
+def normalize_title(title):
+    """Lower case title without brackets, extension, tags and separators"""
+    nam = title.lower()
+    nam = BRACKET_RE.sub(' ', nam)
+    nam = EXT_RE.sub('', nam)
+    nam = SEPARATOR_RE.sub(' ', nam)
+    nam = JUNK_RE.sub(' ', nam)
+    return SPACE_RE.sub(' ', nam).strip()
+
+
+def title_from_filename(name):
+    """Normalized series title of episode file name"""
+    nam = BRACKET_RE.sub(' ', name.lower())
+    nam = EXT_RE.sub('', nam.strip())
+    match = TITLE_END_RE.search(nam)
+    if match and match.start() > 0:
+        nam = nam[:match.start()]
+    return normalize_title(nam)
+
+
+def title_tokens(title):
+    return normalize_title(title).split()
+
+
+def trigrams(text):
+    text = '  {} '.format(text)
+    return set(text[i:i+3] for i in range(len(text) - 2))
+
+
+def levenshtein_py(s1, s2):
+    """Bit-parallel edit distance, one integer operation per character of s2"""
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+    if not s2:
+        return len(s1)
+    # s2 is pattern, bit i of peq[c] is set when s2[i] == c
+    peq = {}
+    for i, c in enumerate(s2):
+        peq[c] = peq.get(c, 0) | (1 << i)
+    m = len(s2)
+    mask = (1 << m) - 1
+    last = 1 << (m - 1)
+    pv = mask
+    mv = 0
+    score = m
+    for c in s1:
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+    return score
+
+
+if c_distance:
+    levenshtein = c_distance
+else:
+    levenshtein = levenshtein_py
+
+
+def similarity(s1, s2):
+    """1.0 for equal normalized titles, 0.0 for nothing in common"""
+    s1 = normalize_title(s1)
+    s2 = normalize_title(s2)
+    size = max(len(s1), len(s2))
+    if not size:
+        return 1.0
+    return 1.0 - levenshtein(s1, s2)/size
+
+
+class TitleIndex:
+
+    """
+    Trigram index of titles. search looks at titles sharing trigrams
+    with query, keeps best by dice coefficient and ranks them by edit
+    distance of normalized titles.
+    """
+
+    def __init__(self, titles=None):
+        self.titles = []
+        self.data = []
+        self.normalized = []
+        self.gram_count = []
+        self.grams = {}
+        if titles:
+            for title in titles:
+                self.add(title)
+
+    def add(self, title, data=None):
+        index = len(self.titles)
+        nam = normalize_title(title)
+        grams = trigrams(nam)
+        self.titles.append(title)
+        self.data.append(data)
+        self.normalized.append(nam)
+        self.gram_count.append(len(grams))
+        for gram in grams:
+            self.grams.setdefault(gram, []).append(index)
+        return index
+
+    def __len__(self):
+        return len(self.titles)
+
+    def search(self, query, limit=5, min_score=0.3):
+        """List of (title, data, distance), closest first"""
+        nam = normalize_title(query)
+        grams = trigrams(nam)
+        common = {}
+        for gram in grams:
+            for index in self.grams.get(gram, ()):
+                common[index] = common.get(index, 0) + 1
+        scored = []
+        for index, count in common.items():
+            dice = 2.0*count/(len(grams) + self.gram_count[index])
+            if dice >= min_score:
+                scored.append((dice, index))
+        scored = heapq.nlargest(max(limit*4, 20), scored)
+        ranked = []
+        for dice, index in scored:
+            dist = levenshtein(nam, self.normalized[index])
+            ranked.append((dist, -dice, index))
+        ranked.sort()
+        return [(self.titles[i], self.data[i], dist) for dist, _, i in ranked[:limit]]
+
+    def best(self, query, min_score=0.3):
+        result = self.search(query, limit=1, min_score=min_score)
+        if result:
+            return result[0]
+        return None
+
+
+@lru_cache(maxsize=16384)
+def parse_episode(lower_case, index=None):
+    """
+    (key, season) of episode file name, key is like s1e2 or e2 or empty
+    and season is -1 when not known. Results are cached per name.
+    """
+    lower_case = BRACKET_RE.sub('', lower_case)
+    name_srch = SXE_RE.search(lower_case)
+    name_srch_val = None
+    ep_name = ''
+
+    if not name_srch:
+        name_srch = EPISODE_RE.search(lower_case)
+        if not name_srch:
+            name_srch = DASH_NUMBER_RE.search(lower_case)
+            if not name_srch:
+                name_srch = NUMBER_RE.search(lower_case)
+                if not name_srch:
+                    if isinstance(index, int):
+                        if not OPED_RE.search(lower_case):
+                            name_srch_val = 'ep'+str(index+1)
+                else:
+                    if not OPED_RE.search(lower_case):
+                        name_srch_val = 'ep' + name_srch.group()
+            else:
+                ssn_final = ''
+                ssn_val = SEASON_DASH_RE.search(lower_case)
+                if ssn_val:
+                    ssn_str_srch = SEASON_RE.search(ssn_val.group())
+                    if ssn_str_srch:
+                        ssn_final = ssn_str_srch.group()
+                if ssn_final:
+                    ep_srch = SEASON_TOKEN_RE.sub('', name_srch.group())
+                    name_srch_val = ssn_final + 'ep'+DASH_PREFIX_RE.sub('', ep_srch)
+                elif not OPED_RE.search(lower_case):
+                    name_srch_val = 'ep' + DASH_PREFIX_RE.sub('', name_srch.group())
+        else:
+            name_srch_val = name_srch.group()
+    else:
+        name_srch_val = name_srch.group()
+    sn = -1
+    en = -1
+    if name_srch_val:
+        epval = name_srch_val.lower()
+        s = SEASON_KEY_RE.search(epval)
+        e = EPISODE_KEY_RE.search(epval)
+        if not e:
+            e = EPISODE_LONG_RE.search(epval)
+        if s:
+            ss = DIGITS_RE.search(s.group())
+            if ss:
+                sn = int(ss.group())
+        if e:
+            ee = DIGITS_RE.search(e.group())
+            if ee:
+                en = int(ee.group())
+        if sn >= 0 and en >= 0:
+            ep_name = 's'+str(sn)+'e'+str(en)
+        elif sn < 0 and en >= 0:
+            ep_name = 'e'+str(en)
+    return (ep_name, sn)
@@ -6,12 +6,12 @@ from bs4 import BeautifulSoup
 
 class Backend:
     
-    def __init__(self, hdrs):
+    def __init__(self, hdrs, cache=None):
         if hdrs:
             self.hdrs = hdrs
         else:
             self.hdrs = {'User-Agent':'Mozilla/5.0'}
-        self.vnt = Vinanti(block=False, hdrs=self.hdrs, timeout=10)
+        self.vnt = Vinanti(block=False, hdrs=self.hdrs, timeout=10, cache=cache)
     
     def search(self, nam, backend, onfinished, *args):
         if backend == 'g':
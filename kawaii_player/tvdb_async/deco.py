@@ -28,6 +28,8 @@ def search_onfinished(func):
                     break
             if new_url:
                 args[0].getinfo(new_url, onfinished=args[1], eps=args[3])
+            else:
+                args[1](None, 'not-found')
         else:
             args[1](search_dict, *args)
     return wrapper
@@ -31,6 +31,10 @@ except ImportError:
     from deco import *
     from backend import Backend
     from log import log_function
+try:
+    from title_match import levenshtein as fast_levenshtein
+except ImportError:
+    fast_levenshtein = None
 logger = log_function(__name__)
 
 
@@ -38,7 +42,7 @@ class TVDB:
     
     def __init__(self, base_url=None, lang='en', wait=None,
                  episode_summary=False, search_and_grab=True,
-                 backend=None, hdrs=None):
+                 backend=None, hdrs=None, cache=None):
         if not base_url:
             self.base_url = 'https://www.thetvdb.com'
         else:
@@ -53,9 +57,9 @@ class TVDB:
         else:
             verify = False
         if isinstance(wait, int) or isinstance(wait, float):
-            self.vnt = Vinanti(block=False, hdrs=self.hdrs, wait=wait, timeout=10, verify=verify)
+            self.vnt = Vinanti(block=False, hdrs=self.hdrs, wait=wait, timeout=10, verify=verify, cache=cache)
         else:
-            self.vnt = Vinanti(block=False, hdrs=self.hdrs, timeout=10, verify=verify)
+            self.vnt = Vinanti(block=False, hdrs=self.hdrs, timeout=10, verify=verify, cache=cache)
         self.fanart_list = []
         self.poster_list = []
         self.banner_list = []
@@ -63,7 +67,7 @@ class TVDB:
         self.time = time.time()
         self.ep_summary = episode_summary
         self.search_and_grab = search_and_grab
-        self.backend = Backend(hdrs)
+        self.backend = Backend(hdrs, cache=cache)
         self.backend_search = backend
     
     def find_redirected_link(self, *args):
@@ -294,6 +298,7 @@ class TVDB:
         min_val = None
         min_dict = {'final':None}
         min_index = 0
+        srch_lower = srch.lower()
         for i, tr in enumerate(soup.findAll('tr')):
             for j, td in enumerate(tr.findAll('td')):
                 if j == 0:
@@ -301,10 +306,11 @@ class TVDB:
                 elif j == 1:
                     if 'href' in str(td):
                         txt = td.text
-                        if txt.lower() == srch.lower():
+                        txt_lower = txt.lower()
+                        if txt_lower == srch_lower:
                             exact_found = True
                         else:
-                            dist = self.levenshtein(txt.lower(), srch.lower())
+                            dist = self.levenshtein(txt_lower, srch_lower)
                             if not min_val:
                                 min_val = dist
                                 min_index = i
@@ -348,6 +354,8 @@ class TVDB:
     #https://en.wikibooks.org/wiki/Algorithm_Implementation/Strings/Levenshtein_distance#Python
     
     def levenshtein(self, s1, s2):
+        if fast_levenshtein:
+            return fast_levenshtein(s1, s2)
         if len(s1) < len(s2):
             return self.levenshtein(s2, s1)
 
@@ -1,7 +1,15 @@
+import os
+import time
+import sqlite3
+import hashlib
+import tempfile
+import posixpath
 import urllib.parse
+import urllib.robotparser
+from threading import Lock
+from functools import partial
 from urllib.parse import urlparse
-from collections import OrderedDict
-    
+
 try:
     from bs4 import BeautifulSoup
 except ImportError:
@@ -13,13 +21,159 @@ try:
 except ImportError:
     from utils import URL
     from log import log_function
-    
+
 logger = log_function(__name__)
 
+ROBOTS_TTL = 24*3600
+
+
+def normalize_url(url):
+    """
+    Lower case scheme and host, without default port, fragment and
+    dot segments, so that same page is visited once
+    """
+    n = urlparse(url)
+    scheme = n.scheme.lower()
+    netloc = (n.hostname or '').lower()
+    if n.port and not ((scheme == 'http' and n.port == 80)
+                       or (scheme == 'https' and n.port == 443)):
+        netloc = '{}:{}'.format(netloc, n.port)
+    if n.username:
+        netloc = '{}@{}'.format(n.username, netloc)
+    path = n.path or '/'
+    if '.' in path:
+        trailing = path.endswith('/')
+        path = posixpath.normpath(path)
+        if trailing and not path.endswith('/'):
+            path = path + '/'
+    return urllib.parse.urlunparse((scheme, netloc, path, n.params, n.query, ''))
+
+
+def url_hash(url):
+    """64 bit hash of normalized url"""
+    digest = hashlib.blake2b(normalize_url(url).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+class CrawlState:
+
+    """
+    Visited set and frontier of crawl kept in sqlite file. Visited urls
+    are kept in memory only as 64 bit hashes. Frontier holds queue of
+    every domain, pages are taken from domains in turn and lower depth
+    first. Without state_file, temporary file is used and removed at end.
+    """
+
+    def __init__(self, state_file=None):
+        if state_file:
+            self.state_file = state_file
+            self.temporary = False
+        else:
+            fd, self.state_file = tempfile.mkstemp(prefix='vinanti-crawl-', suffix='.db')
+            os.close(fd)
+            self.temporary = True
+        self.lock = Lock()
+        self.conn = sqlite3.connect(self.state_file, check_same_thread=False)
+        cur = self.conn.cursor()
+        cur.execute('CREATE TABLE IF NOT EXISTS Frontier(Id integer primary key autoincrement, '
+                    'Domain text, Url text, Depth integer, State integer)')
+        cur.execute('CREATE INDEX IF NOT EXISTS FrontierDomain ON Frontier(State, Domain, Depth, Id)')
+        cur.execute('CREATE TABLE IF NOT EXISTS Visited(Hash integer primary key)')
+        cur.execute('CREATE TABLE IF NOT EXISTS Robots(Domain text primary key, Body text, Fetched real)')
+        cur.execute('CREATE TABLE IF NOT EXISTS Stats(Key text primary key, Value integer)')
+        # pages in progress when crawl was interrupted are fetched again
+        cur.execute('Update Frontier Set State=0 Where State=1')
+        self.conn.commit()
+        self.visited = set(i[0] for i in cur.execute('SELECT Hash FROM Visited'))
+        self.stats = dict(cur.execute('SELECT Key, Value FROM Stats').fetchall())
+        self.last_domain = None
+
+    def add_visited(self, url):
+        """Returns False if url was already visited"""
+        hash_val = url_hash(url)
+        with self.lock:
+            if hash_val in self.visited:
+                return False
+            self.visited.add(hash_val)
+            self.conn.execute('INSERT OR IGNORE INTO Visited VALUES(?)', (hash_val, ))
+        return True
+
+    def push(self, url, depth):
+        n = urlparse(url)
+        domain = '{}://{}'.format(n.scheme, n.netloc)
+        with self.lock:
+            self.conn.execute('INSERT INTO Frontier(Domain, Url, Depth, State) VALUES(?, ?, ?, 0)',
+                              (domain, url, depth))
+
+    def domains(self):
+        with self.lock:
+            rows = self.conn.execute('SELECT DISTINCT Domain FROM Frontier Where State=0').fetchall()
+        domains = sorted(i[0] for i in rows)
+        if self.last_domain in domains:
+            # continue round after last served domain
+            index = domains.index(self.last_domain) + 1
+            domains = domains[index:] + domains[:index]
+        return domains
+
+    def pop(self, domain):
+        """(id, url, depth) of next page of domain, marked as in progress"""
+        with self.lock:
+            row = self.conn.execute('SELECT Id, Url, Depth FROM Frontier Where State=0 and Domain=? '
+                                    'order by Depth, Id limit 1', (domain, )).fetchone()
+            if row:
+                self.conn.execute('Update Frontier Set State=1 Where Id=?', (row[0], ))
+                self.last_domain = domain
+        return row
+
+    def requeue(self, row_id):
+        """Marks page taken by pop as waiting again"""
+        with self.lock:
+            self.conn.execute('Update Frontier Set State=0 Where Id=?', (row_id, ))
+
+    def done(self, row_id):
+        with self.lock:
+            self.conn.execute('DELETE FROM Frontier Where Id=?', (row_id, ))
+
+    def pending(self):
+        with self.lock:
+            return self.conn.execute('SELECT count(*) FROM Frontier Where State=0').fetchone()[0]
+
+    def robots_body(self, domain):
+        """Cached robots.txt of domain, None if not fetched or expired"""
+        with self.lock:
+            row = self.conn.execute('SELECT Body, Fetched FROM Robots Where Domain=?', (domain, )).fetchone()
+        if row and time.time() - row[1] < ROBOTS_TTL:
+            return row[0]
+        return None
+
+    def set_robots(self, domain, body):
+        with self.lock:
+            self.conn.execute('INSERT OR REPLACE INTO Robots VALUES(?, ?, ?)', (domain, body, time.time()))
+            self.conn.commit()
+
+    def set_stat(self, key, value):
+        self.stats.update({key:value})
+        with self.lock:
+            self.conn.execute('INSERT OR REPLACE INTO Stats VALUES(?, ?)', (key, value))
+
+    def commit(self):
+        with self.lock:
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
+        if self.temporary and os.path.exists(self.state_file):
+            os.remove(self.state_file)
+
+
 class CrawlObject:
-    
+
     def __init__(self, vnt, url_obj, onfinished, all_domain,
-                 domains_allowed, depth_allowed):
+                 domains_allowed, depth_allowed, kargs=None):
+        if kargs is None:
+            kargs = {}
         url = url_obj.url
         self.url_obj = url_obj
         ourl = urllib.parse.urlparse(url)
@@ -30,9 +184,7 @@ class CrawlObject:
         self.ourl = url
         if ourl.path and not url.endswith('/'):
             self.base_url, _ = self.base_url.rsplit('/', 1)
-        self.crawl_dict = OrderedDict()
         self.onfinished = onfinished
-        self.link_set = set()
         if not self.base_url.endswith('/'):
             self.base_url = self.base_url + '/'
         if all_domain:
@@ -52,7 +204,54 @@ class CrawlObject:
             self.depth_allowed = depth_allowed
         else:
             self.depth_allowed = 0
-        
+        self.max_pages = kargs.get('max_pages') or 0
+        self.max_bytes = kargs.get('max_bytes') or 0
+        self.max_active = kargs.get('max_active') or vnt.max_requests
+        self.use_robots = kargs.get('robots', True)
+        hdrs = vnt.hdrs_global or {}
+        self.user_agent = hdrs.get('User-Agent', '*')
+        self.state = CrawlState(kargs.get('state_file'))
+        self.state.add_visited(url)
+        self.pages = self.state.stats.get('pages', 0)
+        self.bytes = self.state.stats.get('bytes', 0)
+        self.active = {}
+        self.robots = {}
+        self.session = None
+        self.out_dir = None
+        self.finished = False
+
+    def limit_reached(self):
+        return ((self.max_pages and self.pages + len(self.active) >= self.max_pages)
+                or (self.max_bytes and self.bytes >= self.max_bytes))
+
+    def result_size(self, result):
+        out_file = getattr(result, 'out_file', None)
+        if out_file and os.path.isfile(out_file):
+            return os.stat(out_file).st_size
+        if isinstance(result.html, (str, bytes)):
+            return len(result.html)
+        return 0
+
+    def page_done(self, result, url_obj, session):
+        """Called by vinanti after every page of crawl, result may be None"""
+        row_id = self.active.pop(url_obj, None)
+        if row_id is not None:
+            self.state.done(row_id)
+        if session:
+            self.session = session
+        self.pages += 1
+        if result:
+            self.bytes += self.result_size(result)
+            if result.url and result.url != url_obj.url:
+                self.state.add_visited(result.url)
+            if result.out_dir:
+                self.out_dir = result.out_dir
+            self.start_crawling(result, url_obj, session)
+        self.state.set_stat('pages', self.pages)
+        self.state.set_stat('bytes', self.bytes)
+        self.state.commit()
+        self.fill()
+
     def start_crawling(self, result, url_obj, session):
         depth = url_obj.depth
         url = url_obj.url
@@ -64,13 +263,13 @@ class CrawlObject:
         scheme = ourl.scheme
         netloc = ourl.netloc
         base_url = url
-        
+
         if ourl.path and not url.endswith('/'):
             base_url, _ = base_url.rsplit('/', 1)
-            
+
         if not base_url.endswith('/'):
             base_url = base_url + '/'
-            
+
         if result and result.html:
             soup = BeautifulSoup(result.html, 'html.parser')
             if soup.title:
@@ -86,7 +285,7 @@ class CrawlObject:
                             lnk = link.get('src')
                         else:
                             lnk = link.get('href')
-                        
+
                         if not lnk or lnk == '#':
                             continue
                         lnk = self.construct_link(ourl, scheme, netloc,
@@ -94,23 +293,91 @@ class CrawlObject:
                         if lnk:
                             self.crawl_next_link(lnk, session, base_url,
                                                  depth, result.out_dir)
-                    
+
     def crawl_next_link(self, lnk, session, base_url, depth, out_dir):
+        """Adds lnk to frontier, pages are requested by fill"""
         n = urllib.parse.urlparse(lnk)
+        if n.scheme not in ['http', 'https']:
+            return
         crawl_allow = False
         if len(self.domains_allowed) > 1:
             for dm in self.domains_allowed:
                 if dm in n.netloc or n.netloc == dm:
                     crawl_allow = True
-        if not self.crawl_dict.get(lnk) and lnk not in self.link_set:
-            self.link_set.add(lnk)
-            if lnk.startswith(base_url) or self.all_domain or crawl_allow:
-                self.vnt.crawl(lnk, depth=depth+1, session=session,
-                               method='CRAWL_CHILDREN',
-                               crawl_object=self,
-                               onfinished=self.onfinished,
-                               out=out_dir)
-        
+        if lnk.startswith(base_url) or self.all_domain or crawl_allow:
+            if self.state.add_visited(lnk):
+                self.state.push(lnk, depth+1)
+
+    def robots_allowed(self, domain, url):
+        """True or False, None if robots.txt of domain isn't available yet"""
+        if not self.use_robots:
+            return True
+        if domain not in self.robots:
+            body = self.state.robots_body(domain)
+            if body is None:
+                self.robots.update({domain:None})
+                self.vnt.get(domain + '/robots.txt',
+                             onfinished=partial(self.robots_fetched, domain))
+                return None
+            self.set_robots(domain, body)
+        parser = self.robots.get(domain)
+        if parser is None:
+            return None
+        return parser.can_fetch(self.user_agent, url)
+
+    def set_robots(self, domain, body):
+        parser = urllib.robotparser.RobotFileParser()
+        parser.parse(body.splitlines())
+        self.robots.update({domain:parser})
+
+    def robots_fetched(self, domain, *args):
+        if self.finished:
+            return
+        result = args[-1]
+        body = ''
+        if result and result.status == 200 and isinstance(result.html, str):
+            body = result.html
+        self.state.set_robots(domain, body)
+        self.set_robots(domain, body)
+        self.fill()
+
+    def fill(self):
+        """Requests pages from frontier while fewer than max_active are in progress"""
+        while len(self.active) < self.max_active and not self.limit_reached():
+            row = None
+            for domain in self.state.domains():
+                row = self.state.pop(domain)
+                if row is None:
+                    continue
+                row_id, lnk, depth = row
+                allowed = self.robots_allowed(domain, lnk)
+                if allowed is None:
+                    # waiting for robots.txt, page is taken again later
+                    self.state.requeue(row_id)
+                    row = None
+                    continue
+                elif allowed is False:
+                    logger.info('disallowed by robots.txt: {}'.format(lnk))
+                    self.state.done(row_id)
+                    row = None
+                    continue
+                break
+            if row is None:
+                break
+            url_obj = URL(lnk, depth)
+            self.active.update({url_obj:row_id})
+            self.vnt.crawl(lnk, depth=depth, session=self.session,
+                           method='CRAWL_CHILDREN',
+                           crawl_object=self,
+                           onfinished=self.onfinished,
+                           out=self.out_dir, url_obj=url_obj)
+        if not self.active and not self.finished:
+            if self.limit_reached() or not self.state.pending():
+                self.finished = True
+                logger.info('crawl of {} finished: {} pages, {} bytes'
+                            .format(self.ourl, self.pages, self.bytes))
+                self.state.close()
+
     def construct_link(self, ourl, scheme,
                        netloc, url, base_url,
                        lnk):
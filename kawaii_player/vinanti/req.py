@@ -51,6 +51,7 @@ class RequestObject:
         self.charset = kargs.get('charset')
         self.session = kargs.get('session')
         self.verify = kargs.get('verify')
+        self.cache = kargs.get('cache')
         if not self.log:
             logger.disabled = True
         self.timeout = self.kargs.get('timeout')
@@ -108,8 +108,8 @@ class RequestObjectAiohttp(RequestObject):
                 rsp.html = text
                 rsp.status = resp.status
                 cj_arr = []
-                for c in session.cookie_jar:
-                    cj_arr.append('{}={}'.format(c.key, c.value))
+                for key, c in session.cookie_jar.filter_cookies(resp.url).items():
+                    cj_arr.append('{}={}'.format(key, c.value))
                 rsp.session_cookies = ';'.join(cj_arr)
         return rsp
         
@@ -23,6 +23,7 @@ import gzip
 import time
 import shutil
 import base64
+import urllib.error
 import urllib.parse
 import urllib.request
 import http.cookiejar
@@ -42,9 +43,45 @@ class RequestObjectUrllib(RequestObject):
     def __init__(self, url, hdrs, method, kargs):
         super().__init__(url, hdrs, method, 'urllib', kargs)
         
+    def use_cache(self):
+        """
+        cache is object given as cache parameter, with interface of
+        HttpCache of kawaii-player. Only plain GET requests are cached.
+        """
+        return (self.cache is not None and self.method == 'GET'
+                and not self.session and not self.auth and not self.auth_digest
+                and not self.continue_out and not self.files
+                and self.cache.is_cacheable_url(self.url))
+
+    def fits_cache(self, r_open):
+        """
+        Body is read into memory before it is cached. Downloads into out
+        file are cached only if Content-Length shows that body is small
+        enough to be cached, otherwise they are streamed to file as usual.
+        """
+        if not self.out:
+            return True
+        length = r_open.info().get('Content-Length')
+        return bool(length and length.isdigit()
+                    and int(length) <= self.cache.max_bytes/8)
+        
     def process_request(self):
         opener = None
         cj = None
+        entry = None
+        use_cache = self.use_cache()
+        if use_cache:
+            entry = self.cache.lookup(self.url, self.hdrs)
+            if entry and entry['fresh']:
+                logger.info('from cache: {}'.format(self.url))
+                r_open = CachedResponseUrllib(
+                    self.url, 200, self.cache.message(entry['headers']),
+                    self.cache.read(entry)
+                    )
+                return ResponseUrllib(self, r_open, cj)
+            elif entry:
+                self.hdrs = self.hdrs.copy()
+                self.hdrs.update(self.cache.conditional_headers(entry))
         if self.verify is False:
             opener = self.handle_https_context(opener, False)
         if self.proxies:
@@ -64,10 +101,30 @@ class RequestObjectUrllib(RequestObject):
                 r_open = opener.open(req, timeout=self.timeout)
             else:
                 r_open = urllib.request.urlopen(req, timeout=self.timeout)
+        except urllib.error.HTTPError as err:
+            r_open = None
+            if err.code == 304 and entry:
+                entry = self.cache.revalidate(self.url, err.headers.items(), self.hdrs)
+            if err.code == 304 and entry:
+                r_open = CachedResponseUrllib(
+                    self.url, 200, self.cache.message(entry['headers']),
+                    self.cache.read(entry)
+                    )
+            else:
+                self.error = str(err)
+                logger.error(err)
         except Exception as err:
             r_open = None
             self.error = str(err)
             logger.error(err)
+        if (use_cache and r_open is not None and r_open.getcode() == 200
+                and not isinstance(r_open, CachedResponseUrllib)
+                and self.fits_cache(r_open)):
+            body = r_open.read()
+            self.cache.store(
+                self.url, r_open.info().items(), body=body, request_headers=self.hdrs
+                )
+            r_open = CachedResponseUrllib(r_open.geturl(), 200, r_open.info(), body)
         ret_obj = ResponseUrllib(self, r_open, cj)
         return ret_obj
                 
@@ -132,6 +189,29 @@ class RequestObjectUrllib(RequestObject):
         return opener
 
 
+class CachedResponseUrllib:
+    
+    """Stands in for response of urlopen, whose body is already read"""
+    
+    def __init__(self, url, status, info, body):
+        self.url = url
+        self.status = status
+        self.headers = info
+        self.storage = BytesIO(body)
+        
+    def info(self):
+        return self.headers
+        
+    def geturl(self):
+        return self.url
+        
+    def getcode(self):
+        return self.status
+        
+    def read(self, size=-1):
+        return self.storage.read(size)
+
+
 class ResponseUrllib(Response):
     
     def __init__(self, parent=None, req=None, cj=None):
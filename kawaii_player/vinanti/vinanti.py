@@ -55,7 +55,8 @@ class Vinanti:
     
     def __init__(self, backend='urllib', block=False, log=False,
                  old_method=False, group_task=False, max_requests=10,
-                 multiprocess=False, loop_forever=False, **kargs):
+                 multiprocess=False, loop_forever=False, limit_per_host=4,
+                 dns_cache_ttl=300, keepalive=15, **kargs):
         self.backend = backend
         self.block = block
         self.tasks = OrderedDict()
@@ -97,6 +98,11 @@ class Vinanti:
         self.old_method = old_method
         self.sem = None
         self.loop_forever = loop_forever
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive = keepalive
+        self.aio_sessions = {}
+        self.aio_connectors = {}
         
     def clear(self):
         self.tasks.clear()
@@ -112,7 +118,12 @@ class Vinanti:
         
     def loop_close(self):
         if self.loop:
-            self.loop.stop()
+            if self.loop.is_running():
+                asyncio.run_coroutine_threadsafe(
+                    self.__close_aio_sessions__(self.loop, True), self.loop
+                    )
+            else:
+                self.loop.stop()
             self.loop = None
             logger.info('All Tasks Finished: closing loop')
             self.sem = None
@@ -233,6 +244,8 @@ class Vinanti:
             depth = 0
         if isinstance(urls, list):
             url_obj = [URL(i, depth) for i in urls]
+        elif isinstance(kargs.get('url_obj'), URL):
+            url_obj.append(kargs.pop('url_obj'))
         else:
             url_obj.append(URL(urls, depth))
         return self.__build_tasks__(url_obj, method, onfinished, hdrs, kargs)
@@ -277,6 +290,7 @@ class Vinanti:
             tasks.append(asyncio.ensure_future(self.__start_fetching__(*val, loop)))
         logger.debug('starting {} tasks in single loop'.format(len(tasks_dict)))
         loop.run_until_complete(asyncio.gather(*tasks))
+        loop.run_until_complete(self.__close_aio_sessions__(loop))
         loop.close()
 
     def __start_non_block_loop__(self, tasks_dict, loop):
@@ -290,6 +304,10 @@ class Vinanti:
     def start(self, task_dict=None, queue=False):
         if self.group_task and not queue:
             task_dict = self.tasks
+        with self.lock:
+            self.__start_tasks__(task_dict, queue)
+    
+    def __start_tasks__(self, task_dict, queue):
         if (not self.loop and task_dict) or (task_dict and self.old_method):
             if self.old_method:
                 loop = asyncio.new_event_loop()
@@ -303,7 +321,9 @@ class Vinanti:
             self.loop_nonblock_list[len(self.loop_nonblock_list)-1].start()
         elif task_dict:
             for key, val in task_dict.items():
-                self.loop.create_task(self.__start_fetching__(*val, self.loop))
+                self.loop.call_soon_threadsafe(
+                    self.loop.create_task, self.__start_fetching__(*val, self.loop)
+                    )
             logger.info('queue = {}'.format(queue))
     
     def __update_hdrs__(self, hdrs, netloc):
@@ -409,24 +429,35 @@ class Vinanti:
             onfinished(task_num, url, result)
             logger.info('callback completed, task {} {}'
                         .format(task_num, url))
-        if crawl and crawl_object and result:
-            if not crawl_object.crawl_dict.get(url):
-                crawl_object.crawl_dict.update({url:True})
-                if result and result.url:
-                    if url != result.url:
-                        crawl_object.crawl_dict.update({result.url:True})
-            if result.html and result.out_file:
+        if crawl and crawl_object:
+            if result and result.html and result.out_file:
                 out_file = result.out_file
                 if os.path.isfile(out_file) and not result.binary:
                     with open(out_file, mode='r', encoding='utf-8') as fd:
                         result.html = fd.read()
-            crawl_object.start_crawling(result, url_obj, session)
+            crawl_object.page_done(result, url_obj, session)
         if not self.old_method:
             if self.tasks_remaining() == 0 and not self.loop_forever:
-                self.loop.stop()
-                self.loop = None
-                self.sem = None
-                logger.info('All Tasks Finished: closing loop')
+                if self.aio_connectors:
+                    loop.call_later(self.keepalive, self.__stop_idle_loop__, loop)
+                else:
+                    self.loop.stop()
+                    self.loop = None
+                    self.sem = None
+                    logger.info('All Tasks Finished: closing loop')
+    
+    def __stop_idle_loop__(self, loop):
+        """
+        Loop with aiohttp sessions is kept running for keepalive seconds
+        after last task, so that following requests reuse connections
+        """
+        with self.lock:
+            if self.loop is not loop or self.tasks_remaining() != 0:
+                return
+            self.loop = None
+            self.sem = None
+        loop.create_task(self.__close_aio_sessions__(loop, True))
+        logger.info('All Tasks Finished: closing loop')
                     
     async def __start_fetching__(self, url_obj, onfinished, hdrs,
                                  method, kargs, task_num, loop):
@@ -447,7 +478,7 @@ class Vinanti:
                     depth_allowed = kargs.get('depth_allowed')
                     crawl_object = CrawlObject(self, url_obj, onfinished,
                                                all_domain, domains_allowed,
-                                               depth_allowed)
+                                               depth_allowed, kargs)
                     self.crawler_dict.update({url_obj:crawl_object})
                 else:
                     crawl_object = kargs.get('crawl_object')
@@ -484,22 +515,15 @@ class Vinanti:
                 response = await future
             elif backend == 'aiohttp' and isinstance(url, str):
                 session, netloc = await self.__request_preprocess_aio__(url, hdrs, method, kargs)
-                req = None
-                jar = None
-                auth_basic = None
-                cookie_unsafe = kargs.get('cookie_unsafe')
-                if cookie_unsafe:
-                    jar = aiohttp.CookieJar(unsafe=True)
-                auth = kargs.get('auth')
-                if auth:
-                    auth_basic = aiohttp.BasicAuth(auth[0], auth[1])
-                aio = aiohttp.ClientSession(cookie_jar=jar, auth=auth_basic, loop=loop)
-                async with aio:
-                    try:
-                        response = await self.__fetch_aio__(url, aio, hdrs, method, kargs)
-                    except Exception as err:
-                        logger.error(err)
-                        response = Response(url, error=str(err), method=method)
+                aio, temporary = self.__aio_session__(loop, kargs)
+                try:
+                    response = await self.__fetch_aio__(url, aio, hdrs, method, kargs)
+                except Exception as err:
+                    logger.error(err)
+                    response = Response(url, error=str(err), method=method)
+                finally:
+                    if temporary:
+                        await aio.close()
             elif backend == 'function' or not isinstance(url, str):
                 future = loop.run_in_executor(executor,
                                               complete_function_request,
@@ -511,6 +535,68 @@ class Vinanti:
                                                crawl, crawl_object, url_obj,
                                                response)
             
+    def __aio_connector__(self, loop):
+        """TCPConnector shared by all ClientSessions of loop"""
+        connector = self.aio_connectors.get(loop)
+        if connector is None or connector.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_requests, limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_cache_ttl
+                )
+            self.aio_connectors.update({loop:connector})
+        return connector
+    
+    def __aio_session__(self, loop, kargs):
+        """
+        Returns (ClientSession, temporary) for request. All sessions of
+        loop share one connector, so that connections and resolved hosts
+        are reused. session and cookie_unsafe requests use long lived
+        session of their cookie and auth profile, which keeps cookies.
+        Other requests get temporary session with fresh cookie jar, so
+        that cookies set during redirects are sent only within that
+        request; caller closes it.
+        """
+        session = bool(kargs.get('session'))
+        cookie_unsafe = bool(kargs.get('cookie_unsafe'))
+        auth = kargs.get('auth')
+        auth_basic = None
+        if auth:
+            auth = tuple(auth)
+            auth_basic = aiohttp.BasicAuth(auth[0], auth[1])
+        connector = self.__aio_connector__(loop)
+        if not session and not cookie_unsafe:
+            aio = aiohttp.ClientSession(
+                connector=connector, connector_owner=False,
+                cookie_jar=aiohttp.CookieJar(), auth=auth_basic
+                )
+            return (aio, True)
+        key = (loop, session, cookie_unsafe, auth)
+        aio = self.aio_sessions.get(key)
+        if aio is None or aio.closed:
+            jar = aiohttp.CookieJar(unsafe=cookie_unsafe)
+            aio = aiohttp.ClientSession(
+                connector=connector, connector_owner=False,
+                cookie_jar=jar, auth=auth_basic
+                )
+            self.aio_sessions.update({key:aio})
+        return (aio, False)
+    
+    async def __close_aio_sessions__(self, loop, stop=False):
+        closed = False
+        for key in [i for i in self.aio_sessions if i[0] is loop]:
+            aio = self.aio_sessions.pop(key)
+            if not aio.closed:
+                await aio.close()
+        connector = self.aio_connectors.pop(loop, None)
+        if connector is not None and not connector.closed:
+            await connector.close()
+            closed = True
+        if closed:
+            # lets ssl transports finish shutdown before loop stops
+            await asyncio.sleep(0.25)
+        if stop:
+            loop.stop()
+    
     async def __fetch_aio__(self, url, session, hdrs, method, kargs):
         req = RequestObjectAiohttp(url, hdrs, method, kargs)
         req_obj = await req.process_aio_request(session)
@@ -457,6 +457,8 @@ class MySlider(QtWidgets.QSlider):
         self.preview_thread_list = []
         self.final_point = (0, 0)
         self.ui = ui
+        self.sprite_url = None
+        self.sprite_pixmaps = {}
         
     def set_value(self, val):
         self.setSliderPosition(val)
@@ -554,6 +556,29 @@ class MySlider(QtWidgets.QSlider):
         self.mpv.stop = True
         self.preview_lock.release()
     
+    def sprite_preview(self, t):
+        """
+        Crops preview of position t (in seconds) from sprite sheet of
+        currently playing file. Requests sprite sheet if not available.
+        """
+        url = ui.final_playing_url
+        if url != self.sprite_url:
+            self.sprite_url = url
+            self.sprite_pixmaps.clear()
+        sprite = ui.sprite_sheet.lookup(url, t)
+        if sprite is None:
+            ui.sprite_sheet.request(url)
+            return None
+        image, rect, index = sprite
+        tile = os.path.join(self.preview_dir, 'sprite_tile_{0}.jpg'.format(index))
+        if not os.path.exists(tile):
+            pixmap = self.sprite_pixmaps.get(image)
+            if pixmap is None:
+                pixmap = QtGui.QPixmap(image)
+                self.sprite_pixmaps.update({image: pixmap})
+            pixmap.copy(*rect).save(tile, 'JPG')
+        return tile
+
     def mouseMoveEvent(self, event, source=None):
         if ui.player_val != 'mplayer' or ui.mpvplayer_val.processId() == 0:
             self.setFocus()
@@ -594,7 +619,12 @@ class MySlider(QtWidgets.QSlider):
             picn = os.path.join(self.preview_dir, '00000001.jpg')
             newpicn = os.path.join(self.preview_dir, "{}.jpg".format(int(t)))
             change_aspect = True
+            sprite_tile = None
             if ui.player_val in ["libmpv", "mpv"]:
+                sprite_tile = self.sprite_preview(t)
+            if sprite_tile:
+                self.apply_pic(sprite_tile, event.x(), event.y(), l, source_val=source_val)
+            elif ui.player_val in ["libmpv", "mpv"]:
                 #if True:
                 self.final_point = (event.x(), event.y())
                 func = partial(self.mpv_preview, self.preview_dir, t,
@@ -1523,25 +1523,8 @@ class PlaylistWidget(QtWidgets.QListWidget):
     def remove_thumbnails(self, row, row_item, remove_summary=None):
         dest = self.ui.get_thumbnail_image_path(row, row_item, only_name=True)
         if os.path.exists(dest) and remove_summary is None:
-            os.remove(dest)
-            small_nm_1, new_title = os.path.split(dest)
-            small_nm_2 = '128px.'+new_title
-            small_nm_3 = '480px.'+new_title
-            small_nm_4 = 'label.'+new_title
-            small_nm_5 = '256px.'+new_title
-            new_small_thumb = os.path.join(small_nm_1, small_nm_2)
-            small_thumb = os.path.join(small_nm_1, small_nm_3)
-            small_label = os.path.join(small_nm_1, small_nm_4)
-            wall_thumb = os.path.join(small_nm_1, small_nm_5)
-            logger.info(new_small_thumb)
-            if os.path.exists(new_small_thumb):
-                os.remove(new_small_thumb)
-            if os.path.exists(small_thumb):
-                os.remove(small_thumb)
-            if os.path.exists(small_label):
-                os.remove(small_label)
-            if os.path.exists(wall_thumb):
-                os.remove(wall_thumb)
+            logger.info(dest)
+            self.ui.thumbnail_cache.remove(dest)
         elif remove_summary:
             path_thumb, new_title = os.path.split(dest)
             txt_file = new_title.replace('.jpg', '.txt', 1)
@@ -224,17 +224,13 @@ class QtGuiQWidgetScroll1(QtWidgets.QScrollArea):
     def sizeAdjust(self, nextR, direction):
         ui.list2.setCurrentRow(nextR)
         try:
-            p1 = "ui.label_epn_"+str(nextR)+".y()"
-            yy = eval(p1)
-            p1 = "ui.label_epn_"+str(nextR)+".x()"
-            xy = eval(p1)
-            p1 = "ui.label_epn_"+str(nextR)+".setFocus()"
-            exec (p1)
-            new_cnt = str(nextR+ui.list2.count())
+            yy = ui.label_epn_list[nextR].y()
+            xy = ui.label_epn_list[nextR].x()
+            ui.label_epn_list[nextR].setFocus()
+            new_cnt = nextR+ui.list2.count()
             self.text_color = ui.thumbnail_text_color_dict[ui.thumbnail_text_color]
             self.text_color_focus = ui.thumbnail_text_color_dict[ui.thumbnail_text_color_focus]
-            p1 = "ui.label_epn_{0}".format(new_cnt)
-            label_number = eval(p1)
+            label_number = ui.label_epn_list[new_cnt]
             ui.setLabelTextStyle(label_number, ui.thumbnail_text_color_focus)
             txt = label_number.text()
             try:
@@ -267,9 +263,8 @@ class QtGuiQWidgetScroll1(QtWidgets.QScrollArea):
                     wd1 = (0.6*int(wi))
                     ht = str(ht1)
                     wd = str(wd1)
-                    new_cnt = str(prevR+ui.list2.count())
-                    p1 = "ui.label_epn_{0}".format(new_cnt)
-                    label_number = eval(p1)
+                    new_cnt = prevR+ui.list2.count()
+                    label_number = ui.label_epn_list[new_cnt]
                     #label_number.setTextColor(self.text_color)
                     ui.setLabelTextStyle(label_number, ui.thumbnail_text_color)
                     txt = label_number.text()
@@ -283,19 +278,15 @@ class QtGuiQWidgetScroll1(QtWidgets.QScrollArea):
                             print(e, '--line--4643--')
                     label_number.setAlignment(QtCore.Qt.AlignCenter)
                 elif prevR < 0:
-                    p1 = "ui.label_epn_"+str(nextR)+".width()"
-                    wd1=eval(p1)
-                    p1 = "ui.label_epn_"+str(nextR)+".height()"
-                    ht1=eval(p1)
+                    wd1 = ui.label_epn_list[nextR].width()
+                    ht1 = ui.label_epn_list[nextR].height()
                     ht = str(0.6*ht1)
                     wd = str(0.6*wd1)
                     print("ht="+wd)
                     print("wd="+wd)
             else:
-                p1 = "ui.label_epn_"+str(nextR)+".width()"
-                wd1 = eval(p1)
-                p1 = "ui.label_epn_"+str(nextR)+".height()"
-                ht1 = eval(p1)
+                wd1 = ui.label_epn_list[nextR].width()
+                ht1 = ui.label_epn_list[nextR].height()
                 ht = str(0.6*ht1)
                 wd = str(0.6*wd1)
             ui.scrollArea1.verticalScrollBar().setValue(yy-ht1)
@@ -399,17 +390,14 @@ class QtGuiQWidgetScroll1(QtWidgets.QScrollArea):
             elif event.key() == QtCore.Qt.Key_Return:
                 num = ui.list2.currentRow()
                 txt_count = num + ui.list2.count()
-                p1 = "ui.label_epn_{0}.text()".format(txt_count)
-                txt = eval(p1)
+                txt = ui.label_epn_list[txt_count].text()
                 ui.thumbnail_label_number[:] = []
                 ui.thumbnail_label_number = [num, txt]
-                p1 = "ui.gridLayout2.indexOf(ui.label_epn_{0})".format(num)
-                index = eval(p1)
+                index = ui.gridLayout2.indexOf(ui.label_epn_list[num])
                 if ui.player_val == "libmpv":
                     ui.video_mode_index = 1
                 ui.current_thumbnail_position = ui.gridLayout2.getItemPosition(index)
-                exec_str = 'ui.label_epn_{0}.change_video_mode({1}, {2})'.format(num, ui.video_mode_index, num)
-                exec(exec_str)
+                ui.label_epn_list[num].change_video_mode(ui.video_mode_index, num)
             elif event.text().isalnum():
                 ui.focus_widget = ui.list2
                 if ui.search_on_type_btn.isHidden():
@@ -450,10 +450,8 @@ class ThumbnailWidget(QtWidgets.QLabel):
                     self.player_thumbnail_fs()
                 elif ui.video_mode_index in range(3, 6):
                     num = ui.thumbnail_label_number[0]
-                    p1 = "ui.label_epn_{0}.width()".format(num)
-                    p2 = "ui.label_epn_{0}.height()".format(num)
-                    wd = eval(p1)
-                    ht = eval(p2)
+                    wd = ui.label_epn_list[num].width()
+                    ht = ui.label_epn_list[num].height()
                     fs = False
                     logger.debug('{0}, {1}::original {2}, {3}'.format(wd, ht, screen_width, screen_height))
                     if wd == screen_width and ht == screen_height:
@@ -544,7 +542,7 @@ class ThumbnailWidget(QtWidgets.QLabel):
                 if iconv_r_indicator:
                     iconv_r = iconv_r_indicator[0]
                 ui.set_parameters_value(iconv=iconv_r)
-                widget = eval("ui.label_epn_{}".format(ui.thumbnail_label_number[0]))
+                widget = ui.label_epn_list[ui.thumbnail_label_number[0]]
                 col = (ui.thumbnail_label_number[0]%iconv_r)
                 row = 2*int(ui.thumbnail_label_number[0]/iconv_r)
                 new_pos = (row, col)
@@ -602,7 +600,7 @@ class ThumbnailWidget(QtWidgets.QLabel):
         else:
             if not ui.float_window.isHidden():
                 if not ui.float_window.isFullScreen():
-                    widget = eval("ui.label_epn_{}".format(ui.thumbnail_label_number[0]))
+                    widget = ui.label_epn_list[ui.thumbnail_label_number[0]]
                     index = ui.gridLayout2.indexOf(widget)
                     print(index, '--index--')
                     if index >= 0:
@@ -741,8 +739,7 @@ class ThumbnailWidget(QtWidgets.QLabel):
                         ui.set_parameters_value(iconv=iconv_r)
                         ui.thumbnail_label_update_epn(clicked_num=num)
                         QtWidgets.QApplication.processEvents()
-                        p1 = "ui.label_epn_"+str(num)+".y()"
-                        ht = eval(p1)
+                        ht = ui.label_epn_list[num].y()
                         print(ht, '--ht--', ui.scrollArea1.height())
                         ui.scrollArea1.verticalScrollBar().setValue(ht - 5)
                         #ui.play_file_now(finalUrl)
@@ -792,8 +789,7 @@ class ThumbnailWidget(QtWidgets.QLabel):
                         ui.set_parameters_value(iconv=iconv_r, thumb_indicator='empty')
                         ui.thumbnail_label_update_epn()
                         QtWidgets.QApplication.processEvents()
-                        p1 = "ui.label_epn_"+str(num)+".y()"
-                        ht = eval(p1)
+                        ht = ui.label_epn_list[num].y()
                         print(ht, '--ht--', ui.scrollArea1.height())
                         ui.scrollArea1.verticalScrollBar().setValue(ht)
 
@@ -804,10 +800,8 @@ class ThumbnailWidget(QtWidgets.QLabel):
                 newTitle = ui.check_symbol+ui.epn_name_in_list	
             sumry = "<html><h1>"+ui.epn_name_in_list+"</h1></html>"
             newTitle = newTitle.replace('_', ' ')
-            q3="ui.label_epn_"+str(title_num)+".setText((newTitle))"
-            exec (q3)
-            q3="ui.label_epn_"+str(title_num)+".setAlignment(QtCore.Qt.AlignCenter)"
-            exec(q3)
+            ui.label_epn_list[title_num].setText(newTitle)
+            ui.label_epn_list[title_num].setAlignment(QtCore.Qt.AlignCenter)
             t= ui.epn_name_in_list[:20]
             ui.labelFrame2.setText(newTitle)
             QtWidgets.QApplication.processEvents()
@@ -837,28 +831,22 @@ class ThumbnailWidget(QtWidgets.QLabel):
                 width=str(int(w))
                 height=str(int(h))
 
-                p2="ui.label_epn_"+str(ui.thumbnail_label_number[0])+".setMaximumSize(QtCore.QSize("+width+", "+height+"))"
-                p3="ui.label_epn_"+str(ui.thumbnail_label_number[0])+".setMinimumSize(QtCore.QSize("+width+", "+height+"))"
-                exec (p2)
-                exec (p3)
+                label_epn = ui.label_epn_list[ui.thumbnail_label_number[0]]
+                label_epn.setMaximumSize(QtCore.QSize(int(width), int(height)))
+                label_epn.setMinimumSize(QtCore.QSize(int(width), int(height)))
                 QtWidgets.QApplication.processEvents()
                 QtWidgets.QApplication.processEvents()
-                p2="ui.label_epn_"+str(ui.thumbnail_label_number[0])+".y()"
-                p3="ui.label_epn_"+str(ui.thumbnail_label_number[0])+".x()"
-                yy= eval(p2)
-                xy= eval(p3)
-                p2="ui.label_epn_"+str(ui.thumbnail_label_number[0])+".width()"
-                p3="ui.label_epn_"+str(ui.thumbnail_label_number[0])+".height()"
-                wdt=eval(p2)
-                hgt=eval(p3)
+                yy = label_epn.y()
+                xy = label_epn.x()
+                wdt = label_epn.width()
+                hgt = label_epn.height()
 
                 ui.scrollArea1.horizontalScrollBar().setValue(xy-10)
                 ui.scrollArea1.verticalScrollBar().setValue(yy-5)
 
             ui.quit_really = "no"
             ui.list2.setCurrentRow(num)
-            p4="ui.label_epn_"+str(num)+".setMouseTracking(True)"
-            exec (p4)
+            ui.label_epn_list[num].setMouseTracking(True)
             ui.gridLayout.addWidget(ui.tab_6, 0, 1, 1, 1)
             if '	' in ui.epn_arr_list[num]:
                 finalUrl = '"'+(ui.epn_arr_list[num]).split('	')[1]+'"'
@@ -881,8 +869,7 @@ class ThumbnailWidget(QtWidgets.QLabel):
                 finalUrl = ui.if_path_is_rel(finalUrl)
             if num < ui.list2.count():
                 ui.list2.setCurrentRow(num)
-                p1 = "ui.label_epn_"+str(num)+".winId()"
-                mn=int(eval(p1))
+                mn = int(ui.label_epn_list[num].winId())
                 ui.idw = str(mn)
                 ui.frame1.show()
                 finalUrl = str(finalUrl)
@@ -931,29 +918,23 @@ class ThumbnailWidget(QtWidgets.QLabel):
             height=str(int(h))
             dim = (width, height)
 
-            p2="ui.label_epn_"+str(ui.thumbnail_label_number[0])+".setMaximumSize(QtCore.QSize("+width+", "+height+"))"
-            p3="ui.label_epn_"+str(ui.thumbnail_label_number[0])+".setMinimumSize(QtCore.QSize("+width+", "+height+"))"
-            exec (p2)
-            exec (p3)
+            label_epn = ui.label_epn_list[ui.thumbnail_label_number[0]]
+            label_epn.setMaximumSize(QtCore.QSize(int(width), int(height)))
+            label_epn.setMinimumSize(QtCore.QSize(int(width), int(height)))
             QtWidgets.QApplication.processEvents()
             QtWidgets.QApplication.processEvents()
-            p2="ui.label_epn_"+str(ui.thumbnail_label_number[0])+".y()"
-            p3="ui.label_epn_"+str(ui.thumbnail_label_number[0])+".x()"
-            yy=eval(p2)
-            xy=eval(p3)
+            yy = label_epn.y()
+            xy = label_epn.x()
             print(dim, '--dim--', 'y=', yy, 'x=', xy)
-            p2="ui.label_epn_"+str(ui.thumbnail_label_number[0])+".width()"
-            p3="ui.label_epn_"+str(ui.thumbnail_label_number[0])+".height()"
-            wdt=eval(p2)
-            hgt=eval(p3)
+            wdt = label_epn.width()
+            hgt = label_epn.height()
 
             ui.scrollArea1.horizontalScrollBar().setValue(xy-10)
             ui.scrollArea1.verticalScrollBar().setValue(yy-5)
 
             ui.quit_really = "no"
             ui.list2.setCurrentRow(num)
-            p4="ui.label_epn_"+str(num)+".setMouseTracking(True)"
-            exec(p4)
+            ui.label_epn_list[num].setMouseTracking(True)
             #ui.gridLayout.addWidget(ui.tab_5, 0, 0, 1, 1)
             ui.gridLayout.addWidget(ui.tab_6, 0, 1, 1, 1)
             if '	' in ui.epn_arr_list[num]:
@@ -976,8 +957,7 @@ class ThumbnailWidget(QtWidgets.QLabel):
                 finalUrl = ui.if_path_is_rel(finalUrl)
             if num < ui.list2.count():
                 ui.list2.setCurrentRow(num)
-                p1 = "ui.label_epn_"+str(num)+".winId()"
-                mn=int(eval(p1))
+                mn = int(ui.label_epn_list[num].winId())
                 ui.idw = str(mn)
                 ui.frame1.show()
                 finalUrl = str(finalUrl)
@@ -1107,8 +1087,7 @@ class ThumbnailWidget(QtWidgets.QLabel):
         
         try:
             new_cnt = ui.cur_row + ui.list2.count()
-            p1 = "ui.label_epn_{0}".format(new_cnt)
-            label_number = eval(p1)
+            label_number = ui.label_epn_list[new_cnt]
             text_color = ui.thumbnail_text_color_dict[ui.thumbnail_text_color]
             text_color_focus = ui.thumbnail_text_color_dict[ui.thumbnail_text_color_focus]
             label_number.setTextColor(text_color_focus)
@@ -1185,8 +1164,7 @@ class ThumbnailWidget(QtWidgets.QLabel):
                 ui.list2.setCurrentRow(ui.cur_row)
                 logger.debug('trying to set cur_row :: {}'.format(ui.cur_row))
                 if ui.player_val != "libmpv":
-                    p1 = "ui.label_epn_"+str(num)+".winId()"
-                    mn = int(eval(p1))
+                    mn = int(ui.label_epn_list[num].winId())
                     tmp_idw = str(mn)
                 else:
                     mn = -1
@@ -1210,13 +1188,11 @@ class ThumbnailWidget(QtWidgets.QLabel):
                     self.change_video_mode(ui.video_mode_index, num)
                 
     def remember_thumbnail_position(self, num):
-        p1 = "ui.gridLayout2.indexOf(ui.label_epn_{0})".format(num)
-        index = eval(p1)
+        index = ui.gridLayout2.indexOf(ui.label_epn_list[num])
         print(index, '--index--')
         ui.current_thumbnail_position = ui.gridLayout2.getItemPosition(index)
         txt_count = num + ui.list2.count()
-        p1 = "ui.label_epn_{0}.text()".format(txt_count)
-        txt = eval(p1)
+        txt = ui.label_epn_list[txt_count].text()
         ui.thumbnail_label_number[:] = []
         ui.thumbnail_label_number = [num, txt]
     
@@ -1374,10 +1350,9 @@ class ThumbnailWidget(QtWidgets.QLabel):
                 if os.path.exists(label_thumb):
                     os.remove(label_thumb)
                 if thumbnail_grid:
-                    q1="ui.label_epn_"+str(num)+".clear()"
+                    ui.label_epn_list[num].clear()
                 else:
-                    q1="ui.label.clear()"
-                exec(q1)
+                    ui.label.clear()
             interval = 0
             ui.set_parameters_value(inter=interval)
         elif action == thumb:
@@ -1467,10 +1442,9 @@ class ThumbnailWidget(QtWidgets.QLabel):
                 picn = ui.image_fit_option(picn, '', fit_size=6, widget_size=(int(width), int(height)))
                 img = QtGui.QPixmap(picn, "1")			
                 if thumbnail_grid:
-                    q1="ui.label_epn_"+str(num)+".setPixmap(img)"
+                    ui.label_epn_list[num].setPixmap(img)
                 else:
-                    q1="ui.label.setPixmap(img)"
-                exec (q1)
+                    ui.label.setPixmap(img)
                 if interval == 100:
                     interval = 10
                     ui.set_parameters_value(inter=interval)
@@ -1540,10 +1514,9 @@ class ThumbnailWidget(QtWidgets.QLabel):
                 print(width, height)
                 img = QtGui.QPixmap(picn, "1")
                 if thumbnail_grid:
-                    q1="ui.label_epn_"+str(num)+".setPixmap(img)"
+                    ui.label_epn_list[num].setPixmap(img)
                 else:
-                    q1="ui.label.setPixmap(img)"
-                exec (q1)
+                    ui.label.setPixmap(img)
                 if interval == 100:
                     interval = 10
                     ui.set_parameters_value(inter=interval)
@@ -1687,6 +1660,7 @@ class TitleListWidgetPoster(PlaylistWidget):
             ]
         self.status_dict_poster = {}
         self.num = 9
+        self.verticalScrollBar().valueChanged.connect(self.fetch_more_items)
         
     def set_title(self):
         if self.currentItem():
@@ -1810,9 +1784,22 @@ class TitleListWidgetPoster(PlaylistWidget):
                 if isinstance(row_epn, int) and row_epn < self.count():
                     self.setCurrentRow(row_epn)
 
+    def fetch_more_items(self, value):
+        if value >= self.verticalScrollBar().maximum() - 2:
+            ui.fetch_list1_page()
+
     def refill_items(self, mode):
         self.setWordWrap(False)
-        for i in range(ui.list1.count()):
+        self.add_items(0)
+        if ui.list1.currentItem():
+            row = ui.list1.currentRow()
+            self.setCurrentRow(row)
+        if mode == 'next':
+            ui.dockWidget_3.show()
+        self.title_clicked = False
+
+    def add_items(self, start):
+        for i in range(start, ui.list1.count()):
             txt = ui.list1.item(i).text()
             picn, summary = ui.display_image(i, "image_list", txt_name=txt)
             if os.path.isfile(picn):
@@ -1822,12 +1809,6 @@ class TitleListWidgetPoster(PlaylistWidget):
                 self.addItem(txt)
             summary = "<html><h1>{0}</h1><head/><body><p>{1}</p></body></html>".format(txt, summary)
             self.item(i).setToolTip(summary)
-        if ui.list1.currentItem():
-            row = ui.list1.currentRow()
-            self.setCurrentRow(row)
-        if mode == 'next':
-            ui.dockWidget_3.show()
-        self.title_clicked = False
         
             
     def show_list(self, mode=None):
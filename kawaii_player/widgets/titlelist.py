@@ -911,6 +911,9 @@ class TitleListWidget(QtWidgets.QListWidget):
             submenuR.addSeparator()
             new_pls = submenuR.addAction("Create New Playlist")
             profile = menu.addAction("Find Last.fm Profile(manually)")
+            batch_meta = menu.addAction("Fetch Metadata for Whole Library")
+            export_pack = menu.addAction("Export Metadata Pack")
+            import_pack = menu.addAction("Import Metadata Pack")
             default = menu.addAction("Set Default Background")
             delPosters = menu.addAction("Delete Poster")
             delFanart = menu.addAction("Delete Fanart")
@@ -943,6 +946,12 @@ class TitleListWidget(QtWidgets.QListWidget):
                             t = os.path.join(TMPDIR, i)
                             os.remove(t)
                     ui.vnt.clear()
+            elif action == batch_meta:
+                ui.start_metadata_batch()
+            elif action == export_pack:
+                ui.start_metadata_pack('export')
+            elif action == import_pack:
+                ui.start_metadata_pack('import')
             elif action == new_pls:
                 print("creating")
                 item, ok = QtWidgets.QInputDialog.getText(
@@ -1119,6 +1128,9 @@ class TitleListWidget(QtWidgets.QListWidget):
             glinks_tmdb = menu_search.addAction("Find Poster(g+tmdb) (Ctrl+Down)")
             menu_search.addSeparator()
             poster_all = menu_search.addAction("Find Posters for All")
+            batch_meta = menu_search.addAction("Fetch Metadata for Whole Library")
+            export_pack = menu_search.addAction("Export Metadata Pack")
+            import_pack = menu_search.addAction("Import Metadata Pack")
             
             menu_clear = QtWidgets.QMenu(menu)
             menu_clear.setTitle('Clear')
@@ -1261,6 +1273,12 @@ class TitleListWidget(QtWidgets.QListWidget):
                 self.set_search_backend(use_search='tmdb+ddg')
             elif action == poster_all:
                 self.get_all_information()
+            elif action == batch_meta:
+                ui.start_metadata_batch()
+            elif action == export_pack:
+                ui.start_metadata_pack('export')
+            elif action == import_pack:
+                ui.start_metadata_pack('import')
             elif action == rename:
                 if ui.original_path_name:
                     print('Renaming')
@@ -238,8 +238,7 @@ class FloatWindowWidget(QtWidgets.QWidget):
                 ui.label_new.hide()
                 self.hide_video_window = True
             else:
-                p1 = "ui.label_epn_{0}.hide()".format(cur_label_num)
-                exec(p1)
+                ui.label_epn_list[cur_label_num].hide()
                 self.hide_video_window = True
         else:
             wid_height = int(ui.float_window.height()/3)
@@ -251,8 +250,7 @@ class FloatWindowWidget(QtWidgets.QWidget):
                 if str(ui.idw) == str(int(ui.label_new.winId())):
                     ui.label_new.show()
                 else:
-                    p1 = "ui.label_epn_{0}.show()".format(cur_label_num)
-                    exec(p1)
+                    ui.label_epn_list[cur_label_num].show()
                 self.hide_video_window = False
 
     def lock_toolbar(self):
@@ -415,22 +413,17 @@ class RightClickMenuIndicator(QtWidgets.QMenu):
             else:
                 row = ui.list2.currentRow()
                 if row >= 0:
-                    p1 = "ui.gridLayout2.indexOf(ui.label_epn_{0})".format(cur_label_num)
-                    index = eval(p1)
+                    label_epn = ui.label_epn_list[cur_label_num]
+                    index = ui.gridLayout2.indexOf(label_epn)
                     print(index, '--index--')
                     ui.current_thumbnail_position = ui.gridLayout2.getItemPosition(index)
                     w = 50
                     h = 50
-                    p2 = "ui.label_epn_{0}.minimumWidth()".format(str(cur_label_num))
-                    self.initial_width = eval(p2)
-                    p2 = "ui.label_epn_{0}.minimumHeight()".format(str(cur_label_num))
-                    self.initial_height = eval(p2)
-                    p2 = "ui.label_epn_"+str(cur_label_num)+".setMinimumSize(QtCore.QSize("+str(1)+", "+str(1)+"))"
-                    exec(p2)
-                    p2 = "ui.label_epn_"+str(cur_label_num)+".setMaximumSize(QtCore.QSize("+str(screen_width)+", "+str(screen_height)+"))"
-                    exec(p2)
-                    p1 = "ui.float_window_layout.insertWidget(0, ui.label_epn_{0}, 0)".format(cur_label_num)
-                    exec(p1)
+                    self.initial_width = label_epn.minimumWidth()
+                    self.initial_height = label_epn.minimumHeight()
+                    label_epn.setMinimumSize(QtCore.QSize(1, 1))
+                    label_epn.setMaximumSize(QtCore.QSize(screen_width, screen_height))
+                    ui.float_window_layout.insertWidget(0, label_epn, 0)
 
                 ui.float_window.show()
             ui.new_tray_widget.lay.insertWidget(2, ui.list2, 0)
@@ -482,35 +475,20 @@ class RightClickMenuIndicator(QtWidgets.QMenu):
                 c = ui.current_thumbnail_position[1]
                 cur_label = cur_label_num
                 if cur_label >= 0:
-                    p6 = "ui.gridLayout2.addWidget(ui.label_epn_"+str(cur_label)+", "+str(r)+", "+str(c)+", 1, 1, QtCore.Qt.AlignCenter)"
-                    exec(p6)
-                    p1 = "ui.label_epn_{0}.show()".format(cur_label_num)
-                    exec(p1)
-                    p2 = "ui.label_epn_{0}.setMinimumSize(QtCore.QSize({1}, {2}))".format(
-                        str(cur_label_num), str(self.initial_width), str(self.initial_height)
-                        )
-                    exec(p2)
+                    label_epn = ui.label_epn_list[cur_label]
+                    ui.gridLayout2.addWidget(label_epn, r, c, 1, 1, QtCore.Qt.AlignCenter)
+                    label_epn.show()
+                    label_epn.setMinimumSize(QtCore.QSize(self.initial_width, self.initial_height))
 
                 if ui.mpvplayer_val.processId() > 0:
                     try:
                         new_cnt = cur_label_num + ui.list2.count()
                         new_new_cnt = ui.cur_row + ui.list2.count()
-                        p1 = "ui.label_epn_{0}.setTextColor(QtCore.Qt.green)".format(new_cnt)
-                        exec(p1)
-                        p1 = "ui.label_epn_{0}.toPlainText()".format(new_new_cnt)
-                        txt = eval(p1)
-                        try:
-                            p1 = "ui.label_epn_{0}.setText('{1}')".format(new_cnt, txt)
-                            exec(p1)
-                        except Exception as e:
-                            print(e, '--line--4597--')
-                            try:
-                                p1 = 'ui.label_epn_{0}.setText("{1}")'.format(new_cnt, txt)
-                                exec(p1)
-                            except Exception as e:
-                                print(e)
-                        p1 = "ui.label_epn_{0}.setAlignment(QtCore.Qt.AlignCenter)".format(new_cnt)
-                        exec(p1)
+                        label_number = ui.label_epn_list[new_cnt]
+                        label_number.setTextColor(QtCore.Qt.green)
+                        txt = ui.label_epn_list[new_new_cnt].toPlainText()
+                        label_number.setText(txt)
+                        label_number.setAlignment(QtCore.Qt.AlignCenter)
                     except Exception as e:
                         print(e)
                     QtCore.QTimer.singleShot(1000, partial(ui.update_thumbnail_position, context='attach_video'))
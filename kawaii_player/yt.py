@@ -25,7 +25,7 @@ import subprocess
 from PyQt5 import QtCore
 from player_functions import send_notification, ccurl
 from vinanti import Vinanti
-import yt_dlp
+from yt_resolver import YTResolver, info_expiry
 
 class YTDL:
     
@@ -36,12 +36,63 @@ class YTDL:
         else:
             verify = False
         self.vnt = Vinanti(block=True, hdrs={'User-Agent':self.ui.user_agent}, verify=verify)
+        self.resolver = YTResolver()
+        self.final_cache = {}
+
+    def normalize_url(self, url):
+        """(url, ytdl_extra), youtube watch urls without extra arguments"""
+        m = []
+        ytdl_extra = False
+        if '/watch?' in url and 'youtube.com' in url:
+            a = url.split('?')[-1]
+            b = a.split('&')
+            for i in b:
+                j = i.split('=')
+                if len(j) > 1:
+                    m.append((j[0], j[1]))
+            d = dict(m)
+            if d.get('v'):
+                url = 'https://www.youtube.com/watch?v='+d['v']
+        elif url.startswith('ytdl:'):
+            url = url.replace('ytdl:', '', 1)
+            ytdl_extra = True
+        else:
+            ytdl_extra = True
+        return url, ytdl_extra
+
+    def prefetch(self, urls, quality, ytdl_path, reqfrom=None):
+        """Resolves urls of next entries in background"""
+        if ytdl_path != 'default':
+            return
+        if (quality == 'best'
+                and self.ui.player_val != "libvlc"
+                and (reqfrom is None or reqfrom == 'desktop')
+                and not self.ui.gapless_network_stream):
+            return
+        self.resolver.prefetch([self.normalize_url(i.replace('"', ''))[0] for i in urls])
+
+    def extract_info(self, url, youtube_dl, logger, ytdl_path='default'):
+        """
+        Info of url from resolver, which uses installed yt_dlp module.
+        yt-dlp command is used if it fails or if ytdl_path is configured.
+        """
+        if ytdl_path == 'default':
+            try:
+                return self.resolver.extract(url)
+            except Exception as err:
+                logger.error('yt-dlp worker: {0}'.format(err))
+        ytdl_list = [youtube_dl, '-q', '--no-warnings', '-j', '-s', '--all-sub', url]
+        if os.name == 'posix':
+            content = subprocess.check_output(ytdl_list, stderr= subprocess.STDOUT)
+        else:
+            content = subprocess.check_output(ytdl_list, stderr= subprocess.STDOUT, shell=True)
+        content = str(content, 'utf-8')
+        return json.loads(content)
 
     def get_yt_url(self, url, quality, ytdl_path,
                    logger, mode=None, reqfrom=None):
         final_url = ''
         url = url.replace('"', '')
-        m = []
         home_dir = self.ui.home_folder
         ytdl_stamp = os.path.join(home_dir, 'tmp', 'ytdl_update_stamp.txt')
         yt_sub_folder = os.path.join(home_dir, 'External-Subtitle')
@@ -75,37 +126,10 @@ class YTDL:
             youtube_dl = 'yt-dlp'
             
         logger.info(youtube_dl)
-        ytdl_extra = False
-        if '/watch?' in url and 'youtube.com' in url:
-            a = url.split('?')[-1]
-            b = a.split('&')
-            if b:
-                for i in b:
-                    j = i.split('=')
-                    k = (j[0], j[1])
-                    m.append(k)
-            else:
-                j = a.split('=')
-                k = (j[0], j[1])
-                m.append(k)
-            d = dict(m)
-            logger.info('----dict--arguments---generated---{0}'.format(d))
-            try:
-                url = 'https://www.youtube.com/watch?v='+d['v']
-            except:
-                pass
-        elif url.startswith('ytdl:'):
-            url = url.replace('ytdl:', '', 1)
-            ytdl_extra = True
-        else:
-            ytdl_extra = True
+        url, ytdl_extra = self.normalize_url(url)
         try:
             if mode == 'TITLE':
-                if os.name == 'posix':
-                    final_url = subprocess.check_output([youtube_dl, '-e', url])
-                else:
-                    final_url = subprocess.check_output([youtube_dl, '-e', url], shell=True)
-                final_url = str(final_url, 'utf-8')
+                final_url = self.extract_info(url, youtube_dl, logger, ytdl_path).get('title') or ''
                 final_url = final_url.replace(' - YouTube', '', 1)
             else:
                 if quality == 'sd':
@@ -128,7 +152,7 @@ class YTDL:
                 else:
                     final_url = self.get_final_for_resolution(
                         url, youtube_dl, logger, ytdl_extra, resolution=res,
-                        mode=mode, sub_folder=yt_sub_folder
+                        mode=mode, sub_folder=yt_sub_folder, ytdl_path=ytdl_path
                         )
                     if not final_url:
                         final_url = url
@@ -175,23 +199,23 @@ class YTDL:
         return final_url
 
     def get_final_for_resolution(self, url, youtube_dl, logger, ytdl_extra,
-                                 resolution=None, mode=None, sub_folder=None):
+                                 resolution=None, mode=None, sub_folder=None,
+                                 ytdl_path='default'):
         final_url = ''
         if resolution:
             res = int(resolution)
         else:
             res = 1080
-        ytdl_list = [youtube_dl, '-q', '--no-warnings', '-j', '-s', '--all-sub', url]
-        if os.name == 'posix':
-            content = subprocess.check_output(ytdl_list, stderr= subprocess.STDOUT)
-        else:
-            content = subprocess.check_output(ytdl_list, stderr= subprocess.STDOUT, shell=True)
-        content = str(content, 'utf-8')
+        key = (url, res)
+        cached = self.final_cache.get(key)
+        if cached and cached[2] > time.time():
+            self.ui.gui_signals.subtitle_fetch(cached[1])
+            return cached[0]
         audio_dict = {}
         video_dict = {}
         best = None
         subs = {}
-        js = json.loads(content)
+        js = self.extract_info(url, youtube_dl, logger, ytdl_path)
         best = js.get('format_id')
         subs = js.get('subtitles')
         title = js.get('fulltitle')
@@ -216,11 +240,11 @@ class YTDL:
         sub_arr = []
         if sub_folder and not os.path.exists(sub_folder):
             os.makedirs(sub_folder)
-        for key, value in subs_dict.items():
+        for lang, value in subs_dict.items():
             if len(value) > 0:
                 urlsub = value[0].get("url")
                 ext = value[0].get('ext')
-                path = '{}.{}.{}'.format(ytid, key, ext)
+                path = '{}.{}.{}'.format(ytid, lang, ext)
                 sub_path = os.path.join(sub_folder, path)
                 sub_arr.append([urlsub, sub_path, title])
 
@@ -234,6 +258,10 @@ class YTDL:
 
         logger.debug("selected-video: {}".format(video_only[0]))
         logger.debug("selected-audio: {}".format(audio_only[0]))
+        for i, value in list(self.final_cache.items()):
+            if value[2] < time.time():
+                self.final_cache.pop(i, None)
+        self.final_cache.update({key:(final_url, sub_arr, info_expiry(js))})
 
         return final_url
 
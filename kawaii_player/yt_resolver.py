@@ -0,0 +1,517 @@
+"""
+Copyright (C) 2017 kanishka-linux kanishka.linux@gmail.com
+
+This file is part of kawaii-player.
+
+kawaii-player is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+kawaii-player is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with kawaii-player.  If not, see <http://www.gnu.org/licenses/>.
+
+Resolution of youtube (and other yt-dlp supported) urls in long lived
+worker processes, which keep one yt_dlp.YoutubeDL instance each, so
+that python interpreter and extractors are loaded only once. Worker
+reads urls and writes info as json lines on stdin/stdout. Info is kept
+in memory until signed stream urls in it expire, requests for url
+already in progress wait for same result, requests made while playing
+are served before prefetched ones, worker which doesn't answer in
+time is killed and replaced. Playlists are expanded with flat
+extraction in one request, entries are sent back in batches while
+pages of playlist are fetched and snapshot of playlist is kept for
+few minutes.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import subprocess
+import importlib.util
+import urllib.parse
+from threading import Lock, Thread
+from collections import deque
+from concurrent.futures import Future
+
+DEFAULT_TTL = 1800
+EXPIRY_MARGIN = 120
+MAX_ENTRIES = 256
+FORMAT_KEYS = (
+    'format_id', 'url', 'ext', 'acodec', 'vcodec', 'height', 'fps',
+    'quality', 'manifest_url'
+    )
+WORKER_OPTIONS = {'quiet': True, 'no_warnings': True, 'noplaylist': True}
+FLAT_OPTIONS = {'quiet': True, 'no_warnings': True, 'extract_flat': 'in_playlist'}
+FLAT_PREFIX = 'flat:'
+PLAYLIST_BATCH = 50
+PLAYLIST_TTL = 300
+MAX_PLAYLISTS = 16
+
+
+def url_expiry(url):
+    """Expiry time of signed url (expire=... or /expire/.../), None if unsigned"""
+    n = urllib.parse.urlparse(url)
+    expire = urllib.parse.parse_qs(n.query).get('expire')
+    if expire:
+        value = expire[0]
+    elif '/expire/' in n.path:
+        value = n.path.split('/expire/', 1)[1].split('/', 1)[0]
+    else:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def info_expiry(info):
+    expiry = [url_expiry(i['url']) for i in info.get('formats', []) if i.get('url')]
+    expiry = [i for i in expiry if i]
+    if expiry:
+        return min(expiry) - EXPIRY_MARGIN
+    return time.time() + DEFAULT_TTL
+
+
+def strip_info(info):
+    """Fields of yt-dlp info used for selecting streams and subtitles"""
+    formats = [
+        dict((key, i.get(key)) for key in FORMAT_KEYS)
+        for i in info.get('formats') or []
+        ]
+    subtitles = dict(
+        (lang, [{'ext': i.get('ext'), 'url': i.get('url')} for i in value])
+        for lang, value in (info.get('subtitles') or {}).items()
+        )
+    return {
+        'id': info.get('id'), 'title': info.get('title'),
+        'fulltitle': info.get('fulltitle'), 'format_id': info.get('format_id'),
+        'url': info.get('url'), 'formats': formats, 'subtitles': subtitles
+        }
+
+
+def flat_entry(entry):
+    if entry.get('_type') in ('url', 'url_transparent'):
+        url = entry.get('url')
+    else:
+        url = entry.get('webpage_url') or entry.get('url')
+    title = entry.get('title') or entry.get('id') or url
+    return {'id': entry.get('id'), 'title': title, 'url': url, 'duration': entry.get('duration')}
+
+
+def write_line(out, value):
+    out.write(json.dumps(value) + '\n')
+    out.flush()
+
+
+def expand_playlist(ydl, key, out):
+    """
+    Writes entries of playlist in batches, entries are generated
+    lazily by extractor so first batch is sent after first page
+    """
+    info = ydl.extract_info(key[len(FLAT_PREFIX):], download=False, process=False)
+    for i in range(3):
+        if info.get('_type') not in ('url', 'url_transparent'):
+            break
+        info = ydl.extract_info(info['url'], download=False, process=False, ie_key=info.get('ie_key'))
+    if 'entries' in info:
+        entries = info['entries'] or []
+    else:
+        entries = [info]
+    batch = []
+    for entry in entries:
+        if not entry:
+            continue
+        batch.append(flat_entry(entry))
+        if len(batch) >= PLAYLIST_BATCH:
+            write_line(out, [key, {'entries': batch, 'partial': True}, None])
+            batch = []
+    write_line(out, [key, {'title': info.get('title'), 'entries': batch, 'partial': False}, None])
+
+
+def expand_playlist_command(cmd, callback):
+    """
+    Expands playlist with yt-dlp command cmd, which is run with
+    --flat-playlist -j, when resolver isn't used. callback is called
+    with batches of entries while command prints them. Returns number
+    of entries.
+    """
+    if os.name == 'posix':
+        proc = subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            universal_newlines=True
+            )
+    else:
+        proc = subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            universal_newlines=True, shell=True
+            )
+    count = 0
+    batch = []
+    for line in proc.stdout:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(entry, dict):
+            continue
+        batch.append(flat_entry(entry))
+        if len(batch) >= PLAYLIST_BATCH:
+            count += len(batch)
+            callback(batch)
+            batch = []
+    if proc.wait() and not (count or batch):
+        raise RuntimeError('{0} exited with {1}'.format(cmd[0], proc.returncode))
+    if batch:
+        count += len(batch)
+        callback(batch)
+    return count
+
+
+def worker_main():
+    import yt_dlp
+    out = sys.stdout
+    sys.stdout = sys.stderr
+    ydl = yt_dlp.YoutubeDL(WORKER_OPTIONS)
+    flat_ydl = None
+    for line in sys.stdin:
+        url = json.loads(line)
+        try:
+            if url.startswith(FLAT_PREFIX):
+                if flat_ydl is None:
+                    flat_ydl = yt_dlp.YoutubeDL(FLAT_OPTIONS)
+                expand_playlist(flat_ydl, url, out)
+            else:
+                info = ydl.sanitize_info(ydl.extract_info(url, download=False))
+                write_line(out, [url, strip_info(info), None])
+        except Exception as err:
+            write_line(out, [url, None, str(err)])
+
+
+class YTResolver():
+
+    def __init__(self, logger=None, workers=2, timeout=60):
+        if logger is None:
+            logger = logging.getLogger(__name__)
+        self.logger = logger
+        self.workers = workers
+        self.timeout = timeout
+        self.lock = Lock()
+        self.cache = {}
+        self.pending = {}
+        self.waiting = deque()
+        self.processes = []
+        self.busy = {}
+        self.disabled = not self.is_available()
+        self.playlists = {}
+        self.partial = {}
+        self.listeners = {}
+
+    def is_available(self):
+        """
+        Worker runs this file with python interpreter and needs yt_dlp
+        module. Frozen builds have no interpreter to run it with.
+        """
+        if getattr(sys, 'frozen', False):
+            self.logger.info('yt-dlp worker: not available in frozen build')
+            return False
+        if importlib.util.find_spec('yt_dlp') is None:
+            self.logger.info('yt-dlp worker: yt_dlp module not found')
+            return False
+        return True
+
+    def start_worker(self):
+        """Called with lock held"""
+        cmd = [sys.executable, os.path.abspath(__file__), 'worker']
+        try:
+            proc = subprocess.Popen(
+                cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL, universal_newlines=True, bufsize=1
+                )
+        except Exception as err:
+            self.logger.error('yt-dlp worker: {0}'.format(err))
+            self.disabled = True
+            return None
+        self.processes.append(proc)
+        thread = Thread(target=self.read_results, args=(proc, ), daemon=True)
+        thread.start()
+        return proc
+
+    def read_results(self, proc):
+        answered = False
+        for line in proc.stdout:
+            try:
+                url, info, err = json.loads(line)
+            except ValueError:
+                continue
+            answered = True
+            future = None
+            batch = None
+            with self.lock:
+                if info and url.startswith(FLAT_PREFIX):
+                    batch = info['entries']
+                if info and info.get('partial'):
+                    self.partial.setdefault(url, []).extend(batch)
+                    listeners = self.listeners.get(url, []).copy()
+                else:
+                    self.busy.pop(proc, None)
+                    future = self.pending.pop(url, None)
+                    listeners = self.listeners.pop(url, [])
+                    entries = self.partial.pop(url, [])
+                    if batch is not None:
+                        info = self.store_playlist(url, info, entries)
+                    elif info:
+                        self.store(url, info)
+                    self.dispatch()
+            if batch:
+                for callback in listeners:
+                    self.call_listener(callback, batch, url)
+            if future and not future.done():
+                if info:
+                    future.set_result(info)
+                else:
+                    future.set_exception(RuntimeError(err))
+        with self.lock:
+            url = self.busy.pop(proc, None)
+            if proc in self.processes:
+                self.processes.remove(proc)
+                if not answered:
+                    # worker which exits by itself before answering can't
+                    # start, e.g. yt_dlp fails to import
+                    self.logger.error('yt-dlp worker exited before answering')
+                    self.disabled = True
+            future = self.pending.pop(url, None)
+            self.partial.pop(url, None)
+            self.listeners.pop(url, None)
+            self.dispatch()
+        if future and not future.done():
+            future.set_exception(RuntimeError('yt-dlp worker exited'))
+
+    def call_listener(self, callback, entries, key):
+        try:
+            callback(entries)
+        except Exception as err:
+            self.logger.error('playlist {0}: {1}'.format(key[len(FLAT_PREFIX):], err))
+
+    def store(self, url, info):
+        """Called with lock held"""
+        now = time.time()
+        if len(self.cache) >= MAX_ENTRIES:
+            for key in [k for k, v in self.cache.items() if v[1] < now]:
+                del self.cache[key]
+            if len(self.cache) >= MAX_ENTRIES:
+                oldest = min(self.cache, key=lambda k: self.cache[k][1])
+                del self.cache[oldest]
+        self.cache.update({url:(info, info_expiry(info))})
+
+    def store_playlist(self, key, info, entries):
+        """
+        Keeps snapshot of playlist made of entries received earlier and
+        last batch, returns snapshot. Called with lock held
+        """
+        now = time.time()
+        for i in [k for k, v in self.playlists.items() if v[1] < now]:
+            del self.playlists[i]
+        if len(self.playlists) >= MAX_PLAYLISTS:
+            oldest = min(self.playlists, key=lambda k: self.playlists[k][1])
+            del self.playlists[oldest]
+        snapshot = {'title': info.get('title'), 'entries': entries + info['entries']}
+        self.playlists.update({key:(snapshot, now + PLAYLIST_TTL)})
+        return snapshot
+
+    def fail_waiting(self):
+        """Called with lock held"""
+        for url in self.waiting:
+            future = self.pending.pop(url, None)
+            self.partial.pop(url, None)
+            self.listeners.pop(url, None)
+            if future:
+                future.set_exception(RuntimeError('yt-dlp worker not available'))
+        self.waiting.clear()
+
+    def failed(self):
+        future = Future()
+        future.set_exception(RuntimeError('yt-dlp worker not available'))
+        return future
+
+    def dispatch(self):
+        """Gives waiting urls to idle workers, called with lock held"""
+        while self.waiting:
+            idle = [i for i in self.processes if i not in self.busy and i.poll() is None]
+            if not idle:
+                if self.disabled and not self.processes:
+                    self.fail_waiting()
+                    return
+                if len(self.processes) >= self.workers or self.disabled:
+                    return
+                proc = self.start_worker()
+                if proc is None:
+                    self.fail_waiting()
+                    return
+                idle = [proc]
+            url = self.waiting.popleft()
+            if url not in self.pending:
+                continue
+            try:
+                idle[0].stdin.write(json.dumps(url) + '\n')
+                idle[0].stdin.flush()
+                self.busy.update({idle[0]:url})
+            except (OSError, ValueError) as err:
+                self.logger.error('yt-dlp worker: {0}'.format(err))
+                self.waiting.appendleft(url)
+                self.processes.remove(idle[0])
+
+    def cached(self, url):
+        """Info of url if resolved and not expired"""
+        with self.lock:
+            entry = self.cache.get(url)
+            if entry and entry[1] > time.time():
+                return entry[0]
+        return None
+
+    def expiry(self, url):
+        with self.lock:
+            entry = self.cache.get(url)
+        if entry:
+            return entry[1]
+        return 0
+
+    def submit(self, url, prefetch=False):
+        """Future of info of url"""
+        with self.lock:
+            entry = self.cache.get(url)
+            if entry and entry[1] > time.time():
+                future = Future()
+                future.set_result(entry[0])
+                return future
+            if self.disabled:
+                return self.failed()
+            future = self.pending.get(url)
+            if future:
+                if not prefetch and url in self.waiting:
+                    self.waiting.remove(url)
+                    self.waiting.appendleft(url)
+                return future
+            future = Future()
+            self.pending.update({url:future})
+            if prefetch:
+                self.waiting.append(url)
+            else:
+                self.waiting.appendleft(url)
+            self.dispatch()
+        return future
+
+    def extract(self, url, timeout=None):
+        """Info of url, raises exception if it can't be resolved in time"""
+        future = self.submit(url)
+        try:
+            return future.result(timeout or self.timeout)
+        except Exception:
+            stuck = []
+            with self.lock:
+                if self.pending.get(url) is future:
+                    del self.pending[url]
+                    if url in self.waiting:
+                        self.waiting.remove(url)
+                    # worker still resolving url is replaced, so that
+                    # following urls aren't queued behind it
+                    stuck = [i for i, j in self.busy.items() if j == url]
+                    for proc in stuck:
+                        del self.busy[proc]
+                        self.processes.remove(proc)
+                    self.dispatch()
+            for proc in stuck:
+                proc.kill()
+            raise
+
+    def prefetch(self, urls):
+        for url in urls:
+            self.submit(url, prefetch=True)
+
+    def expand_playlist(self, url, callback=None):
+        """
+        Future of {'title', 'entries'} of playlist url, entries are dicts
+        of id, title, url and duration. callback is called with every
+        batch of entries as soon as worker sends it.
+        """
+        key = FLAT_PREFIX + url
+        with self.lock:
+            entry = self.playlists.get(key)
+            if entry and entry[1] > time.time():
+                future = Future()
+                future.set_result(entry[0])
+                entries = entry[0]['entries']
+            else:
+                entry = None
+                if self.disabled:
+                    return self.failed()
+                future = self.pending.get(key)
+                if future is None:
+                    future = Future()
+                    self.pending.update({key:future})
+                    self.waiting.appendleft(key)
+                entries = self.partial.get(key, []).copy()
+                if callback and not entries:
+                    self.listeners.setdefault(key, []).append(callback)
+                self.dispatch()
+        if callback and entries:
+            self.call_listener(callback, entries, key)
+            if entry is None:
+                self.join_listeners(key, callback, future, len(entries))
+        return future
+
+    def join_listeners(self, key, callback, future, delivered):
+        """
+        Adds callback, which has got first delivered entries of playlist
+        key, to listeners. Listeners are called without lock, so entries
+        received meanwhile are given to callback first, to keep order of
+        batches.
+        """
+        while True:
+            with self.lock:
+                if self.pending.get(key) is future:
+                    entries = self.partial.get(key, [])[delivered:]
+                    if not entries:
+                        self.listeners.setdefault(key, []).append(callback)
+                        return
+                else:
+                    snapshot = self.playlists.get(key)
+                    entries = snapshot[0]['entries'][delivered:] if snapshot else []
+            if not entries:
+                return
+            self.call_listener(callback, entries, key)
+            delivered += len(entries)
+
+    def next_entries(self, url, count=2):
+        """Urls following url in playlist snapshots"""
+        with self.lock:
+            for snapshot, expiry in self.playlists.values():
+                urls = [i['url'] for i in snapshot['entries']]
+                if url in urls:
+                    index = urls.index(url) + 1
+                    return urls[index:index+count]
+        return []
+
+    def close(self):
+        with self.lock:
+            processes = self.processes.copy()
+            self.waiting.clear()
+        for proc in processes:
+            try:
+                proc.stdin.close()
+                proc.wait(2)
+            except Exception as err:
+                self.logger.error(err)
+                proc.kill()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'worker':
+        worker_main()
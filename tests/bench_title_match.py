@@ -0,0 +1,84 @@
+"""
+Benchmark of title matching on file name corpus
+
+    python tests/bench_title_match.py [number of extra titles]
+
+Corpus titles are mixed with random titles made of corpus words. Each
+file name is matched by scanning all titles with plain edit distance
+(as TVDB search results were ranked) and by TitleIndex, episode keys
+are parsed without and with cache.
+"""
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'kawaii_player')))
+
+from title_match import TitleIndex, c_distance, levenshtein, parse_episode, title_from_filename
+from test_title_match import dp_levenshtein, load_corpus
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def scan_match(queries, titles, distance):
+    result = []
+    for query in queries:
+        dist = [(distance(query, title.lower()), title) for title in titles]
+        result.append(min(dist)[1])
+    return result
+
+
+def index_match(queries, index):
+    result = []
+    for query in queries:
+        best = index.best(query)
+        result.append(best[0] if best else None)
+    return result
+
+
+def parse_all(names, func, rounds):
+    for _ in range(rounds):
+        keys = [func(name.lower())[0] for name in names]
+    return keys
+
+
+def main():
+    extra = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rows = load_corpus()
+    titles = sorted(set(row[1] for row in rows))
+    words = sorted(set(w for title in titles for w in title.split()))
+    rnd = random.Random(1)
+    titles += [' '.join(rnd.sample(words, rnd.randint(1, 4))) for _ in range(extra)]
+    queries = [title_from_filename(row[0]) for row in rows]
+    expected = [row[1] for row in rows]
+    print('{} file names, {} titles, edit distance: {}'.format(
+        len(rows), len(titles), 'C' if c_distance else 'bit-parallel python'))
+
+    found, scan_time = timed(scan_match, queries, titles, dp_levenshtein)
+    hits = sum(i == j for i, j in zip(found, expected))
+    print('linear scan: {:.3f}s, {}/{} correct'.format(scan_time, hits, len(rows)))
+    found, scan_time = timed(scan_match, queries, titles, levenshtein)
+    print('linear scan, fast edit distance: {:.3f}s'.format(scan_time))
+
+    index, build_time = timed(TitleIndex, titles)
+    found, index_time = timed(index_match, queries, index)
+    hits = sum(i == j for i, j in zip(found, expected))
+    print('title index: {:.3f}s (+{:.3f}s build), {}/{} correct'.format(
+        index_time, build_time, hits, len(rows)))
+
+    names = [row[0] for row in rows]
+    rounds = 200
+    keys, plain_time = timed(parse_all, names, parse_episode.__wrapped__, rounds)
+    hits = sum(i == row[2] for i, row in zip(keys, rows))
+    _, cached_time = timed(parse_all, names, parse_episode, rounds)
+    print('episode keys x{}: {:.3f}s, cached {:.3f}s, {}/{} correct'.format(
+        rounds, plain_time, cached_time, hits, len(rows)))
+
+
+if __name__ == '__main__':
+    main()
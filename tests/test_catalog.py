@@ -0,0 +1,123 @@
+"""
+Unit tests for unified media catalog
+"""
+import os
+import sys
+import pickle
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'kawaii_player')))
+
+from catalog import MediaCatalog, SCHEMA_VERSION
+
+
+class TestMediaCatalog(unittest.TestCase):
+    """Test import of legacy stores into catalog.db"""
+
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.video = os.path.join(self.home, 'lib', 'Show')
+        os.makedirs(self.video)
+        os.makedirs(os.path.join(self.home, 'VideoDB'))
+        os.makedirs(os.path.join(self.home, 'Music'))
+        self.ep1 = os.path.join(self.video, 'ep1.mkv')
+        self.ep2 = os.path.join(self.video, 'ep2.mkv')
+        for path in [self.ep1, self.ep2]:
+            open(path, 'w').close()
+        conn = sqlite3.connect(os.path.join(self.home, 'VideoDB', 'Video.db'))
+        conn.execute('CREATE TABLE Video(Title text, Directory text, FileName text, EP_NAME text, Path text primary key, EPN integer, Category integer)')
+        conn.execute('INSERT INTO Video VALUES(?, ?, ?, ?, ?, ?, ?)', ('Show', self.video, '#ep1.mkv', '#ep1.mkv', self.ep1, 0, 1))
+        conn.execute('INSERT INTO Video VALUES(?, ?, ?, ?, ?, ?, ?)', ('Show', self.video, 'ep2.mkv', 'ep2.mkv', self.ep2, 1, 1))
+        conn.commit()
+        conn.close()
+        conn = sqlite3.connect(os.path.join(self.home, 'Music', 'Music.db'))
+        conn.execute('CREATE TABLE Music(Title text, Artist text, Album text, Directory text, Path text primary key, Playlist text, Favourite text, FavouriteOpt text, Playcount integer, Modified timestamp, LastPlayed timestamp)')
+        conn.execute('INSERT INTO Music VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', ('Song', 'Artist', 'Album', '/music', '/music/song.mp3', '', 'yes', '', 5, 1000.0, '2020-01-01 10:00:00.000001'))
+        conn.commit()
+        conn.close()
+        history = {self.ep1: [120, 2000.0, 'auto', 'auto', 1, 'auto', '0'], '#LAST@TITLE': ['x']}
+        with open(os.path.join(self.home, 'VideoDB', 'historydata'), 'wb') as f:
+            pickle.dump(history, f)
+        series = os.path.join(self.home, 'History', 'Local', 'Series')
+        os.makedirs(series)
+        with open(os.path.join(series, 'Ep.txt'), 'w') as f:
+            f.write('#Episode 1\thttp://example.com/1\nEpisode 2\thttp://example.com/2\n')
+        self.catalog = MediaCatalog(self.home)
+
+    def tearDown(self):
+        shutil.rmtree(self.home)
+
+    def test_schema_version(self):
+        conn = self.catalog.connect()
+        self.assertEqual(self.catalog.schema_version(conn), SCHEMA_VERSION)
+        conn.close()
+
+    def test_import_legacy_stores(self):
+        result = self.catalog.import_legacy_stores()
+        self.assertEqual(result, {'video': 2, 'music': 1, 'series': 2, 'history': 1})
+        again = self.catalog.import_legacy_stores()
+        self.assertEqual(again, {'video': 0, 'music': 0, 'series': 0, 'history': 0})
+        forced = self.catalog.import_legacy_stores(force=True)
+        self.assertEqual(result, forced)
+        conn = self.catalog.connect()
+        self.assertEqual(conn.execute('SELECT count(*) FROM media_item').fetchone()[0], 5)
+        self.assertEqual(conn.execute('SELECT count(*) FROM play_event').fetchone()[0], 1)
+        watched = conn.execute("SELECT watched FROM media_item Where path=?", (self.ep1, )).fetchone()[0]
+        self.assertEqual(watched, 1)
+        conn.close()
+
+    def test_views(self):
+        self.catalog.import_legacy_stores()
+        self.assertEqual(self.catalog.continue_watching(), [('Show', self.ep1, 120.0)])
+        self.catalog.record_play(self.ep2)
+        most_played = self.catalog.most_played()
+        self.assertEqual(most_played[0][1], '/music/song.mp3')
+        self.assertEqual(self.catalog.recently_played(kind='video')[0][1], self.ep2)
+
+    def test_incremental_import(self):
+        self.catalog.import_legacy_stores()
+        video_db = os.path.join(self.home, 'VideoDB', 'Video.db')
+        conn = sqlite3.connect(video_db)
+        conn.execute('DELETE FROM Video Where Path=?', (self.ep2, ))
+        conn.commit()
+        conn.close()
+        os.utime(video_db, (3000, 3000))
+        with open(os.path.join(self.home, 'History', 'Local', 'Series', 'Ep.txt'), 'w') as f:
+            f.write('#Episode 1\thttp://example.com/1\n')
+        result = self.catalog.import_legacy_stores()
+        self.assertEqual(result, {'video': 1, 'music': 0, 'series': 1, 'history': 0})
+        conn = self.catalog.connect()
+        paths = [i for i, in conn.execute('SELECT path FROM media_item')]
+        conn.close()
+        self.assertNotIn(self.ep2, paths)
+        self.assertNotIn('http://example.com/2', paths)
+        self.assertIn(self.ep1, paths)
+
+    def test_history_play_not_counted_twice(self):
+        self.catalog.import_legacy_stores()
+        self.catalog.record_play(self.ep1)
+        conn = self.catalog.connect()
+        played_at = conn.execute('SELECT max(played_at) FROM play_event').fetchone()[0]
+        conn.close()
+        history_file = os.path.join(self.home, 'VideoDB', 'historydata')
+        history = {self.ep1: [300, played_at + 60, 'auto', 'auto', 1, 'auto', '0']}
+        with open(history_file, 'wb') as f:
+            pickle.dump(history, f)
+        os.utime(history_file, (played_at + 60, played_at + 60))
+        self.assertEqual(self.catalog.import_legacy_stores()['history'], 1)
+        conn = self.catalog.connect()
+        self.assertEqual(conn.execute('SELECT count(*) FROM play_event').fetchone()[0], 2)
+        conn.close()
+
+    def test_video_history(self):
+        self.catalog.import_legacy_stores()
+        self.assertEqual(self.catalog.video_history(), [('Show', self.video)])
+        self.catalog.set_watched(self.ep1, False)
+        self.assertEqual(self.catalog.video_history(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
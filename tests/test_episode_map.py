@@ -0,0 +1,51 @@
+"""
+Unit tests for episode mapping
+"""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'kawaii_player')))
+
+from episode_map import EpisodeMap
+
+
+def tvdb_entry(k, nsid, title):
+    num = nsid.split('x')[1]
+    return [k, nsid, num, title, 'http://tvdb/' + nsid, '2010-01-01', None, 'summary']
+
+
+class TestEpisodeMap(unittest.TestCase):
+    """Test mapping of local names to TVDB keys and its persistence"""
+
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.tvdb_dict = {
+            '0x1': tvdb_entry(0, '0x1', 'Special'),
+            '1x1': tvdb_entry(1, '1x1', 'Pilot'),
+            '1x2': tvdb_entry(2, '1x2', 'Second'),
+            '2x01': tvdb_entry(3, '2x01', 'Return'),
+            }
+        self.names = ['Show.S01E02.720p.mkv', '[Grp] Show - 03 [1080p].mkv', 'Show OP.mkv', 'Show.S02E01.mkv']
+
+    def tearDown(self):
+        shutil.rmtree(self.home)
+
+    def test_map_names(self):
+        episode_map = EpisodeMap(self.home)
+        result = episode_map.map_names('Video:/show', self.tvdb_dict, self.names)
+        self.assertEqual(result, [('1x2', False), ('2x01', False), (None, False), ('2x01', False)])
+        episode_map = EpisodeMap(self.home)
+        result = episode_map.map_names('Video:/show', self.tvdb_dict, self.names)
+        self.assertEqual([i[1] for i in result], [True, True, False, True])
+        self.assertEqual(episode_map.map_names('Video:/other', self.tvdb_dict, self.names[:1]), [('1x2', False)])
+        del self.tvdb_dict['1x2']
+        self.assertEqual(episode_map.map_names('Video:/show', self.tvdb_dict, self.names[:1]), [(None, False)])
+        episode_map.forget('Video:/show')
+        self.assertEqual(EpisodeMap(self.home).map_names('Video:/show', {}, self.names[:1]), [(None, False)])
+
+
+if __name__ == '__main__':
+    unittest.main()
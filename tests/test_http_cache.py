@@ -0,0 +1,75 @@
+"""
+Unit tests for on-disk http cache
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'kawaii_player')))
+
+from http_cache import HttpCache
+
+
+class TestHttpCache(unittest.TestCase):
+    """Test freshness, revalidation, eviction and keys of HttpCache"""
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = HttpCache(self.cache_dir, max_bytes=1000)
+        self.url = 'https://example.org/page'
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_expiry(self):
+        headers = [('Cache-Control', 'max-age=60')]
+        self.assertTrue(self.cache.store(self.url, headers, body=b'body'))
+        entry = self.cache.lookup(self.url)
+        self.assertTrue(entry['fresh'])
+        self.assertEqual(self.cache.read(entry), b'body')
+        self.assertFalse(self.cache.store(self.url, [('Cache-Control', 'no-store')], body=b'x'))
+        self.assertFalse(self.cache.store('http://127.0.0.1/page', headers, body=b'x'))
+        self.cache.store(self.url, [('Expires', 'Thu, 01 Jan 1970 00:00:00 GMT')], body=b'old')
+        self.assertFalse(self.cache.lookup(self.url)['fresh'])
+
+    def test_revalidate(self):
+        headers = [('Cache-Control', 'no-cache'), ('ETag', '"v1"')]
+        self.cache.store(self.url, headers, body=b'body')
+        entry = self.cache.lookup(self.url)
+        self.assertFalse(entry['fresh'])
+        self.assertEqual(self.cache.conditional_headers(entry), {'If-None-Match': '"v1"'})
+        entry = self.cache.revalidate(self.url, [('Cache-Control', 'max-age=60')])
+        self.assertTrue(entry['fresh'])
+        self.assertEqual(self.cache.read(entry), b'body')
+        self.assertTrue(self.cache.lookup(self.url)['fresh'])
+
+    def test_evict(self):
+        headers = [('Cache-Control', 'max-age=60')]
+        for i in range(8):
+            self.cache.store('{0}/{1}'.format(self.url, i), headers, body=b'x'*120)
+            time.sleep(0.01)
+        self.cache.lookup(self.url + '/0')
+        self.cache.store(self.url + '/8', headers, body=b'x'*120)
+        self.assertIsNotNone(self.cache.lookup(self.url + '/0'))
+        self.assertIsNone(self.cache.lookup(self.url + '/1'))
+        self.assertIsNotNone(self.cache.lookup(self.url + '/8'))
+        self.assertLessEqual(self.cache.used, 1000)
+
+    def test_request_headers(self):
+        headers = [('Cache-Control', 'max-age=60')]
+        self.cache.store(self.url, headers, body=b'en', request_headers={'Accept-Language': 'en'})
+        self.cache.store(self.url, headers, body=b'de', request_headers={'Accept-Language': 'de'})
+        entry = self.cache.lookup(self.url, {'accept-language': 'en', 'User-Agent': 'x'})
+        self.assertEqual(self.cache.read(entry), b'en')
+        entry = self.cache.lookup(self.url, [('Accept-Language', 'de')])
+        self.assertEqual(self.cache.read(entry), b'de')
+        self.assertIsNone(self.cache.lookup(self.url))
+        self.assertIsNone(self.cache.lookup(self.url, {'Authorization': 'Basic eDp5'}))
+        self.assertFalse(self.cache.store(self.url, headers + [('Vary', '*')], body=b'x'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+Unit tests for offline metadata pack
+"""
+import os
+import sys
+import shutil
+import sqlite3
+import hashlib
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'kawaii_player')))
+
+from metadata_pack import MetadataPack, path_hash
+
+
+def make_home(home, library, titles):
+    """Video.db of home with episodes of titles at library/<title>/<file>"""
+    os.makedirs(os.path.join(home, 'VideoDB'))
+    conn = sqlite3.connect(os.path.join(home, 'VideoDB', 'Video.db'))
+    conn.execute('CREATE TABLE Video(Title text, Directory text, FileName text, EP_NAME text, Path text primary key, EPN integer, Category integer)')
+    for title, files in titles.items():
+        directory = os.path.join(library, title)
+        os.makedirs(directory, exist_ok=True)
+        for i, (file_name, content) in enumerate(files):
+            path = os.path.join(directory, file_name)
+            with open(path, 'wb') as f:
+                f.write(content)
+            conn.execute('INSERT INTO Video VALUES(?, ?, ?, ?, ?, ?, ?)',
+                         (title, directory, file_name, file_name, path, i, 1))
+    conn.commit()
+    conn.close()
+
+
+class TestMetadataPack(unittest.TestCase):
+    """Test export of metadata and import into library at other paths"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.old_home = os.path.join(self.tmp, 'old')
+        self.new_home = os.path.join(self.tmp, 'new')
+        files = [('show.s01e01.mkv', b'a'*200000), ('show.s01e02.mkv', b'b'*1000)]
+        make_home(self.old_home, os.path.join(self.tmp, 'lib1'), {'Show': files})
+        renamed = [('Show - 01.mkv', b'a'*200000), ('show.s01e02.mkv', b'b'*1000)]
+        make_home(self.new_home, os.path.join(self.tmp, 'lib2'), {'Show (2010)': renamed})
+        local = os.path.join(self.old_home, 'Local', 'Show')
+        os.makedirs(local)
+        for name in ['poster.jpg', 'summary.txt', '128px.poster.jpg']:
+            with open(os.path.join(local, name), 'w') as f:
+                f.write(name)
+        conn = sqlite3.connect(os.path.join(self.old_home, 'VideoDB', 'Video.db'))
+        conn.execute('Update Video Set EP_NAME=? Where FileName=?', ('1x1 Pilot', 'show.s01e01.mkv'))
+        conn.commit()
+        conn.close()
+        thumb_dir = os.path.join(self.old_home, 'thumbnails', 'thumbnail_server')
+        os.makedirs(thumb_dir)
+        old_path = os.path.join(self.tmp, 'lib1', 'Show', 'show.s01e01.mkv')
+        with open(os.path.join(thumb_dir, path_hash(old_path)+'.jpg'), 'w') as f:
+            f.write('thumb')
+        self.pack_file = os.path.join(self.tmp, 'pack.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_export_import(self):
+        result = MetadataPack(self.old_home).export_pack(self.pack_file)
+        self.assertEqual(result, {'titles': 1, 'files': 2, 'episodes': 1, 'blobs': 3})
+        result = MetadataPack(self.new_home).import_pack(self.pack_file)
+        self.assertEqual(result, {'titles': 1, 'files': 2, 'episodes': 1, 'unmatched': 0})
+        local = os.path.join(self.new_home, 'Local', 'Show (2010)')
+        self.assertEqual(sorted(os.listdir(local)), ['poster.jpg', 'summary.txt'])
+        new_path = os.path.join(self.tmp, 'lib2', 'Show (2010)', 'Show - 01.mkv')
+        thumb = os.path.join(self.new_home, 'thumbnails', 'thumbnail_server', path_hash(new_path)+'.jpg')
+        with open(thumb) as f:
+            self.assertEqual(f.read(), 'thumb')
+        conn = sqlite3.connect(os.path.join(self.new_home, 'VideoDB', 'Video.db'))
+        ep_name = conn.execute('SELECT EP_NAME FROM Video Where Path=?', (new_path, )).fetchone()[0]
+        conn.close()
+        self.assertEqual(ep_name, '1x1 Pilot')
+
+
+if __name__ == '__main__':
+    unittest.main()
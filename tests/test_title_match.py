@@ -0,0 +1,73 @@
+"""
+Unit tests for title and episode matching
+"""
+import os
+import sys
+import random
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'kawaii_player')))
+
+from title_match import (
+    TitleIndex, levenshtein, levenshtein_py, normalize_title,
+    parse_episode, title_from_filename
+)
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'title_corpus.tsv')
+
+
+def load_corpus():
+    rows = []
+    with open(CORPUS, encoding='utf-8') as f:
+        for line in f:
+            if line.strip() and not line.startswith('#'):
+                rows.append(line.rstrip('\n').split('\t'))
+    return rows
+
+
+def dp_levenshtein(s1, s2):
+    previous_row = list(range(len(s2) + 1))
+    for i, c1 in enumerate(s1):
+        current_row = [i + 1]
+        for j, c2 in enumerate(s2):
+            current_row.append(min(previous_row[j + 1] + 1, current_row[j] + 1,
+                                   previous_row[j] + (c1 != c2)))
+        previous_row = current_row
+    return previous_row[-1]
+
+
+class TestTitleMatch(unittest.TestCase):
+    """Test edit distance, title index and episode keys on file name corpus"""
+
+    def setUp(self):
+        self.rows = load_corpus()
+
+    def test_levenshtein(self):
+        rnd = random.Random(7)
+        for _ in range(500):
+            s1 = ''.join(rnd.choice('abc d') for _ in range(rnd.randint(0, 90)))
+            s2 = ''.join(rnd.choice('abc d') for _ in range(rnd.randint(0, 90)))
+            self.assertEqual(levenshtein_py(s1, s2), dp_levenshtein(s1, s2))
+            self.assertEqual(levenshtein(s1, s2), dp_levenshtein(s1, s2))
+
+    def test_normalize_title(self):
+        self.assertEqual(normalize_title('[HorribleSubs] One_Punch.Man [1080p].mkv'), 'one punch man')
+        self.assertEqual(title_from_filename('Breaking.Bad.S01E01.720p.HDTV.x264-CTU.mkv'), 'breaking bad')
+
+    def test_episode_keys(self):
+        for file_name, _, key in self.rows:
+            self.assertEqual(parse_episode(file_name.lower())[0], key, file_name)
+        self.assertEqual(parse_episode('title without number', 4), ('e5', -1))
+
+    def test_title_index(self):
+        index = TitleIndex()
+        for i, title in enumerate(sorted(set(row[1] for row in self.rows))):
+            index.add(title, i)
+        index.add('Breaking Badly')
+        for file_name, title, _ in self.rows:
+            self.assertEqual(index.best(title_from_filename(file_name))[0], title, file_name)
+        self.assertIsNone(index.best('zzzz qqqq'))
+
+
+if __name__ == '__main__':
+    unittest.main()